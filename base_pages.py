@@ -0,0 +1,462 @@
+#!/usr/bin/env python3
+"""
+Script to factor literals shared by several pages into a base page.
+
+Pages that load the same CSS links and JS libraries each carry their own copy.
+Page Builder can render one page inside another through ``extendsPage``: the
+base page's components come first, then the page's own. This finds what
+pages share at their top (before their first block or form) and moves it
+into a generated base page that they extend:
+
+* whole literals with identical values, as long as every literal before them
+  moves too, so nothing shown on the page changes place,
+* ``<script src>`` and ``<link rel="stylesheet">`` tags inside those
+  literals, as long as every script (or stylesheet and ``<style>`` block)
+  before them moves too, so scripts still run, and stylesheets still
+  cascade, in the same order. Tags inside comments are left alone.
+
+The fragments shared by at least ``--min-pages`` pages are grouped into the
+set that saves the most bytes. Every page in the group must contain all of
+them in the same order, so no page gains anything it did not load before.
+Pages that already extend a page are skipped.
+
+``factor`` writes ``pages.<base>.json`` next to the first page, removes the
+fragments from the dependent pages and points their ``extendsPage`` at the
+base. Pages with extracted literals must be in sync first; they are
+re-extracted afterwards, with the base page, so ``check`` and ``rebuild``
+keep working. With ``--out`` the base and rewritten pages are written there
+instead and the sources are left alone.
+
+Usage:
+    python base_pages.py analyze [file_pattern]  # Report shared fragments
+    python base_pages.py factor [file_pattern]   # Create the base page
+
+Options:
+    --base=<name>      constantName of the base page (default: base)
+    --min-pages=<n>    Pages a fragment must be shared by (default: 2)
+    --out=<dir>        Write the base and rewritten pages here instead of
+                       over the sources
+    --roots=<dirs>     Comma-separated directories to search for pages (default:
+                       everything not ignored by .gitignore/.pagebuilderignore)
+"""
+
+import copy
+import hashlib
+import json
+import sys
+from collections import Counter
+from pathlib import Path
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Set, Tuple
+
+from content_sniffer import scan_markup
+from discovery import DEFAULT_PATTERN, parse_roots
+from extract_literals import (
+    compare_extracted_literals,
+    extract_literals_from_json,
+    find_page_files,
+    parse_options,
+)
+from inheritance import extends_page
+from manifest import compact_manifest
+from resource_optimizer import SCRIPT_OR_LINK_RE, parse_attributes
+from storage import DiskStorage
+
+DEFAULT_BASE_NAME = "base"
+DEFAULT_MIN_PAGES = 2
+EXTRACTED_DIR = "extracted_literals"
+
+# Components that render nothing, so they don't end a page's leading literals
+NON_VISUAL_TYPES = {"resource", "data"}
+
+# Name of the base page literal holding the shared tags
+SHARED_TAGS_NAME = "shared_resources"
+
+
+class Fragment(NamedTuple):
+    # literal, script or style
+    kind: str
+    # The same on every page that shares the fragment
+    key: str
+    # A component name or tag URL, for reports
+    label: str
+    component: Dict[str, Any]
+    start: int
+    end: int
+
+    @property
+    def text(self) -> str:
+        return str(self.component["value"][self.start : self.end])
+
+
+class LeadingLiteral(NamedTuple):
+    whole: Fragment
+    # Scripts and stylesheets in document order; None for ones that can't move
+    resources: List[Tuple[str, Optional[Fragment]]]
+
+
+class BasePlan(NamedTuple):
+    name: str
+    # Fragment keys in the order the base page holds them
+    keys: List[str]
+    pages: List[str]
+
+
+def page_bytes(data: Dict[str, Any]) -> int:
+    """Return the size of a page as rebuild writes it."""
+    return len(json.dumps(data, indent=3, ensure_ascii=False).encode())
+
+
+def fragment_key(kind: str, text: str) -> str:
+    if kind != "literal":
+        text = " ".join(text.split())
+    return f"{kind}:{hashlib.md5(text.encode()).hexdigest()}"
+
+
+def scan_literal(component: Dict[str, Any]) -> LeadingLiteral:
+    """Return a literal as a whole fragment plus its scripts and stylesheets."""
+    value = component.get("value", "")
+
+    def fragment(kind: str, label: str, start: int, end: int) -> Fragment:
+        key = fragment_key(kind, value[start:end])
+        return Fragment(kind, key, label, component, start, end)
+
+    whole = fragment("literal", component.get("name", ""), 0, len(value))
+    resources: List[Tuple[str, Optional[Fragment]]] = []
+    for item in scan_markup(value):
+        if item.kind in ("script", "style"):
+            resources.append((item.kind, None))
+            continue
+        if item.kind != "markup":
+            continue
+        for match in SCRIPT_OR_LINK_RE.finditer(value, item.start, item.end):
+            tag = match.group(1).lower()
+            attributes = parse_attributes(match.group(2))
+            if tag == "script":
+                # An external script (or a template) is the whole item
+                url = attributes.get("src")
+                if url:
+                    resources.append(
+                        ("script", fragment("script", url, match.start(), item.end))
+                    )
+                break
+            rel = (attributes.get("rel") or "").lower().split()
+            url = attributes.get("href")
+            if "stylesheet" in rel and url:
+                resources.append(
+                    ("style", fragment("style", url, match.start(), match.end()))
+                )
+    return LeadingLiteral(whole, resources)
+
+
+def leading_literals(data: Dict[str, Any]) -> List[LeadingLiteral]:
+    """Return the literals before a page's first block, form or other widget."""
+    literals = []
+    for component in data.get("modelView", {}).get("components", []):
+        component_type = component.get("type")
+        if component_type in NON_VISUAL_TYPES:
+            continue
+        if component_type != "literal":
+            break
+        if component.get("value", "").strip():
+            literals.append(scan_literal(component))
+    return literals
+
+
+def movable_fragments(literals: List[LeadingLiteral], keys: Set[str]) -> List[Fragment]:
+    """Return the fragments with one of ``keys`` that can move to a base page."""
+    moved: List[Fragment] = []
+    whole_literals = True
+    blocked = {"script": False, "style": False}
+    for literal in literals:
+        if whole_literals and literal.whole.key in keys:
+            moved.append(literal.whole)
+            continue
+        whole_literals = False
+        for kind, fragment in literal.resources:
+            if fragment is not None and fragment.key in keys and not blocked[kind]:
+                moved.append(fragment)
+            else:
+                blocked[kind] = True
+    return moved
+
+
+def moved_keys(literals: List[LeadingLiteral], keys: Set[str]) -> List[str]:
+    return [fragment.key for fragment in movable_fragments(literals, keys)]
+
+
+def shared_keys(
+    first: List[LeadingLiteral], second: List[LeadingLiteral], keys: Set[str]
+) -> Set[str]:
+    """Return the keys both pages can move when only those keys move."""
+    shared = set(moved_keys(first, keys)) & set(moved_keys(second, keys))
+    # Leaving a fragment in place can stop later ones moving, so repeat
+    while shared:
+        narrowed = (
+            shared & set(moved_keys(first, shared)) & set(moved_keys(second, shared))
+        )
+        if narrowed == shared:
+            break
+        shared = narrowed
+    return shared
+
+
+def plan_base(
+    pages: Dict[str, List[LeadingLiteral]],
+    name: str = DEFAULT_BASE_NAME,
+    min_pages: int = DEFAULT_MIN_PAGES,
+) -> Optional[BasePlan]:
+    """Choose the shared fragments and pages that save the most bytes."""
+    names = sorted(pages)
+    counts = Counter(
+        key
+        for literals in pages.values()
+        for key in {
+            fragment.key
+            for literal in literals
+            for fragment in [literal.whole]
+            + [f for _, f in literal.resources if f is not None]
+        }
+    )
+    frequent = {key for key, count in counts.items() if count >= min_pages}
+
+    candidates = set()
+    for i, first in enumerate(names):
+        for second in names[i + 1 :]:
+            keys = shared_keys(pages[first], pages[second], frequent)
+            if keys:
+                candidates.add(frozenset(keys))
+
+    best: Optional[Tuple[int, int, BasePlan]] = None
+    for candidate in candidates:
+        keys = set(candidate)
+        group = [n for n in names if set(moved_keys(pages[n], keys)) == keys]
+        if not group:
+            continue
+        fragments = movable_fragments(pages[group[0]], keys)
+        order = [fragment.key for fragment in fragments]
+        group = [n for n in group if moved_keys(pages[n], keys) == order]
+        if len(group) < min_pages:
+            continue
+        size = sum(len(fragment.text.encode()) for fragment in fragments)
+        saved = size * (len(group) - 1)
+        plan = BasePlan(name, order, group)
+        if best is None or (saved, len(group)) > best[:2]:
+            best = (saved, len(group), plan)
+    return best[2] if best else None
+
+
+def remove_fragments(data: Dict[str, Any], fragments: List[Fragment]) -> None:
+    """Remove fragments from a page, dropping literals left empty."""
+    removed = {id(f.component) for f in fragments if f.kind == "literal"}
+    by_component: Dict[int, List[Fragment]] = {}
+    for fragment in fragments:
+        if fragment.kind != "literal":
+            by_component.setdefault(id(fragment.component), []).append(fragment)
+
+    for component_fragments in by_component.values():
+        component = component_fragments[0].component
+        value = component["value"]
+        for fragment in sorted(component_fragments, key=lambda f: -f.start):
+            start = fragment.start
+            end = fragment.end
+            while end < len(value) and value[end].isspace():
+                end += 1
+            if end == len(value):
+                start = len(value[:start].rstrip())
+            value = value[:start] + value[end:]
+        component["value"] = value
+        if not value.strip():
+            removed.add(id(component))
+
+    model_view = data["modelView"]
+    model_view["components"] = [
+        c for c in model_view["components"] if id(c) not in removed
+    ]
+
+
+def base_page(plan: BasePlan, fragments: List[Fragment]) -> Dict[str, Any]:
+    """Return a page holding the fragments, in the shape Page Builder exports."""
+    components = []
+    tags = []
+    for fragment in fragments:
+        if fragment.kind == "literal":
+            components.append(copy.deepcopy(fragment.component))
+        else:
+            tags.append(fragment.text)
+    if tags:
+        components.append(
+            {"name": SHARED_TAGS_NAME, "type": "literal", "value": "\n".join(tags)}
+        )
+    return {
+        "constantName": plan.name,
+        "developerSecurity": [],
+        "extendsPage": None,
+        "owner": None,
+        "pageRoles": [],
+        "modelView": {
+            "name": plan.name,
+            "style": "",
+            "label": "",
+            "type": "page",
+            "title": "",
+            "components": components,
+        },
+    }
+
+
+def make_base_page_transform(plan: BasePlan) -> Callable[[Dict[str, Any]], None]:
+    """Return a transform that makes a dependent page extend the base page."""
+
+    def transform(data: Dict[str, Any]) -> None:
+        name = data.get("constantName")
+        if name not in plan.pages:
+            return
+        fragments = movable_fragments(leading_literals(data), set(plan.keys))
+        if [fragment.key for fragment in fragments] != plan.keys:
+            raise ValueError(f"{name} no longer has the fragments of {plan.name}")
+        remove_fragments(data, fragments)
+        data["extendsPage"] = {"constantName": plan.name}
+
+    return transform
+
+
+def factor_pages(
+    pages: Dict[str, Dict[str, Any]], plan: BasePlan
+) -> Tuple[Dict[str, Any], Dict[str, Dict[str, Any]]]:
+    """Return the base page and rewritten copies of the dependent pages."""
+    first = pages[plan.pages[0]]
+    base = base_page(plan, movable_fragments(leading_literals(first), set(plan.keys)))
+    transform = make_base_page_transform(plan)
+    rewritten = {}
+    for name in plan.pages:
+        data = copy.deepcopy(pages[name])
+        transform(data)
+        rewritten[name] = data
+    return base, rewritten
+
+
+def print_plan(
+    plan: BasePlan,
+    pages: Dict[str, Dict[str, Any]],
+    literals: Dict[str, List[LeadingLiteral]],
+) -> Tuple[Dict[str, Any], Dict[str, Dict[str, Any]]]:
+    """Print the fragments and per-page reduction of a plan."""
+    fragments = movable_fragments(literals[plan.pages[0]], set(plan.keys))
+    print(f"Shared by {len(plan.pages)} pages: {', '.join(plan.pages)}")
+    for fragment in fragments:
+        size = len(fragment.text.encode())
+        print(f"  {fragment.kind:<8} {fragment.label} ({size:,} bytes)")
+
+    base, rewritten = factor_pages(pages, plan)
+    total_saved = 0
+    print()
+    for name in plan.pages:
+        before = page_bytes(pages[name])
+        after = page_bytes(rewritten[name])
+        saved = before - after
+        total_saved += saved
+        print(
+            f"{name}: {before:,} -> {after:,} bytes "
+            f"({saved:,} saved, {saved / max(before, 1):.0%})"
+        )
+    base_size = page_bytes(base)
+    print(
+        f"{plan.name} (base page): {base_size:,} bytes, "
+        f"{total_saved - base_size:,} bytes saved in total"
+    )
+    return base, rewritten
+
+
+def write_json(storage: DiskStorage, path: Path, data: Dict[str, Any]) -> None:
+    storage.mkdir(path.parent)
+    storage.write_text(path, json.dumps(data, indent=3, ensure_ascii=False))
+
+
+def main():
+    args, options = parse_options(sys.argv[1:])
+    if not args:
+        print(__doc__)
+        sys.exit(1)
+
+    command = args[0]
+    pattern = args[1] if len(args) > 1 else DEFAULT_PATTERN
+
+    if command not in ("analyze", "factor"):
+        print(f"Unknown command: {command}")
+        print(__doc__)
+        sys.exit(1)
+
+    base_name = options.get("base", DEFAULT_BASE_NAME)
+    min_pages = int(options.get("min-pages", DEFAULT_MIN_PAGES))
+
+    json_files = find_page_files(pattern, roots=parse_roots(options.get("roots")))
+    if not json_files:
+        print(f"No page JSON files found matching pattern: {pattern}")
+        sys.exit(1)
+
+    pages: Dict[str, Dict[str, Any]] = {}
+    sources: Dict[str, str] = {}
+    for json_file in json_files:
+        with open(json_file, encoding="utf-8") as f:
+            data = json.load(f)
+        name = data.get("constantName") or Path(json_file).stem
+        if name == base_name:
+            print(f"❌ A page named {base_name} already exists: {json_file}")
+            sys.exit(1)
+        if extends_page(data):
+            print(f"Skipping {name}: already extends {extends_page(data)}")
+            continue
+        pages[name] = data
+        sources[name] = json_file
+
+    literals = {name: leading_literals(data) for name, data in pages.items()}
+    plan = plan_base(literals, base_name, min_pages)
+    if plan is None:
+        print(f"✅ No literals or tags shared by {min_pages}+ of {len(pages)} pages")
+        return
+
+    base, rewritten = print_plan(plan, pages, literals)
+    if command == "analyze":
+        print(f"\nRun 'python base_pages.py factor --base={base_name}' to apply.")
+        return
+
+    storage = DiskStorage()
+    out_dir = options.get("out")
+    if out_dir:
+        base_file = Path(out_dir) / f"pages.{base_name}.json"
+        write_json(storage, base_file, base)
+        for name in plan.pages:
+            write_json(
+                storage, Path(out_dir) / Path(sources[name]).name, rewritten[name]
+            )
+        print(f"\n✅ Wrote {base_file} and {len(plan.pages)} page(s) to {out_dir}")
+        return
+
+    # Re-extracting would overwrite edits that haven't been rebuilt yet
+    extracted = [name for name in plan.pages if (Path(EXTRACTED_DIR) / name).is_dir()]
+    for name in extracted:
+        statuses = compare_extracted_literals(str(Path(EXTRACTED_DIR) / name))
+        if any(status.status != "in-sync" for status in statuses):
+            print(f"\n❌ {name} has extracted literals out of sync with its JSON.")
+            print("   Run 'python extract_literals.py rebuild' or 'extract' first.")
+            sys.exit(1)
+
+    base_file = Path(sources[plan.pages[0]]).parent / f"pages.{base_name}.json"
+    write_json(storage, base_file, base)
+    print(f"\nWrote base page: {base_file}")
+    for name in plan.pages:
+        write_json(storage, Path(sources[name]), rewritten[name])
+        print(f"Rewrote: {sources[name]}")
+
+    if extracted:
+        print()
+        for json_file in [str(base_file)] + [sources[name] for name in extracted]:
+            # Also removes the files of literals that moved to the base page
+            extract_literals_from_json(json_file, EXTRACTED_DIR, storage)
+        compact_manifest(storage)
+
+    print(f"\n✅ {len(plan.pages)} page(s) now extend {base_name}")
+
+
+if __name__ == "__main__":
+    main()
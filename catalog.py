@@ -0,0 +1,431 @@
+#!/usr/bin/env python3
+"""
+Script to load every page and virtual domain into a queryable SQLite catalog.
+
+Pages, their components (at any depth), literals, ``pageRoles`` entries,
+virtual domains, their SQL blocks and ``virtualDomainRoles`` entries each get
+a normalized, indexed table, so cross-cutting questions are a single SQL
+query instead of a new Python walk:
+
+    -- Select components loaded with the page whose domain allows PUT
+    SELECT p.constant_name, c.path, c.name, c.domain
+    FROM components c
+    JOIN pages p ON p.id = c.page_id
+    JOIN domains d ON d.service_name = c.domain
+    JOIN domain_roles r ON r.domain_id = d.id
+    WHERE c.type = 'select' AND c.load_initially AND r.allow_put
+    GROUP BY c.id
+
+    -- Largest literals
+    SELECT p.constant_name, c.name, l.kind, l.size
+    FROM literals l JOIN components c ON c.id = l.component_id
+    JOIN pages p ON p.id = c.page_id ORDER BY l.size DESC LIMIT 10
+
+Tables (``sqlite3 .pagebuilder_cache/catalog.db .schema`` shows all columns):
+
+    files         path, mtime_ns, size, hash (one row per scanned JSON file)
+    pages         constant_name, extends_page, owner, title, page_url, ...
+    page_roles    page_id, role_name, allow
+    components    page_id, parent_id, path, depth, type, name, model,
+                  source_model, resource, domain, load_initially,
+                  show_initially, page_size, properties (the other keys, JSON)
+    literals      component_id, size (bytes), hash (MD5), kind, value
+    domains       service_name, type_of_code, owner, file_timestamp
+    domain_sql    domain_id, field (codeGet, ...), size, hash, sql
+    domain_roles  domain_id, role_name, allow_get, allow_post, allow_put,
+                  allow_delete
+
+``components.domain`` is the virtual domain a component reads: its own for
+``resource`` components, and its ``model``/``sourceModel`` resource's for
+loaders. Flags are 1/0, or NULL when the key is absent.
+
+The catalog is updated incrementally like the search index: files whose size
+and modification time are unchanged are skipped, files whose content hash is
+unchanged are only re-stat'ed, and a changed file's rows are replaced.
+
+Usage:
+    python catalog.py catalog [file_pattern]  # Build or update the catalog
+    python catalog.py query "<sql>"           # Run a query against the catalog
+
+Options:
+    --catalog=<file>  Catalog location (default: .pagebuilder_cache/catalog.db)
+    --roots=<dirs>    Comma-separated directories to catalog (default: everything
+                      not ignored by .gitignore/.pagebuilderignore)
+    --no-update       Query the catalog as is instead of refreshing it first
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+from content_sniffer import classify_literal
+from discovery import DEFAULT_PATTERN, find_json_files, parse_roots
+from extract_literals import is_page_definition, iter_components, parse_options
+from extract_virtual_domains import SQL_FIELDS, is_virtual_domain
+from file_cache import FILES_SCHEMA, open_cache, update_files
+from load_analyzer import page_size, resource_domain
+
+DEFAULT_CATALOG_FILE = os.path.join(".pagebuilder_cache", "catalog.db")
+SCHEMA_VERSION = 1
+
+# Children first, so they can be dropped in order
+TABLES = [
+    "domain_roles",
+    "domain_sql",
+    "domains",
+    "literals",
+    "components",
+    "page_roles",
+    "pages",
+    "files",
+]
+
+# Component keys with their own column; the rest go in ``properties``
+COMPONENT_COLUMNS = {
+    "components",
+    "value",
+    "type",
+    "name",
+    "model",
+    "sourceModel",
+    "resource",
+    "loadInitially",
+    "showInitially",
+    "pageSize",
+}
+
+SCHEMA = """
+CREATE TABLE pages (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL REFERENCES files(path) ON DELETE CASCADE,
+    constant_name TEXT,
+    extends_page TEXT,
+    owner TEXT,
+    title TEXT,
+    page_url TEXT,
+    style TEXT,
+    import_css TEXT,
+    file_timestamp TEXT
+);
+CREATE TABLE page_roles (
+    page_id INTEGER NOT NULL REFERENCES pages(id) ON DELETE CASCADE,
+    role_name TEXT,
+    allow INTEGER
+);
+CREATE TABLE components (
+    id INTEGER PRIMARY KEY,
+    page_id INTEGER NOT NULL REFERENCES pages(id) ON DELETE CASCADE,
+    parent_id INTEGER REFERENCES components(id) ON DELETE CASCADE,
+    path TEXT NOT NULL,
+    depth INTEGER NOT NULL,
+    type TEXT,
+    name TEXT,
+    model TEXT,
+    source_model TEXT,
+    resource TEXT,
+    domain TEXT,
+    load_initially INTEGER,
+    show_initially INTEGER,
+    page_size INTEGER,
+    properties TEXT NOT NULL
+);
+CREATE TABLE literals (
+    component_id INTEGER PRIMARY KEY REFERENCES components(id) ON DELETE CASCADE,
+    size INTEGER NOT NULL,
+    hash TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    value TEXT NOT NULL
+);
+CREATE TABLE domains (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL REFERENCES files(path) ON DELETE CASCADE,
+    service_name TEXT,
+    type_of_code TEXT,
+    owner TEXT,
+    file_timestamp TEXT
+);
+CREATE TABLE domain_sql (
+    domain_id INTEGER NOT NULL REFERENCES domains(id) ON DELETE CASCADE,
+    field TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    hash TEXT NOT NULL,
+    sql TEXT NOT NULL
+);
+CREATE TABLE domain_roles (
+    domain_id INTEGER NOT NULL REFERENCES domains(id) ON DELETE CASCADE,
+    role_name TEXT,
+    allow_get INTEGER,
+    allow_post INTEGER,
+    allow_put INTEGER,
+    allow_delete INTEGER
+);
+CREATE INDEX pages_path ON pages (path);
+CREATE INDEX pages_constant_name ON pages (constant_name);
+CREATE INDEX page_roles_page ON page_roles (page_id);
+CREATE INDEX page_roles_role ON page_roles (role_name);
+CREATE INDEX components_page ON components (page_id);
+CREATE INDEX components_parent ON components (parent_id);
+CREATE INDEX components_type ON components (type, name);
+CREATE INDEX components_domain ON components (domain);
+CREATE INDEX literals_hash ON literals (hash);
+CREATE INDEX domains_path ON domains (path);
+CREATE INDEX domains_service_name ON domains (service_name);
+CREATE INDEX domain_sql_domain ON domain_sql (domain_id, field);
+CREATE INDEX domain_roles_domain ON domain_roles (domain_id);
+CREATE INDEX domain_roles_role ON domain_roles (role_name);
+"""
+
+
+def open_catalog(catalog_file: str) -> sqlite3.Connection:
+    """Open the catalog, (re)creating it if it is missing or from another version."""
+    conn = open_cache(catalog_file, FILES_SCHEMA + SCHEMA, SCHEMA_VERSION, TABLES)
+    # Deleting a file's row removes everything loaded from it
+    conn.execute("PRAGMA foreign_keys = ON")
+    return conn
+
+
+def flag(value: Any) -> Optional[int]:
+    """Store a JSON flag as 1/0 (NULL if absent)."""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        return int(value.lower() == "true")
+    return int(bool(value))
+
+
+def text(value: Any) -> Optional[str]:
+    """Store a scalar as text; lists and objects as JSON."""
+    if value is None or isinstance(value, str):
+        return value
+    return json.dumps(value)
+
+
+def add_page(conn: sqlite3.Connection, path: str, data: Dict[str, Any]) -> None:
+    """Catalog a page, its roles, components and literals."""
+    model_view = data.get("modelView") or {}
+    cursor = conn.execute(
+        "INSERT INTO pages (path, constant_name, extends_page, owner, title, "
+        "page_url, style, import_css, file_timestamp) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (
+            path,
+            text(data.get("constantName")),
+            text(data.get("extendsPage")),
+            text(data.get("owner")),
+            text(model_view.get("title")),
+            text(model_view.get("pageURL")),
+            text(model_view.get("style")),
+            text(model_view.get("importCSS")),
+            text(data.get("fileTimestamp")),
+        ),
+    )
+    page_id = cursor.lastrowid
+
+    roles = data.get("pageRoles")
+    conn.executemany(
+        "INSERT INTO page_roles (page_id, role_name, allow) VALUES (?, ?, ?)",
+        [
+            (page_id, text(role.get("roleName")), flag(role.get("allow")))
+            for role in (roles if isinstance(roles, list) else [])
+            if isinstance(role, dict)
+        ],
+    )
+
+    components = model_view.get("components") or []
+    resources = {
+        component.get("name", ""): component
+        for _, component in iter_components(components)
+        if component.get("type") == "resource"
+    }
+    component_ids: Dict[str, Optional[int]] = {}
+    for component_path, component in iter_components(components):
+        parent_path, _, _ = component_path.rpartition(".components.")
+        model = component.get("model") or component.get("sourceModel")
+        if component.get("type") == "resource":
+            domain = resource_domain(component)
+        else:
+            domain = resource_domain(resources.get(model)) if model else None
+        properties = {
+            key: value
+            for key, value in component.items()
+            if key not in COMPONENT_COLUMNS
+        }
+        cursor = conn.execute(
+            "INSERT INTO components (page_id, parent_id, path, depth, type, name, "
+            "model, source_model, resource, domain, load_initially, "
+            "show_initially, page_size, properties) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                page_id,
+                component_ids.get(parent_path),
+                component_path,
+                component_path.count(".components."),
+                text(component.get("type")),
+                text(component.get("name")),
+                text(component.get("model")),
+                text(component.get("sourceModel")),
+                text(component.get("resource")),
+                domain,
+                flag(component.get("loadInitially")),
+                flag(component.get("showInitially")),
+                page_size(component) or None,
+                json.dumps(properties),
+            ),
+        )
+        component_id = cursor.lastrowid
+        component_ids[component_path] = component_id
+
+        value = component.get("value")
+        if component.get("type") == "literal" and isinstance(value, str):
+            encoded = value.encode()
+            conn.execute(
+                "INSERT INTO literals (component_id, size, hash, kind, value) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (
+                    component_id,
+                    len(encoded),
+                    hashlib.md5(encoded).hexdigest(),
+                    classify_literal(value, component.get("name", "")).kind,
+                    value,
+                ),
+            )
+
+
+def add_domain(conn: sqlite3.Connection, path: str, data: Dict[str, Any]) -> None:
+    """Catalog a virtual domain, its SQL blocks and roles."""
+    cursor = conn.execute(
+        "INSERT INTO domains (path, service_name, type_of_code, owner, "
+        "file_timestamp) VALUES (?, ?, ?, ?, ?)",
+        (
+            path,
+            text(data.get("serviceName")),
+            text(data.get("typeOfCode")),
+            text(data.get("owner")),
+            text(data.get("fileTimestamp")),
+        ),
+    )
+    domain_id = cursor.lastrowid
+
+    blocks = []
+    for field in SQL_FIELDS:
+        sql = data.get(field)
+        if isinstance(sql, str) and sql:
+            encoded = sql.encode()
+            blocks.append(
+                (domain_id, field, len(encoded), hashlib.md5(encoded).hexdigest(), sql)
+            )
+    conn.executemany(
+        "INSERT INTO domain_sql (domain_id, field, size, hash, sql) "
+        "VALUES (?, ?, ?, ?, ?)",
+        blocks,
+    )
+
+    roles = data.get("virtualDomainRoles")
+    conn.executemany(
+        "INSERT INTO domain_roles (domain_id, role_name, allow_get, allow_post, "
+        "allow_put, allow_delete) VALUES (?, ?, ?, ?, ?, ?)",
+        [
+            (
+                domain_id,
+                text(role.get("roleName")),
+                flag(role.get("allowGet")),
+                flag(role.get("allowPost")),
+                flag(role.get("allowPut")),
+                flag(role.get("allowDelete")),
+            )
+            for role in (roles if isinstance(roles, list) else [])
+            if isinstance(role, dict)
+        ],
+    )
+
+
+def add_file(conn: sqlite3.Connection, path: str, content: str) -> None:
+    """Catalog one file's page or virtual domain, if it is either."""
+    try:
+        data = json.loads(content)
+    except json.JSONDecodeError:
+        return
+    if is_page_definition(data):
+        add_page(conn, path, data)
+    elif is_virtual_domain(data):
+        add_domain(conn, path, data)
+
+
+def update_catalog(conn: sqlite3.Connection, file_paths: List[str]) -> Dict[str, int]:
+    """Bring the catalog up to date with ``file_paths`` (see ``update_files``).
+
+    Deleting a file's ``files`` row cascades to everything loaded from it, so
+    no separate removal is needed.
+    """
+    return update_files(conn, file_paths, add_file)
+
+
+def format_cell(value: Any) -> str:
+    if value is None:
+        return "NULL"
+    return str(value).replace("\n", "\\n")[:80]
+
+
+def main():
+    positionals, options = parse_options(sys.argv[1:])
+    if not positionals:
+        print(__doc__)
+        sys.exit(1)
+
+    command = positionals[0]
+    catalog_file = options.get("catalog", DEFAULT_CATALOG_FILE)
+    roots = parse_roots(options.get("roots"))
+
+    if command == "catalog":
+        pattern = positionals[1] if len(positionals) > 1 else DEFAULT_PATTERN
+        conn = open_catalog(catalog_file)
+        counts = update_catalog(conn, find_json_files(pattern, roots=roots))
+        pages, domains = conn.execute(
+            "SELECT (SELECT count(*) FROM pages), (SELECT count(*) FROM domains)"
+        ).fetchone()
+        conn.close()
+        print(
+            f"✅ Catalog updated ({catalog_file}): {counts['added']} added, "
+            f"{counts['updated']} updated, {counts['removed']} removed, "
+            f"{counts['unchanged']} unchanged; {pages} page(s), "
+            f"{domains} virtual domain(s)"
+        )
+
+    elif command == "query":
+        if len(positionals) != 2:
+            print(__doc__)
+            sys.exit(1)
+
+        conn = open_catalog(catalog_file)
+        if "no-update" not in options:
+            update_catalog(conn, find_json_files(roots=roots))
+
+        start = time.perf_counter()
+        try:
+            cursor = conn.execute(positionals[1])
+            rows = cursor.fetchall()
+        except sqlite3.Error as e:
+            print(f"❌ Query failed: {e}")
+            sys.exit(1)
+        finally:
+            conn.close()
+        elapsed = (time.perf_counter() - start) * 1000
+
+        if cursor.description:
+            print("\t".join(column[0] for column in cursor.description))
+        for row in rows:
+            print("\t".join(format_cell(value) for value in row))
+        print(f"\n✅ {len(rows)} row(s) in {elapsed:.1f} ms")
+
+    else:
+        print(f"Unknown command: {command}")
+        print(__doc__)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,487 @@
+#!/usr/bin/env python3
+"""
+Script to classify page literals as HTML, JavaScript, CSS or mixed content.
+
+Only the first ``--limit`` characters of a literal are scanned (64 KiB by
+default), with a small tokenizer rather than lowercased copies and substring
+searches:
+
+    html   Markup, including ``<link>`` and ``<script src>`` tags
+    js     A bare script, or markup that is nothing but inline ``<script>``
+           blocks (``<script>...</script>``)
+    css    Bare CSS, or nothing but ``<style>`` blocks
+    mixed  Markup with inline ``<script>`` or ``<style>`` bodies, or both
+    text   Neither markup nor code; the literal's name decides (``js``,
+           ``script`` -> js, ``css``, ``style`` -> css), otherwise html
+
+Mixed literals can be split into a markup skeleton (the literal with every
+inline script and style body removed) plus one file per body; joining them
+back gives the original literal byte for byte. ``extract_literals.py extract
+--split-mixed`` uses this.
+
+Usage:
+    python content_sniffer.py classify [file_pattern]  # Show how literals classify
+    python content_sniffer.py bench                    # Benchmark on large literals
+
+Options:
+    --limit=<n>    Characters scanned per literal (default: 65536)
+    --size=<mb>    Size of the generated benchmark literals (default: 8)
+    --roots=<dirs> Comma-separated directories to search for pages
+"""
+
+import json
+import re
+import sys
+import time
+from typing import Callable, Iterator, List, NamedTuple, Optional, Tuple
+
+from discovery import DEFAULT_PATTERN, parse_roots
+
+SNIFF_LIMIT = 64 * 1024
+
+KIND_EXTENSIONS = {
+    "html": ".html",
+    "js": ".js",
+    "css": ".css",
+    "mixed": ".html",
+    "text": ".html",
+}
+BODY_EXTENSIONS = {"script": ".js", "style": ".css"}
+
+NAME_HINTS = {
+    "js": "js",
+    "javascript": "js",
+    "script": "js",
+    "scripts": "js",
+    "css": "css",
+    "style": "css",
+    "styles": "css",
+}
+
+SCRIPT_TYPE_RE = re.compile(r"""\btype\s*=\s*["']?([^"'\s>]+)""", re.I)
+SCRIPT_SRC_RE = re.compile(r"\bsrc\s*=", re.I)
+
+JS_SCRIPT_TYPES = {
+    "text/javascript",
+    "application/javascript",
+    "module",
+    "text/ecmascript",
+    "application/ecmascript",
+}
+
+# Words that start JavaScript statements but are never CSS selectors
+JS_KEYWORDS = {
+    "return",
+    "function",
+    "var",
+    "let",
+    "const",
+    "if",
+    "else",
+    "for",
+    "while",
+    "do",
+    "try",
+    "catch",
+    "switch",
+    "new",
+    "typeof",
+}
+
+NESTED_AT_RULES = {"@media", "@supports", "@container", "@layer", "@document"}
+
+# Complete CSS rules after which a literal is taken to be CSS
+CSS_RULES_NEEDED = 8
+
+TAG_RE = re.compile(r"</?[A-Za-z][\w:-]*[\s/>]")
+BLOCK_RE = re.compile(r"<!--|<(script|style)(?![\w:-])", re.I)
+TAG_ATTRIBUTES_RE = re.compile(r"""(?:[^>"']|"[^"]*"|'[^']*')*>?""")
+CLOSE_TAG_RE = {
+    "script": re.compile(r"</script", re.I),
+    "style": re.compile(r"</style", re.I),
+}
+CLOSE_TAG_END_RE = re.compile(r"[^>]*>?")
+NON_SPACE_RE = re.compile(r"\S")
+NAME_WORD_RE = re.compile(r"[a-z]+")
+
+CSS_TOKEN_RE = re.compile(
+    r"""\s+|/\*.*?(?:\*/|\Z)|"(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*'|[{};:()]|[^\s{};:()"'/]+|/""",
+    re.S,
+)
+CSS_PROPERTY_RE = re.compile(r"\*?-{0,2}[A-Za-z][\w-]*\Z")
+
+JS_SIGNAL_RE = re.compile(
+    r"(?P<keyword>\b(?:function|var|let|const|typeof|return)\b)"
+    r"|(?P<operator>=>|[!=]==?|(?<![<>!=])=(?!=))"
+    r"|(?P<call>[\w$\])]\()"
+    r"|(?P<member>[\w$\])]\.[A-Za-z_$])"
+    r"|(?P<statement>;)"
+)
+
+
+class MarkupItem(NamedTuple):
+    # markup, comment, script or style
+    kind: str
+    start: int
+    end: int
+    body_start: int
+    body_end: int
+
+
+class Classification(NamedTuple):
+    kind: str
+    extension: str
+    inline_scripts: int
+    inline_styles: int
+
+    @property
+    def has_script(self) -> bool:
+        return self.kind == "js" or self.inline_scripts > 0
+
+
+def is_inline_script(attributes: str) -> bool:
+    """Return True for an executable inline script (no src, JavaScript type)."""
+    if SCRIPT_SRC_RE.search(attributes):
+        return False
+    type_match = SCRIPT_TYPE_RE.search(attributes)
+    return type_match is None or type_match.group(1).lower() in JS_SCRIPT_TYPES
+
+
+def scan_markup(
+    content: str, start: int = 0, end: Optional[int] = None
+) -> Iterator[MarkupItem]:
+    """Yield the markup, comments and inline script/style blocks of HTML.
+
+    Only ``<script``, ``<style`` and ``<!--`` are looked for; everything
+    between them that isn't whitespace is yielded as one ``markup`` item.
+    Script and style bodies are raw text up to their closing tag (or ``end``),
+    so markup inside JavaScript strings is not mistaken for tags.
+    """
+    end = len(content) if end is None else end
+    pos = start
+    while pos < end:
+        match = BLOCK_RE.search(content, pos, end)
+        block_start = match.start() if match else end
+        if NON_SPACE_RE.search(content, pos, block_start):
+            yield MarkupItem("markup", pos, block_start, pos, pos)
+        if not match:
+            return
+
+        if match.group() == "<!--":
+            close = content.find("-->", match.end(), end)
+            pos = end if close < 0 else close + 3
+            yield MarkupItem("comment", block_start, pos, pos, pos)
+            continue
+
+        name = match.group(1).lower()
+        # The pattern can match nothing, so there is always a match
+        attributes = TAG_ATTRIBUTES_RE.match(content, match.end(), end)
+        body_start = attributes.end() if attributes else match.end()
+        close_match = CLOSE_TAG_RE[name].search(content, body_start, end)
+        body_end = close_match.start() if close_match else end
+        close_end = CLOSE_TAG_END_RE.match(content, body_end, end)
+        pos = close_end.end() if close_match and close_end else end
+
+        # External and non-JavaScript scripts are plain markup
+        attribute_text = content[match.end() : body_start]
+        if name == "script" and not is_inline_script(attribute_text):
+            yield MarkupItem("markup", block_start, pos, body_start, body_end)
+        else:
+            yield MarkupItem(name, block_start, pos, body_start, body_end)
+
+
+def looks_like_css(content: str, start: int, end: int) -> bool:
+    """Return True if the scanned range parses as a sequence of CSS rules."""
+    # Each open block is True for nested rules (@media) or False for declarations
+    blocks: List[bool] = []
+    prelude: List[str] = []
+    property_seen = colon_seen = False
+    rules = 0
+    for match in CSS_TOKEN_RE.finditer(content, start, end):
+        token = match.group()
+        if token[0].isspace() or token.startswith("/*"):
+            continue
+        in_declarations = bool(blocks) and not blocks[-1]
+
+        if token == "}":
+            if not blocks or (prelude and not in_declarations):
+                return False
+            if in_declarations and property_seen and not colon_seen:
+                return False
+            blocks.pop()
+            prelude, property_seen, colon_seen = [], False, False
+            if not blocks and rules >= CSS_RULES_NEEDED:
+                return True
+        elif in_declarations:
+            if token == "{":
+                return False
+            if token == ";":
+                property_seen = colon_seen = False
+            elif not property_seen:
+                if not CSS_PROPERTY_RE.match(token):
+                    return False
+                property_seen = True
+            elif not colon_seen:
+                if token != ":":
+                    return False
+                colon_seen = True
+        elif token == "{":
+            if not prelude:
+                return False
+            keyword = prelude[0].lower()
+            blocks.append(keyword in NESTED_AT_RULES or keyword.endswith("keyframes"))
+            prelude = []
+            rules += 1
+        elif token == ";":
+            # Only at-rule statements (@import, @charset) end with ";"
+            if not prelude or not prelude[0].startswith("@"):
+                return False
+            prelude = []
+        else:
+            at_rule = bool(prelude) and prelude[0].startswith("@")
+            if (
+                token == "("
+                and not at_rule
+                and not (len(prelude) >= 2 and prelude[-2] == ":")
+            ):
+                return False
+            if "=" in token and "[" not in token and not at_rule:
+                return False
+            if token in JS_KEYWORDS:
+                return False
+            prelude.append(token)
+    return rules > 0
+
+
+def looks_like_js(content: str, start: int, end: int) -> bool:
+    """Return True if the scanned range shows two or more kinds of JS syntax."""
+    kinds = set()
+    for match in JS_SIGNAL_RE.finditer(content, start, end):
+        kinds.add(match.lastgroup)
+        if len(kinds) >= 2:
+            return True
+    return False
+
+
+def name_hint(component_name: str) -> Optional[str]:
+    """Return the kind a literal's name suggests, matching whole words only."""
+    for word in NAME_WORD_RE.findall(component_name.lower()):
+        if word in NAME_HINTS:
+            return NAME_HINTS[word]
+    return None
+
+
+def classify(kind: str, scripts: int = 0, styles: int = 0) -> Classification:
+    return Classification(kind, KIND_EXTENSIONS[kind], scripts, styles)
+
+
+def classify_markup(content: str, start: int, end: int) -> Classification:
+    scripts = styles = 0
+    markup = False
+    for item in scan_markup(content, start, end):
+        if item.kind == "script":
+            scripts += 1
+        elif item.kind == "style":
+            styles += 1
+        elif item.kind != "comment":
+            markup = True
+
+    if not scripts and not styles:
+        return classify("html")
+    if markup or (scripts and styles):
+        return classify("mixed", scripts, styles)
+    return classify("js" if scripts else "css", scripts, styles)
+
+
+def classify_literal(
+    content: str, component_name: str = "", limit: int = SNIFF_LIMIT
+) -> Classification:
+    """Classify a literal from at most ``limit`` characters of its content."""
+    first = NON_SPACE_RE.search(content)
+    if first is None:
+        return classify(name_hint(component_name) or "html")
+    start = first.start()
+    end = min(len(content), start + limit)
+
+    if content.startswith("<", start):
+        return classify_markup(content, start, end)
+    if looks_like_css(content, start, end):
+        return classify("css")
+    if looks_like_js(content, start, end):
+        return classify("js")
+    if TAG_RE.search(content, start, end):
+        return classify_markup(content, start, end)
+    return classify(name_hint(component_name) or "text")
+
+
+def split_literal(content: str) -> Tuple[str, List[Tuple[str, str]]]:
+    """Split markup into a skeleton and its inline (kind, body) blocks.
+
+    The skeleton keeps every tag, with the script and style bodies cut out;
+    ``join_literal`` puts them back.
+    """
+    skeleton = []
+    bodies = []
+    pos = 0
+    for item in scan_markup(content):
+        if item.kind in BODY_EXTENSIONS:
+            skeleton.append(content[pos : item.body_start])
+            bodies.append((item.kind, content[item.body_start : item.body_end]))
+            pos = item.body_end
+    skeleton.append(content[pos:])
+    return "".join(skeleton), bodies
+
+
+def join_literal(skeleton: str, bodies: List[str]) -> str:
+    """Put inline script and style bodies back into a skeleton, in order."""
+    slots = [
+        item.body_start
+        for item in scan_markup(skeleton)
+        if item.kind in BODY_EXTENSIONS
+    ]
+    if len(slots) != len(bodies):
+        raise ValueError(
+            f"skeleton has {len(slots)} script/style block(s) but "
+            f"{len(bodies)} body file(s) were given"
+        )
+    parts = []
+    pos = 0
+    for slot, body in zip(slots, bodies):
+        parts.append(skeleton[pos:slot])
+        parts.append(body)
+        pos = slot
+    parts.append(skeleton[pos:])
+    return "".join(parts)
+
+
+def legacy_extension(content: str, component_name: str) -> str:
+    """The previous name- and substring-based extension check, for comparison."""
+    content_lower = content.lower().strip()
+    name_lower = component_name.lower()
+    if (
+        "<script" in content_lower
+        or "javascript" in content_lower
+        or any(js_name in name_lower for js_name in ["js", "script", "function"])
+    ):
+        return ".js"
+    if "<style" in content_lower or any(
+        css_name in name_lower for css_name in ["css", "style"]
+    ):
+        return ".css"
+    return ".html"
+
+
+def benchmark_literals(size: int) -> List[Tuple[str, str]]:
+    """Build (label, literal) pairs of about ``size`` characters each."""
+    markup = '<div class="row"><span id="x">Term</span><a href="#">link</a></div>\n'
+    script = "  var row = $('#term-' + i); if (row.length) { row.show(); }\n"
+    style = "  .feature-box { padding: 20px; border-radius: 8px; }\n"
+    return [
+        ("html", markup * (size // len(markup))),
+        ("script", "<script>\n" + script * (size // len(script)) + "</script>"),
+        ("css", style * (size // len(style))),
+        (
+            "mixed",
+            (markup + "<script>" + script * 50 + "</script>\n")
+            * (size // (len(markup) + len(script) * 50)),
+        ),
+    ]
+
+
+def time_per_call(
+    func: Callable[..., object], *args: object, seconds: float = 0.5
+) -> float:
+    """Return the mean seconds per ``func(*args)`` call, run for about ``seconds``."""
+    calls = 0
+    start = time.perf_counter()
+    while True:
+        func(*args)
+        calls += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= seconds:
+            return elapsed / calls
+
+
+def run_benchmark(size_mb: float, limit: int) -> None:
+    size = int(size_mb * 1024 * 1024)
+    print(f"Literals of ~{size_mb:g} MB, scanning {limit} characters\n")
+    print(
+        f"{'literal':<8}  {'legacy':>10}  {'classify':>10}  {'split':>10}  "
+        f"{'legacy -> classify':>18}"
+    )
+    for label, literal in benchmark_literals(size):
+        mb = len(literal) / (1024 * 1024)
+        legacy = time_per_call(legacy_extension, literal, "main")
+        sniffed = time_per_call(classify_literal, literal, "main", limit)
+        split = time_per_call(split_literal, literal)
+        kind = classify_literal(literal, "main", limit).kind
+        print(
+            f"{label:<8}  {mb / legacy:>7.0f} MB/s  {mb / sniffed:>7.0f} MB/s  "
+            f"{mb / split:>7.0f} MB/s  "
+            f"{legacy_extension(literal, 'main'):>7} -> {kind}"
+        )
+    print("\n✅ Benchmark finished.")
+
+
+def main():
+    # extract_literals imports this module, so its helpers are imported late
+    from extract_literals import find_page_files, parse_options
+    from page_transforms import iter_literals
+
+    args, options = parse_options(sys.argv[1:])
+    if not args:
+        print(__doc__)
+        sys.exit(1)
+
+    command = args[0]
+    try:
+        limit = int(options.get("limit", SNIFF_LIMIT))
+        size_mb = float(options.get("size", 8))
+    except ValueError as e:
+        print(f"❌ Invalid option value: {e}")
+        sys.exit(1)
+
+    if command == "bench":
+        run_benchmark(size_mb, limit)
+        return
+    if command != "classify":
+        print(f"Unknown command: {command}")
+        print(__doc__)
+        sys.exit(1)
+
+    pattern = args[1] if len(args) > 1 else DEFAULT_PATTERN
+    json_files = find_page_files(pattern, roots=parse_roots(options.get("roots")))
+    if not json_files:
+        print(f"No page JSON files found matching pattern: {pattern}")
+        sys.exit(1)
+
+    changed = 0
+    for json_file in json_files:
+        with open(json_file, encoding="utf-8") as f:
+            data = json.load(f)
+        print(f"\n{json_file}")
+        for component_path, component in iter_literals(data):
+            value = component.get("value") or ""
+            name = component.get("name", "")
+            result = classify_literal(value, name, limit)
+            previous = legacy_extension(value, name)
+            note = f" (was {name}{previous})" if previous != result.extension else ""
+            changed += bool(note)
+            blocks = ""
+            if result.kind == "mixed":
+                blocks = (
+                    f", {result.inline_scripts} script(s), "
+                    f"{result.inline_styles} style(s)"
+                )
+            print(
+                f"    [{component_path}] {name}{result.extension}: "
+                f"{result.kind}{blocks}{note}"
+            )
+    print(
+        f"\n✅ Classified literals in {len(json_files)} page file(s); "
+        f"{changed} extension(s) differ from the old check."
+    )
+
+
+if __name__ == "__main__":
+    main()
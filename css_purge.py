@@ -0,0 +1,446 @@
+#!/usr/bin/env python3
+"""
+Script to prune vendored framework CSS down to the rules a page can use.
+
+Pages load all of Bootstrap and Font Awesome for a handful of classes and
+icons. This collects the class names, ids and tags a page uses:
+
+* ``class``/``id`` attributes and tag names in its HTML literals, plus every
+  name in its other attribute values (``ng-class``, ``data-bs-target``, ...),
+* every name inside string literals in its JavaScript, so classes added with
+  ``addClass``, selectors passed to ``$()`` and markup built in strings count,
+* the ``style``/``labelStyle``/``valueStyle`` classes of its components, and
+  the tags Page Builder renders itself (``BASE_TAGS``),
+
+then keeps only the rules of a locally vendored stylesheet with a selector
+that could match: every class, id and tag in the selector is used. Attribute
+selectors and the contents of ``:not()``/``:is()`` are ignored, so the result
+errs on the side of keeping rules. ``@media``/``@supports`` blocks are pruned
+recursively, and ``@font-face``/``@keyframes`` are kept only when a kept rule
+refers to them. ``/*! ... */`` license comments are kept. Nothing is fetched:
+pass the vendored copies with ``--css``.
+
+The output for each page is a CSS literal (a ``<style>`` block) in
+``<out>/<constantName>.css``, or with ``--shared`` one literal for all the
+pages in ``<out>/shared.css``, and the bytes saved are reported.
+
+Usage:
+    python css_purge.py purge [file_pattern] --css=<files>  # Purge per page
+    python css_purge.py purge [file_pattern] --css=<files> --shared
+
+Options:
+    --css=<files>      Comma-separated vendored stylesheets, e.g.
+                       --css=vendor/bootstrap.min.css,vendor/all.min.css
+    --out=<dir>        Where the purged literals are written (default: purged)
+    --shared           Write one literal for the union of all pages
+    --safelist=<names> Comma-separated classes/ids to always keep (e.g. classes
+                       added by code outside the pages)
+    --roots=<dirs>     Comma-separated directories to search for pages (default:
+                       everything not ignored by .gitignore/.pagebuilderignore)
+"""
+
+import json
+import re
+import sys
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from content_sniffer import classify_literal, scan_markup
+from discovery import DEFAULT_PATTERN, parse_roots
+from extract_literals import find_page_files, iter_components, parse_options
+from page_transforms import iter_literals
+
+DEFAULT_OUT_DIR = "purged"
+
+# Tags Page Builder renders around and inside its components
+BASE_TAGS = {
+    "html",
+    "body",
+    "div",
+    "span",
+    "form",
+    "label",
+    "input",
+    "select",
+    "option",
+    "textarea",
+    "button",
+    "a",
+    "img",
+    "p",
+    "ul",
+    "li",
+    "table",
+    "thead",
+    "tbody",
+    "tr",
+    "th",
+    "td",
+}
+
+# Component keys holding CSS classes
+STYLE_KEYS = {"style", "labelStyle", "valueStyle"}
+
+# At-rules whose blocks contain rules rather than declarations
+NESTED_AT_RULES = {"@media", "@supports", "@layer", "@container", "@document"}
+
+NAME_RE = re.compile(r"-?[A-Za-z_][\w-]*")
+HTML_TAG_RE = re.compile(r"<([A-Za-z][\w-]*)((?:[^>\"']|\"[^\"]*\"|'[^']*')*)>")
+HTML_ATTRIBUTE_RE = re.compile(r"""([^\s=/>"']+)\s*=\s*("[^"]*"|'[^']*'|[^\s"'>]+)""")
+JS_STRING_RE = re.compile(
+    r"""//[^\n]*|/\*.*?(?:\*/|\Z)|"(?:\\.|[^"\\\n])*"|'(?:\\.|[^'\\\n])*'|`(?:\\.|[^`\\])*`""",
+    re.S,
+)
+CSS_TOKEN_RE = re.compile(
+    r"""/\*.*?(?:\*/|\Z)|"(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*'|[{};]|[^{};"'/]+|/""",
+    re.S,
+)
+IDENTIFIER = r"(?:\\[0-9a-fA-F]{1,6}\s?|\\.|[\w-])+"
+CLASS_RE = re.compile(r"\.(" + IDENTIFIER + ")")
+ID_RE = re.compile(r"#(" + IDENTIFIER + ")")
+TAG_RE = re.compile(r"(?:^|[\s>+~])([A-Za-z][\w-]*)")
+PSEUDO_RE = re.compile(r"::?[\w-]+")
+ESCAPE_RE = re.compile(r"\\([0-9a-fA-F]{1,6})\s?|\\(.)")
+FONT_FAMILY_RE = re.compile(r"font-family\s*:\s*([^;}]+)", re.I)
+
+
+class Usage(NamedTuple):
+    classes: Set[str]
+    ids: Set[str]
+    tags: Set[str]
+
+
+class CssRule(NamedTuple):
+    # style, at-block (nested rules), at-rule (declarations), statement, comment
+    kind: str
+    prelude: str
+    body: str = ""
+    children: Tuple["CssRule", ...] = ()
+
+
+def new_usage(names: Iterable[str] = ()) -> Usage:
+    names = set(names)
+    return Usage(set(names), set(names), set(BASE_TAGS))
+
+
+def add_names(usage: Usage, text: str) -> None:
+    """Count every name in ``text`` as a possible class, id and tag."""
+    names = set(NAME_RE.findall(text))
+    usage.classes.update(names)
+    usage.ids.update(names)
+    usage.tags.update(name.lower() for name in names)
+
+
+def add_html(usage: Usage, markup: str) -> None:
+    """Collect the tags, classes and ids used in HTML markup."""
+    for tag_match in HTML_TAG_RE.finditer(markup):
+        usage.tags.add(tag_match.group(1).lower())
+        for match in HTML_ATTRIBUTE_RE.finditer(tag_match.group(2)):
+            name = match.group(1).lower()
+            value = match.group(2).strip("\"'")
+            if name == "class":
+                usage.classes.update(value.split())
+            elif name == "id":
+                usage.ids.add(value.strip())
+            else:
+                add_names(usage, value)
+
+
+def add_js(usage: Usage, code: str) -> None:
+    """Collect the names in a script's string literals."""
+    for match in JS_STRING_RE.finditer(code):
+        token = match.group()
+        if token[0] in "\"'`":
+            add_names(usage, token[1:-1])
+            add_html(usage, token[1:-1])
+
+
+def page_usage(data: Dict[str, Any], usage: Optional[Usage] = None) -> Usage:
+    """Collect the classes, ids and tags a page uses."""
+    usage = usage if usage is not None else new_usage()
+    components = data.get("modelView", {}).get("components", [])
+    for _, component in iter_components(components):
+        for key in STYLE_KEYS:
+            if isinstance(component.get(key), str):
+                usage.classes.update(component[key].split())
+
+    for _, component in iter_literals(data):
+        value = component["value"]
+        kind = classify_literal(value, component.get("name", "")).kind
+        if kind == "css":
+            continue
+        if kind == "js" and "<script" not in value.lower():
+            add_js(usage, value)
+            continue
+        for item in scan_markup(value):
+            text = value[item.start : item.end]
+            if item.kind == "script":
+                add_js(usage, value[item.body_start : item.body_end])
+            elif item.kind == "markup":
+                add_html(usage, text)
+    return usage
+
+
+def parse_css(css: str) -> List[CssRule]:
+    """Parse a stylesheet into rules, with nested at-rule blocks as children."""
+    tokens = [m.group() for m in CSS_TOKEN_RE.finditer(css)]
+    rules, _ = parse_block(tokens, 0)
+    return rules
+
+
+def parse_block(tokens: List[str], pos: int) -> Tuple[List[CssRule], int]:
+    """Parse rules up to the ``}`` closing the current block."""
+    rules: List[CssRule] = []
+    prelude: List[str] = []
+    while pos < len(tokens):
+        token = tokens[pos]
+        pos += 1
+        if token.startswith("/*"):
+            if token.startswith("/*!") and not "".join(prelude).strip():
+                rules.append(CssRule("comment", token))
+            continue
+        if token == "}":
+            break
+        if token == ";":
+            text = " ".join("".join(prelude).split())
+            if text:
+                rules.append(CssRule("statement", text))
+            prelude = []
+            continue
+        if token != "{":
+            prelude.append(token)
+            continue
+
+        text = " ".join("".join(prelude).split())
+        prelude = []
+        keyword = text.split(" ", 1)[0].lower()
+        if keyword in NESTED_AT_RULES:
+            children, pos = parse_block(tokens, pos)
+            rules.append(CssRule("at-block", text, children=tuple(children)))
+            continue
+
+        # Declarations, up to the matching "}"
+        depth = 1
+        body: List[str] = []
+        while pos < len(tokens):
+            token = tokens[pos]
+            pos += 1
+            if token == "{":
+                depth += 1
+            elif token == "}":
+                depth -= 1
+                if depth == 0:
+                    break
+            if not token.startswith("/*"):
+                body.append(token)
+        kind = "at-rule" if text.startswith("@") else "style"
+        rules.append(CssRule(kind, text, "".join(body).strip()))
+    return rules, pos
+
+
+def split_selectors(prelude: str) -> List[str]:
+    """Split a selector list on its top-level commas."""
+    selectors = []
+    depth = 0
+    quote = ""
+    start = 0
+    for i, char in enumerate(prelude):
+        if quote:
+            if char == quote and prelude[i - 1] != "\\":
+                quote = ""
+        elif char in "\"'":
+            quote = char
+        elif char in "([":
+            depth += 1
+        elif char in ")]":
+            depth -= 1
+        elif char == "," and depth == 0:
+            selectors.append(prelude[start:i].strip())
+            start = i + 1
+    selectors.append(prelude[start:].strip())
+    return [s for s in selectors if s]
+
+
+def strip_arguments(selector: str) -> str:
+    """Drop attribute selectors and the arguments of functional pseudo-classes."""
+    result = []
+    depth = 0
+    quote = ""
+    for i, char in enumerate(selector):
+        if quote:
+            if char == quote and selector[i - 1] != "\\":
+                quote = ""
+        elif depth and char in "\"'":
+            quote = char
+        elif char in "([":
+            depth += 1
+        elif char in ")]":
+            depth = max(depth - 1, 0)
+        elif not depth:
+            result.append(char)
+    return "".join(result)
+
+
+def unescape(name: str) -> str:
+    """Resolve CSS escapes in an identifier."""
+
+    def replace(match: "re.Match[str]") -> str:
+        if match.group(1):
+            return chr(int(match.group(1), 16))
+        return match.group(2)
+
+    return ESCAPE_RE.sub(replace, name)
+
+
+def selector_matches(selector: str, usage: Usage) -> bool:
+    """Return True if every class, id and tag in a selector is used."""
+    selector = PSEUDO_RE.sub(" ", strip_arguments(selector))
+    for name in CLASS_RE.findall(selector):
+        if unescape(name) not in usage.classes:
+            return False
+    for name in ID_RE.findall(selector):
+        if unescape(name) not in usage.ids:
+            return False
+    # Class and id names were matched above; only bare tag names remain
+    bare = ID_RE.sub(" ", CLASS_RE.sub(" ", selector))
+    return all(tag.lower() in usage.tags for tag in TAG_RE.findall(bare))
+
+
+def purge_rules(
+    rules: Iterable[CssRule], usage: Usage, referenced: Optional[str] = None
+) -> List[CssRule]:
+    """Keep the rules that could match; ``referenced`` filters fonts/keyframes."""
+    kept: List[CssRule] = []
+    for rule in rules:
+        if rule.kind == "style":
+            selectors = [
+                s for s in split_selectors(rule.prelude) if selector_matches(s, usage)
+            ]
+            if selectors:
+                kept.append(rule._replace(prelude=",".join(selectors)))
+        elif rule.kind == "at-block":
+            children = purge_rules(rule.children, usage, referenced)
+            if children:
+                kept.append(rule._replace(children=tuple(children)))
+        elif rule.kind == "at-rule" and referenced is not None:
+            if is_referenced(rule, referenced):
+                kept.append(rule)
+        else:
+            kept.append(rule)
+    return kept
+
+
+def is_referenced(rule: CssRule, referenced: str) -> bool:
+    """Return True unless a font or keyframes rule is unused by ``referenced``."""
+    keyword, _, name = rule.prelude.partition(" ")
+    keyword = keyword.lower()
+    if keyword == "@font-face":
+        match = FONT_FAMILY_RE.search(rule.body)
+        if not match:
+            return True
+        family = match.group(1).strip().strip("\"'")
+        return family.lower() in referenced.lower()
+    if keyword.endswith("keyframes"):
+        name = name.strip().strip("\"'")
+        return (
+            re.search(r"(?<![\w-])" + re.escape(name) + r"(?![\w-])", referenced)
+            is not None
+        )
+    return True
+
+
+def serialize(rules: Iterable[CssRule], definitions: bool = True) -> str:
+    """Write rules back out as compact CSS."""
+    parts = []
+    for rule in rules:
+        if rule.kind == "comment":
+            parts.append(rule.prelude + "\n")
+        elif rule.kind == "statement":
+            parts.append(rule.prelude + ";")
+        elif rule.kind == "at-block":
+            parts.append(f"{rule.prelude}{{{serialize(rule.children, definitions)}}}")
+        elif rule.kind == "style" or definitions:
+            parts.append(f"{rule.prelude}{{{rule.body}}}")
+    return "".join(parts)
+
+
+def purge_css(css: str, usage: Usage) -> str:
+    """Return the parts of a stylesheet that a page with ``usage`` can use."""
+    kept = purge_rules(parse_css(css), usage)
+    referenced = serialize(kept, definitions=False)
+    return serialize(purge_rules(kept, usage, referenced))
+
+
+def css_literal(css: str) -> str:
+    return f"<style>\n{css}\n</style>\n"
+
+
+def main():
+    args, options = parse_options(sys.argv[1:])
+    if not args:
+        print(__doc__)
+        sys.exit(1)
+
+    command = args[0]
+    pattern = args[1] if len(args) > 1 else DEFAULT_PATTERN
+
+    if command != "purge":
+        print(f"Unknown command: {command}")
+        print(__doc__)
+        sys.exit(1)
+
+    css_files = [f for f in options.get("css", "").split(",") if f]
+    if not css_files:
+        print("❌ Pass the vendored stylesheets to purge with --css=<files>")
+        sys.exit(1)
+    try:
+        stylesheets = [Path(f).read_text(encoding="utf-8") for f in css_files]
+    except OSError as e:
+        print(f"❌ Cannot read stylesheet: {e}")
+        sys.exit(1)
+    original_size = sum(len(css.encode()) for css in stylesheets)
+
+    json_files = find_page_files(pattern, roots=parse_roots(options.get("roots")))
+    if not json_files:
+        print(f"No page JSON files found matching pattern: {pattern}")
+        sys.exit(1)
+
+    safelist = [name for name in options.get("safelist", "").split(",") if name]
+    usages: Dict[str, Usage] = {}
+    for json_file in json_files:
+        with open(json_file, encoding="utf-8") as f:
+            data = json.load(f)
+        name = data.get("constantName") or Path(json_file).stem
+        usages[name] = page_usage(data, new_usage(safelist))
+
+    if "shared" in options:
+        shared = new_usage(safelist)
+        for usage in usages.values():
+            shared.classes.update(usage.classes)
+            shared.ids.update(usage.ids)
+            shared.tags.update(usage.tags)
+        usages = {"shared": shared}
+
+    out_dir = Path(options.get("out", DEFAULT_OUT_DIR))
+    out_dir.mkdir(parents=True, exist_ok=True)
+    total_saved = 0
+    for name, usage in usages.items():
+        purged = "\n".join(purge_css(css, usage) for css in stylesheets)
+        purged_size = len(purged.encode())
+        saved = original_size - purged_size
+        total_saved += saved
+        out_file = out_dir / f"{name}.css"
+        out_file.write_text(css_literal(purged), encoding="utf-8")
+        print(
+            f"{out_file}: {original_size:,} -> {purged_size:,} bytes "
+            f"({saved:,} saved, {saved / max(original_size, 1):.0%})"
+        )
+
+    print(
+        f"\n✅ Purged {len(css_files)} stylesheet(s) for {len(json_files)} page(s); "
+        f"{total_saved:,} bytes saved"
+    )
+
+
+if __name__ == "__main__":
+    main()
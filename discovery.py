@@ -0,0 +1,176 @@
+"""
+Ignore-aware discovery of page and virtual domain JSON files.
+
+With the default ``**/*.json`` pattern, the extraction tools walk the tree with
+``os.scandir`` (via ``Storage.scandir``) instead of globbing it, so ignored
+directories such as ``.git``, ``.venv`` or ``node_modules`` are pruned before
+they are entered rather than filtered afterwards.
+
+Ignore rules use ``.gitignore`` syntax. ``DEFAULT_IGNORES`` (hidden entries,
+virtualenvs, ``node_modules`` and the tools' own ``extracted_*`` output
+directories) come first, then the ``.gitignore`` and ``.pagebuilderignore``
+files of each directory from the working directory down. As with git, the last
+matching rule wins, so a ``.pagebuilderignore`` can re-include something with
+``!`` (e.g. ``!.exports/``), and nothing inside a pruned directory is seen.
+
+Discovery can also be limited to include roots (``--roots=pages,virtualDomains``);
+any other explicit glob pattern is used as given.
+"""
+
+from typing import Iterable, List, NamedTuple, Optional, Pattern, Sequence
+
+from storage import DiskStorage, Storage, glob_to_regex, normalize_path
+
+DEFAULT_PATTERN = "**/*.json"
+IGNORE_FILES = (".gitignore", ".pagebuilderignore")
+DEFAULT_IGNORES = [
+    ".*",
+    "node_modules/",
+    "venv/",
+    "__pycache__/",
+    "extracted_literals/",
+    "extracted_virtual_domains/",
+]
+
+
+class IgnoreRule(NamedTuple):
+    base: str  # Directory the rule's ignore file lives in ("." for the cwd)
+    regex: Pattern[str]
+    negated: bool
+    dir_only: bool
+
+
+def parse_ignore_line(line: str, base: str) -> Optional[IgnoreRule]:
+    """Parse one ``.gitignore`` line into a rule (None for blanks/comments)."""
+    line = line.rstrip("\n").rstrip()
+    if not line or line.startswith("#"):
+        return None
+
+    negated = line.startswith("!")
+    if negated:
+        line = line[1:]
+    elif line.startswith("\\"):
+        line = line[1:]  # \# or \! matches a literal leading character
+
+    dir_only = line.endswith("/")
+    line = line.rstrip("/")
+    if not line:
+        return None
+
+    # A slash anywhere but the end anchors the pattern to the ignore file's
+    # directory; otherwise it matches a name at any depth below it
+    anchored = "/" in line
+    pattern = line.lstrip("/") if anchored else "**/" + line
+    return IgnoreRule(normalize_path(base), glob_to_regex(pattern), negated, dir_only)
+
+
+def parse_ignore_lines(lines: Iterable[str], base: str) -> List[IgnoreRule]:
+    rules = []
+    for line in lines:
+        rule = parse_ignore_line(line, base)
+        if rule is not None:
+            rules.append(rule)
+    return rules
+
+
+def is_ignored(path: str, is_dir: bool, rules: Sequence[IgnoreRule]) -> bool:
+    """Return True if the last rule matching ``path`` ignores it."""
+    ignored = False
+    for rule in rules:
+        if rule.dir_only and not is_dir:
+            continue
+        if rule.base == ".":
+            relative = path
+        elif path.startswith(rule.base + "/"):
+            relative = path[len(rule.base) + 1 :]
+        else:
+            continue
+        if rule.regex.match(relative):
+            ignored = not rule.negated
+    return ignored
+
+
+def load_ignore_rules(storage: Storage, directory: str) -> List[IgnoreRule]:
+    """Read the ignore files in one directory."""
+    rules: List[IgnoreRule] = []
+    for name in IGNORE_FILES:
+        ignore_file = name if directory == "." else f"{directory}/{name}"
+        if storage.exists(ignore_file) and not storage.is_dir(ignore_file):
+            lines = storage.read_text(ignore_file).splitlines()
+            rules.extend(parse_ignore_lines(lines, directory))
+    return rules
+
+
+def ancestor_dirs(directory: str) -> List[str]:
+    """Return ``"."`` and each directory from the cwd down to ``directory``.
+
+    Directories outside the working directory only return themselves.
+    """
+    if directory == ".":
+        return ["."]
+    if directory.startswith("/") or directory.startswith(".."):
+        return [directory]
+    parts = directory.split("/")
+    return ["."] + ["/".join(parts[: i + 1]) for i in range(len(parts))]
+
+
+def walk_files(
+    storage: Optional[Storage] = None,
+    roots: Optional[Sequence[str]] = None,
+    suffix: str = ".json",
+    default_ignores: Sequence[str] = DEFAULT_IGNORES,
+) -> List[str]:
+    """Find files ending in ``suffix`` under ``roots``, pruning ignored dirs.
+
+    Roots default to the working directory; roots that don't exist are
+    skipped. Paths are returned relative to the working directory (or as
+    given for roots outside it), in sorted order per root.
+    """
+    storage = storage or DiskStorage()
+    found: List[str] = []
+
+    def walk(directory: str, rules: List[IgnoreRule]) -> None:
+        rules = rules + load_ignore_rules(storage, directory)
+        for name, is_dir in storage.scandir(directory):
+            path = name if directory == "." else f"{directory}/{name}"
+            if is_ignored(path, is_dir, rules):
+                continue
+            if is_dir:
+                walk(path, rules)
+            elif name.endswith(suffix):
+                found.append(path)
+
+    for root in roots or ["."]:
+        root = normalize_path(root)
+        if not storage.is_dir(root):
+            continue
+        base = "." if ancestor_dirs(root)[0] == "." else root
+        rules = parse_ignore_lines(default_ignores, base)
+        for directory in ancestor_dirs(root)[:-1]:
+            rules += load_ignore_rules(storage, directory)
+        # An explicitly listed root is walked even if it would be ignored
+        walk(root, rules)
+    return found
+
+
+def find_json_files(
+    pattern: str = DEFAULT_PATTERN,
+    storage: Optional[Storage] = None,
+    roots: Optional[Sequence[str]] = None,
+) -> List[str]:
+    """Find candidate JSON files for a command line pattern.
+
+    The default pattern walks ``roots`` with ignore rules applied; any other
+    pattern (including archive paths) is globbed as given.
+    """
+    storage = storage or DiskStorage()
+    if pattern == DEFAULT_PATTERN:
+        return walk_files(storage, roots)
+    return storage.glob(pattern)
+
+
+def parse_roots(value: Optional[str]) -> Optional[List[str]]:
+    """Split a ``--roots=pages,virtualDomains`` option value."""
+    if not value or value == "true":
+        return None
+    return [root.strip() for root in value.split(",") if root.strip()]
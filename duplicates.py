@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+"""
+Script to find near-duplicate code across page literals using winnowing.
+
+Each literal is fingerprinted with winnowing (as used by MOSS): whitespace is
+removed, every k-character substring is hashed with a rolling hash, and the
+smallest hash in each window of ``w`` consecutive hashes is kept. Any copied
+region of at least ``k + w - 1`` characters is guaranteed to share a
+fingerprint, and fingerprinting is linear in the literal's length.
+
+Fingerprints go into an inverted table (fingerprint -> literals), so only
+literals that share fingerprints are ever compared. The similarity of two
+literals is the share of the smaller literal's fingerprints that also occur in
+the other, so a block pasted into a larger literal still scores highly.
+Literals at or above the threshold are grouped into clusters, and each member
+is reported with the line ranges it shares with the rest of its cluster.
+
+Fingerprints that occur in more than ``--max-shared`` literals are treated as
+boilerplate and ignored, which keeps the pair count bounded on large repos.
+
+Usage:
+    python duplicates.py dupes [file_pattern]  # Report clusters of near-duplicate literals
+
+Options:
+    --k=<n>           Characters per hashed substring (default: 40)
+    --window=<n>      Winnowing window size (default: 20)
+    --threshold=<x>   Minimum similarity between 0 and 1 (default: 0.5)
+    --max-shared=<n>  Ignore fingerprints found in more literals (default: 100)
+    --roots=<dirs>    Comma-separated directories to search for pages (default:
+                      everything not ignored by .gitignore/.pagebuilderignore)
+"""
+
+import bisect
+import json
+import sys
+from collections import defaultdict, deque
+from itertools import combinations
+from typing import Any, Dict, List, Set, Tuple
+
+from discovery import DEFAULT_PATTERN, parse_roots
+from extract_literals import find_page_files, get_file_extension, parse_options
+from page_transforms import iter_literals
+
+DEFAULT_K = 40
+DEFAULT_WINDOW = 20
+DEFAULT_THRESHOLD = 0.5
+DEFAULT_MAX_SHARED = 100
+
+HASH_BASE = 257
+HASH_MODULUS = (1 << 61) - 1
+
+
+def normalize(text: str) -> Tuple[str, List[int]]:
+    """Remove whitespace, returning the text and each character's original offset."""
+    chars = []
+    offsets = []
+    for offset, char in enumerate(text):
+        if not char.isspace():
+            chars.append(char)
+            offsets.append(offset)
+    return "".join(chars), offsets
+
+
+def kgram_hashes(text: str, k: int) -> List[int]:
+    """Hash every k-character substring with a rolling (Rabin-Karp) hash."""
+    if len(text) < k:
+        return []
+
+    high = pow(HASH_BASE, k - 1, HASH_MODULUS)
+    value = 0
+    for char in text[:k]:
+        value = (value * HASH_BASE + ord(char)) % HASH_MODULUS
+    hashes = [value]
+    for i in range(k, len(text)):
+        value = (value - ord(text[i - k]) * high) % HASH_MODULUS
+        value = (value * HASH_BASE + ord(text[i])) % HASH_MODULUS
+        hashes.append(value)
+    return hashes
+
+
+def winnow(hashes: List[int], window: int) -> List[Tuple[int, int]]:
+    """Select (hash, position) fingerprints: the rightmost minimum of each window."""
+    if not hashes:
+        return []
+    if len(hashes) < window:
+        position = min(range(len(hashes)), key=lambda i: (hashes[i], -i))
+        return [(hashes[position], position)]
+
+    fingerprints: List[Tuple[int, int]] = []
+    # Positions with strictly increasing hashes; the front is the window minimum
+    candidates: deque = deque()
+    for i, value in enumerate(hashes):
+        while candidates and hashes[candidates[-1]] >= value:
+            candidates.pop()
+        candidates.append(i)
+        if candidates[0] <= i - window:
+            candidates.popleft()
+        if i >= window - 1:
+            position = candidates[0]
+            if not fingerprints or fingerprints[-1][1] != position:
+                fingerprints.append((hashes[position], position))
+    return fingerprints
+
+
+def fingerprint(
+    text: str, k: int = DEFAULT_K, window: int = DEFAULT_WINDOW
+) -> Dict[str, Any]:
+    """Fingerprint a literal.
+
+    Returns ``fingerprints`` (a list of (hash, normalized position)) and
+    ``offsets`` (normalized position -> offset in ``text``).
+    """
+    normalized, offsets = normalize(text)
+    return {
+        "fingerprints": winnow(kgram_hashes(normalized, k), window),
+        "offsets": offsets,
+    }
+
+
+def collect_literals(
+    json_files: List[str], k: int = DEFAULT_K, window: int = DEFAULT_WINDOW
+) -> List[Dict[str, Any]]:
+    """Fingerprint every page literal long enough to hold one k-gram."""
+    literals = []
+    for json_file in json_files:
+        with open(json_file, encoding="utf-8") as f:
+            data = json.load(f)
+        for component_path, component in iter_literals(data):
+            value = component["value"]
+            entry = fingerprint(value, k, window)
+            if not entry["fingerprints"]:
+                continue
+            name = component.get("name", "")
+            entry.update(
+                file=json_file,
+                component_path=component_path,
+                filename=name + get_file_extension(value, name),
+                text=value,
+            )
+            literals.append(entry)
+    return literals
+
+
+def shared_fingerprint_counts(
+    hash_sets: List[Set[int]], max_shared: int = DEFAULT_MAX_SHARED
+) -> Dict[Tuple[int, int], int]:
+    """Count shared fingerprints for every pair of literals that has any.
+
+    Uses an inverted fingerprint -> literals table, so literals without a
+    common fingerprint are never compared.
+    """
+    postings: Dict[int, List[int]] = defaultdict(list)
+    for index, hashes in enumerate(hash_sets):
+        for value in hashes:
+            postings[value].append(index)
+
+    counts: Dict[Tuple[int, int], int] = defaultdict(int)
+    for indexes in postings.values():
+        if 1 < len(indexes) <= max_shared:
+            for pair in combinations(indexes, 2):
+                counts[pair] += 1
+    return counts
+
+
+def merge_regions(
+    positions: List[int], gap: int, k: int, offsets: List[int], text: str
+) -> List[Tuple[int, int]]:
+    """Merge fingerprint positions into (first_line, last_line) ranges."""
+    spans: List[List[int]] = []
+    for position in sorted(positions):
+        end = position + k - 1
+        if spans and position - spans[-1][1] <= gap:
+            spans[-1][1] = max(spans[-1][1], end)
+        else:
+            spans.append([position, end])
+
+    line_starts = [i for i, char in enumerate(text) if char == "\n"]
+    regions: List[Tuple[int, int]] = []
+    for start, end in spans:
+        first = bisect.bisect_left(line_starts, offsets[start]) + 1
+        last = bisect.bisect_left(line_starts, offsets[min(end, len(offsets) - 1)]) + 1
+        if regions and first <= regions[-1][1] + 1:
+            regions[-1] = (regions[-1][0], max(regions[-1][1], last))
+        else:
+            regions.append((first, last))
+    return regions
+
+
+def find_duplicates(
+    literals: List[Dict[str, Any]],
+    threshold: float = DEFAULT_THRESHOLD,
+    max_shared: int = DEFAULT_MAX_SHARED,
+    k: int = DEFAULT_K,
+    window: int = DEFAULT_WINDOW,
+) -> List[Dict[str, Any]]:
+    """Group fingerprinted literals into clusters of near-duplicates.
+
+    Returns clusters (largest first) with ``similarity`` (the lowest and
+    highest pairwise similarity that joined the cluster) and ``members``:
+    dicts with ``file``, ``component_path``, ``filename`` and ``regions``
+    (line ranges shared with other members).
+    """
+    hash_sets = [{value for value, _ in entry["fingerprints"]} for entry in literals]
+    counts = shared_fingerprint_counts(hash_sets, max_shared)
+
+    parents = list(range(len(literals)))
+
+    def find(index: int) -> int:
+        while parents[index] != index:
+            parents[index] = parents[parents[index]]
+            index = parents[index]
+        return index
+
+    similar: List[Tuple[int, int, float]] = []
+    for (a, b), shared in counts.items():
+        similarity = shared / min(len(hash_sets[a]), len(hash_sets[b]))
+        if similarity >= threshold:
+            similar.append((a, b, similarity))
+            parents[find(a)] = find(b)
+
+    groups: Dict[int, List[int]] = defaultdict(list)
+    for index in range(len(literals)):
+        groups[find(index)].append(index)
+    scores: Dict[int, List[float]] = defaultdict(list)
+    for a, _, similarity in similar:
+        scores[find(a)].append(similarity)
+
+    clusters: List[Dict[str, Any]] = []
+    for root, indexes in groups.items():
+        if len(indexes) < 2:
+            continue
+        members = []
+        for index in indexes:
+            others: Set[int] = set()
+            for other in indexes:
+                if other != index:
+                    others |= hash_sets[other]
+            entry = literals[index]
+            positions = [p for value, p in entry["fingerprints"] if value in others]
+            members.append(
+                {
+                    "file": entry["file"],
+                    "component_path": entry["component_path"],
+                    "filename": entry["filename"],
+                    "regions": merge_regions(
+                        positions, window + k, k, entry["offsets"], entry["text"]
+                    ),
+                }
+            )
+        clusters.append(
+            {
+                "similarity": (min(scores[root]), max(scores[root])),
+                "members": members,
+            }
+        )
+
+    clusters.sort(
+        key=lambda cluster: (-len(cluster["members"]), -cluster["similarity"][1])
+    )
+    return clusters
+
+
+def format_regions(regions: List[Tuple[int, int]]) -> str:
+    return ", ".join(
+        f"line {first}" if first == last else f"lines {first}-{last}"
+        for first, last in regions
+    )
+
+
+def main():
+    args, options = parse_options(sys.argv[1:])
+    if not args:
+        print(__doc__)
+        sys.exit(1)
+
+    command = args[0]
+    pattern = args[1] if len(args) > 1 else DEFAULT_PATTERN
+
+    if command != "dupes":
+        print(f"Unknown command: {command}")
+        print(__doc__)
+        sys.exit(1)
+
+    try:
+        k = int(options.get("k", DEFAULT_K))
+        window = int(options.get("window", DEFAULT_WINDOW))
+        threshold = float(options.get("threshold", DEFAULT_THRESHOLD))
+        max_shared = int(options.get("max-shared", DEFAULT_MAX_SHARED))
+    except ValueError as e:
+        print(f"❌ Invalid option value: {e}")
+        sys.exit(1)
+
+    json_files = find_page_files(pattern, roots=parse_roots(options.get("roots")))
+    if not json_files:
+        print(f"No page JSON files found matching pattern: {pattern}")
+        sys.exit(1)
+
+    literals = collect_literals(json_files, k, window)
+    clusters = find_duplicates(literals, threshold, max_shared, k, window)
+
+    for number, cluster in enumerate(clusters, 1):
+        low, high = cluster["similarity"]
+        score = f"{high:.2f}" if low == high else f"{low:.2f}-{high:.2f}"
+        print(
+            f"\nCluster {number}: {len(cluster['members'])} literals, "
+            f"similarity {score}"
+        )
+        for member in cluster["members"]:
+            print(
+                f"    {member['file']} [{member['component_path']} "
+                f"{member['filename']}] {format_regions(member['regions'])}"
+            )
+
+    if clusters:
+        print(
+            f"\n❌ {len(clusters)} cluster(s) of near-duplicate literals "
+            f"in {len(json_files)} page file(s)."
+        )
+        sys.exit(1)
+    print(f"\n✅ No near-duplicate literals in {len(json_files)} page file(s).")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,51 +7,345 @@ in JSON files by extracting them into separate, reviewable files.
 
 Usage:
     python extract_literals.py extract [file_pattern]  # Extract literals to separate files
+    python extract_literals.py extract <export.zip>    # Extract straight from a .zip/.tar.gz export
     python extract_literals.py rebuild [file_pattern]  # Rebuild JSON from extracted files
     python extract_literals.py check [file_pattern]    # Check if extracted files are in sync
+    python extract_literals.py partials                # List the pages including each partial
+
+Extract options:
+    --split-mixed  Split literals that mix markup with inline scripts/styles
+                   into <name>.html (the markup) plus <name>.<n>.js/.css
+                   files, one per block (see content_sniffer.py)
+
+Rebuild options:
+    --profile      Instrument page JavaScript with performance marks (see profiling.py)
+    --request-cache[=<config.json>]
+                   Inject a cache/de-duplication shim for virtual domain GETs
+                   (see request_cache.py)
+    --optimize-resources[=<policy.json>]
+                   Defer safe external scripts, add preconnect/dns-prefetch
+                   hints and drop duplicate script/link tags
+                   (see resource_optimizer.py)
+    --partial=<names>
+                   Only rebuild the pages that include one of these
+                   comma-separated partials, directly or through other
+                   partials (see partials.py)
+    --out=<dir>    Where rebuilt pages are written (default: over the source
+                   JSON, or build/ for transformed builds). Required for pages
+                   extracted from an archive.
+
+Options:
+    --dry-run      Don't write anything; list the files that would be written
+    --jobs=<n>     Archive members processed in parallel (default: CPU count, max 8)
+    --roots=<dirs> Comma-separated directories to search for pages, e.g.
+                   --roots=pages (default: everything not ignored by
+                   .gitignore/.pagebuilderignore)
+    --fsync=<when> always (default): fsync every write; end: fsync everything
+                   once the run finishes; never: leave it to the OS. Writes are
+                   atomic renames either way.
 """
 
-import glob
 import hashlib
 import json
-import os
 import sys
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Set,
+    Tuple,
+)
+
+from content_sniffer import (
+    BODY_EXTENSIONS,
+    classify_literal,
+    join_literal,
+    split_literal,
+)
+from discovery import DEFAULT_PATTERN, find_json_files, parse_roots
+from manifest import (
+    MAP_FILE,
+    compact_manifest,
+    has_extraction_map,
+    item_files,
+    manifest_directories,
+    read_extraction_map,
+    write_extraction_map,
+)
+from partials import PARTIALS_DIR, Partials, has_includes
+from storage import (
+    ArchiveStorage,
+    DiskStorage,
+    ReadOnlyStorage,
+    Storage,
+    is_archive,
+    parse_jobs,
+    process_archive,
+)
+from stream_compare import compare_file_to_text
+
+
+def iter_components(
+    components: List[Dict], path: str = ""
+) -> Iterator[Tuple[str, Dict]]:
+    """Yield (component_path, component) for every component, depth first.
+
+    Paths use the same scheme as ``_extraction_map.json``: ``"3"`` for a
+    top-level component and ``"3.components.0"`` for its first child.
+    """
+    for i, component in enumerate(components):
+        component_path = f"{path}.{i}" if path else str(i)
+        yield component_path, component
+
+        if "components" in component:
+            yield from iter_components(
+                component["components"], f"{component_path}.components"
+            )
 
 
-def get_file_extension(content: str, component_name: str) -> str:
-    """Determine appropriate file extension based on content and component name."""
-    content_lower = content.lower().strip()
-    name_lower = component_name.lower()
-
-    # Check for script tags or JS-related names
-    if (
-        "<script" in content_lower
-        or "javascript" in content_lower
-        or any(js_name in name_lower for js_name in ["js", "script", "function"])
-    ):
-        return ".js"
+def is_page_definition(data: Any) -> bool:
+    """Return True if loaded JSON looks like a Banner page definition."""
+    return isinstance(data, dict) and "constantName" in data and "modelView" in data
 
-    # Check for style tags or CSS-related names
-    if "<style" in content_lower or any(
-        css_name in name_lower for css_name in ["css", "style"]
-    ):
-        return ".css"
 
-    # Default to HTML for most literal content
-    return ".html"
+def find_page_files(
+    pattern: str = DEFAULT_PATTERN,
+    storage: Optional[Storage] = None,
+    roots: Optional[List[str]] = None,
+) -> List[str]:
+    """Find page definition JSON files matching a glob pattern.
 
+    The default pattern walks ``roots`` (default: the working directory),
+    skipping anything ignored by ``.gitignore``/``.pagebuilderignore``.
+    """
+    storage = storage or DiskStorage()
+    json_files = []
+    for file_path in find_json_files(pattern, storage, roots):
+        if file_path.endswith(".json") and not file_path.endswith(
+            "_extraction_map.json"
+        ):
+            # Basic check if it looks like a page definition
+            try:
+                if is_page_definition(json.loads(storage.read_text(file_path))):
+                    json_files.append(file_path)
+            except (json.JSONDecodeError, KeyError):
+                continue
+    return json_files
+
+
+def find_extracted_dirs(
+    output_dir: str, storage: Optional[Storage] = None
+) -> List[str]:
+    """Find extracted directories (those with an ``_extraction_map.json``).
+
+    With an extraction manifest, the directories it lists are used instead.
+    """
+    storage = storage or DiskStorage()
+    if not storage.is_dir(output_dir):
+        return []
+    listed = manifest_directories(storage, output_dir)
+    if listed is not None:
+        return [path for path in listed if storage.is_dir(path)]
+    return [
+        path
+        for path in storage.iterdir(output_dir)
+        if storage.is_dir(path) and storage.exists(Path(path) / MAP_FILE)
+    ]
+
+
+def parse_options(args: List[str]) -> Tuple[List[str], Dict[str, str]]:
+    """Split command line arguments into positionals and ``--name[=value]`` options.
+
+    Flags given without a value are stored as ``"true"``.
+    """
+    positionals = []
+    options = {}
+    for arg in args:
+        if arg.startswith("--"):
+            name, _, value = arg[2:].partition("=")
+            options[name] = value if value else "true"
+        else:
+            positionals.append(arg)
+    return positionals, options
 
-def extract_literals_from_json(json_file: str, output_dir: str) -> Dict[str, Any]:
-    """Extract literal components from a JSON file into separate files."""
 
-    with open(json_file, encoding="utf-8") as f:
-        data = json.load(f)
+def get_file_extension(content: str, component_name: str) -> str:
+    """Determine appropriate file extension based on content and component name.
+
+    Content decides (see ``content_sniffer.classify_literal``); the name is only
+    used for plain text that is neither markup nor code.
+    """
+    return classify_literal(content, component_name).extension
+
+
+def literal_files(
+    name: str, content: str, split_mixed: bool = False
+) -> List[Tuple[str, str]]:
+    """Return the ``(filename, content)`` files a literal is extracted to.
+
+    The first is the literal's own file. With ``split_mixed``, a mixed
+    literal's file holds only the markup, followed by one ``<name>.<n>.js`` or
+    ``.css`` part per inline script/style body.
+    """
+    classification = classify_literal(content, name)
+    filename = f"{name}{classification.extension}"
+    if not (split_mixed and classification.kind == "mixed"):
+        return [(filename, content)]
+
+    skeleton, bodies = split_literal(content)
+    return [(filename, skeleton)] + [
+        (f"{name}.{n}{BODY_EXTENSIONS[kind]}", body)
+        for n, (kind, body) in enumerate(bodies, 1)
+    ]
+
+
+def read_extracted_literal(
+    storage: Storage,
+    page_path: Path,
+    literal_info: Dict[str, Any],
+    partials: Optional[Partials] = None,
+) -> Optional[str]:
+    """Read a literal's extracted content, joining split parts back together.
+
+    Include directives are expanded (see partials.py). Returns None if any of
+    its files is missing.
+    """
+    filenames = [literal_info["filename"]] + literal_info.get("parts", [])
+    if not all(storage.exists(page_path / name) for name in filenames):
+        return None
+    content = storage.read_text(page_path / literal_info["filename"])
+    if "parts" in literal_info:
+        bodies = [storage.read_text(page_path / name) for name in literal_info["parts"]]
+        try:
+            content = join_literal(content, bodies)
+        except ValueError as e:
+            raise ValueError(f"{page_path / literal_info['filename']}: {e}") from e
+    if has_includes(content):
+        partials = partials or Partials.for_page(page_path, storage)
+        try:
+            content = partials.expand(content)
+        except ValueError as e:
+            raise ValueError(f"{page_path / literal_info['filename']}: {e}") from e
+    return content
+
+
+def page_partials(
+    page_dir: str,
+    storage: Optional[Storage] = None,
+    partials: Optional[Partials] = None,
+) -> Set[str]:
+    """Return the partials an extracted page includes, directly or indirectly."""
+    storage = storage or DiskStorage()
+    page_path = Path(page_dir)
+    partials = partials or Partials.for_page(page_path, storage)
+    extraction_map = read_extraction_map(storage, page_path)
+    used: Set[str] = set()
+    for literal_info in extraction_map["literals"]:
+        for name in [literal_info["filename"]] + literal_info.get("parts", []):
+            if storage.exists(page_path / name):
+                used |= partials.used_by(storage.read_text(page_path / name))
+    return used
+
+
+def extract_literals_from_json(
+    json_file: str,
+    output_dir: str,
+    storage: Optional[Storage] = None,
+    split_mixed: bool = False,
+) -> Dict[str, Any]:
+    """Extract literal components from a JSON file into separate files."""
+    storage = storage or DiskStorage()
+    with storage.lock(json_file):
+        data = json.loads(storage.read_text(json_file))
+        return extract_literals_from_data(
+            data, json_file, output_dir, storage, split_mixed
+        )
+
+
+def extract_literals_from_archive(
+    archive: str,
+    output_dir: str,
+    storage: Optional[Storage] = None,
+    jobs: int = 1,
+    split_mixed: bool = False,
+) -> List[Dict[str, Any]]:
+    """Extract literals from every page definition in a .zip/.tar.gz export.
+
+    Members are classified and extracted as they are read from the archive;
+    nothing is unpacked to disk. Returns the extraction maps in archive order.
+    """
+    storage = storage or DiskStorage()
+
+    def extract_member(
+        member: str, text: str
+    ) -> Optional[Tuple[List[str], Dict[str, Any]]]:
+        try:
+            data = json.loads(text)
+        except json.JSONDecodeError:
+            return None
+        if not is_page_definition(data):
+            return None
+        output = [f"\nProcessing: {member}"]
+        extraction_map = extract_literals_from_data(
+            data,
+            member,
+            output_dir,
+            storage,
+            split_mixed,
+            log=output.append,
+            save_map=False,
+        )
+        return output, extraction_map
+
+    # Workers only write the extracted files; their output and the maps are
+    # written here, one page at a time
+    extraction_maps = []
+    for output, extraction_map in process_archive(
+        archive, extract_member, "**/*.json", jobs
+    ):
+        page_dir = Path(output_dir) / extraction_map["page_name"]
+        map_file = write_extraction_map(storage, page_dir, extraction_map)
+        print("\n".join(output))
+        print(f"Extraction map saved: {map_file}")
+        extraction_maps.append(extraction_map)
+    return extraction_maps
+
+
+def extract_literals_from_data(
+    data: Dict[str, Any],
+    json_file: str,
+    output_dir: str,
+    storage: Optional[Storage] = None,
+    split_mixed: bool = False,
+    verbose: bool = True,
+    log: Callable[[str], None] = print,
+    save_map: bool = True,
+) -> Dict[str, Any]:
+    """Extract literal components from already loaded page JSON.
+
+    ``json_file`` is recorded as the source file to rebuild into. With
+    ``split_mixed``, mixed literals are written as a markup skeleton plus one
+    file per inline script/style body, listed under ``parts`` in the map.
+    Files from an earlier extraction that the new map no longer lists (e.g.
+    a literal that was removed or now gets a different extension) are deleted.
+    Progress goes to ``log`` when ``verbose``. Without ``save_map`` the map is
+    only returned, for the caller to record with ``write_extraction_map``.
+    """
+    storage = storage or DiskStorage()
 
     page_name = data.get("constantName", Path(json_file).stem)
     page_dir = Path(output_dir) / page_name
-    page_dir.mkdir(parents=True, exist_ok=True)
+    storage.mkdir(page_dir)
+    previous_files = set()
+    if has_extraction_map(storage, page_dir):
+        for item in read_extraction_map(storage, page_dir)["literals"]:
+            previous_files.update(item_files(item))
+    partials = Partials(Path(output_dir) / PARTIALS_DIR, storage)
 
     # Track extracted literals for rebuilding
     extraction_map = {"source_file": json_file, "page_name": page_name, "literals": []}
@@ -66,25 +360,31 @@ def extract_literals_from_json(json_file: str, output_dir: str) -> Dict[str, Any
                 content = component.get("value", "")
 
                 if content.strip():  # Only extract non-empty content
-                    ext = get_file_extension(content, name)
-                    filename = f"{name}{ext}"
-                    filepath = page_dir / filename
-
-                    # Write the content to file
-                    with open(filepath, "w", encoding="utf-8") as f:
-                        f.write(content)
+                    # Expanded includes go back to their directives
+                    collapsed, differing = partials.collapse(content)
+                    for partial in differing:
+                        if verbose:
+                            log(
+                                f"Kept expanded: {page_dir / name} (the {partial} "
+                                "include differs from the partial)"
+                            )
+                    files = literal_files(name, collapsed, split_mixed)
+                    for filename, file_content in files:
+                        storage.write_text(page_dir / filename, file_content)
+                        if verbose:
+                            log(f"Extracted: {page_dir / filename}")
 
                     # Store mapping for rebuilding
-                    extraction_map["literals"].append(
-                        {
-                            "component_path": component_path,
-                            "name": name,
-                            "filename": filename,
-                            "content_hash": hashlib.md5(content.encode()).hexdigest(),
-                        }
-                    )
-
-                    print(f"Extracted: {filepath}")
+                    literal_info = {
+                        "component_path": component_path,
+                        "name": name,
+                        "filename": files[0][0],
+                        "content_hash": hashlib.md5(content.encode()).hexdigest(),
+                        "size": len(content.encode()),
+                    }
+                    if len(files) > 1:
+                        literal_info["parts"] = [filename for filename, _ in files[1:]]
+                    extraction_map["literals"].append(literal_info)
 
             # Recursively check nested components
             if "components" in component:
@@ -96,138 +396,237 @@ def extract_literals_from_json(json_file: str, output_dir: str) -> Dict[str, Any
     if "modelView" in data and "components" in data["modelView"]:
         extract_from_components(data["modelView"]["components"])
 
-    # Save extraction mapping
-    map_file = page_dir / "_extraction_map.json"
-    with open(map_file, "w", encoding="utf-8") as f:
-        json.dump(extraction_map, f, indent=2)
+    # Remove files left over from the previous extraction
+    for item in extraction_map["literals"]:
+        previous_files.difference_update(item_files(item))
+    for filename in sorted(previous_files):
+        storage.remove(page_dir / filename)
+        if verbose:
+            log(f"Removed: {page_dir / filename}")
 
-    print(f"Extraction map saved: {map_file}")
+    # Save extraction mapping
+    if save_map:
+        map_file = write_extraction_map(storage, page_dir, extraction_map)
+        if verbose:
+            log(f"Extraction map saved: {map_file}")
     return extraction_map
 
 
-def rebuild_json_from_literals(page_dir: str) -> str:
-    """Rebuild JSON file from extracted literal files."""
-
-    page_path = Path(page_dir)
-    map_file = page_path / "_extraction_map.json"
+def rebuild_json_from_literals(
+    page_dir: str,
+    transforms: Optional[List[Callable[[Dict[str, Any]], None]]] = None,
+    output_dir: Optional[str] = None,
+    storage: Optional[Storage] = None,
+    partials: Optional[Partials] = None,
+) -> str:
+    """Rebuild JSON file from extracted literal files.
 
-    if not map_file.exists():
-        raise FileNotFoundError(f"Extraction map not found: {map_file}")
+    ``transforms`` are called in order with the rebuilt page data and may
+    modify it in place (e.g. to instrument a profiling build). Transformed
+    builds should normally be written to ``output_dir`` (keeping the source
+    file name) so the source JSON stays in sync with the extracted files.
+    Pass ``partials`` to share cached include expansions between pages.
+    """
+    storage = storage or DiskStorage()
 
-    with open(map_file, encoding="utf-8") as f:
-        extraction_map = json.load(f)
+    page_path = Path(page_dir)
+    source_file = read_extraction_map(storage, page_path)["source_file"]
 
-    source_file = extraction_map["source_file"]
+    # Hold the page lock from reading the extracted files to writing the result
+    with storage.lock(source_file):
+        # Re-read under the lock in case the page was re-extracted meanwhile
+        extraction_map = read_extraction_map(storage, page_path)
 
-    # Load original JSON
-    with open(source_file, encoding="utf-8") as f:
-        data = json.load(f)
+        # Load original JSON
+        data = json.loads(storage.read_text(source_file))
 
-    # Read extracted content back
-    literal_content = {}
-    for literal_info in extraction_map["literals"]:
-        filepath = page_path / literal_info["filename"]
-        if filepath.exists():
-            with open(filepath, encoding="utf-8") as f:
-                content = f.read()
+        # Read extracted content back
+        literal_content = {}
+        for literal_info in extraction_map["literals"]:
+            content = read_extracted_literal(storage, page_path, literal_info, partials)
+            if content is not None:
                 literal_content[literal_info["component_path"]] = content
 
-    def update_components(components: List[Dict], path: str = ""):
-        """Recursively update literal components with file content."""
-        for i, component in enumerate(components):
-            component_path = f"{path}.{i}" if path else str(i)
+        def update_components(components: List[Dict], path: str = ""):
+            """Recursively update literal components with file content."""
+            for i, component in enumerate(components):
+                component_path = f"{path}.{i}" if path else str(i)
 
-            if component.get("type") == "literal" and component_path in literal_content:
-                component["value"] = literal_content[component_path]
-
-            # Recursively update nested components
-            if "components" in component:
-                update_components(
-                    component["components"], f"{component_path}.components"
-                )
-
-    # Update main components
-    if "modelView" in data and "components" in data["modelView"]:
-        update_components(data["modelView"]["components"])
+                if (
+                    component.get("type") == "literal"
+                    and component_path in literal_content
+                ):
+                    component["value"] = literal_content[component_path]
 
-    # Write updated JSON back
-    with open(source_file, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=3, ensure_ascii=False)
+                # Recursively update nested components
+                if "components" in component:
+                    update_components(
+                        component["components"], f"{component_path}.components"
+                    )
 
-    print(f"Rebuilt: {source_file}")
-    return source_file
+        # Update main components
+        if "modelView" in data and "components" in data["modelView"]:
+            update_components(data["modelView"]["components"])
 
+        for transform in transforms or []:
+            transform(data)
 
-def check_sync_status(page_dir: str) -> bool:
-    """Check if extracted files are in sync with the source JSON."""
+        # Write updated JSON back
+        target_file = (
+            str(Path(output_dir) / Path(source_file).name)
+            if output_dir
+            else source_file
+        )
+        storage.mkdir(Path(target_file).parent)
+        storage.write_text(target_file, json.dumps(data, indent=3, ensure_ascii=False))
 
-    page_path = Path(page_dir)
-    map_file = page_path / "_extraction_map.json"
+        print(f"Rebuilt: {target_file}")
+        return target_file
 
-    if not map_file.exists():
-        print(f"❌ No extraction map found: {map_file}")
-        return False
 
-    with open(map_file, encoding="utf-8") as f:
-        extraction_map = json.load(f)
+class SyncStatus(NamedTuple):
+    path: str
+    # in-sync, out-of-sync or missing
+    status: str
+    file_hash: str = ""
+    json_hash: str = ""
+    message: str = ""
 
-    source_file = extraction_map["source_file"]
 
-    if not os.path.exists(source_file):
-        print(f"❌ Source file not found: {source_file}")
-        return False
+def compare_extracted_literals(
+    page_dir: str, storage: Optional[Storage] = None
+) -> List[SyncStatus]:
+    """Compare each extracted literal file with the source JSON.
 
-    # Load current JSON and extract current literal content
-    with open(source_file, encoding="utf-8") as f:
-        data = json.load(f)
+    Raises FileNotFoundError if the extraction map or source file is missing.
+    """
+    storage = storage or DiskStorage()
 
-    def get_literal_content(components: List[Dict], path: str = "") -> Dict[str, str]:
-        """Extract current literal content from JSON."""
-        content = {}
-        for i, component in enumerate(components):
-            component_path = f"{path}.{i}" if path else str(i)
+    page_path = Path(page_dir)
+    if not has_extraction_map(storage, page_path):
+        raise FileNotFoundError(f"No extraction map found: {page_path / MAP_FILE}")
 
-            if component.get("type") == "literal":
-                content[component_path] = component.get("value", "")
+    extraction_map = read_extraction_map(storage, page_path)
 
-            if "components" in component:
-                content.update(
-                    get_literal_content(
-                        component["components"], f"{component_path}.components"
-                    )
-                )
+    source_file = extraction_map["source_file"]
 
-        return content
+    if not storage.exists(source_file):
+        raise FileNotFoundError(f"Source file not found: {source_file}")
 
-    current_content = {}
-    if "modelView" in data and "components" in data["modelView"]:
-        current_content = get_literal_content(data["modelView"]["components"])
+    # Load current JSON and extract current literal content
+    data = json.loads(storage.read_text(source_file))
+    current_content = {
+        component_path: component.get("value", "")
+        for component_path, component in iter_components(
+            data.get("modelView", {}).get("components", [])
+        )
+        if component.get("type") == "literal"
+    }
+    return compare_literal_files(page_dir, extraction_map, current_content, storage)
+
+
+def compare_literal_files(
+    page_dir: str,
+    extraction_map: Dict[str, Any],
+    current_content: Dict[str, str],
+    storage: Optional[Storage] = None,
+    partials: Optional[Partials] = None,
+) -> List[SyncStatus]:
+    """Compare extracted literal files with literal values keyed by path.
+
+    Files with include directives are compared after expanding them.
+    """
+    storage = storage or DiskStorage()
+    page_path = Path(page_dir)
+    partials = partials or Partials.for_page(page_path, storage)
 
     # Check each extracted file
-    all_synced = True
+    statuses: List[SyncStatus] = []
     for literal_info in extraction_map["literals"]:
         filepath = page_path / literal_info["filename"]
         component_path = literal_info["component_path"]
 
-        if not filepath.exists():
-            print(f"❌ Missing extracted file: {filepath}")
-            all_synced = False
+        missing = [
+            page_path / name
+            for name in [literal_info["filename"]] + literal_info.get("parts", [])
+            if not storage.exists(page_path / name)
+        ]
+        if missing:
+            statuses.extend(SyncStatus(str(path), "missing") for path in missing)
             continue
 
-        with open(filepath, encoding="utf-8") as f:
-            file_content = f.read()
-
         json_content = current_content.get(component_path, "")
 
-        if file_content != json_content:
-            print(f"❌ Out of sync: {filepath}")
-            print(f"   File hash: {hashlib.md5(file_content.encode()).hexdigest()}")
-            print(f"   JSON hash: {hashlib.md5(json_content.encode()).hexdigest()}")
-            all_synced = False
+        if "parts" in literal_info:
+            try:
+                joined = read_extracted_literal(
+                    storage, page_path, literal_info, partials
+                )
+            except ValueError as e:
+                statuses.append(
+                    SyncStatus(str(filepath), "out-of-sync", message=str(e))
+                )
+                continue
+            file_hash = hashlib.md5((joined or "").encode()).hexdigest()
+            json_hash = hashlib.md5(json_content.encode()).hexdigest()
+            mismatch = (file_hash, json_hash) if file_hash != json_hash else None
         else:
-            print(f"✅ In sync: {filepath}")
+            # Streams the file and stops at the first difference
+            mismatch = compare_file_to_text(storage, filepath, json_content)
+            if mismatch and has_includes(storage.read_text(filepath)):
+                try:
+                    expanded = read_extracted_literal(
+                        storage, page_path, literal_info, partials
+                    )
+                except ValueError as e:
+                    statuses.append(
+                        SyncStatus(str(filepath), "out-of-sync", message=str(e))
+                    )
+                    continue
+                file_hash = hashlib.md5((expanded or "").encode()).hexdigest()
+                json_hash = hashlib.md5(json_content.encode()).hexdigest()
+                mismatch = (file_hash, json_hash) if file_hash != json_hash else None
+
+        if mismatch:
+            statuses.append(SyncStatus(str(filepath), "out-of-sync", *mismatch))
+        else:
+            statuses.append(SyncStatus(str(filepath), "in-sync"))
+    return statuses
+
+
+def print_sync_statuses(statuses: List[SyncStatus]) -> bool:
+    """Print sync statuses and return True if everything is in sync."""
+    for status in statuses:
+        if status.status == "missing":
+            print(f"❌ Missing extracted file: {status.path}")
+        elif status.status == "out-of-sync" and status.message:
+            print(f"❌ Out of sync: {status.message}")
+        elif status.status == "out-of-sync":
+            print(f"❌ Out of sync: {status.path}")
+            print(f"   File hash: {status.file_hash}")
+            print(f"   JSON hash: {status.json_hash}")
+        else:
+            print(f"✅ In sync: {status.path}")
+    return all(status.status == "in-sync" for status in statuses)
+
+
+def check_sync_status(page_dir: str, storage: Optional[Storage] = None) -> bool:
+    """Check if extracted files are in sync with the source JSON."""
+    try:
+        statuses = compare_extracted_literals(page_dir, storage)
+    except FileNotFoundError as e:
+        print(f"❌ {e}")
+        return False
+    return print_sync_statuses(statuses)
 
-    return all_synced
+
+def print_planned_writes(storage: ReadOnlyStorage) -> None:
+    """Summarize the writes a dry run skipped."""
+    print(f"\nDry run: {len(storage.planned_writes)} file(s) would be written")
+    if storage.planned_removals:
+        print(f"         {len(storage.planned_removals)} file(s) would be removed")
+    for line in storage.describe_planned_writes():
+        print(f"  {line}")
 
 
 def main():
@@ -235,36 +634,55 @@ def main():
         print(__doc__)
         sys.exit(1)
 
-    command = sys.argv[1]
-    pattern = sys.argv[2] if len(sys.argv) > 2 else "**/*.json"
+    args, options = parse_options(sys.argv[1:])
+    command = args[0] if args else ""
+    pattern = args[1] if len(args) > 1 else DEFAULT_PATTERN
+
+    # A dry run reads from disk but only records what would be written
+    try:
+        disk = DiskStorage(fsync=options.get("fsync", "always"))
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    storage: Storage = ArchiveStorage(disk)
+    if "dry-run" in options:
+        storage = ReadOnlyStorage(storage)
+    try:
+        jobs = parse_jobs(options.get("jobs"))
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    # Archives are streamed during extraction rather than listed up front
+    streaming = command == "extract" and is_archive(pattern)
 
     # Find JSON files matching pattern
-    json_files = []
-    for file_path in glob.glob(pattern, recursive=True):
-        if file_path.endswith(".json") and not file_path.endswith(
-            "_extraction_map.json"
-        ):
-            # Basic check if it looks like a page definition
-            try:
-                with open(file_path, encoding="utf-8") as f:
-                    data = json.load(f)
-                    if "constantName" in data and "modelView" in data:
-                        json_files.append(file_path)
-            except (json.JSONDecodeError, KeyError):
-                continue
+    roots = parse_roots(options.get("roots"))
+    json_files = [] if streaming else find_page_files(pattern, storage, roots)
 
-    if not json_files:
+    if not json_files and not streaming:
         print(f"No page JSON files found matching pattern: {pattern}")
         sys.exit(1)
 
     output_dir = "extracted_literals"
 
     if command == "extract":
-        print(f"Extracting literals from {len(json_files)} files...")
-        for json_file in json_files:
-            print(f"\nProcessing: {json_file}")
-            extract_literals_from_json(json_file, output_dir)
+        split_mixed = "split-mixed" in options
+        if streaming:
+            print(f"Extracting literals from archive: {pattern}")
+            if not extract_literals_from_archive(
+                pattern, output_dir, storage, jobs, split_mixed
+            ):
+                print(f"No page JSON files found in archive: {pattern}")
+                sys.exit(1)
+        else:
+            print(f"Extracting literals from {len(json_files)} files...")
+            for json_file in json_files:
+                print(f"\nProcessing: {json_file}")
+                extract_literals_from_json(json_file, output_dir, storage, split_mixed)
 
+        compact_manifest(storage)
+        storage.flush()
         print(f"\n✅ Extraction complete! Files saved to: {output_dir}")
         print("You can now edit the extracted HTML/CSS/JS files directly.")
         print("Run 'python extract_literals.py rebuild' to update the JSON files.")
@@ -272,23 +690,78 @@ def main():
     elif command == "rebuild":
         print("Rebuilding JSON files from extracted literals...")
 
-        # Find all page directories
-        for page_dir in Path(output_dir).iterdir():
-            if page_dir.is_dir() and (page_dir / "_extraction_map.json").exists():
-                print(f"\nRebuilding: {page_dir.name}")
-                rebuild_json_from_literals(str(page_dir))
+        transforms: List[Callable[[Dict[str, Any]], None]] = []
+        if "profile" in options:
+            from profiling import instrument_page
+
+            transforms.append(instrument_page)
+        if "request-cache" in options:
+            from request_cache import load_config, make_request_cache_transform
+
+            config_file = options["request-cache"]
+            config = load_config(None if config_file == "true" else config_file)
+            transforms.append(make_request_cache_transform(config))
+        if "optimize-resources" in options:
+            from resource_optimizer import (
+                load_policy,
+                make_resource_optimizer_transform,
+            )
+
+            policy_file = options["optimize-resources"]
+            policy = load_policy(None if policy_file == "true" else policy_file)
+            transforms.append(make_resource_optimizer_transform(policy))
+
+        # Transformed builds go to a separate directory, never over the sources
+        build_dir = options.get("out", "build") if transforms else options.get("out")
+        if build_dir:
+            print(f"Writing build to: {build_dir}")
 
+        # Find all page directories
+        page_dirs = find_extracted_dirs(output_dir, storage)
+        partials = Partials(Path(output_dir) / PARTIALS_DIR, storage)
+        if "partial" in options:
+            # Only the pages that include one of the edited partials
+            changed = set(options["partial"].split(","))
+            try:
+                page_dirs = [
+                    page_dir
+                    for page_dir in page_dirs
+                    if changed & page_partials(page_dir, storage, partials)
+                ]
+            except ValueError as e:
+                print(f"❌ {e}")
+                sys.exit(1)
+            print(f"{len(page_dirs)} page(s) include {', '.join(sorted(changed))}")
+
+        all_rebuilt = True
+        for page_dir in page_dirs:
+            print(f"\nRebuilding: {Path(page_dir).name}")
+            try:
+                rebuild_json_from_literals(
+                    page_dir, transforms, build_dir, storage, partials
+                )
+            except PermissionError as e:
+                print(f"❌ {e}")
+                print("   Use --out=<dir> to rebuild pages extracted from an archive.")
+                all_rebuilt = False
+            except ValueError as e:
+                print(f"❌ {e}")
+                all_rebuilt = False
+
+        storage.flush()
+        if not all_rebuilt:
+            print("\n❌ Some pages could not be rebuilt.")
+            sys.exit(1)
         print("\n✅ Rebuild complete!")
 
     elif command == "check":
         print("Checking sync status...")
 
         all_synced = True
-        for page_dir in Path(output_dir).iterdir():
-            if page_dir.is_dir() and (page_dir / "_extraction_map.json").exists():
-                print(f"\nChecking: {page_dir.name}")
-                if not check_sync_status(str(page_dir)):
-                    all_synced = False
+        for page_dir in find_extracted_dirs(output_dir, storage):
+            print(f"\nChecking: {Path(page_dir).name}")
+            if not check_sync_status(page_dir, storage):
+                all_synced = False
 
         if all_synced:
             print("\n✅ All files are in sync!")
@@ -299,11 +772,29 @@ def main():
             )
             sys.exit(1)
 
+    elif command == "partials":
+        partials = Partials(Path(output_dir) / PARTIALS_DIR, storage)
+        including: Dict[str, List[str]] = {}
+        try:
+            for page_dir in find_extracted_dirs(output_dir, storage):
+                for name in page_partials(page_dir, storage, partials):
+                    including.setdefault(name, []).append(Path(page_dir).name)
+        except ValueError as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+
+        for name, pages in sorted(including.items()):
+            print(f"{name}: {', '.join(sorted(pages))}")
+        print(f"\n✅ {len(including)} partial(s) included by extracted pages")
+
     else:
         print(f"Unknown command: {command}")
         print(__doc__)
         sys.exit(1)
 
+    if isinstance(storage, ReadOnlyStorage):
+        print_planned_writes(storage)
+
 
 if __name__ == "__main__":
     main()
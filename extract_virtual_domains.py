@@ -7,30 +7,166 @@ in JSON files by extracting them into separate, reviewable .sql files.
 
 Usage:
     python extract_virtual_domains.py extract [file_pattern]  # Extract SQL to separate files
+    python extract_virtual_domains.py extract <export.zip>    # Extract straight from a .zip/.tar.gz export
     python extract_virtual_domains.py rebuild [file_pattern]  # Rebuild JSON from extracted files
     python extract_virtual_domains.py check [file_pattern]    # Check if extracted files are in sync
+
+Options:
+    --dry-run      Don't write anything; list the files that would be written
+    --jobs=<n>     Archive members processed in parallel (default: CPU count, max 8)
+    --roots=<dirs> Comma-separated directories to search for virtual domains,
+                   e.g. --roots=virtualDomains (default: everything not ignored
+                   by .gitignore/.pagebuilderignore)
+    --fsync=<when> always (default): fsync every write; end: fsync everything
+                   once the run finishes; never: leave it to the OS. Writes are
+                   atomic renames either way.
+    --out=<dir>    Rebuild into a directory instead of over the source JSON
+                   (required for domains extracted from an archive)
 """
 
-import glob
 import hashlib
 import json
-import os
 import sys
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from discovery import DEFAULT_PATTERN, find_json_files, parse_roots
+from extract_literals import (
+    SyncStatus,
+    find_extracted_dirs,
+    parse_options,
+    print_planned_writes,
+    print_sync_statuses,
+)
+from manifest import (
+    MAP_FILE,
+    compact_manifest,
+    has_extraction_map,
+    read_extraction_map,
+    write_extraction_map,
+)
+from storage import (
+    ArchiveStorage,
+    DiskStorage,
+    ReadOnlyStorage,
+    Storage,
+    is_archive,
+    parse_jobs,
+    process_archive,
+)
+from stream_compare import compare_file_to_text
+
+# SQL code fields that might contain extractable content
+SQL_FIELDS = ["codeGet", "codePost", "codePut", "codeDelete"]
+
+
+def is_virtual_domain(data: Any) -> bool:
+    """Return True if loaded JSON looks like a virtual domain definition."""
+    # Virtual domains have serviceName and at least one of the code fields
+    return (
+        isinstance(data, dict)
+        and "serviceName" in data
+        and any(field in data for field in SQL_FIELDS)
+    )
 
 
-def extract_sql_from_json(json_file: str, output_dir: str) -> Dict[str, Any]:
-    """Extract SQL code blocks from a virtual domain JSON file into separate .sql files."""
+def find_domain_files(
+    pattern: str = DEFAULT_PATTERN,
+    storage: Optional[Storage] = None,
+    roots: Optional[List[str]] = None,
+) -> List[str]:
+    """Find virtual domain JSON files matching a glob pattern.
 
-    with open(json_file, encoding="utf-8") as f:
-        data = json.load(f)
+    The default pattern walks ``roots`` (default: the working directory),
+    skipping anything ignored by ``.gitignore``/``.pagebuilderignore``.
+    """
+    storage = storage or DiskStorage()
+    json_files = []
+    for file_path in find_json_files(pattern, storage, roots):
+        if file_path.endswith(".json") and not file_path.endswith(
+            "_extraction_map.json"
+        ):
+            # Basic check if it looks like a virtual domain definition
+            try:
+                if is_virtual_domain(json.loads(storage.read_text(file_path))):
+                    json_files.append(file_path)
+            except (json.JSONDecodeError, KeyError):
+                continue
+    return json_files
+
+
+def extract_sql_from_json(
+    json_file: str, output_dir: str, storage: Optional[Storage] = None
+) -> Dict[str, Any]:
+    """Extract SQL code blocks from a virtual domain JSON file into separate .sql files."""
+    storage = storage or DiskStorage()
+    with storage.lock(json_file):
+        data = json.loads(storage.read_text(json_file))
+        return extract_sql_from_data(data, json_file, output_dir, storage)
+
+
+def extract_sql_from_archive(
+    archive: str, output_dir: str, storage: Optional[Storage] = None, jobs: int = 1
+) -> List[Dict[str, Any]]:
+    """Extract SQL from every virtual domain in a .zip/.tar.gz export.
+
+    Members are classified and extracted as they are read from the archive;
+    nothing is unpacked to disk. Returns the extraction maps in archive order.
+    """
+    storage = storage or DiskStorage()
+
+    def extract_member(
+        member: str, text: str
+    ) -> Optional[Tuple[List[str], Dict[str, Any]]]:
+        try:
+            data = json.loads(text)
+        except json.JSONDecodeError:
+            return None
+        if not is_virtual_domain(data):
+            return None
+        output = [f"\nProcessing: {member}"]
+        extraction_map = extract_sql_from_data(
+            data, member, output_dir, storage, log=output.append, save_map=False
+        )
+        return output, extraction_map
+
+    # Workers only write the SQL files; their output and the maps are written
+    # here, one domain at a time
+    extraction_maps = []
+    for output, extraction_map in process_archive(
+        archive, extract_member, "**/*.json", jobs
+    ):
+        print("\n".join(output))
+        if extraction_map["sql_blocks"]:
+            domain_dir = Path(output_dir) / extraction_map["service_name"]
+            map_file = write_extraction_map(storage, domain_dir, extraction_map)
+            print(f"Extraction map saved: {map_file}")
+        extraction_maps.append(extraction_map)
+    return extraction_maps
+
+
+def extract_sql_from_data(
+    data: Dict[str, Any],
+    json_file: str,
+    output_dir: str,
+    storage: Optional[Storage] = None,
+    verbose: bool = True,
+    log: Callable[[str], None] = print,
+    save_map: bool = True,
+) -> Dict[str, Any]:
+    """Extract SQL code blocks from already loaded virtual domain JSON.
+
+    ``json_file`` is recorded as the source file to rebuild into. Progress
+    goes to ``log`` when ``verbose``. Without ``save_map`` the map is only
+    returned, for the caller to record with ``write_extraction_map``.
+    """
+    storage = storage or DiskStorage()
 
     service_name = data.get(
         "serviceName", Path(json_file).stem.replace("virtualDomains.", "")
     )
     domain_dir = Path(output_dir) / service_name
-    domain_dir.mkdir(parents=True, exist_ok=True)
+    storage.mkdir(domain_dir)
 
     # Track extracted SQL for rebuilding
     extraction_map = {
@@ -39,10 +175,7 @@ def extract_sql_from_json(json_file: str, output_dir: str) -> Dict[str, Any]:
         "sql_blocks": [],
     }
 
-    # SQL code fields that might contain extractable content
-    sql_fields = ["codeGet", "codePost", "codePut", "codeDelete"]
-
-    for field in sql_fields:
+    for field in SQL_FIELDS:
         sql_content = data.get(field)
         if sql_content and sql_content.strip():
             # Clean up common SQL formatting issues from Banner exports
@@ -52,8 +185,7 @@ def extract_sql_from_json(json_file: str, output_dir: str) -> Dict[str, Any]:
             filepath = domain_dir / filename
 
             # Write the SQL content to file
-            with open(filepath, "w", encoding="utf-8") as f:
-                f.write(cleaned_content)
+            storage.write_text(filepath, cleaned_content)
 
             # Store mapping for rebuilding
             extraction_map["sql_blocks"].append(
@@ -61,115 +193,136 @@ def extract_sql_from_json(json_file: str, output_dir: str) -> Dict[str, Any]:
                     "field": field,
                     "filename": filename,
                     "content_hash": hashlib.md5(cleaned_content.encode()).hexdigest(),
+                    "size": len(cleaned_content.encode()),
                 }
             )
 
-            print(f"Extracted: {filepath}")
+            if verbose:
+                log(f"Extracted: {filepath}")
 
     # Save extraction mapping if we extracted any SQL
-    if extraction_map["sql_blocks"]:
-        map_file = domain_dir / "_extraction_map.json"
-        with open(map_file, "w", encoding="utf-8") as f:
-            json.dump(extraction_map, f, indent=2)
-
-        print(f"Extraction map saved: {map_file}")
-    else:
-        print(f"No SQL content found in: {json_file}")
+    if not extraction_map["sql_blocks"]:
+        if verbose:
+            log(f"No SQL content found in: {json_file}")
+    elif save_map:
+        map_file = write_extraction_map(storage, domain_dir, extraction_map)
+        if verbose:
+            log(f"Extraction map saved: {map_file}")
 
     return extraction_map
 
 
-def rebuild_json_from_sql(domain_dir: str) -> str:
-    """Rebuild JSON file from extracted SQL files."""
+def rebuild_json_from_sql(
+    domain_dir: str,
+    storage: Optional[Storage] = None,
+    output_dir: Optional[str] = None,
+) -> str:
+    """Rebuild JSON file from extracted SQL files.
 
-    domain_path = Path(domain_dir)
-    map_file = domain_path / "_extraction_map.json"
+    With ``output_dir`` the rebuilt JSON is written there (keeping the source
+    file name) instead of over the source file.
+    """
+    storage = storage or DiskStorage()
 
-    if not map_file.exists():
-        raise FileNotFoundError(f"Extraction map not found: {map_file}")
-
-    with open(map_file, encoding="utf-8") as f:
-        extraction_map = json.load(f)
+    domain_path = Path(domain_dir)
+    source_file = read_extraction_map(storage, domain_path)["source_file"]
 
-    source_file = extraction_map["source_file"]
+    # Hold the domain lock from reading the extracted files to writing the result
+    with storage.lock(source_file):
+        # Re-read under the lock in case the domain was re-extracted meanwhile
+        extraction_map = read_extraction_map(storage, domain_path)
 
-    # Load original JSON
-    with open(source_file, encoding="utf-8") as f:
-        data = json.load(f)
+        # Load original JSON
+        data = json.loads(storage.read_text(source_file))
 
-    # Read extracted SQL content back
-    for sql_info in extraction_map["sql_blocks"]:
-        filepath = domain_path / sql_info["filename"]
-        if filepath.exists():
-            with open(filepath, encoding="utf-8") as f:
-                content = f.read()
+        # Read extracted SQL content back
+        for sql_info in extraction_map["sql_blocks"]:
+            filepath = domain_path / sql_info["filename"]
+            if storage.exists(filepath):
                 # Update the JSON with the file content
-                data[sql_info["field"]] = content
+                data[sql_info["field"]] = storage.read_text(filepath)
 
-    # Write updated JSON back
-    with open(source_file, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
+        # Write updated JSON back
+        target_file = (
+            str(Path(output_dir) / Path(source_file).name)
+            if output_dir
+            else source_file
+        )
+        if output_dir:
+            storage.mkdir(output_dir)
+        storage.write_text(target_file, json.dumps(data, indent=2, ensure_ascii=False))
 
-    print(f"Rebuilt: {source_file}")
-    return source_file
+        print(f"Rebuilt: {target_file}")
+        return target_file
 
 
-def check_sync_status(domain_dir: str) -> bool:
-    """Check if extracted SQL files are in sync with the source JSON."""
+def compare_extracted_sql(
+    domain_dir: str, storage: Optional[Storage] = None
+) -> List[SyncStatus]:
+    """Compare each extracted SQL file with the source JSON.
 
-    domain_path = Path(domain_dir)
-    map_file = domain_path / "_extraction_map.json"
+    Raises FileNotFoundError if the extraction map or source file is missing.
+    """
+    storage = storage or DiskStorage()
 
-    if not map_file.exists():
-        print(f"❌ No extraction map found: {map_file}")
-        return False
+    domain_path = Path(domain_dir)
+    if not has_extraction_map(storage, domain_path):
+        raise FileNotFoundError(f"No extraction map found: {domain_path / MAP_FILE}")
 
-    with open(map_file, encoding="utf-8") as f:
-        extraction_map = json.load(f)
+    extraction_map = read_extraction_map(storage, domain_path)
 
     source_file = extraction_map["source_file"]
 
-    if not os.path.exists(source_file):
-        print(f"❌ Source file not found: {source_file}")
-        return False
+    if not storage.exists(source_file):
+        raise FileNotFoundError(f"Source file not found: {source_file}")
 
     # Load current JSON
-    with open(source_file, encoding="utf-8") as f:
-        data = json.load(f)
+    data = json.loads(storage.read_text(source_file))
+    return compare_sql_files(domain_dir, extraction_map, data, storage)
+
+
+def compare_sql_files(
+    domain_dir: str,
+    extraction_map: Dict[str, Any],
+    data: Dict[str, Any],
+    storage: Optional[Storage] = None,
+) -> List[SyncStatus]:
+    """Compare extracted SQL files with the SQL fields of loaded domain JSON."""
+    storage = storage or DiskStorage()
+    domain_path = Path(domain_dir)
 
     # Check each extracted SQL file
-    all_synced = True
+    statuses: List[SyncStatus] = []
     for sql_info in extraction_map["sql_blocks"]:
         filepath = domain_path / sql_info["filename"]
         field = sql_info["field"]
 
-        if not filepath.exists():
-            print(f"❌ Missing extracted file: {filepath}")
-            all_synced = False
+        if not storage.exists(filepath):
+            statuses.append(SyncStatus(str(filepath), "missing"))
             continue
 
-        with open(filepath, encoding="utf-8") as f:
-            file_content = f.read()
-
         json_content = data.get(field, "")
 
-        # Normalize line endings for comparison
-        file_content_normalized = file_content.replace("\r\n", "\n").replace("\r", "\n")
-        json_content_normalized = json_content.replace("\r\n", "\n").replace("\r", "\n")
+        # Line endings are normalized on both sides while streaming
+        mismatch = compare_file_to_text(
+            storage, filepath, json_content, normalize_text=True
+        )
 
-        if file_content_normalized != json_content_normalized:
-            print(f"❌ Out of sync: {filepath}")
-            print(
-                f"   File hash: {hashlib.md5(file_content_normalized.encode()).hexdigest()}"
-            )
-            print(
-                f"   JSON hash: {hashlib.md5(json_content_normalized.encode()).hexdigest()}"
-            )
-            all_synced = False
+        if mismatch:
+            statuses.append(SyncStatus(str(filepath), "out-of-sync", *mismatch))
         else:
-            print(f"✅ In sync: {filepath}")
+            statuses.append(SyncStatus(str(filepath), "in-sync"))
+    return statuses
+
 
-    return all_synced
+def check_sync_status(domain_dir: str, storage: Optional[Storage] = None) -> bool:
+    """Check if extracted SQL files are in sync with the source JSON."""
+    try:
+        statuses = compare_extracted_sql(domain_dir, storage)
+    except FileNotFoundError as e:
+        print(f"❌ {e}")
+        return False
+    return print_sync_statuses(statuses)
 
 
 def main():
@@ -177,40 +330,52 @@ def main():
         print(__doc__)
         sys.exit(1)
 
-    command = sys.argv[1]
-    pattern = sys.argv[2] if len(sys.argv) > 2 else "**/*.json"
+    args, options = parse_options(sys.argv[1:])
+    command = args[0] if args else ""
+    pattern = args[1] if len(args) > 1 else DEFAULT_PATTERN
+
+    # A dry run reads from disk but only records what would be written
+    try:
+        disk = DiskStorage(fsync=options.get("fsync", "always"))
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    storage: Storage = ArchiveStorage(disk)
+    if "dry-run" in options:
+        storage = ReadOnlyStorage(storage)
+    try:
+        jobs = parse_jobs(options.get("jobs"))
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    # Archives are streamed during extraction rather than listed up front
+    streaming = command == "extract" and is_archive(pattern)
 
     # Find virtual domain JSON files matching pattern
-    json_files = []
-    for file_path in glob.glob(pattern, recursive=True):
-        if file_path.endswith(".json") and not file_path.endswith(
-            "_extraction_map.json"
-        ):
-            # Basic check if it looks like a virtual domain definition
-            try:
-                with open(file_path, encoding="utf-8") as f:
-                    data = json.load(f)
-                    # Virtual domains have serviceName and at least one of the code fields
-                    if "serviceName" in data and any(
-                        field in data
-                        for field in ["codeGet", "codePost", "codePut", "codeDelete"]
-                    ):
-                        json_files.append(file_path)
-            except (json.JSONDecodeError, KeyError):
-                continue
+    roots = parse_roots(options.get("roots"))
+    json_files = [] if streaming else find_domain_files(pattern, storage, roots)
 
-    if not json_files:
+    if not json_files and not streaming:
         print(f"No virtual domain JSON files found matching pattern: {pattern}")
         sys.exit(1)
 
     output_dir = "extracted_virtual_domains"
 
     if command == "extract":
-        print(f"Extracting SQL from {len(json_files)} virtual domain files...")
-        for json_file in json_files:
-            print(f"\nProcessing: {json_file}")
-            extract_sql_from_json(json_file, output_dir)
+        if streaming:
+            print(f"Extracting SQL from archive: {pattern}")
+            if not extract_sql_from_archive(pattern, output_dir, storage, jobs):
+                print(f"No virtual domain JSON files found in archive: {pattern}")
+                sys.exit(1)
+        else:
+            print(f"Extracting SQL from {len(json_files)} virtual domain files...")
+            for json_file in json_files:
+                print(f"\nProcessing: {json_file}")
+                extract_sql_from_json(json_file, output_dir, storage)
 
+        compact_manifest(storage)
+        storage.flush()
         print(f"\n✅ Extraction complete! Files saved to: {output_dir}")
         print("You can now edit the extracted .sql files directly.")
         print(
@@ -221,22 +386,32 @@ def main():
         print("Rebuilding JSON files from extracted SQL...")
 
         # Find all domain directories
-        for domain_dir in Path(output_dir).iterdir():
-            if domain_dir.is_dir() and (domain_dir / "_extraction_map.json").exists():
-                print(f"\nRebuilding: {domain_dir.name}")
-                rebuild_json_from_sql(str(domain_dir))
-
+        all_rebuilt = True
+        for domain_dir in find_extracted_dirs(output_dir, storage):
+            print(f"\nRebuilding: {Path(domain_dir).name}")
+            try:
+                rebuild_json_from_sql(domain_dir, storage, options.get("out"))
+            except PermissionError as e:
+                print(f"❌ {e}")
+                print(
+                    "   Use --out=<dir> to rebuild domains extracted from an archive."
+                )
+                all_rebuilt = False
+
+        storage.flush()
+        if not all_rebuilt:
+            print("\n❌ Some virtual domains could not be rebuilt.")
+            sys.exit(1)
         print("\n✅ Rebuild complete!")
 
     elif command == "check":
         print("Checking sync status...")
 
         all_synced = True
-        for domain_dir in Path(output_dir).iterdir():
-            if domain_dir.is_dir() and (domain_dir / "_extraction_map.json").exists():
-                print(f"\nChecking: {domain_dir.name}")
-                if not check_sync_status(str(domain_dir)):
-                    all_synced = False
+        for domain_dir in find_extracted_dirs(output_dir, storage):
+            print(f"\nChecking: {Path(domain_dir).name}")
+            if not check_sync_status(domain_dir, storage):
+                all_synced = False
 
         if all_synced:
             print("\n✅ All files are in sync!")
@@ -252,6 +427,9 @@ def main():
         print(__doc__)
         sys.exit(1)
 
+    if isinstance(storage, ReadOnlyStorage):
+        print_planned_writes(storage)
+
 
 if __name__ == "__main__":
     main()
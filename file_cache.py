@@ -0,0 +1,120 @@
+"""
+Incremental updates for the SQLite caches built from JSON files.
+
+``search_index.py`` and ``catalog.py`` both keep derived rows for every
+scanned file and bring them up to date the same way: files whose size and
+modification time are unchanged are skipped without being read, files whose
+content hash is unchanged only get their new stat recorded, and a changed
+file's rows are removed and added again. Each cache supplies the callbacks
+that remove and add a file's rows; the shared ``files`` table is kept here:
+
+    conn = open_cache(db_file, FILES_SCHEMA + SCHEMA, SCHEMA_VERSION, TABLES)
+    counts = update_files(conn, file_paths, add_rows, remove_rows)
+"""
+
+import hashlib
+import os
+import sqlite3
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+FILES_SCHEMA = """
+CREATE TABLE files (
+    path TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    hash TEXT NOT NULL
+);
+"""
+
+# Called with the connection, a file's path and (for adding) its content
+AddRows = Callable[[sqlite3.Connection, str, str], None]
+RemoveRows = Callable[[sqlite3.Connection, str], None]
+
+
+def open_cache(
+    db_file: str, schema: str, version: int, tables: List[str]
+) -> sqlite3.Connection:
+    """Open a cache, (re)creating it if it is missing or from another version.
+
+    ``tables`` are dropped in order when the schema version changes.
+    """
+    if db_file != ":memory:":
+        Path(db_file).parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(db_file)
+    if conn.execute("PRAGMA user_version").fetchone()[0] != version:
+        with conn:
+            for table in tables:
+                conn.execute(f"DROP TABLE IF EXISTS {table}")
+            conn.executescript(schema)
+            conn.execute(f"PRAGMA user_version = {version}")
+    return conn
+
+
+def update_files(
+    conn: sqlite3.Connection,
+    file_paths: List[str],
+    add: AddRows,
+    remove: Optional[RemoveRows] = None,
+) -> Dict[str, int]:
+    """Bring a cache up to date with ``file_paths``.
+
+    A file's ``files`` row is inserted before ``add`` is called (so other
+    tables can reference it) and deleted after ``remove``. Every file is
+    recorded, even one ``add`` adds nothing for, so it is skipped next time.
+    Returns counts of ``added``, ``updated``, ``removed`` and ``unchanged``
+    files.
+    """
+    counts = {"added": 0, "updated": 0, "removed": 0, "unchanged": 0}
+    cached = {
+        path: (mtime_ns, size, file_hash)
+        for path, mtime_ns, size, file_hash in conn.execute(
+            "SELECT path, mtime_ns, size, hash FROM files"
+        )
+    }
+
+    def remove_file(path: str) -> None:
+        if remove is not None:
+            remove(conn, path)
+        conn.execute("DELETE FROM files WHERE path = ?", (path,))
+
+    with conn:
+        for path in sorted(set(cached) - set(file_paths)):
+            remove_file(path)
+            counts["removed"] += 1
+
+        for path in file_paths:
+            if path.endswith("_extraction_map.json"):
+                continue
+            stat = os.stat(path)
+            previous = cached.get(path)
+            if previous and previous[:2] == (stat.st_mtime_ns, stat.st_size):
+                counts["unchanged"] += 1
+                continue
+
+            try:
+                with open(path, encoding="utf-8") as f:
+                    content = f.read()
+            except UnicodeDecodeError:
+                content = ""
+            content_hash = hashlib.md5(content.encode()).hexdigest()
+
+            if previous and previous[2] == content_hash:
+                # Touched but not changed: just remember the new stat
+                conn.execute(
+                    "UPDATE files SET mtime_ns = ?, size = ? WHERE path = ?",
+                    (stat.st_mtime_ns, stat.st_size, path),
+                )
+                counts["unchanged"] += 1
+                continue
+
+            if previous:
+                remove_file(path)
+            conn.execute(
+                "INSERT INTO files (path, mtime_ns, size, hash) VALUES (?, ?, ?, ?)",
+                (path, stat.st_mtime_ns, stat.st_size, content_hash),
+            )
+            add(conn, path, content)
+            counts["updated" if previous else "added"] += 1
+
+    return counts
@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""
+Script to resolve ``extendsPage`` inheritance into effective pages.
+
+A page that extends another renders the base page's components first, then
+its own; a top-level component with the same name as an inherited one
+replaces it in place. Bases can extend pages in turn. ``Resolver`` follows
+these chains and builds each page's effective component tree, so tools that
+look at one page at a time can see what it inherits:
+
+    resolver = Resolver(pages)              # constantName -> page data
+    for name in resolver.order():           # bases before the pages extending them
+        effective = resolver.resolve(name)  # EffectivePage(data, origins, chain)
+
+Each ancestor is resolved once and shared by every page extending it.
+``update`` replaces a page and drops only the cached pages that inherit from
+it. Pages extending a missing page, or caught in a cycle, raise ValueError
+from ``resolve`` and are listed by ``problems``. Effective pages share
+component dicts with the pages they were built from; copy before modifying.
+
+``resolve`` writes every page's effective version to ``effective/`` so the
+other tools can scan them, e.g.
+``python load_analyzer.py analyze --roots=effective,virtualDomains``.
+
+Usage:
+    python inheritance.py resolve [file_pattern]  # Write effective pages
+    python inheritance.py tree [file_pattern]     # Show the inheritance tree
+
+Options:
+    --out=<dir>        Where effective pages are written (default: effective)
+    --roots=<dirs>     Comma-separated directories to search for pages (default:
+                       everything not ignored by .gitignore/.pagebuilderignore)
+"""
+
+import heapq
+import json
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional, Set, Tuple
+
+from discovery import DEFAULT_PATTERN, parse_roots
+from extract_literals import find_page_files, parse_options
+
+DEFAULT_OUT_DIR = "effective"
+
+
+class EffectivePage(NamedTuple):
+    name: str
+    data: Dict[str, Any]
+    # The page each top-level component comes from
+    origins: List[str]
+    # The page's ancestors, nearest first
+    chain: Tuple[str, ...]
+
+
+def extends_page(data: Dict[str, Any]) -> Optional[str]:
+    """Return the constantName of the page a page extends, if any."""
+    parent = data.get("extendsPage")
+    if isinstance(parent, dict):
+        parent = parent.get("constantName")
+    return parent or None
+
+
+def ancestors(parents: Dict[str, Optional[str]], name: str) -> Tuple[str, ...]:
+    """Return a page's ancestors, nearest first.
+
+    Raises ValueError for a missing parent or a cycle.
+    """
+    chain: List[str] = []
+    seen = {name}
+    parent = parents[name]
+    while parent is not None:
+        if parent not in parents:
+            extended_by = chain[-1] if chain else name
+            raise ValueError(f"{extended_by} extends missing page {parent}")
+        if parent in seen:
+            path = [name] + chain + [parent]
+            raise ValueError(f"extendsPage cycle: {' -> '.join(path)}")
+        chain.append(parent)
+        seen.add(parent)
+        parent = parents[parent]
+    return tuple(chain)
+
+
+def inheritance_problems(parents: Dict[str, Optional[str]]) -> Dict[str, str]:
+    """Return the pages whose chain is broken, with the reason."""
+    problems = {}
+    for name in sorted(parents):
+        try:
+            ancestors(parents, name)
+        except ValueError as e:
+            problems[name] = str(e)
+    return problems
+
+
+def merge_components(
+    inherited: List[Dict[str, Any]],
+    origins: List[str],
+    own: List[Dict[str, Any]],
+    name: str,
+) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """Return inherited components followed by a page's own, with origins."""
+    components = list(inherited)
+    merged_origins = list(origins)
+    positions = {c.get("name"): i for i, c in enumerate(components) if c.get("name")}
+    for component in own:
+        position = positions.pop(component.get("name"), None)
+        if position is None:
+            components.append(component)
+            merged_origins.append(name)
+        else:
+            components[position] = component
+            merged_origins[position] = name
+    return components, merged_origins
+
+
+class Resolver:
+    """Resolves pages into effective pages, memoizing each ancestor."""
+
+    def __init__(self, pages: Optional[Dict[str, Dict[str, Any]]] = None):
+        self.pages: Dict[str, Dict[str, Any]] = {}
+        self.parents: Dict[str, Optional[str]] = {}
+        self.children: Dict[str, Set[str]] = {}
+        self._resolved: Dict[str, EffectivePage] = {}
+        for name, data in (pages or {}).items():
+            self.update(name, data)
+
+    def update(self, name: str, data: Optional[Dict[str, Any]]) -> Set[str]:
+        """Replace (or with None, remove) a page.
+
+        Returns the pages whose cached effective version was dropped: the
+        page and every page inheriting from it.
+        """
+        invalidated = self.descendants(name) | {name}
+        for page in invalidated:
+            self._resolved.pop(page, None)
+
+        old_parent = self.parents.pop(name, None)
+        if old_parent is not None:
+            self.children.get(old_parent, set()).discard(name)
+        self.pages.pop(name, None)
+        if data is not None:
+            parent = extends_page(data)
+            self.pages[name] = data
+            self.parents[name] = parent
+            if parent is not None:
+                self.children.setdefault(parent, set()).add(name)
+        return invalidated
+
+    def descendants(self, name: str) -> Set[str]:
+        """Return every page inheriting from ``name``, directly or not."""
+        found: Set[str] = set()
+        pending = [name]
+        while pending:
+            for child in self.children.get(pending.pop(), ()):
+                if child not in found:
+                    found.add(child)
+                    pending.append(child)
+        return found
+
+    def problems(self) -> Dict[str, str]:
+        return inheritance_problems(self.parents)
+
+    def order(self) -> List[str]:
+        """Return the resolvable pages, each after the page it extends.
+
+        Pages that are ready at the same time come in name order, so the
+        order is stable.
+        """
+        problems = self.problems()
+        ready = [n for n in self.pages if self.parents[n] is None]
+        heapq.heapify(ready)
+        ordered = []
+        while ready:
+            name = heapq.heappop(ready)
+            ordered.append(name)
+            for child in self.children.get(name, ()):
+                if child not in problems:
+                    heapq.heappush(ready, child)
+        return ordered
+
+    def resolve(self, name: str) -> EffectivePage:
+        """Return a page's effective version, resolving its ancestors first."""
+        if name in self._resolved:
+            return self._resolved[name]
+        if name not in self.pages:
+            raise KeyError(name)
+        chain = ancestors(self.parents, name)
+
+        # Walk down from the furthest ancestor that isn't resolved yet
+        pending = [name]
+        for ancestor in chain:
+            if ancestor in self._resolved:
+                break
+            pending.append(ancestor)
+        for page in reversed(pending):
+            self._resolved[page] = self._build(page)
+        return self._resolved[name]
+
+    def _build(self, name: str) -> EffectivePage:
+        data = self.pages[name]
+        model_view = data.get("modelView") or {}
+        own = model_view.get("components") or []
+        parent = self.parents[name]
+        if parent is None:
+            return EffectivePage(name, data, [name] * len(own), ())
+
+        base = self._resolved[parent]
+        base_components = base.data.get("modelView", {}).get("components") or []
+        components, origins = merge_components(base_components, base.origins, own, name)
+        # The effective page is self-contained
+        effective = dict(data, extendsPage=None)
+        effective["modelView"] = dict(model_view, components=components)
+        return EffectivePage(name, effective, origins, (parent,) + base.chain)
+
+
+def load_pages(json_files: List[str]) -> Tuple[Resolver, Dict[str, str]]:
+    """Load page files into a resolver, returning it and each page's file."""
+    resolver = Resolver()
+    sources = {}
+    for json_file in json_files:
+        with open(json_file, encoding="utf-8") as f:
+            data = json.load(f)
+        name = data.get("constantName") or Path(json_file).stem
+        resolver.update(name, data)
+        sources[name] = json_file
+    return resolver, sources
+
+
+def print_tree(resolver: Resolver, name: str, depth: int = 0) -> None:
+    components = resolver.pages[name].get("modelView", {}).get("components") or []
+    print(f"{'  ' * depth}{name} ({len(components)} components)")
+    for child in sorted(resolver.children.get(name, ())):
+        print_tree(resolver, child, depth + 1)
+
+
+def main():
+    args, options = parse_options(sys.argv[1:])
+    if not args:
+        print(__doc__)
+        sys.exit(1)
+
+    command = args[0]
+    pattern = args[1] if len(args) > 1 else DEFAULT_PATTERN
+
+    if command not in ("resolve", "tree"):
+        print(f"Unknown command: {command}")
+        print(__doc__)
+        sys.exit(1)
+
+    json_files = find_page_files(pattern, roots=parse_roots(options.get("roots")))
+    if not json_files:
+        print(f"No page JSON files found matching pattern: {pattern}")
+        sys.exit(1)
+    resolver, sources = load_pages(json_files)
+    problems = resolver.problems()
+
+    if command == "tree":
+        for name in sorted(resolver.pages):
+            if resolver.parents[name] is None:
+                print_tree(resolver, name)
+    else:
+        out_dir = Path(options.get("out", DEFAULT_OUT_DIR))
+        out_dir.mkdir(parents=True, exist_ok=True)
+        for name in resolver.order():
+            effective = resolver.resolve(name)
+            out_file = out_dir / Path(sources[name]).name
+            out_file.write_text(
+                json.dumps(effective.data, indent=3, ensure_ascii=False),
+                encoding="utf-8",
+            )
+            if effective.chain:
+                inherited = sum(origin != name for origin in effective.origins)
+                print(
+                    f"{name}: extends {' -> '.join(effective.chain)} "
+                    f"({inherited} of {len(effective.origins)} components inherited)"
+                )
+
+    for name, problem in problems.items():
+        print(f"❌ {sources[name]}: {problem}")
+    if problems:
+        sys.exit(1)
+    if command == "resolve":
+        print(f"\n✅ Resolved {len(resolver.pages)} page(s) into {out_dir}")
+
+
+if __name__ == "__main__":
+    main()
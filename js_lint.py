@@ -0,0 +1,752 @@
+#!/usr/bin/env python3
+"""
+Script to lint page JavaScript literals for runtime performance anti-patterns.
+
+Every literal that is JavaScript or has inline scripts (see
+``content_sniffer.py``) is tokenized with a small pure-Python JavaScript
+tokenizer (inline ``<script>`` blocks are linted on their own; external
+``<script src>`` tags are skipped) and checked for these patterns:
+
+    jquery-lookup-in-loop  $("selector") inside a $.each/.each callback or a
+                           for/while loop body - the DOM is queried on every
+                           iteration
+    rebind-in-callback     Event handlers bound inside a .done/.then/.always/
+                           .fail callback - every redraw adds another handler
+    implicit-global        Assignment to a name that is never declared in any
+                           enclosing function or at page level
+    reload-navigation      window.open(..., "_self") or location.reload() -
+                           a full page reload instead of updating in place
+
+Findings are reported with the page file, component path, extracted file name
+and line/column (lines match the extracted file in extracted_literals/).
+
+Suppress findings with JavaScript comments:
+
+    // pblint-disable-line implicit-global         (this line)
+    // pblint-disable-next-line reload-navigation  (the next line)
+    /* pblint-disable rebind-in-callback */ ... /* pblint-enable */  (a range)
+
+Omit the rule name to suppress every rule; separate several with commas.
+
+Usage:
+    python js_lint.py lint [file_pattern]  # Lint JS literals in page JSON files
+
+Options:
+    --roots=<dirs> Comma-separated directories to search for pages (default:
+                   everything not ignored by .gitignore/.pagebuilderignore)
+"""
+
+import json
+import re
+import sys
+from typing import Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from content_sniffer import classify_literal
+from discovery import DEFAULT_PATTERN, parse_roots
+from extract_literals import find_page_files, get_file_extension, parse_options
+from page_transforms import SCRIPT_BLOCK_RE, is_inline_script, iter_literals
+
+
+class Token(NamedTuple):
+    """A JavaScript token. ``kind`` is one of name, number, string, template,
+    regex, punct or comment; ``line`` and ``col`` are 1-based."""
+
+    kind: str
+    value: str
+    line: int
+    col: int
+
+
+class LintFinding(NamedTuple):
+    """A lint finding within one script, positioned relative to that script."""
+
+    rule: str
+    message: str
+    line: int
+    col: int
+
+
+NAME_RE = re.compile(r"[A-Za-z_$\u00a0-\uffff][\w$\u00a0-\uffff]*")
+NUMBER_RE = re.compile(
+    r"0[xXbBoO][\da-fA-F_]+n?|(?:\d[\d_]*\.?[\d_]*|\.\d[\d_]*)(?:[eE][+-]?\d+)?n?"
+)
+PUNCTUATORS = sorted(
+    """>>>= ... === !== **= <<= >>= >>> &&= ||= ??= => == != <= >= && || ?? ?.
+    ++ -- += -= *= /= %= &= |= ^= << >> ** { } ( ) [ ] ; , < > + - * / % & | ^
+    ! ~ ? : = . @ #""".split(),
+    key=len,
+    reverse=True,
+)
+
+# After these keywords a "/" starts a regular expression, not a division
+REGEX_KEYWORDS = {
+    "return",
+    "typeof",
+    "case",
+    "do",
+    "else",
+    "in",
+    "instanceof",
+    "new",
+    "delete",
+    "void",
+    "throw",
+    "yield",
+    "await",
+}
+
+
+def tokenize_js(source: str) -> List[Token]:
+    """Split JavaScript source into tokens, including comments.
+
+    This is a lightweight tokenizer for linting: it understands strings,
+    template literals (including nested ``${...}``), comments, regular
+    expression literals and punctuators, but does not validate syntax.
+    """
+    tokens: List[Token] = []
+    pos = 0
+    line = 1
+    line_start = 0
+    length = len(source)
+    last_significant: Optional[Token] = None
+
+    def regex_allowed() -> bool:
+        if last_significant is None:
+            return True
+        if last_significant.kind == "punct":
+            return last_significant.value not in (")", "]", "}")
+        return (
+            last_significant.kind == "name" and last_significant.value in REGEX_KEYWORDS
+        )
+
+    while pos < length:
+        char = source[pos]
+
+        if char == "\n":
+            pos += 1
+            line += 1
+            line_start = pos
+            continue
+        if char.isspace():
+            pos += 1
+            continue
+
+        start = pos
+        col = pos - line_start + 1
+
+        if source.startswith("//", pos):
+            end = source.find("\n", pos)
+            pos = length if end == -1 else end
+            kind = "comment"
+        elif source.startswith("/*", pos):
+            end = source.find("*/", pos + 2)
+            pos = length if end == -1 else end + 2
+            kind = "comment"
+        elif char in "'\"":
+            pos += 1
+            while pos < length and source[pos] != char and source[pos] != "\n":
+                pos += 2 if source[pos] == "\\" else 1
+            pos = min(pos + 1, length)
+            kind = "string"
+        elif char == "`":
+            pos += 1
+            depth = 0
+            while pos < length:
+                current = source[pos]
+                if current == "\\":
+                    pos += 2
+                    continue
+                if depth == 0 and current == "`":
+                    break
+                if source.startswith("${", pos):
+                    depth += 1
+                    pos += 2
+                    continue
+                if depth and current == "{":
+                    depth += 1
+                elif depth and current == "}":
+                    depth -= 1
+                pos += 1
+            pos = min(pos + 1, length)
+            kind = "template"
+        elif char == "/" and regex_allowed():
+            pos += 1
+            in_class = False
+            while pos < length and source[pos] != "\n":
+                current = source[pos]
+                if current == "\\":
+                    pos += 2
+                    continue
+                if current == "[":
+                    in_class = True
+                elif current == "]":
+                    in_class = False
+                elif current == "/" and not in_class:
+                    break
+                pos += 1
+            pos += 1
+            while pos < length and (source[pos].isalnum() or source[pos] == "_"):
+                pos += 1
+            kind = "regex"
+        elif char.isdigit() or (char == "." and source[pos + 1 : pos + 2].isdigit()):
+            match = NUMBER_RE.match(source, pos)
+            pos = match.end() if match else pos + 1
+            kind = "number"
+        else:
+            match = NAME_RE.match(source, pos)
+            if match:
+                pos = match.end()
+                kind = "name"
+            else:
+                for punct in PUNCTUATORS:
+                    if source.startswith(punct, pos):
+                        pos += len(punct)
+                        break
+                else:
+                    pos += 1
+                kind = "punct"
+
+        value = source[start:pos]
+        token = Token(kind, value, line, col)
+        tokens.append(token)
+        if kind != "comment":
+            last_significant = token
+
+        newlines = value.count("\n")
+        if newlines:
+            line += newlines
+            line_start = start + value.rfind("\n") + 1
+
+    return tokens
+
+
+SUPPRESSION_RE = re.compile(
+    r"pblint-(disable-next-line|disable-line|disable|enable)\b([ \t\w,-]*)"
+)
+
+
+def parse_suppressions(
+    tokens: Iterable[Token],
+) -> Tuple[
+    Dict[int, Optional[FrozenSet[str]]], List[Tuple[int, int, Optional[FrozenSet[str]]]]
+]:
+    """Collect suppression comments.
+
+    Returns per-line suppressions and ``(first_line, last_line, rules)``
+    ranges. A rules value of None means every rule.
+    """
+    lines: Dict[int, Optional[FrozenSet[str]]] = {}
+    ranges: List[Tuple[int, int, Optional[FrozenSet[str]]]] = []
+    open_ranges: List[Tuple[int, Optional[FrozenSet[str]]]] = []
+
+    for token in tokens:
+        if token.kind != "comment":
+            continue
+        for match in SUPPRESSION_RE.finditer(token.value):
+            directive = match.group(1)
+            names = [n.strip() for n in match.group(2).split(",") if n.strip()]
+            rules = frozenset(names) if names else None
+
+            if directive == "disable-line":
+                lines[token.line] = rules
+            elif directive == "disable-next-line":
+                lines[token.line + token.value.count("\n") + 1] = rules
+            elif directive == "disable":
+                open_ranges.append((token.line, rules))
+            else:
+                for start, range_rules in open_ranges:
+                    ranges.append((start, token.line, range_rules))
+                open_ranges = []
+
+    for start, range_rules in open_ranges:
+        ranges.append((start, sys.maxsize, range_rules))
+    return lines, ranges
+
+
+def is_suppressed(
+    finding: LintFinding,
+    lines: Dict[int, Optional[FrozenSet[str]]],
+    ranges: List[Tuple[int, int, Optional[FrozenSet[str]]]],
+) -> bool:
+    """Return True if a finding is covered by a suppression comment."""
+    if finding.line in lines:
+        rules = lines[finding.line]
+        if rules is None or finding.rule in rules:
+            return True
+    return any(
+        start <= finding.line <= end and (rules is None or finding.rule in rules)
+        for start, end, rules in ranges
+    )
+
+
+LOOP_METHODS = {"each"}
+CALLBACK_METHODS = {"done", "then", "always", "fail", "catch", "success", "complete"}
+BIND_METHODS = {
+    "on",
+    "one",
+    "bind",
+    "delegate",
+    "live",
+    "click",
+    "dblclick",
+    "change",
+    "submit",
+    "input",
+    "keyup",
+    "keydown",
+    "keypress",
+    "focus",
+    "blur",
+    "hover",
+    "mouseenter",
+    "mouseleave",
+    "mouseover",
+    "mouseout",
+    "addEventListener",
+}
+DECLARATION_KEYWORDS = {"var", "let", "const"}
+
+# Browser globals that pages legitimately assign to (or that always exist)
+KNOWN_GLOBALS = {
+    "window",
+    "document",
+    "location",
+    "console",
+    "navigator",
+    "history",
+    "localStorage",
+    "sessionStorage",
+    "performance",
+    "$",
+    "jQuery",
+    "undefined",
+    "arguments",
+    "this",
+    "onload",
+    "onerror",
+}
+
+
+class Frame(NamedTuple):
+    """An open bracket during scope analysis: the scope to restore when it
+    closes, and the new scope its parameters belong to for a function's
+    parameter list."""
+
+    scope: int
+    params_scope: Optional[int]
+
+
+def declared_top_level_names(source: str) -> Set[str]:
+    """Return the names a script declares at its top level (page globals)."""
+    scopes, _ = analyze_scopes([t for t in tokenize_js(source) if t.kind != "comment"])
+    return scopes[0][1]
+
+
+def analyze_scopes(
+    tokens: List[Token],
+) -> Tuple[List[Tuple[int, Set[str]]], List[Tuple[Token, int]]]:
+    """Build function scopes and find plain assignments to bare names.
+
+    Returns ``(scopes, assignments)``: ``scopes[i]`` is ``(parent, names)``
+    with scope 0 the script's top level, and each assignment is
+    ``(name_token, scope)``. Blocks do not create scopes; ``let``/``const`` are
+    treated like ``var``.
+    """
+    scopes: List[Tuple[int, Set[str]]] = [(-1, set())]
+    assignments: List[Tuple[Token, int]] = []
+    stack: List[Frame] = []
+    scope = 0
+    pending_body_scope: Optional[int] = None
+    declaring_depth: Optional[int] = None
+    last_paren_params: List[str] = []
+
+    def new_scope(parent: int) -> int:
+        scopes.append((parent, set()))
+        return len(scopes) - 1
+
+    for i, token in enumerate(tokens):
+        value = token.value
+        prev = tokens[i - 1] if i else None
+        nxt = tokens[i + 1] if i + 1 < len(tokens) else None
+
+        if token.kind == "punct" and value in "({[":
+            params_scope = None
+            if value == "(" and prev is not None:
+                # function name(...) / function (...)
+                if prev.value == "function" or (
+                    i >= 2 and tokens[i - 2].value == "function" and prev.kind == "name"
+                ):
+                    params_scope = new_scope(scope)
+            body_scope = scope
+            if value == "{" and pending_body_scope is not None:
+                body_scope = pending_body_scope
+            pending_body_scope = None
+            stack.append(Frame(scope, params_scope))
+            scope = body_scope
+            continue
+
+        if token.kind == "punct" and value in ")}]":
+            if stack:
+                frame = stack.pop()
+                scope = frame.scope
+                if value == ")":
+                    if frame.params_scope is not None:
+                        pending_body_scope = frame.params_scope
+                    last_paren_params = collect_params(tokens, i)
+            if declaring_depth is not None and len(stack) < declaring_depth:
+                declaring_depth = None
+            continue
+
+        if token.kind == "punct" and value == "=>":
+            arrow_scope = new_scope(scope)
+            params = [prev.value] if prev and prev.kind == "name" else last_paren_params
+            scopes[arrow_scope][1].update(params)
+            if nxt is not None and nxt.value == "{":
+                pending_body_scope = arrow_scope
+            else:
+                scopes[scope][1].update(params)
+            continue
+
+        if token.kind == "punct" and value == ";" and declaring_depth == len(stack):
+            declaring_depth = None
+            continue
+
+        if token.kind != "name":
+            continue
+
+        if stack and stack[-1].params_scope is not None:
+            # Parameters of a function being declared
+            if prev is not None and prev.value in ("(", ",", "...", "{", "["):
+                scopes[stack[-1].params_scope][1].add(value)
+            continue
+
+        if value in DECLARATION_KEYWORDS:
+            declaring_depth = len(stack)
+            if nxt is not None and nxt.kind == "name":
+                scopes[scope][1].add(nxt.value)
+            continue
+        if value in ("function", "class") and nxt is not None and nxt.kind == "name":
+            scopes[scope][1].add(nxt.value)
+            continue
+        if value == "catch" and i + 2 < len(tokens) and tokens[i + 2].kind == "name":
+            scopes[scope][1].add(tokens[i + 2].value)
+            continue
+
+        if declaring_depth == len(stack) and prev is not None and prev.value == ",":
+            scopes[scope][1].add(value)
+            continue
+        if (
+            declaring_depth == len(stack)
+            and prev is not None
+            and prev.kind != "punct"
+            and prev.value not in DECLARATION_KEYWORDS
+            and token.line > prev.line
+        ):
+            # A new statement on a new line without a semicolon ends it
+            declaring_depth = None
+
+        if (
+            nxt is not None
+            and nxt.value == "="
+            and (
+                prev is None
+                or prev.value not in (".", "?.")
+                and prev.value not in DECLARATION_KEYWORDS
+            )
+        ):
+            assignments.append((token, scope))
+
+    return scopes, assignments
+
+
+def collect_params(tokens: List[Token], close_index: int) -> List[str]:
+    """Return names directly inside the parenthesized group closing at an index."""
+    depth = 0
+    names = []
+    for j in range(close_index - 1, -1, -1):
+        token = tokens[j]
+        if token.value in (")", "]", "}"):
+            depth += 1
+        elif token.value in ("(", "[", "{"):
+            if depth == 0:
+                break
+            depth -= 1
+        elif (
+            token.kind == "name" and j > 0 and tokens[j - 1].value in ("(", ",", "...")
+        ):
+            if depth == 0:
+                names.append(token.value)
+    return names
+
+
+def lint_script(source: str, page_globals: Iterable[str] = ()) -> List[LintFinding]:
+    """Lint one piece of JavaScript, returning findings not suppressed by comments.
+
+    ``page_globals`` are names declared at top level by other scripts on the
+    same page; assigning to them is not an implicit global.
+    """
+    all_tokens = tokenize_js(source)
+    tokens = [t for t in all_tokens if t.kind != "comment"]
+    findings: List[LintFinding] = []
+
+    # Pass 1: bracket contexts for loops, callbacks and navigation calls.
+    # Each open bracket carries the tags it adds ("loop", "callback", ...).
+    stack: List[FrozenSet[str]] = []
+    pending_tags: FrozenSet[str] = frozenset()
+
+    def active_tags() -> Set[str]:
+        tags: Set[str] = set()
+        for frame_tags in stack:
+            tags |= frame_tags
+        return tags
+
+    for i, token in enumerate(tokens):
+        value = token.value
+        prev = tokens[i - 1] if i else None
+        prev2 = tokens[i - 2] if i >= 2 else None
+        nxt = tokens[i + 1] if i + 1 < len(tokens) else None
+
+        if token.kind == "punct" and value in "({[":
+            tags: Set[str] = set()
+            if value == "(" and prev is not None and prev2 is not None:
+                if prev2.value == "." and prev.value in LOOP_METHODS:
+                    tags.add("loop")
+                elif prev2.value == "." and prev.value in CALLBACK_METHODS:
+                    tags.add("callback")
+            if value == "(" and prev is not None and prev.value in ("for", "while"):
+                tags.add("loop-header")
+            if value == "{" and pending_tags:
+                tags |= pending_tags
+            pending_tags = frozenset()
+            stack.append(frozenset(tags))
+            continue
+
+        if token.kind == "punct" and value in ")}]":
+            if stack and "loop-header" in stack.pop():
+                pending_tags = frozenset({"loop"})
+            continue
+
+        if (
+            token.kind == "name"
+            and value == "do"
+            and nxt is not None
+            and nxt.value == "{"
+        ):
+            pending_tags = frozenset({"loop"})
+            continue
+
+        is_member = prev is not None and prev.value in (".", "?.")
+
+        if (
+            token.kind == "name"
+            and value in ("$", "jQuery")
+            and not is_member
+            and nxt is not None
+            and nxt.value == "("
+            and i + 2 < len(tokens)
+            and tokens[i + 2].kind in ("string", "template")
+            and "loop" in active_tags()
+        ):
+            findings.append(
+                LintFinding(
+                    "jquery-lookup-in-loop",
+                    f"{value}({tokens[i + 2].value}) is looked up on every "
+                    "iteration; query it once before the loop",
+                    token.line,
+                    token.col,
+                )
+            )
+
+        if (
+            token.kind == "name"
+            and value in BIND_METHODS
+            and is_member
+            and nxt is not None
+            and nxt.value == "("
+            and i + 2 < len(tokens)
+            and tokens[i + 2].value != ")"
+            and "callback" in active_tags()
+        ):
+            findings.append(
+                LintFinding(
+                    "rebind-in-callback",
+                    f".{value}(...) binds a handler inside a request callback; "
+                    "it is bound again on every redraw - bind once outside "
+                    "or use a delegated handler",
+                    token.line,
+                    token.col,
+                )
+            )
+
+        if token.kind == "name" and nxt is not None and nxt.value == "(" and is_member:
+            owner = prev2.value if prev2 is not None else ""
+            if value == "open" and owner == "window":
+                args = call_argument_tokens(tokens, i + 1)
+                if any(t.kind == "string" and t.value[1:-1] == "_self" for t in args):
+                    findings.append(
+                        LintFinding(
+                            "reload-navigation",
+                            'window.open(..., "_self") reloads the whole page; '
+                            "update the page in place instead",
+                            token.line,
+                            token.col,
+                        )
+                    )
+            elif value == "reload" and owner == "location":
+                findings.append(
+                    LintFinding(
+                        "reload-navigation",
+                        "location.reload() reloads the whole page; "
+                        "update the page in place instead",
+                        token.line,
+                        token.col,
+                    )
+                )
+
+    # Pass 2: assignments to names no enclosing scope declares
+    scopes, assignments = analyze_scopes(tokens)
+    known = KNOWN_GLOBALS | set(page_globals)
+    for token, scope in assignments:
+        if token.value in known:
+            continue
+        current = scope
+        while current != -1:
+            parent, names = scopes[current]
+            if token.value in names:
+                break
+            current = parent
+        else:
+            findings.append(
+                LintFinding(
+                    "implicit-global",
+                    f"'{token.value}' is assigned without var/let/const and "
+                    "becomes an implicit global",
+                    token.line,
+                    token.col,
+                )
+            )
+
+    lines, ranges = parse_suppressions(all_tokens)
+    findings = [f for f in findings if not is_suppressed(f, lines, ranges)]
+    return sorted(findings, key=lambda f: (f.line, f.col, f.rule))
+
+
+def call_argument_tokens(tokens: List[Token], open_index: int) -> List[Token]:
+    """Return the tokens between a "(" and its matching ")"."""
+    depth = 0
+    for j in range(open_index, len(tokens)):
+        if tokens[j].value in ("(", "[", "{"):
+            depth += 1
+        elif tokens[j].value in (")", "]", "}"):
+            depth -= 1
+            if depth == 0:
+                return tokens[open_index + 1 : j]
+    return tokens[open_index + 1 :]
+
+
+def iter_literal_scripts(value: str) -> List[Tuple[str, int, int]]:
+    """Split a literal into ``(script, line_offset, first_line_col_offset)``.
+
+    HTML literals yield each inline script body; a literal without any
+    ``<script>`` tags is treated as bare JavaScript.
+    """
+    matches = list(SCRIPT_BLOCK_RE.finditer(value))
+    if not matches:
+        return [(value, 0, 0)]
+
+    scripts = []
+    for match in matches:
+        if not is_inline_script(match.group(1)):
+            continue
+        start = match.start(2)
+        line_offset = value.count("\n", 0, start)
+        col_offset = start - (value.rfind("\n", 0, start) + 1)
+        scripts.append((match.group(2), line_offset, col_offset))
+    return scripts
+
+
+def lint_literal(value: str, page_globals: Iterable[str] = ()) -> List[LintFinding]:
+    """Lint a JS literal, with positions relative to the whole literal."""
+    findings = []
+    for script, line_offset, col_offset in iter_literal_scripts(value):
+        for finding in lint_script(script, page_globals):
+            col = finding.col + (col_offset if finding.line == 1 else 0)
+            findings.append(finding._replace(line=finding.line + line_offset, col=col))
+    return findings
+
+
+def lint_page_file(json_file: str) -> List[Dict[str, object]]:
+    """Lint every JS literal of a page definition file."""
+    with open(json_file, encoding="utf-8") as f:
+        data = json.load(f)
+
+    js_literals = [
+        (component_path, component)
+        for component_path, component in iter_literals(data)
+        if component["value"].strip()
+        and classify_literal(component["value"], component.get("name", "")).has_script
+    ]
+
+    # Top-level declarations in one literal are globals visible to the others
+    page_globals: Set[str] = set()
+    for _, component in js_literals:
+        for script, _, _ in iter_literal_scripts(component["value"]):
+            page_globals |= declared_top_level_names(script)
+
+    results = []
+    for component_path, component in js_literals:
+        name = component.get("name", "")
+        filename = name + get_file_extension(component["value"], name)
+        for finding in lint_literal(component["value"], page_globals):
+            results.append(
+                {
+                    "file": json_file,
+                    "component_path": component_path,
+                    "filename": filename,
+                    "line": finding.line,
+                    "col": finding.col,
+                    "rule": finding.rule,
+                    "message": finding.message,
+                }
+            )
+    return results
+
+
+def main():
+    args, options = parse_options(sys.argv[1:])
+    if not args:
+        print(__doc__)
+        sys.exit(1)
+
+    command = args[0]
+    pattern = args[1] if len(args) > 1 else DEFAULT_PATTERN
+
+    if command != "lint":
+        print(f"Unknown command: {command}")
+        print(__doc__)
+        sys.exit(1)
+
+    json_files = find_page_files(pattern, roots=parse_roots(options.get("roots")))
+    if not json_files:
+        print(f"No page JSON files found matching pattern: {pattern}")
+        sys.exit(1)
+
+    total = 0
+    for json_file in json_files:
+        findings = lint_page_file(json_file)
+        total += len(findings)
+        for finding in findings:
+            print(
+                f"{finding['file']} [{finding['component_path']} "
+                f"{finding['filename']}:{finding['line']}:{finding['col']}] "
+                f"{finding['rule']}: {finding['message']}"
+            )
+
+    if total:
+        print(f"\n❌ {total} finding(s) in {len(json_files)} page file(s).")
+        sys.exit(1)
+    print(f"\n✅ No findings in {len(json_files)} page file(s).")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+"""
+Script to analyze how many virtual domain requests each page makes as it loads.
+
+Every component with a ``model`` (``data``, ``grid``, ``htable``, ``list``,
+``detail``) or ``sourceModel`` (``select``, ``radio``) is a loader. Its model
+is resolved through the page's ``resource`` components to a virtual domain,
+and the component tree is walked to estimate the requests each loader makes:
+one per load, multiplied by the rows of every repeating component (``grid``,
+``htable``, ``list``, ``detail``) it is nested in. Loads triggered from an
+eager loader's ``onLoad`` (``$other.$load()``) count towards the page too.
+
+Findings:
+
+    eager-load         A loader with ``loadInitially`` - fetched as the page
+                       loads (informational; counted against the budget)
+    missing-page-size  A data or repeating component without a ``pageSize``
+                       - every row the domain returns is fetched
+    large-page-size    A ``pageSize`` above ``--max-page-size``
+    unbounded-select   A select/radio filled from a domain whose SQL has no
+                       bind variable or row limit (or no known SQL and no
+                       ``sourceParameters``)
+    nested-fan-out     A loader inside a repeating component - one request
+                       per row
+    over-budget        More estimated requests on page load than ``--budget``
+
+Each finding carries an estimated request count. Repeating components without
+a ``pageSize`` are assumed to show ``--rows`` rows.
+
+Usage:
+    python load_analyzer.py analyze [file_pattern]  # Analyze page data loading
+
+Options:
+    --budget=<n>         Requests allowed on page load (default: 5)
+    --max-page-size=<n>  Largest acceptable pageSize (default: 100)
+    --rows=<n>           Rows assumed for repeating components without a
+                         pageSize (default: 25)
+    --roots=<dirs>       Comma-separated directories to search for pages and
+                         virtual domains (default: everything not ignored by
+                         .gitignore/.pagebuilderignore)
+"""
+
+import json
+import re
+import sys
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from discovery import DEFAULT_PATTERN, parse_roots
+from extract_literals import find_page_files, iter_components, parse_options
+from extract_virtual_domains import find_domain_files
+
+DEFAULT_BUDGET = 5
+DEFAULT_MAX_PAGE_SIZE = 100
+DEFAULT_ROWS = 25
+
+REPEATING_TYPES = {"grid", "htable", "list", "detail"}
+PAGED_TYPES = REPEATING_TYPES | {"data"}
+SOURCE_TYPES = {"select", "radio"}
+
+# Rules that don't fail the run on their own
+INFO_RULES = {"eager-load"}
+
+LOAD_CALL_RE = re.compile(r"\$([\w$]+)\.\$load\s*\(")
+SQL_COMMENT_RE = re.compile(r"--[^\n]*|/\*.*?\*/", re.S)
+SQL_BOUND_RE = re.compile(
+    r"\brownum\b|\bfetch\s+(?:first|next)\b|\blimit\s+\d|:[a-z_]\w*", re.I
+)
+
+
+class LoadFinding(NamedTuple):
+    component_path: str
+    name: str
+    rule: str
+    message: str
+    requests: int
+
+
+def load_domain_sql(domain_files: List[str]) -> Dict[str, str]:
+    """Map virtual domain service names to their GET SQL."""
+    domains = {}
+    for domain_file in domain_files:
+        with open(domain_file, encoding="utf-8") as f:
+            data = json.load(f)
+        domains[data["serviceName"]] = data.get("codeGet") or ""
+    return domains
+
+
+def is_unbounded_sql(sql: str) -> bool:
+    """Return True if SQL has neither a bind variable nor a row limit."""
+    return not SQL_BOUND_RE.search(SQL_COMMENT_RE.sub(" ", sql))
+
+
+def resource_domain(resource: Optional[Dict[str, Any]]) -> Optional[str]:
+    """Return the virtual domain a resource component reads, if any."""
+    if not resource or not isinstance(resource.get("resource"), str):
+        return None
+    name: str = resource["resource"]
+    prefix = "virtualDomains."
+    return name[len(prefix) :] if name.startswith(prefix) else name
+
+
+def page_size(component: Dict[str, Any]) -> int:
+    """Return a component's pageSize, or 0 if it has none."""
+    try:
+        return max(int(component.get("pageSize") or 0), 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+def iter_loaders(
+    components: List[Dict[str, Any]],
+    default_rows: int = DEFAULT_ROWS,
+    path: str = "",
+    rows: int = 1,
+    repeater: str = "",
+) -> Iterator[Tuple[str, Dict[str, Any], int, str]]:
+    """Yield (component_path, component, rows, repeater) for every loader.
+
+    ``rows`` is how many times the loader runs per load of the page: the
+    product of the page sizes of the repeating components it is nested in,
+    the innermost of which is ``repeater``.
+    """
+    for i, component in enumerate(components):
+        component_path = f"{path}.{i}" if path else str(i)
+        if component.get("model") or component.get("sourceModel"):
+            yield component_path, component, rows, repeater
+
+        child_rows, child_repeater = rows, repeater
+        if component.get("type") in REPEATING_TYPES:
+            child_rows = rows * (page_size(component) or default_rows)
+            child_repeater = component.get("name") or component_path
+        yield from iter_loaders(
+            component.get("components", []),
+            default_rows,
+            f"{component_path}.components",
+            child_rows,
+            child_repeater,
+        )
+
+
+def analyze_page(
+    data: Dict[str, Any],
+    domains: Optional[Dict[str, str]] = None,
+    budget: int = DEFAULT_BUDGET,
+    max_page_size: int = DEFAULT_MAX_PAGE_SIZE,
+    default_rows: int = DEFAULT_ROWS,
+) -> List[LoadFinding]:
+    """Estimate the requests a page makes as it loads and report problems."""
+    domains = domains or {}
+    components = data.get("modelView", {}).get("components", [])
+    resources = {
+        component.get("name", ""): component
+        for _, component in iter_components(components)
+        if component.get("type") == "resource"
+    }
+    loaders = list(iter_loaders(components, default_rows))
+    loader_names = {component.get("name", "") for _, component, _, _ in loaders}
+
+    def describe(model: str) -> str:
+        domain = resource_domain(resources.get(model))
+        return f"{model} (virtualDomains.{domain})" if domain else model
+
+    findings: List[LoadFinding] = []
+    eager_requests = 0
+    for component_path, component, rows, repeater in loaders:
+        component_type = component.get("type")
+        name = component.get("name", "")
+        model = str(component.get("model") or component.get("sourceModel"))
+        resource = resources.get(model)
+        # Resources with only staticData never hit the server
+        if resource is not None and not resource_domain(resource):
+            continue
+
+        problems: List[Tuple[str, str]] = []
+        if component.get("loadInitially"):
+            triggered = [
+                other
+                for other in LOAD_CALL_RE.findall(component.get("onLoad") or "")
+                if other in loader_names and other != name
+            ]
+            requests = rows * (1 + len(triggered))
+            eager_requests += requests
+            message = f"loads {describe(model)} on page load"
+            if triggered:
+                message += ", then " + ", ".join(triggered)
+            findings.append(
+                LoadFinding(component_path, name, "eager-load", message, requests)
+            )
+
+        if repeater:
+            problems.append(
+                (
+                    "nested-fan-out",
+                    f"loads {describe(model)} once per row of {repeater}",
+                )
+            )
+
+        size = page_size(component)
+        if component_type in PAGED_TYPES and not size:
+            problems.append(
+                (
+                    "missing-page-size",
+                    f"no pageSize: every row of {describe(model)} is fetched",
+                )
+            )
+        elif component_type in PAGED_TYPES and size > max_page_size:
+            problems.append(
+                ("large-page-size", f"pageSize {size} exceeds {max_page_size}")
+            )
+
+        if component_type in SOURCE_TYPES:
+            domain = resource_domain(resource)
+            if domain in domains and is_unbounded_sql(domains[domain]):
+                problems.append(
+                    (
+                        "unbounded-select",
+                        f"options come from virtualDomains.{domain}, whose SQL "
+                        "has no bind variable or row limit",
+                    )
+                )
+            elif domain not in domains and not component.get("sourceParameters"):
+                problems.append(
+                    (
+                        "unbounded-select",
+                        f"options come from {describe(model)} with no "
+                        "sourceParameters (domain SQL not found)",
+                    )
+                )
+
+        for rule, message in problems:
+            findings.append(LoadFinding(component_path, name, rule, message, rows))
+
+    if eager_requests > budget:
+        findings.append(
+            LoadFinding(
+                "",
+                data.get("constantName", ""),
+                "over-budget",
+                f"~{eager_requests} requests on page load exceed the budget of "
+                f"{budget}",
+                eager_requests,
+            )
+        )
+    return findings
+
+
+def estimated_load_requests(findings: List[LoadFinding]) -> int:
+    """Total the estimated requests made on page load."""
+    return sum(f.requests for f in findings if f.rule == "eager-load")
+
+
+def main():
+    args, options = parse_options(sys.argv[1:])
+    if not args:
+        print(__doc__)
+        sys.exit(1)
+
+    command = args[0]
+    pattern = args[1] if len(args) > 1 else DEFAULT_PATTERN
+
+    if command != "analyze":
+        print(f"Unknown command: {command}")
+        print(__doc__)
+        sys.exit(1)
+
+    try:
+        budget = int(options.get("budget", DEFAULT_BUDGET))
+        max_page_size = int(options.get("max-page-size", DEFAULT_MAX_PAGE_SIZE))
+        default_rows = int(options.get("rows", DEFAULT_ROWS))
+    except ValueError as e:
+        print(f"❌ Invalid option value: {e}")
+        sys.exit(1)
+
+    roots = parse_roots(options.get("roots"))
+    json_files = find_page_files(pattern, roots=roots)
+    if not json_files:
+        print(f"No page JSON files found matching pattern: {pattern}")
+        sys.exit(1)
+    domains = load_domain_sql(find_domain_files(roots=roots))
+
+    problems = 0
+    for json_file in json_files:
+        with open(json_file, encoding="utf-8") as f:
+            data = json.load(f)
+        findings = analyze_page(data, domains, budget, max_page_size, default_rows)
+
+        print(
+            f"\n{json_file}: ~{estimated_load_requests(findings)} request(s) "
+            f"on page load (budget {budget})"
+        )
+        for finding in findings:
+            location = (
+                f"[{finding.component_path} {finding.name}] "
+                if finding.component_path
+                else ""
+            )
+            print(
+                f"    {location}{finding.rule}: {finding.message} "
+                f"(~{finding.requests} request(s))"
+            )
+        problems += sum(1 for f in findings if f.rule not in INFO_RULES)
+
+    if problems:
+        print(
+            f"\n❌ {problems} data loading problem(s) in {len(json_files)} page file(s)."
+        )
+        sys.exit(1)
+    print(f"\n✅ No data loading problems in {len(json_files)} page file(s).")
+
+
+if __name__ == "__main__":
+    main()
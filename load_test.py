@@ -0,0 +1,573 @@
+#!/usr/bin/env python3
+"""
+Script to replay the virtual domain calls pages make, under load.
+
+Call patterns are read from the pages themselves:
+
+- ``$.ajax`` calls in literals whose URL names ``virtualDomains.<name>``
+  (directly, or through a string assigned earlier), with the keys of their
+  ``data: {...}`` object as query parameters
+- ``resource`` components, for every component that loads them through a
+  ``model`` or ``sourceModel``, with ``max`` from its ``pageSize`` and its
+  ``parameters``/``sourceParameters``
+
+Parameters whose value is a literal in the page (``max: 300``) are sent as-is.
+Parameters bound to a variable (``'term': term``) are filled from a
+``--params`` JSON file, picking a value at random for each request, or left
+out if the file has none::
+
+    {
+      "free_tuition_single": {"term": ["202450", "202470"]},
+      "*": {"gid": ["A00012345", "A00067890"]}
+    }
+
+``"*"`` applies to every domain. Requests go out from ``--concurrency``
+workers, each keeping one HTTP/1.1 connection alive, cycling through the
+patterns until ``--requests`` have been sent or ``--duration`` has passed.
+Throughput, p50/p95/p99 latency and errors (non-2xx responses, timeouts and
+connection failures) are reported per domain.
+
+Point it at Banner, or at ``mock_server.py serve-mock`` for a local run.
+
+Usage:
+    python load_test.py patterns [file_pattern]        # List call patterns
+    python load_test.py run <base_url> [file_pattern]  # Replay them under load
+
+Options:
+    --concurrency=<n>  Simultaneous workers (default: 10)
+    --requests=<n>     Total requests to send (default: 1000)
+    --duration=<s>     Run for this many seconds instead of a request count
+    --timeout=<s>      Per-request timeout in seconds (default: 10)
+    --domains=<names>  Comma-separated domains to replay (default: all)
+    --params=<file>    Values for variable parameters (see above)
+    --cookie=<value>   Cookie header to send (e.g. a Banner session)
+    --seed=<n>         Seed for parameter choices (default: 0)
+    --roots=<dirs>     Comma-separated directories to search for pages
+                       (default: everything not ignored by
+                       .gitignore/.pagebuilderignore)
+"""
+
+import asyncio
+import json
+import math
+import random
+import re
+import ssl
+import sys
+import time
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple
+from urllib.parse import urlencode, urlsplit
+
+from discovery import DEFAULT_PATTERN, parse_roots
+from extract_literals import find_page_files, iter_components, parse_options
+from js_lint import Token, call_argument_tokens, iter_literal_scripts, tokenize_js
+from load_analyzer import page_size, resource_domain
+from mock_server import URL_PREFIX
+from page_transforms import iter_literals
+
+DEFAULT_CONCURRENCY = 10
+DEFAULT_REQUESTS = 1000
+DEFAULT_TIMEOUT = 10.0
+
+# How far past a virtual domain URL to look for the call's data object
+DATA_SEARCH_TOKENS = 200
+
+DOMAIN_URL_RE = re.compile(r"((?:/[\w.-]+)*/)?virtualDomains\.([\w$-]+)")
+
+
+class CallPattern(NamedTuple):
+    domain: str
+    path: str
+    # None marks a parameter bound to a variable in the page
+    params: Dict[str, Optional[str]]
+    source: str
+
+
+class DomainStats(NamedTuple):
+    requests: int
+    errors: int
+    throughput: float
+    p50: float
+    p95: float
+    p99: float
+    max: float
+    error_kinds: Dict[str, int]
+
+
+def literal_value(token: Token) -> Optional[str]:
+    """Return the value of a string or number token, or None for anything else."""
+    if token.kind == "number":
+        return token.value
+    if token.kind == "string":
+        return token.value[1:-1]
+    return None
+
+
+def parse_object_params(
+    tokens: List[Token], open_index: int
+) -> Dict[str, Optional[str]]:
+    """Read ``key: value`` pairs from the object literal opened at ``open_index``.
+
+    Values that are a single string or number become the parameter value;
+    anything else (a variable, a call, an expression) becomes None.
+    """
+    entries: List[List[Token]] = [[]]
+    depth = 0
+    for token in call_argument_tokens(tokens, open_index):
+        if token.value in ("(", "[", "{"):
+            depth += 1
+        elif token.value in (")", "]", "}"):
+            depth -= 1
+        if depth == 0 and token.value == ",":
+            entries.append([])
+        else:
+            entries[-1].append(token)
+
+    params: Dict[str, Optional[str]] = {}
+    for entry in entries:
+        if len(entry) < 3 or entry[1].value != ":":
+            continue
+        key = entry[0].value if entry[0].kind == "name" else literal_value(entry[0])
+        if key is not None:
+            value = entry[2:]
+            params[key] = literal_value(value[0]) if len(value) == 1 else None
+    return params
+
+
+def find_data_object(tokens: List[Token], start: int, end: int) -> Optional[int]:
+    """Return the index of the ``{`` after ``data:`` between two tokens."""
+    for j in range(start, min(end, len(tokens) - 2)):
+        if (
+            tokens[j].kind in ("name", "string")
+            and tokens[j].value.strip("'\"") == "data"
+            and tokens[j + 1].value == ":"
+            and tokens[j + 2].value == "{"
+        ):
+            return j + 2
+    return None
+
+
+def script_call_patterns(script: str) -> Iterator[Tuple[str, str, Dict[str, Any]]]:
+    """Yield (domain, path, params) for each virtual domain URL in a script."""
+    tokens = [t for t in tokenize_js(script) if t.kind != "comment"]
+    urls = []
+    for i, token in enumerate(tokens):
+        if token.kind not in ("string", "template"):
+            continue
+        match = DOMAIN_URL_RE.search(token.value)
+        if match:
+            urls.append((i, match))
+
+    for n, (i, match) in enumerate(urls):
+        end = urls[n + 1][0] if n + 1 < len(urls) else len(tokens)
+        open_index = find_data_object(tokens, i + 1, min(end, i + DATA_SEARCH_TOKENS))
+        params = parse_object_params(tokens, open_index) if open_index else {}
+        domain = match.group(2)
+        path = (match.group(1) or URL_PREFIX[: -len("virtualDomains.")]) + (
+            f"virtualDomains.{domain}"
+        )
+        yield domain, path, params
+
+
+def extract_call_patterns(data: Dict[str, Any], source: str = "") -> List[CallPattern]:
+    """Collect the virtual domain calls a page makes, without duplicates."""
+    patterns: List[CallPattern] = []
+    seen = set()
+
+    def add(domain: str, path: str, params: Dict[str, Any], location: str) -> None:
+        key = (domain, path, tuple(sorted(params.items())))
+        if key not in seen:
+            seen.add(key)
+            patterns.append(
+                CallPattern(domain, path, params, f"{source} [{location}]".strip())
+            )
+
+    for component_path, literal in iter_literals(data):
+        for script, _, _ in iter_literal_scripts(literal.get("value") or ""):
+            for name, path, found in script_call_patterns(script):
+                add(name, path, found, component_path)
+
+    components = data.get("modelView", {}).get("components", [])
+    resources = {
+        component.get("name", ""): component
+        for _, component in iter_components(components)
+        if component.get("type") == "resource"
+    }
+    for component_path, component in iter_components(components):
+        model = component.get("model") or component.get("sourceModel")
+        domain = resource_domain(resources.get(model)) if model else None
+        if domain is None:
+            continue
+        params: Dict[str, Optional[str]] = {}
+        size = page_size(component)
+        if size:
+            params.update({"max": str(size), "offset": "0"})
+        bound = component.get("parameters") or component.get("sourceParameters")
+        for name, value in (bound if isinstance(bound, dict) else {}).items():
+            # "$term" and "$select.value" are page variables
+            is_literal = isinstance(value, (str, int, float)) and "$" not in str(value)
+            params[name] = str(value) if is_literal else None
+        add(domain, URL_PREFIX + domain, params, component_path)
+    return patterns
+
+
+def load_param_values(params_file: Optional[str]) -> Dict[str, Dict[str, List[str]]]:
+    """Load values for variable parameters, keyed by domain (or ``*``)."""
+    if not params_file:
+        return {}
+    with open(params_file, encoding="utf-8") as f:
+        data = json.load(f)
+    if not isinstance(data, dict):
+        raise ValueError("params file must be a JSON object")
+    values: Dict[str, Dict[str, List[str]]] = {}
+    for domain, params in data.items():
+        if not isinstance(params, dict):
+            raise ValueError(f"{domain}: expected an object of parameter values")
+        values[domain] = {
+            name: [str(v) for v in (value if isinstance(value, list) else [value])]
+            for name, value in params.items()
+        }
+    return values
+
+
+def build_target(
+    pattern: CallPattern,
+    param_values: Dict[str, Dict[str, List[str]]],
+    rng: random.Random,
+) -> str:
+    """Return the request path and query for one call of a pattern."""
+    query = []
+    for name, value in pattern.params.items():
+        if value is None:
+            choices = param_values.get(pattern.domain, {}).get(
+                name
+            ) or param_values.get("*", {}).get(name)
+            if not choices:
+                continue
+            value = rng.choice(choices)
+        query.append((name, value))
+    return pattern.path + ("?" + urlencode(query) if query else "")
+
+
+class HttpConnection:
+    """A minimal keep-alive HTTP/1.1 client connection."""
+
+    def __init__(self, base_url: str, timeout: float = DEFAULT_TIMEOUT):
+        parts = urlsplit(base_url)
+        if parts.scheme not in ("http", "https") or not parts.hostname:
+            raise ValueError(f"Not an http(s) URL: {base_url}")
+        self.host = parts.hostname
+        self.ssl = ssl.create_default_context() if parts.scheme == "https" else None
+        self.port = parts.port or (443 if self.ssl else 80)
+        self.host_header = parts.netloc.rpartition("@")[2]
+        self.timeout = timeout
+        self.reader: Optional[asyncio.StreamReader] = None
+        self.writer: Optional[asyncio.StreamWriter] = None
+
+    async def close(self) -> None:
+        if self.writer is not None:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except OSError:
+                pass
+        self.reader = self.writer = None
+
+    async def request(
+        self, target: str, headers: Optional[Dict[str, str]] = None
+    ) -> Tuple[int, bytes]:
+        """Send a GET and return (status, body), reconnecting if needed."""
+        try:
+            return await asyncio.wait_for(
+                self._request(target, headers or {}), self.timeout
+            )
+        except BaseException:
+            # A half-read response leaves the connection unusable
+            await self.close()
+            raise
+
+    async def _request(self, target: str, headers: Dict[str, str]) -> Tuple[int, bytes]:
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(
+                self.host, self.port, ssl=self.ssl
+            )
+        assert self.reader is not None and self.writer is not None
+        lines = [
+            f"GET {target} HTTP/1.1",
+            f"Host: {self.host_header}",
+            "Accept: application/json",
+            "Connection: keep-alive",
+        ]
+        lines += [f"{name}: {value}" for name, value in headers.items()]
+        self.writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+        await self.writer.drain()
+
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionError("connection closed by server")
+        status = int(status_line.split()[1])
+        response_headers: Dict[str, str] = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            response_headers[name.strip().lower()] = value.strip()
+
+        if status in (204, 304) or 100 <= status < 200:
+            body = b""
+        elif "chunked" in response_headers.get("transfer-encoding", "").lower():
+            body = await self.read_chunked()
+        elif "content-length" in response_headers:
+            body = await self.reader.readexactly(
+                int(response_headers["content-length"])
+            )
+        else:
+            body = await self.reader.read()
+            await self.close()
+            return status, body
+
+        if response_headers.get("connection", "").lower() == "close":
+            await self.close()
+        return status, body
+
+    async def read_chunked(self) -> bytes:
+        assert self.reader is not None
+        chunks: List[bytes] = []
+        while True:
+            size = int((await self.reader.readline()).split(b";")[0], 16)
+            if size == 0:
+                # Skip trailers
+                while (await self.reader.readline()) not in (b"\r\n", b"\n", b""):
+                    pass
+                return b"".join(chunks)
+            chunks.append(await self.reader.readexactly(size))
+            await self.reader.readexactly(2)
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Return the nearest-rank percentile of already sorted values."""
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(fraction * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+async def run_load(
+    base_url: str,
+    patterns: List[CallPattern],
+    concurrency: int = DEFAULT_CONCURRENCY,
+    total_requests: Optional[int] = DEFAULT_REQUESTS,
+    duration: Optional[float] = None,
+    timeout: float = DEFAULT_TIMEOUT,
+    param_values: Optional[Dict[str, Dict[str, List[str]]]] = None,
+    headers: Optional[Dict[str, str]] = None,
+    seed: int = 0,
+) -> Tuple[Dict[str, DomainStats], float]:
+    """Replay patterns round-robin and return (stats per domain, elapsed seconds).
+
+    Stops after ``total_requests`` or, if given, ``duration`` seconds.
+    """
+    if not patterns:
+        return {}, 0.0
+    rng = random.Random(seed)
+    param_values = param_values or {}
+    latencies: Dict[str, List[float]] = {p.domain: [] for p in patterns}
+    errors: Dict[str, Dict[str, int]] = {p.domain: {} for p in patterns}
+    next_index = 0
+    start = time.perf_counter()
+    deadline = start + duration if duration else None
+
+    def claim() -> Optional[int]:
+        nonlocal next_index
+        if deadline is not None and time.perf_counter() >= deadline:
+            return None
+        if deadline is None and total_requests is not None:
+            if next_index >= total_requests:
+                return None
+        next_index += 1
+        return next_index - 1
+
+    async def worker() -> None:
+        connection = HttpConnection(base_url, timeout)
+        try:
+            while (index := claim()) is not None:
+                pattern = patterns[index % len(patterns)]
+                target = build_target(pattern, param_values, rng)
+                began = time.perf_counter()
+                try:
+                    status, _ = await connection.request(target, headers)
+                except asyncio.TimeoutError:
+                    kind = "timeout"
+                except (OSError, ValueError, asyncio.IncompleteReadError) as e:
+                    kind = type(e).__name__
+                else:
+                    latencies[pattern.domain].append(time.perf_counter() - began)
+                    if 200 <= status < 300:
+                        continue
+                    kind = f"HTTP {status}"
+                domain_errors = errors[pattern.domain]
+                domain_errors[kind] = domain_errors.get(kind, 0) + 1
+        finally:
+            await connection.close()
+
+    await asyncio.gather(*(worker() for _ in range(max(concurrency, 1))))
+    elapsed = time.perf_counter() - start
+
+    stats = {}
+    for domain, values in latencies.items():
+        values.sort()
+        failures = sum(errors[domain].values())
+        # Failed responses have a latency; timeouts and dropped connections don't
+        sent = len(values) + sum(
+            count
+            for kind, count in errors[domain].items()
+            if not kind.startswith("HTTP")
+        )
+        stats[domain] = DomainStats(
+            requests=sent,
+            errors=failures,
+            throughput=sent / elapsed if elapsed else 0.0,
+            p50=percentile(values, 0.50),
+            p95=percentile(values, 0.95),
+            p99=percentile(values, 0.99),
+            max=values[-1] if values else 0.0,
+            error_kinds=errors[domain],
+        )
+    return stats, elapsed
+
+
+def format_ms(seconds: float) -> str:
+    return f"{seconds * 1000:.1f}ms"
+
+
+def print_report(stats: Dict[str, DomainStats], elapsed: float) -> None:
+    width = max([len(domain) for domain in stats] + [len("domain")])
+    print(
+        f"{'domain':<{width}}  {'requests':>8}  {'errors':>6}  {'req/s':>8}  "
+        f"{'p50':>9}  {'p95':>9}  {'p99':>9}  {'max':>9}"
+    )
+    for domain in sorted(stats):
+        s = stats[domain]
+        print(
+            f"{domain:<{width}}  {s.requests:>8}  {s.errors:>6}  "
+            f"{s.throughput:>8.1f}  {format_ms(s.p50):>9}  {format_ms(s.p95):>9}  "
+            f"{format_ms(s.p99):>9}  {format_ms(s.max):>9}"
+        )
+        for kind, count in sorted(s.error_kinds.items()):
+            print(f"{'':<{width}}    {count} x {kind}")
+    total = sum(s.requests for s in stats.values())
+    print(
+        f"\n{total} request(s) in {elapsed:.2f}s "
+        f"({total / elapsed if elapsed else 0:.1f} req/s)"
+    )
+
+
+def main():
+    args, options = parse_options(sys.argv[1:])
+    if not args:
+        print(__doc__)
+        sys.exit(1)
+
+    command = args[0]
+    if command == "run":
+        if len(args) < 2:
+            print("Usage: python load_test.py run <base_url> [file_pattern]")
+            sys.exit(1)
+        base_url = args[1]
+        pattern = args[2] if len(args) > 2 else DEFAULT_PATTERN
+    elif command == "patterns":
+        base_url = ""
+        pattern = args[1] if len(args) > 1 else DEFAULT_PATTERN
+    else:
+        print(f"Unknown command: {command}")
+        print(__doc__)
+        sys.exit(1)
+
+    json_files = find_page_files(pattern, roots=parse_roots(options.get("roots")))
+    if not json_files:
+        print(f"No page JSON files found matching pattern: {pattern}")
+        sys.exit(1)
+
+    patterns: List[CallPattern] = []
+    for json_file in json_files:
+        with open(json_file, encoding="utf-8") as f:
+            patterns.extend(extract_call_patterns(json.load(f), json_file))
+    if options.get("domains"):
+        wanted = {name.strip() for name in options["domains"].split(",")}
+        patterns = [p for p in patterns if p.domain in wanted]
+    if not patterns:
+        print(f"No virtual domain calls found in {len(json_files)} page file(s).")
+        sys.exit(1)
+
+    try:
+        param_values = load_param_values(options.get("params"))
+    except (OSError, ValueError) as e:
+        print(f"❌ Could not load parameter values: {e}")
+        sys.exit(1)
+
+    if command == "patterns":
+        for p in patterns:
+            params = ", ".join(
+                f"{name}={'<' + name + '>' if value is None else value}"
+                for name, value in p.params.items()
+            )
+            print(f"{p.domain}: {p.path} ({params or 'no parameters'})  {p.source}")
+        print(
+            f"\n✅ {len(patterns)} call pattern(s) in {len(json_files)} page file(s)."
+        )
+        return
+
+    try:
+        concurrency = int(options.get("concurrency", DEFAULT_CONCURRENCY))
+        total_requests = int(options.get("requests", DEFAULT_REQUESTS))
+        duration = float(options["duration"]) if "duration" in options else None
+        timeout = float(options.get("timeout", DEFAULT_TIMEOUT))
+        seed = int(options.get("seed", 0))
+        HttpConnection(base_url)
+    except ValueError as e:
+        print(f"❌ Invalid option value: {e}")
+        sys.exit(1)
+    headers = {"Cookie": options["cookie"]} if options.get("cookie") else None
+
+    unfilled = sorted(
+        {
+            f"{p.domain}.{name}"
+            for p in patterns
+            for name, value in p.params.items()
+            if value is None
+            and name not in param_values.get(p.domain, {})
+            and name not in param_values.get("*", {})
+        }
+    )
+    if unfilled:
+        print(f"Sending without (no --params values): {', '.join(unfilled)}")
+
+    print(
+        f"Replaying {len(patterns)} call pattern(s) against {base_url} "
+        f"with {concurrency} worker(s)...\n"
+    )
+    stats, elapsed = asyncio.run(
+        run_load(
+            base_url,
+            patterns,
+            concurrency,
+            total_requests,
+            duration,
+            timeout,
+            param_values,
+            headers,
+            seed,
+        )
+    )
+    print_report(stats, elapsed)
+
+    failures = sum(s.errors for s in stats.values())
+    if failures:
+        print(f"\n❌ {failures} request(s) failed.")
+        sys.exit(1)
+    print("\n✅ All requests succeeded.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,378 @@
+#!/usr/bin/env python3
+"""
+Script to keep every extraction mapping in one repo-level manifest.
+
+Each extracted page and virtual domain directory normally has its own
+``_extraction_map.json``, so finding work means listing
+``extracted_literals/`` and ``extracted_virtual_domains/`` and opening one
+small file per directory. Once ``extraction_manifest.ndjson`` exists in the
+working directory, the tools use it instead. It has one line per extracted
+directory, holding the same mapping: the source file, each literal's
+component path (or SQL field), file name, content hash and size::
+
+    {"dir": "extracted_literals/ftReview", "source_file": "pages/pages.ftReview.json",
+     "page_name": "ftReview", "literals": [{"component_path": "0", ...}]}
+
+The manifest is read once per run and indexed, so a mapping can be looked up
+by its directory, by its source file or by any extracted file in constant
+time. Extracting appends a line for the directory, and a later line for the
+same directory replaces an earlier one. The command line tools then rewrite
+the file sorted by directory, so diffs stay small and stable. No
+``_extraction_map.json`` files are written while the manifest is in use.
+
+``migrate`` builds the manifest from the existing per-directory maps, adding
+sizes from the source files (read in place for pages and domains extracted
+from an archive). Mappings already in the manifest are kept.
+
+Usage:
+    python manifest.py migrate [--remove-maps]  # Build the manifest from the maps
+    python manifest.py lookup <path>            # Mapping of a source or extracted file
+    python manifest.py compact                  # Drop replaced lines and sort
+
+Options:
+    --remove-maps  Delete the per-directory maps once they are in the manifest
+    --dry-run      Don't write anything; list the files that would be written
+"""
+
+import json
+import sys
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from weakref import WeakKeyDictionary
+
+from storage import (
+    ArchiveStorage,
+    DiskStorage,
+    PathLike,
+    ReadOnlyStorage,
+    Storage,
+    normalize_path,
+    parent_path,
+)
+
+MANIFEST_FILE = "extraction_manifest.ndjson"
+MAP_FILE = "_extraction_map.json"
+EXTRACTED_DIRS = ("extracted_literals", "extracted_virtual_domains")
+
+# The manifest each storage has loaded (None if there is none)
+_loaded: "WeakKeyDictionary[Storage, Optional[Manifest]]" = WeakKeyDictionary()
+_loading = threading.Lock()
+
+
+def map_items(extraction_map: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Return a mapping's literals or SQL blocks."""
+    items: List[Dict[str, Any]] = (
+        extraction_map.get("literals") or extraction_map.get("sql_blocks") or []
+    )
+    return items
+
+
+def item_files(item: Dict[str, Any]) -> List[str]:
+    parts: List[str] = item.get("parts", [])
+    return [item["filename"]] + parts
+
+
+class Manifest:
+    """Extraction mappings keyed by directory, indexed by source and file."""
+
+    def __init__(self, path: str = MANIFEST_FILE):
+        self.path = path
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self.by_source: Dict[str, str] = {}
+        self.by_file: Dict[str, Tuple[str, Dict[str, Any]]] = {}
+        # Set when the file no longer matches what compact() would write
+        self.unsorted = False
+        self.lock = threading.Lock()
+
+    @classmethod
+    def parse(cls, text: str, path: str = MANIFEST_FILE) -> "Manifest":
+        """Parse manifest lines; raises ValueError for a malformed line."""
+        manifest = cls(path)
+        previous = ""
+        for number, line in enumerate(text.splitlines(), 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"{path}:{number}: {e}") from e
+            directory = record.pop("dir", None) if isinstance(record, dict) else None
+            if not isinstance(directory, str) or "source_file" not in record:
+                raise ValueError(f"{path}:{number}: not an extraction mapping")
+            if directory <= previous:
+                manifest.unsorted = True
+            previous = directory
+            manifest.set(directory, record)
+        return manifest
+
+    def set(self, directory: PathLike, extraction_map: Dict[str, Any]) -> str:
+        """Add or replace a directory's mapping; returns the directory key."""
+        key = normalize_path(directory)
+        old = self.entries.get(key)
+        if old is not None:
+            if self.by_source.get(normalize_path(old["source_file"])) == key:
+                del self.by_source[normalize_path(old["source_file"])]
+            for item in map_items(old):
+                for filename in item_files(item):
+                    self.by_file.pop(f"{key}/{filename}", None)
+
+        self.entries[key] = extraction_map
+        self.by_source[normalize_path(extraction_map["source_file"])] = key
+        for item in map_items(extraction_map):
+            for filename in item_files(item):
+                self.by_file[f"{key}/{filename}"] = (key, item)
+        return key
+
+    def get(self, directory: PathLike) -> Optional[Dict[str, Any]]:
+        return self.entries.get(normalize_path(directory))
+
+    def find_source(self, source_file: PathLike) -> Optional[str]:
+        """Return the directory a source file is extracted to."""
+        return self.by_source.get(normalize_path(source_file))
+
+    def find_file(self, path: PathLike) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """Return the directory and literal/SQL entry of an extracted file."""
+        return self.by_file.get(normalize_path(path))
+
+    def directories(self, output_dir: PathLike) -> List[str]:
+        """Return the extracted directories directly under ``output_dir``."""
+        parent = normalize_path(output_dir)
+        return sorted(d for d in self.entries if parent_path(d) == parent)
+
+    def line(self, directory: str) -> str:
+        record = {"dir": directory, **self.entries[directory]}
+        return json.dumps(record, ensure_ascii=False) + "\n"
+
+    def dumps(self) -> str:
+        return "".join(self.line(directory) for directory in sorted(self.entries))
+
+    def reload(self, text: str) -> None:
+        """Replace the mappings with those parsed from the manifest's text."""
+        current = Manifest.parse(text, self.path)
+        self.entries = current.entries
+        self.by_source = current.by_source
+        self.by_file = current.by_file
+
+
+def load_manifest(storage: Storage) -> Optional[Manifest]:
+    """Return the manifest in use, reading it at most once per storage."""
+    with _loading:
+        if storage not in _loaded:
+            manifest = None
+            if storage.exists(MANIFEST_FILE):
+                manifest = Manifest.parse(storage.read_text(MANIFEST_FILE))
+            _loaded[storage] = manifest
+        return _loaded[storage]
+
+
+def has_extraction_map(storage: Storage, directory: PathLike) -> bool:
+    manifest = load_manifest(storage)
+    if manifest is not None and manifest.get(directory) is not None:
+        return True
+    return storage.exists(Path(directory) / MAP_FILE)
+
+
+def read_extraction_map(storage: Storage, directory: PathLike) -> Dict[str, Any]:
+    """Return a directory's mapping from the manifest or its own map file."""
+    manifest = load_manifest(storage)
+    if manifest is not None:
+        extraction_map = manifest.get(directory)
+        if extraction_map is not None:
+            return extraction_map
+    map_file = Path(directory) / MAP_FILE
+    if not storage.exists(map_file):
+        raise FileNotFoundError(f"Extraction map not found: {map_file}")
+    result: Dict[str, Any] = json.loads(storage.read_text(map_file))
+    return result
+
+
+def write_extraction_map(
+    storage: Storage, directory: PathLike, extraction_map: Dict[str, Any]
+) -> str:
+    """Record a directory's mapping and return the file it went to.
+
+    With a manifest in use the mapping is appended to it, holding the
+    storage's lock on the manifest; otherwise it is written to the
+    directory's ``_extraction_map.json``.
+    """
+    manifest = load_manifest(storage)
+    if manifest is None:
+        map_file = str(Path(directory) / MAP_FILE)
+        storage.write_text(map_file, json.dumps(extraction_map, indent=2))
+        return map_file
+    with manifest.lock, storage.lock(manifest.path):
+        key = manifest.set(directory, extraction_map)
+        storage.append_text(manifest.path, manifest.line(key))
+        manifest.unsorted = True
+    return manifest.path
+
+
+def manifest_directories(storage: Storage, output_dir: str) -> Optional[List[str]]:
+    """Return the extracted directories the manifest lists, or None without one."""
+    manifest = load_manifest(storage)
+    return None if manifest is None else manifest.directories(output_dir)
+
+
+def compact_manifest(storage: Storage, force: bool = False) -> bool:
+    """Rewrite the manifest sorted, with one line per directory.
+
+    Does nothing if there is no manifest, or (unless ``force``) if nothing
+    was appended since it was last sorted. Returns True if it was rewritten.
+    The file is re-read under the storage's lock first, so lines appended by
+    other runs sharing the tree since this one loaded it are kept.
+    """
+    manifest = load_manifest(storage)
+    if manifest is None or not (manifest.unsorted or force):
+        return False
+    with manifest.lock, storage.lock(manifest.path):
+        if storage.exists(manifest.path):
+            manifest.reload(storage.read_text(manifest.path))
+        storage.write_text(manifest.path, manifest.dumps())
+        manifest.unsorted = False
+    return True
+
+
+def add_sizes(storage: Storage, extraction_map: Dict[str, Any]) -> bool:
+    """Fill in each entry's size from the source file; False if it is missing."""
+    from extract_literals import iter_components
+
+    source_file = extraction_map["source_file"]
+    if not storage.exists(source_file):
+        return False
+    data = json.loads(storage.read_text(source_file))
+    if "literals" in extraction_map:
+        values = {
+            path: component.get("value")
+            for path, component in iter_components(
+                data.get("modelView", {}).get("components", [])
+            )
+        }
+        for item in extraction_map["literals"]:
+            value = values.get(item["component_path"])
+            if isinstance(value, str):
+                item["size"] = len(value.encode())
+    for item in extraction_map.get("sql_blocks", []):
+        value = data.get(item["field"])
+        if isinstance(value, str):
+            # The extracted SQL has its line endings normalized
+            cleaned = value.replace("\r\n", "\n").replace("\r", "\n")
+            item["size"] = len(cleaned.encode())
+    return True
+
+
+def migrate(storage: Storage) -> Tuple[Manifest, List[str], List[str]]:
+    """Build (or extend) the manifest from the per-directory maps.
+
+    Returns the manifest, the map files migrated and the directories whose
+    source file is missing (migrated without sizes).
+    """
+    manifest = load_manifest(storage) or Manifest()
+    migrated = []
+    missing_sources = []
+    for output_dir in EXTRACTED_DIRS:
+        if not storage.is_dir(output_dir):
+            continue
+        for directory in storage.iterdir(output_dir):
+            map_file = str(Path(directory) / MAP_FILE)
+            if not storage.exists(map_file):
+                continue
+            migrated.append(map_file)
+            # Mappings recorded since the manifest was created are newer
+            if manifest.get(directory) is not None:
+                continue
+            extraction_map = json.loads(storage.read_text(map_file))
+            if not add_sizes(storage, extraction_map):
+                missing_sources.append(directory)
+            manifest.set(directory, extraction_map)
+
+    storage.write_text(manifest.path, manifest.dumps())
+    manifest.unsorted = False
+    _loaded[storage] = manifest
+    return manifest, migrated, missing_sources
+
+
+def main():
+    from extract_literals import parse_options, print_planned_writes
+
+    args, options = parse_options(sys.argv[1:])
+    if not args:
+        print(__doc__)
+        sys.exit(1)
+
+    command = args[0]
+    # The same storage as extraction, so sources inside archives resolve
+    storage: Storage = ArchiveStorage(DiskStorage())
+    if "dry-run" in options:
+        storage = ReadOnlyStorage(storage)
+
+    if command == "migrate":
+        try:
+            manifest, migrated, missing_sources = migrate(storage)
+        except ValueError as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+        for directory in missing_sources:
+            print(f"⚠️  Source file missing, no sizes recorded: {directory}")
+        if "remove-maps" in options:
+            for map_file in migrated:
+                storage.remove(map_file)
+                print(f"Removed: {map_file}")
+        print(
+            f"✅ {len(manifest.entries)} mapping(s) in {manifest.path} "
+            f"({len(migrated)} map file(s) migrated)"
+        )
+        if isinstance(storage, ReadOnlyStorage):
+            print_planned_writes(storage)
+
+    elif command in ("lookup", "compact"):
+        try:
+            loaded = load_manifest(storage)
+        except ValueError as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+        if loaded is None:
+            print(f"❌ No {MANIFEST_FILE}; run 'python manifest.py migrate' first")
+            sys.exit(1)
+        manifest = loaded
+
+        if command == "compact":
+            compact_manifest(storage, force=True)
+            print(f"✅ {len(manifest.entries)} mapping(s) in {manifest.path}")
+            if isinstance(storage, ReadOnlyStorage):
+                print_planned_writes(storage)
+            return
+
+        if len(args) < 2:
+            print("❌ Pass a source or extracted file to look up")
+            sys.exit(1)
+        path = args[1]
+        found = manifest.find_file(path)
+        if found is not None:
+            directory, item = found
+            extraction_map = manifest.entries[directory]
+            print(f"{path}: from {extraction_map['source_file']}")
+            for key, value in item.items():
+                print(f"  {key}: {value}")
+            return
+        source_dir = manifest.find_source(path)
+        if source_dir is None:
+            print(f"❌ {path} is not a mapped source or extracted file")
+            sys.exit(1)
+        print(f"{path}: extracted to {source_dir}")
+        for item in map_items(manifest.entries[source_dir]):
+            location = item.get("component_path") or item.get("field")
+            size = item.get("size")
+            print(
+                f"  {location} -> {', '.join(item_files(item))} "
+                f"({'?' if size is None else f'{size:,}'} bytes, {item['content_hash']})"
+            )
+
+    else:
+        print(f"Unknown command: {command}")
+        print(__doc__)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
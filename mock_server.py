@@ -0,0 +1,586 @@
+#!/usr/bin/env python3
+"""
+Local mock of the Banner virtual domain REST API, for testing pages offline.
+
+Serves ``/BannerExtensibility/internalPb/virtualDomains.<serviceName>`` for
+every virtual domain definition found (``virtualDomains/`` by default):
+
+    GET     Rows, filtered by query parameters that name a column (e.g. ?gid=...
+            for a ``GID`` column) and paged with ``max`` and ``offset``
+    POST    Insert the JSON body (an object or a list of objects)
+    PUT     Update row ``/<id>`` (or the body's ``id``) with the JSON body
+    DELETE  Delete row ``/<id>``
+
+Methods whose ``code*`` SQL is empty answer 405, as Banner does. Rows live in a
+SQLite database, one table per domain. A table is filled from a fixture file
+(a JSON list of row objects) if there is one, otherwise with rows generated
+from the column names in the domain's ``codeGet`` select list. Row ids are
+SQLite rowids, starting at 1 in load order.
+
+Latency and errors can be injected per domain with a JSON config file, in the
+same shape as the request cache config::
+
+    {
+      "default": {"latency": "lognormal:80,0.5", "error_rate": 0.01},
+      "domains": {
+        "spridenName": {"latency": "uniform:200,800", "error_rate": 0.05,
+                        "error_status": 503, "rows": 500},
+        "efg_terms": {"fixture": "fixtures/efg_terms.json"}
+      }
+    }
+
+Latencies are in milliseconds: ``fixed:<ms>`` (or just ``<ms>``),
+``uniform:<min>,<max>``, ``normal:<mean>,<sd>``, ``lognormal:<median>,<sigma>``
+or ``exponential:<mean>``.
+
+Usage:
+    python mock_server.py serve-mock [file_pattern]  # Serve virtual domains locally
+
+Options:
+    --host=<host>        Interface to listen on (default: 127.0.0.1)
+    --port=<n>           Port to listen on (default: 8000)
+    --config=<file>      Per-domain latency/error/fixture settings (see above)
+    --latency=<spec>     Default latency distribution (default: none)
+    --error-rate=<x>     Default share of requests that fail, 0-1 (default: 0)
+    --rows=<n>           Rows generated per domain without a fixture (default: 50)
+    --fixtures=<dir>     Directory of <serviceName>.json fixture files
+    --db=<file>          Keep rows in a SQLite file across runs (default: memory)
+    --seed=<n>           Seed for generated rows, latency and errors (default: 0)
+    --verbose            Log every request
+    --roots=<dirs>       Comma-separated directories to search for virtual domains
+"""
+
+import json
+import math
+import os
+import random
+import re
+import sqlite3
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from discovery import DEFAULT_PATTERN, parse_roots
+from extract_literals import parse_options
+from extract_virtual_domains import find_domain_files
+
+URL_PREFIX = "/BannerExtensibility/internalPb/virtualDomains."
+
+DEFAULT_SETTINGS: Dict[str, Any] = {
+    "latency": "0",
+    "error_rate": 0.0,
+    "error_status": 500,
+    "rows": 50,
+}
+
+METHOD_FIELDS = {
+    "GET": "codeGet",
+    "POST": "codePost",
+    "PUT": "codePut",
+    "DELETE": "codeDelete",
+}
+
+SQL_COMMENT_RE = re.compile(r"--[^\n]*|/\*.*?\*/", re.S)
+COLUMN_ALIAS_RE = re.compile(r'(?:^|[\s.])(?:as\s+)?("?)([A-Za-z_][\w$#]*)\1\s*$', re.I)
+
+FIRST_NAMES = ["Ana", "Ben", "Chen", "Dara", "Eli", "Fatima", "Gus", "Hana"]
+LAST_NAMES = ["Garcia", "Nguyen", "Smith", "Okafor", "Patel", "Kim", "Lopez"]
+
+Sampler = Callable[[random.Random], float]
+
+
+def parse_latency(spec: str) -> Sampler:
+    """Parse a latency distribution into a sampler returning milliseconds."""
+    kind, _, arguments = str(spec).partition(":")
+    if not arguments:
+        kind, arguments = "fixed", kind
+    try:
+        values = [float(value) for value in arguments.split(",")]
+    except ValueError:
+        raise ValueError(f"Invalid latency: {spec}") from None
+
+    shapes: Dict[str, Tuple[int, Sampler]] = {
+        "fixed": (1, lambda rng: values[0]),
+        "uniform": (2, lambda rng: rng.uniform(values[0], values[1])),
+        "normal": (2, lambda rng: rng.gauss(values[0], values[1])),
+        "lognormal": (
+            2,
+            lambda rng: rng.lognormvariate(math.log(values[0]), values[1]),
+        ),
+        "exponential": (1, lambda rng: rng.expovariate(1 / values[0])),
+    }
+    if kind not in shapes or len(values) != shapes[kind][0] or min(values) < 0:
+        raise ValueError(f"Invalid latency: {spec}")
+    if kind in ("lognormal", "exponential") and values[0] == 0:
+        return lambda rng: 0.0
+    sample = shapes[kind][1]
+    return lambda rng: max(sample(rng), 0.0)
+
+
+def validate_config(config: Dict[str, Any]) -> None:
+    """Raise ValueError if a mock server configuration is malformed."""
+
+    def check_settings(settings: Any, where: str) -> None:
+        if not isinstance(settings, dict):
+            raise ValueError(f"{where} must be an object")
+        if "latency" in settings:
+            parse_latency(settings["latency"])
+        error_rate = settings.get("error_rate", 0)
+        if not isinstance(error_rate, (int, float)) or not 0 <= error_rate <= 1:
+            raise ValueError(f"{where}.error_rate must be between 0 and 1")
+        error_status = settings.get("error_status", 500)
+        if not isinstance(error_status, int) or not 400 <= error_status <= 599:
+            raise ValueError(f"{where}.error_status must be an HTTP error status")
+        rows = settings.get("rows", 0)
+        if not isinstance(rows, int) or rows < 0:
+            raise ValueError(f"{where}.rows must be a non-negative integer")
+
+    check_settings(config.get("default", {}), "default")
+    domains = config.get("domains", {})
+    if not isinstance(domains, dict):
+        raise ValueError("domains must be an object keyed by serviceName")
+    for name, settings in domains.items():
+        check_settings(settings, f"domains.{name}")
+
+
+def load_config(
+    config_file: Optional[str] = None, defaults: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """Load a mock server configuration, filling in defaults."""
+    config: Dict[str, Any] = {
+        "default": dict(DEFAULT_SETTINGS, **(defaults or {})),
+        "domains": {},
+    }
+    if config_file:
+        with open(config_file, encoding="utf-8") as f:
+            user_config = json.load(f)
+        config["default"].update(user_config.get("default", {}))
+        config["domains"].update(user_config.get("domains", {}))
+
+    validate_config(config)
+    return config
+
+
+def split_top_level(text: str) -> List[str]:
+    """Split SQL on commas outside parentheses and quotes."""
+    parts, depth, quote, start = [], 0, "", 0
+    for i, char in enumerate(text):
+        if quote:
+            if char == quote:
+                quote = ""
+        elif char in "'\"":
+            quote = char
+        elif char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        elif char == "," and depth == 0:
+            parts.append(text[start:i])
+            start = i + 1
+    parts.append(text[start:])
+    return parts
+
+
+def find_top_level_keyword(sql: str, keyword: str, start: int = 0) -> int:
+    """Find a keyword outside parentheses and quotes, or return -1."""
+    pattern = re.compile(rf"\b{keyword}\b", re.I)
+    depth, quote = 0, ""
+    for i in range(start, len(sql)):
+        char = sql[i]
+        if quote:
+            if char == quote:
+                quote = ""
+        elif char in "'\"":
+            quote = char
+        elif char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        elif depth == 0 and pattern.match(sql, i):
+            return i
+    return -1
+
+
+def parse_select_columns(sql: str) -> List[str]:
+    """Return the column names of a query's select list, as Oracle reports them.
+
+    Unquoted names are upper-cased; columns without a usable name (``*`` or an
+    unaliased expression) get the expression text instead.
+    """
+    sql = SQL_COMMENT_RE.sub(" ", sql or "")
+    select = find_top_level_keyword(sql, "select")
+    if select < 0:
+        return []
+    start = select + len("select")
+    end = find_top_level_keyword(sql, "from", start)
+    select_list = re.sub(
+        r"^\s*(?:distinct|unique|all)\b", "", sql[start:end], flags=re.I
+    )
+
+    columns = []
+    for item in split_top_level(select_list):
+        item = " ".join(item.split())
+        if not item or item == "*" or item.endswith(".*"):
+            continue
+        match = COLUMN_ALIAS_RE.search(item)
+        if match and not (match.group(2).lower() == "end" and not match.group(1)):
+            name = match.group(2) if match.group(1) else match.group(2).upper()
+        else:
+            name = item.upper()
+        if name not in columns:
+            columns.append(name)
+    return columns
+
+
+def generate_value(column: str, index: int, rng: random.Random) -> Any:
+    """Generate a plausible value for a column from its name."""
+    name = column.upper()
+    if "PIDM" in name:
+        return 100000 + index
+    if "EMAIL" in name:
+        return f"student{index}@example.edu"
+    if "PHONE" in name:
+        return f"555-{rng.randrange(100, 1000)}-{rng.randrange(1000, 10000)}"
+    if "DATE" in name:
+        return f"2024-{rng.randrange(1, 13):02d}-{rng.randrange(1, 29):02d}"
+    if "TERM" in name and "DESC" not in name:
+        return f"{2020 + index % 6}{rng.choice(['10', '30', '50', '70'])}"
+    if name.endswith("_IND") or "FLAG" in name:
+        return rng.choice(["Y", "N"])
+    if "FIRST" in name:
+        return rng.choice(FIRST_NAMES)
+    if "LAST" in name:
+        return rng.choice(LAST_NAMES)
+    if name in ("ID", "GID") or name.endswith("_ID"):
+        return f"G{index:08d}"
+    if any(word in name for word in ("AMOUNT", "BALANCE", "COUNT", "NUM", "HOURS")):
+        return round(rng.uniform(0, 1000), 2)
+    if "CODE" in name:
+        return "".join(rng.choice("ABCDEFGHJKLMNPRSTUVWXYZ") for _ in range(2))
+    return f"{column.lower()} {index}"
+
+
+def generate_rows(columns: List[str], count: int, seed: str) -> List[Dict[str, Any]]:
+    """Generate deterministic rows for a list of columns."""
+    rng = random.Random(seed)
+    return [
+        {column: generate_value(column, index, rng) for column in columns}
+        for index in range(1, count + 1)
+    ]
+
+
+def quote_identifier(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+class MockVirtualDomains:
+    """Virtual domain REST semantics over a SQLite database.
+
+    ``handle`` does the work for one request and returns (status, payload,
+    delay in seconds); the HTTP handler only sleeps and writes the response.
+    """
+
+    def __init__(
+        self,
+        domains: Dict[str, Dict[str, Any]],
+        config: Optional[Dict[str, Any]] = None,
+        db_file: str = ":memory:",
+        fixtures_dir: Optional[str] = None,
+        seed: int = 0,
+    ):
+        self.domains = domains
+        self.config = config or load_config()
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(db_file, check_same_thread=False)
+        self.columns: Dict[str, List[str]] = {}
+        self.latency: Dict[str, Sampler] = {}
+        for name, domain in domains.items():
+            self.latency[name] = parse_latency(self.settings(name)["latency"])
+            self.load_table(name, domain, fixtures_dir, seed)
+
+    def settings(self, name: str) -> Dict[str, Any]:
+        return dict(self.config["default"], **self.config["domains"].get(name, {}))
+
+    def load_table(
+        self,
+        name: str,
+        domain: Dict[str, Any],
+        fixtures_dir: Optional[str],
+        seed: int,
+    ) -> None:
+        """Create and fill a domain's table, keeping rows from an existing db."""
+        settings = self.settings(name)
+        fixture_file = settings.get("fixture")
+        if not fixture_file and fixtures_dir:
+            candidate = os.path.join(fixtures_dir, f"{name}.json")
+            fixture_file = candidate if os.path.exists(candidate) else None
+
+        rows: List[Dict[str, Any]]
+        if fixture_file:
+            with open(fixture_file, encoding="utf-8") as f:
+                rows = json.load(f)
+            columns = list(dict.fromkeys(key for row in rows for key in row))
+        else:
+            columns = parse_select_columns(domain.get("codeGet") or "") or ["ID"]
+            rows = generate_rows(columns, settings["rows"], f"{seed}:{name}")
+
+        table = quote_identifier(f"vd_{name}")
+        existing = [row[1] for row in self.conn.execute(f"PRAGMA table_info({table})")]
+        with self.conn:
+            if existing:
+                self.columns[name] = existing
+                return
+            column_sql = ", ".join(quote_identifier(column) for column in columns)
+            self.conn.execute(f"CREATE TABLE {table} ({column_sql})")
+            self.columns[name] = columns
+            for row in rows:
+                self.insert(name, row)
+
+    def column_for(self, name: str, key: str) -> Optional[str]:
+        """Match a parameter or body key to a column, ignoring case."""
+        for column in self.columns[name]:
+            if column.lower() == key.lower():
+                return column
+        return None
+
+    def insert(self, name: str, row: Dict[str, Any]) -> Dict[str, Any]:
+        values = {
+            column: row[key]
+            for key in row
+            if (column := self.column_for(name, key)) is not None
+        }
+        table = quote_identifier(f"vd_{name}")
+        if values:
+            columns = ", ".join(quote_identifier(column) for column in values)
+            placeholders = ", ".join("?" for _ in values)
+            cursor = self.conn.execute(
+                f"INSERT INTO {table} ({columns}) VALUES ({placeholders})",
+                list(values.values()),
+            )
+        else:
+            cursor = self.conn.execute(f"INSERT INTO {table} DEFAULT VALUES")
+        return dict(self.get_row(name, cursor.lastrowid) or {}, id=cursor.lastrowid)
+
+    def get_row(self, name: str, row_id: Any) -> Optional[Dict[str, Any]]:
+        table = quote_identifier(f"vd_{name}")
+        columns = self.columns[name]
+        column_sql = ", ".join(quote_identifier(column) for column in columns)
+        row = self.conn.execute(
+            f"SELECT {column_sql} FROM {table} WHERE rowid = ?", (row_id,)
+        ).fetchone()
+        return dict(zip(columns, row)) if row else None
+
+    def select(
+        self, name: str, params: Dict[str, str], max_rows: Optional[int], offset: int
+    ) -> List[Dict[str, Any]]:
+        conditions: List[str] = []
+        values: List[Any] = []
+        for key, value in params.items():
+            column = self.column_for(name, key)
+            if column is not None:
+                conditions.append(f"CAST({quote_identifier(column)} AS TEXT) = ?")
+                values.append(value)
+
+        columns = self.columns[name]
+        sql = (
+            f"SELECT {', '.join(quote_identifier(column) for column in columns)} "
+            f"FROM {quote_identifier(f'vd_{name}')}"
+        )
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY rowid LIMIT ? OFFSET ?"
+        values += [-1 if max_rows is None else max_rows, offset]
+        return [dict(zip(columns, row)) for row in self.conn.execute(sql, values)]
+
+    def handle(
+        self, method: str, raw_path: str, body: bytes = b""
+    ) -> Tuple[int, Any, float]:
+        """Answer one request: (status, JSON payload or None, delay in seconds)."""
+        url = urlsplit(raw_path)
+        if not url.path.startswith(URL_PREFIX):
+            return 404, {"errors": f"Not found: {url.path}"}, 0.0
+        name, _, row_id = url.path[len(URL_PREFIX) :].partition("/")
+        if name not in self.domains:
+            return 404, {"errors": f"Unknown virtual domain: {name}"}, 0.0
+
+        settings = self.settings(name)
+        with self.lock:
+            delay = self.latency[name](self.rng) / 1000
+            failed = self.rng.random() < settings["error_rate"]
+        if failed:
+            return settings["error_status"], {"errors": "Injected error"}, delay
+
+        if not self.domains[name].get(METHOD_FIELDS[method]):
+            return 405, {"errors": f"{method} is not defined for {name}"}, delay
+
+        try:
+            payload = json.loads(body) if body else {}
+        except json.JSONDecodeError:
+            return 400, {"errors": "Request body is not valid JSON"}, delay
+
+        with self.lock, self.conn:
+            if method == "GET":
+                params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+                try:
+                    max_rows = int(params.pop("max")) if "max" in params else None
+                    offset = int(params.pop("offset", 0) or 0)
+                except ValueError:
+                    return 400, {"errors": "max and offset must be integers"}, delay
+                return 200, self.select(name, params, max_rows, offset), delay
+
+            if method == "POST":
+                rows = payload if isinstance(payload, list) else [payload]
+                if not all(isinstance(row, dict) for row in rows):
+                    return 400, {"errors": "Rows must be JSON objects"}, delay
+                created = [self.insert(name, row) for row in rows]
+                return 200, created if isinstance(payload, list) else created[0], delay
+
+            if not isinstance(payload, dict):
+                return 400, {"errors": "Request body must be a JSON object"}, delay
+            row_id = row_id or str(payload.get("id", payload.get("ID", "")))
+            if not row_id.isdigit() or self.get_row(name, int(row_id)) is None:
+                return 404, {"errors": f"No row {row_id} in {name}"}, delay
+
+            table = quote_identifier(f"vd_{name}")
+            if method == "DELETE":
+                self.conn.execute(
+                    f"DELETE FROM {table} WHERE rowid = ?", (int(row_id),)
+                )
+                return 204, None, delay
+
+            updates = {
+                column: value
+                for key, value in payload.items()
+                if (column := self.column_for(name, key)) is not None
+            }
+            if updates:
+                assignments = ", ".join(
+                    f"{quote_identifier(column)} = ?" for column in updates
+                )
+                self.conn.execute(
+                    f"UPDATE {table} SET {assignments} WHERE rowid = ?",
+                    [*updates.values(), int(row_id)],
+                )
+            row = self.get_row(name, int(row_id)) or {}
+            return 200, dict(row, id=int(row_id)), delay
+
+
+class MockHTTPServer(ThreadingHTTPServer):
+    # Load tests open many connections at once; the default backlog of 5
+    # turns the overflow into 1s SYN retransmits
+    request_queue_size = 128
+
+
+def make_handler(mock: MockVirtualDomains, verbose: bool = False) -> type:
+    """Create a request handler class bound to a mock."""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # Headers and body go out in separate writes; with Nagle on, keep-alive
+        # clients wait on a delayed ACK (~40ms) for every response
+        disable_nagle_algorithm = True
+
+        def respond(self) -> None:
+            length = int(self.headers.get("Content-Length") or 0)
+            body = self.rfile.read(length) if length else b""
+            status, payload, delay = mock.handle(self.command, self.path, body)
+            if delay:
+                time.sleep(delay)
+
+            data = b"" if payload is None else json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Access-Control-Allow-Origin", "*")
+            if payload is not None:
+                self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        do_GET = do_POST = do_PUT = do_DELETE = respond
+
+        def do_OPTIONS(self) -> None:
+            self.send_response(204)
+            self.send_header("Access-Control-Allow-Origin", "*")
+            self.send_header(
+                "Access-Control-Allow-Methods", "GET, POST, PUT, DELETE, OPTIONS"
+            )
+            self.send_header("Access-Control-Allow-Headers", "Content-Type, Accept")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+        def log_message(self, format: str, *args: Any) -> None:
+            if verbose:
+                super().log_message(format, *args)
+
+    return Handler
+
+
+def load_domains(domain_files: List[str]) -> Dict[str, Dict[str, Any]]:
+    """Load virtual domain definitions keyed by service name."""
+    domains = {}
+    for domain_file in domain_files:
+        with open(domain_file, encoding="utf-8") as f:
+            data = json.load(f)
+        domains[data["serviceName"]] = data
+    return domains
+
+
+def main():
+    args, options = parse_options(sys.argv[1:])
+    if not args:
+        print(__doc__)
+        sys.exit(1)
+
+    command = args[0]
+    pattern = args[1] if len(args) > 1 else DEFAULT_PATTERN
+
+    if command != "serve-mock":
+        print(f"Unknown command: {command}")
+        print(__doc__)
+        sys.exit(1)
+
+    domains = load_domains(
+        find_domain_files(pattern, roots=parse_roots(options.get("roots")))
+    )
+    if not domains:
+        print(f"No virtual domain JSON files found matching pattern: {pattern}")
+        sys.exit(1)
+
+    defaults: Dict[str, Any] = {}
+    try:
+        if "latency" in options:
+            defaults["latency"] = options["latency"]
+        if "error-rate" in options:
+            defaults["error_rate"] = float(options["error-rate"])
+        if "rows" in options:
+            defaults["rows"] = int(options["rows"])
+        config = load_config(options.get("config"), defaults)
+        host = options.get("host", "127.0.0.1")
+        port = int(options.get("port", 8000))
+        seed = int(options.get("seed", 0))
+    except ValueError as e:
+        print(f"❌ Invalid mock server settings: {e}")
+        sys.exit(1)
+
+    mock = MockVirtualDomains(
+        domains, config, options.get("db", ":memory:"), options.get("fixtures"), seed
+    )
+    server = MockHTTPServer((host, port), make_handler(mock, "verbose" in options))
+
+    print(f"✅ Serving {len(domains)} virtual domain(s) on http://{host}:{port}")
+    for name in sorted(domains):
+        print(f"   http://{host}:{port}{URL_PREFIX}{name}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Helpers shared by rebuild transforms.
+
+A rebuild transform is a callable that takes the rebuilt page data (the parsed
+page JSON, after extracted literal files have been applied) and modifies it in
+place. Transforms are passed to ``rebuild_json_from_literals`` and only ever
+change the build output, never the files in ``extracted_literals/``.
+"""
+
+import re
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+from content_sniffer import is_inline_script
+from extract_literals import iter_components
+
+# Inline <script> blocks: group 1 is the attribute string, group 2 the body
+SCRIPT_BLOCK_RE = re.compile(r"<script\b([^>]*)>(.*?)</script\s*>", re.I | re.S)
+
+
+def iter_literals(data: Dict[str, Any]) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """Yield (component_path, component) for every literal component of a page."""
+    components = data.get("modelView", {}).get("components", [])
+    for component_path, component in iter_components(components):
+        if component.get("type") == "literal" and isinstance(
+            component.get("value"), str
+        ):
+            yield component_path, component
+
+
+def count_inline_scripts(html: str) -> int:
+    """Count the inline scripts in an HTML literal."""
+    return sum(
+        1 for m in SCRIPT_BLOCK_RE.finditer(html) if is_inline_script(m.group(1))
+    )
+
+
+def has_inline_script(html: str) -> bool:
+    """Return True if an HTML literal contains at least one inline script."""
+    return count_inline_scripts(html) > 0
+
+
+def rewrite_inline_scripts(html: str, rewrite: Callable[[str, int], str]) -> str:
+    """Rewrite the body of every inline script in an HTML literal.
+
+    ``rewrite`` is called with the script body and the index of the inline
+    script within the literal, and returns the new body.
+    """
+    index = 0
+
+    def replace(match: "re.Match[str]") -> str:
+        nonlocal index
+        attributes, body = match.group(1), match.group(2)
+        if not is_inline_script(attributes):
+            return match.group(0)
+        new_body = rewrite(body, index)
+        index += 1
+        return f"<script{attributes}>{new_body}</script>"
+
+    return SCRIPT_BLOCK_RE.sub(replace, html)
+
+
+def inject_script(
+    data: Dict[str, Any],
+    script: str,
+    marker: str,
+    predicate: Optional[Callable[[str], bool]] = None,
+) -> bool:
+    """Prepend an inline ``<script>`` to the first literal that needs it.
+
+    The script goes in front of the first literal (in document order) for which
+    ``predicate`` returns True, defaulting to the first literal with an inline
+    script, so it runs before any page code that depends on it. ``marker`` is a
+    unique string contained in ``script``; a literal that already contains it
+    is left alone so transforms can be applied more than once safely.
+
+    Returns True if the script is present in the page afterwards.
+    """
+    predicate = predicate or has_inline_script
+    for _, component in iter_literals(data):
+        if marker in component["value"]:
+            return True
+
+    for _, component in iter_literals(data):
+        if predicate(component["value"]):
+            component["value"] = f"<script>\n{script}\n</script>\n" + component["value"]
+            return True
+
+    return False
@@ -0,0 +1,1153 @@
+#!/usr/bin/env python3
+"""
+Object model for scripting against pages and virtual domains.
+
+The command line tools work on the dicts ``json.load`` returns and print as
+they go. This module wraps the same files in small classes whose methods
+return results instead:
+
+    from pagebuilder import Corpus, Page
+
+    page = Page.load("pages/pages.ftReview.json")
+    for literal in page.literals:
+        print(literal.path, literal.name, literal.kind, len(literal.value))
+
+    result = page.extract()               # ExtractResult(directory, files, ...)
+    statuses = page.check()               # [SyncStatus(path, status, ...)]
+    result = page.rebuild()               # RebuildResult(target_file, changed)
+    issues = page.validate()              # [ValidationIssue(source, ...)]
+
+    corpus = Corpus.load(roots=["pages", "virtualDomains"])
+    issues = corpus.validate()
+
+Everything uses ``__slots__``, and a corpus holds little more than the
+component tree: literal values and virtual domain SQL of ``LAZY_MIN_LENGTH``
+characters or more are not kept in memory. Loading records where each one
+starts and ends in the file (in bytes), and ``Literal.value`` /
+``VirtualDomain.sql()`` read just that range back when asked. Keys, component
+types and names, paths and other short strings are interned in a
+``StringPool`` shared by the whole corpus, so the many identical strings
+across pages are stored once.
+
+A lazy value is read from the file as it is on disk at that moment. If the
+file has changed size since it was loaded, or the recorded range no longer
+holds a JSON string, reading raises ValueError; load the page again. Pass
+``lazy=False`` to load every value up front instead.
+
+Usage:
+    python pagebuilder.py validate [file_pattern]       # Validate pages and virtual domains
+    python pagebuilder.py export --ndjson [file_pattern] # Stream literals and SQL to stdout
+    python pagebuilder.py import --ndjson [file|-]       # Apply changed records (default: stdin)
+
+NDJSON streams have one record per line for every literal and SQL block:
+
+    {"file": "pages/pages.ftReview.json", "page": "ftReview",
+     "path": "3.components.0", "name": "functions", "kind": "js",
+     "hash": "<md5 of value>", "value": "..."}
+
+``page`` is the constantName (serviceName for virtual domains), ``path`` the
+component path (the SQL field, e.g. ``codeGet``) and ``kind`` one of html,
+js, css, mixed, text or sql. Tools in a pipeline change ``value`` and leave
+``hash`` alone; import writes only records whose value no longer matches
+their hash, and skips any whose file has changed since the export. Both
+directions hold one file at a time, so any size of corpus streams through
+in constant memory:
+
+    python pagebuilder.py export --ndjson | my-formatter | python pagebuilder.py import --ndjson
+
+Options:
+    --ndjson        Export/import format (currently the only one)
+    --dry-run       Import: don't write anything; list the files that would be written
+    --roots=<dirs>  Comma-separated directories to search (default: everything
+                    not ignored by .gitignore/.pagebuilderignore)
+"""
+
+import hashlib
+import io
+import json
+import os
+import sys
+from json import decoder, scanner
+from json.decoder import JSONDecoder
+from pathlib import Path
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Hashable,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+    TypeVar,
+    Union,
+)
+
+from content_sniffer import classify_literal
+from discovery import DEFAULT_PATTERN, find_json_files, parse_roots
+from extract_literals import (
+    SyncStatus,
+    compare_literal_files,
+    extract_literals_from_data,
+    is_page_definition,
+    parse_options,
+    print_planned_writes,
+    read_extracted_literal,
+)
+from extract_virtual_domains import (
+    SQL_FIELDS,
+    compare_sql_files,
+    extract_sql_from_data,
+    is_virtual_domain,
+)
+from inheritance import extends_page, inheritance_problems
+from manifest import MAP_FILE, has_extraction_map, read_extraction_map
+from storage import DiskStorage, PathLike, ReadOnlyStorage, Storage
+
+# Every NDJSON record has these; others (page, name, kind) are informational
+RECORD_KEYS = {"file", "path", "hash", "value"}
+
+# Strings at least this long are loaded lazily; shorter ones are interned
+LAZY_MIN_LENGTH = 128
+
+H = TypeVar("H", bound=Hashable)
+
+# The pure Python scanner and the string decoder it uses (not in the stubs)
+scanstring: Callable[..., Tuple[str, int]] = decoder.scanstring  # type: ignore[attr-defined]
+py_make_scanner: Callable[..., Any] = scanner.py_make_scanner  # type: ignore[attr-defined]
+
+
+class Span(NamedTuple):
+    # Offsets of a JSON string including its quotes: characters while
+    # decoding, bytes once the page is built
+    start: int
+    end: int
+
+
+class ExtractResult(NamedTuple):
+    directory: str
+    files: List[str]
+    extraction_map: Dict[str, Any]
+
+
+class RebuildResult(NamedTuple):
+    target_file: str
+    # Component paths (pages) or SQL fields (virtual domains) that changed
+    changed: List[str]
+
+
+class ValidationIssue(NamedTuple):
+    source: str
+    # Component path or field name
+    location: str
+    message: str
+
+
+class StringPool:
+    """Interns strings (and key-order tuples) so equal values are stored once."""
+
+    __slots__ = ("_values",)
+
+    def __init__(self) -> None:
+        self._values: Dict[Hashable, Hashable] = {}
+
+    def __call__(self, value: H) -> H:
+        return self._values.setdefault(value, value)  # type: ignore[return-value]
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+
+def scan_lazy_string(s: str, end: int, strict: bool = True) -> Tuple[Any, int]:
+    """``parse_string`` for the JSON scanner that skips over long strings.
+
+    Returns a ``Span`` for strings of ``LAZY_MIN_LENGTH`` characters or more
+    (they are decoded when read) and the decoded string otherwise.
+    """
+    pos = end
+    while True:
+        quote = s.find('"', pos)
+        if quote == -1:
+            # Unterminated; let the real scanner report it
+            return scanstring(s, end, strict)
+        backslashes = 0
+        # s[end - 1] is the opening quote, so this stops there at the latest
+        while s[quote - 1 - backslashes] == "\\":
+            backslashes += 1
+        if backslashes % 2 == 0:
+            break
+        pos = quote + 1
+
+    if quote - end < LAZY_MIN_LENGTH:
+        return scanstring(s, end, strict)
+    return Span(end - 1, quote + 1), quote + 1
+
+
+class LazyDecoder(JSONDecoder):
+    """A JSON decoder that leaves long string values as ``Span`` placeholders."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.parse_string = scan_lazy_string
+        # The C scanner ignores parse_string
+        self.scan_once = py_make_scanner(self)
+
+
+def read_span(storage: Storage, path: str, size: int, span: Span) -> str:
+    """Read and decode the JSON string at a byte span of a file."""
+    with storage.open_bytes(path) as f:
+        f.seek(0, io.SEEK_END)
+        if f.tell() == size:
+            f.seek(span.start)
+            chunk = f.read(span.end - span.start)
+        else:
+            chunk = b""
+    if len(chunk) < 2 or chunk[:1] != b'"' or chunk[-1:] != b'"':
+        raise ValueError(f"{path} has changed since it was loaded")
+    return scanstring(chunk.decode("utf-8"), 1)[0]
+
+
+class Loader:
+    """Turns decoded JSON into model values: spans to bytes, strings pooled."""
+
+    __slots__ = ("text", "pool", "is_ascii", "char", "byte")
+
+    def __init__(self, text: str, is_ascii: bool, pool: StringPool):
+        self.text = text
+        self.pool = pool
+        self.is_ascii = is_ascii
+        # Last converted offset, so conversion is incremental in file order
+        self.char = 0
+        self.byte = 0
+
+    def byte_offset(self, char_offset: int) -> int:
+        if self.is_ascii:
+            return char_offset
+        if char_offset < self.char:
+            self.char = self.byte = 0
+        self.byte += len(self.text[self.char : char_offset].encode("utf-8"))
+        self.char = char_offset
+        return self.byte
+
+    def span(self, value: Any) -> Any:
+        """Return a lazy value: a byte ``Span`` for long strings."""
+        if isinstance(value, Span):
+            return Span(self.byte_offset(value.start), self.byte_offset(value.end))
+        return self.plain(value)
+
+    def plain(self, value: Any) -> Any:
+        """Return a value with spans decoded and short strings interned."""
+        if isinstance(value, Span):
+            return scanstring(self.text, value.start + 1)[0]
+        if isinstance(value, str):
+            return self.pool(value) if len(value) < LAZY_MIN_LENGTH else value
+        if isinstance(value, dict):
+            return {self.pool(k): self.plain(v) for k, v in value.items()}
+        if isinstance(value, list):
+            return [self.plain(v) for v in value]
+        return value
+
+    def order(self, data: Dict[str, Any]) -> Tuple[str, ...]:
+        return self.pool(tuple(self.pool(key) for key in data))
+
+
+def decode(raw: bytes, lazy: bool, pool: StringPool) -> Tuple[Any, Loader]:
+    """Decode a JSON file's bytes, leaving long strings as spans if ``lazy``."""
+    text = raw.decode("utf-8")
+    if lazy:
+        data = LazyDecoder().decode(text)
+    else:
+        data = json.loads(text)
+    return data, Loader(text, raw.isascii(), pool)
+
+
+class Component:
+    """A page component. Nested components are in ``children``."""
+
+    __slots__ = ("page", "path", "fields", "children", "_order")
+
+    def __init__(
+        self,
+        page: "Page",
+        path: str,
+        fields: Dict[str, Any],
+        children: List["Component"],
+        order: Tuple[str, ...],
+    ):
+        self.page = page
+        self.path = path
+        # Every key except nested components (and a literal's value)
+        self.fields = fields
+        self.children = children
+        self._order = order
+
+    @property
+    def type(self) -> str:
+        value = self.fields.get("type")
+        return value if isinstance(value, str) else ""
+
+    @property
+    def name(self) -> str:
+        value = self.fields.get("name")
+        return value if isinstance(value, str) else ""
+
+    def iter_components(self) -> Iterator["Component"]:
+        """Yield this component and its descendants, depth first."""
+        yield self
+        for child in self.children:
+            yield from child.iter_components()
+
+    def to_data(self) -> Dict[str, Any]:
+        """Return the component as JSON data, keys in their original order."""
+        data = {}
+        for key in self._order:
+            if key in self.fields:
+                data[key] = self.fields[key]
+            elif key == "components":
+                data[key] = [child.to_data() for child in self.children]
+        return data
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.path!r}, {self.type!r}, {self.name!r})"
+
+
+class Literal(Component):
+    """A ``literal`` component, whose value is read from the file on demand."""
+
+    __slots__ = ("_value",)
+
+    def __init__(
+        self,
+        page: "Page",
+        path: str,
+        fields: Dict[str, Any],
+        children: List[Component],
+        order: Tuple[str, ...],
+        value: Any,
+    ):
+        super().__init__(page, path, fields, children, order)
+        self._value = value
+
+    @property
+    def value(self) -> Any:
+        """The literal's content (normally a string; "" if it has none)."""
+        if isinstance(self._value, Span):
+            return self.page.read(self._value)
+        return self._value
+
+    @value.setter
+    def value(self, value: Any) -> None:
+        self._value = value
+        if "value" not in self._order:
+            self._order = self.page.pool(self._order + ("value",))
+
+    @property
+    def is_loaded(self) -> bool:
+        """True if the value is held in memory rather than read on demand."""
+        return not isinstance(self._value, Span)
+
+    @property
+    def content_hash(self) -> str:
+        """MD5 of the value, as recorded in extraction maps."""
+        return hashlib.md5(str(self.value).encode()).hexdigest()
+
+    @property
+    def kind(self) -> str:
+        """``html``, ``js``, ``css``, ``mixed`` or ``text`` (see content_sniffer)."""
+        return classify_literal(str(self.value), self.name).kind
+
+    def to_data(self) -> Dict[str, Any]:
+        data = super().to_data()
+        if "value" in self._order:
+            data["value"] = self.value
+            # Put it back in its original position
+            data = {key: data[key] for key in self._order if key in data}
+        return data
+
+
+def build_components(
+    page: "Page", items: List[Any], loader: Loader, path: str = ""
+) -> List[Component]:
+    """Build components from decoded JSON, keeping literal values lazy."""
+    pool = loader.pool
+    components: List[Component] = []
+    for i, item in enumerate(items):
+        component_path = pool(f"{path}.{i}" if path else str(i))
+        if not isinstance(item, dict):
+            raise ValueError(
+                f"{page.source}: component {component_path} is not an object"
+            )
+
+        is_literal = item.get("type") == "literal"
+        fields = {}
+        children: List[Component] = []
+        value: Any = ""
+        for key, field_value in item.items():
+            if key == "components" and isinstance(field_value, list):
+                children = build_components(
+                    page, field_value, loader, f"{component_path}.components"
+                )
+            elif key == "value" and is_literal:
+                value = loader.span(field_value)
+            else:
+                fields[pool(key)] = loader.plain(field_value)
+
+        order = loader.order(item)
+        if is_literal:
+            components.append(
+                Literal(page, component_path, fields, children, order, value)
+            )
+        else:
+            components.append(Component(page, component_path, fields, children, order))
+    return components
+
+
+class Page:
+    """A page definition: top-level fields, ``modelView`` and its components."""
+
+    __slots__ = (
+        "source",
+        "storage",
+        "pool",
+        "fields",
+        "view",
+        "components",
+        "_order",
+        "_view_order",
+        "_size",
+    )
+
+    def __init__(self, source: str, storage: Storage, pool: StringPool):
+        self.source = source
+        self.storage = storage
+        self.pool = pool
+        # Top-level keys except modelView, and modelView's except components
+        self.fields: Dict[str, Any] = {}
+        self.view: Optional[Dict[str, Any]] = None
+        self.components: List[Component] = []
+        self._order: Tuple[str, ...] = ()
+        self._view_order: Tuple[str, ...] = ()
+        self._size = 0
+
+    @classmethod
+    def load(
+        cls,
+        path: PathLike,
+        storage: Optional[Storage] = None,
+        lazy: bool = True,
+        pool: Optional[StringPool] = None,
+    ) -> "Page":
+        """Load a page definition file.
+
+        Raises ValueError if the file is not a JSON object (and
+        json.JSONDecodeError if it is not JSON at all).
+        """
+        storage = storage or DiskStorage()
+        with storage.open_bytes(path) as f:
+            raw = f.read()
+        data, loader = decode(raw, lazy, pool if pool is not None else StringPool())
+        if not isinstance(data, dict):
+            raise ValueError(f"{path} is not a JSON object")
+
+        page = cls(str(path), storage, loader.pool)
+        page.build(data, loader)
+        page._size = len(raw)
+        return page
+
+    def build(self, data: Dict[str, Any], loader: Loader) -> None:
+        self._order = loader.order(data)
+        model_view = data.get("modelView")
+        for key, value in data.items():
+            if key == "modelView" and isinstance(model_view, dict):
+                continue
+            self.fields[self.pool(key)] = loader.plain(value)
+        if not isinstance(model_view, dict):
+            return
+
+        self.view = {}
+        self._view_order = loader.order(model_view)
+        for key, value in model_view.items():
+            if key == "components" and isinstance(value, list):
+                self.components = build_components(self, value, loader)
+            else:
+                self.view[self.pool(key)] = loader.plain(value)
+
+    def read(self, span: Span) -> str:
+        return read_span(self.storage, self.source, self._size, span)
+
+    @property
+    def constant_name(self) -> str:
+        return self.fields.get("constantName") or Path(self.source).stem
+
+    def iter_components(self) -> Iterator[Component]:
+        """Yield every component, depth first (the extraction map's order)."""
+        for component in self.components:
+            yield from component.iter_components()
+
+    @property
+    def literals(self) -> List[Literal]:
+        return [c for c in self.iter_components() if isinstance(c, Literal)]
+
+    def get_component(self, path: str) -> Optional[Component]:
+        """Return the component at an extraction map path, e.g. ``3.components.0``."""
+        components = self.components
+        component = None
+        for index in path.split(".components."):
+            if not index.isdigit() or int(index) >= len(components):
+                return None
+            component = components[int(index)]
+            components = component.children
+        return component
+
+    def to_data(self) -> Dict[str, Any]:
+        """Return the page as JSON data, keys in their original order."""
+        data = {}
+        for key in self._order:
+            if key in self.fields:
+                data[key] = self.fields[key]
+            elif key == "modelView" and self.view is not None:
+                view = {}
+                for view_key in self._view_order:
+                    if view_key in self.view:
+                        view[view_key] = self.view[view_key]
+                    elif view_key == "components":
+                        view[view_key] = [c.to_data() for c in self.components]
+                data[key] = view
+        return data
+
+    def save(self, path: Optional[PathLike] = None) -> str:
+        """Write the page (default: over its source) and return the path."""
+        target = str(path or self.source)
+        self.storage.write_text(
+            target, json.dumps(self.to_data(), indent=3, ensure_ascii=False)
+        )
+        if target == self.source:
+            self.reindex()
+        return target
+
+    def reindex(self) -> None:
+        """Re-read the source so lazy values point into its current content."""
+        fresh = Page.load(self.source, self.storage, pool=self.pool)
+        for old, new in zip(self.iter_components(), fresh.iter_components()):
+            if isinstance(old, Literal) and isinstance(new, Literal):
+                old._value = new._value
+        self._size = fresh._size
+
+    def extract(
+        self, output_dir: str = "extracted_literals", split_mixed: bool = False
+    ) -> ExtractResult:
+        """Extract literals to ``<output_dir>/<constantName>/``."""
+        extraction_map = extract_literals_from_data(
+            self.to_data(),
+            self.source,
+            output_dir,
+            self.storage,
+            split_mixed,
+            verbose=False,
+        )
+        directory = Path(output_dir) / extraction_map["page_name"]
+        files = [
+            str(directory / name)
+            for info in extraction_map["literals"]
+            for name in [info["filename"]] + info.get("parts", [])
+        ]
+        return ExtractResult(str(directory), files, extraction_map)
+
+    def default_dir(self, page_dir: Optional[str]) -> Path:
+        return Path(page_dir or Path("extracted_literals") / self.constant_name)
+
+    def read_map(self, directory: Path, missing: str) -> Dict[str, Any]:
+        if not has_extraction_map(self.storage, directory):
+            raise FileNotFoundError(f"{missing}: {directory / MAP_FILE}")
+        return read_extraction_map(self.storage, directory)
+
+    def rebuild(
+        self,
+        page_dir: Optional[str] = None,
+        output_dir: Optional[str] = None,
+        transforms: Optional[List[Callable[[Dict[str, Any]], None]]] = None,
+    ) -> RebuildResult:
+        """Update literals from their extracted files and write the page.
+
+        The page is written over its source, or to ``output_dir`` keeping the
+        file name. ``transforms`` are applied to the written JSON only, not
+        to this object.
+        """
+        page_path = self.default_dir(page_dir)
+        changed = []
+        with self.storage.lock(self.source):
+            extraction_map = self.read_map(page_path, "Extraction map not found")
+            for literal_info in extraction_map["literals"]:
+                content = read_extracted_literal(self.storage, page_path, literal_info)
+                component = self.get_component(literal_info["component_path"])
+                if content is None or not isinstance(component, Literal):
+                    continue
+                if component.value != content:
+                    component.value = content
+                    changed.append(component.path)
+
+            target_file = (
+                str(Path(output_dir) / Path(self.source).name)
+                if output_dir
+                else self.source
+            )
+            self.storage.mkdir(Path(target_file).parent)
+            if transforms:
+                data = self.to_data()
+                for transform in transforms:
+                    transform(data)
+                self.storage.write_text(
+                    target_file, json.dumps(data, indent=3, ensure_ascii=False)
+                )
+            else:
+                self.save(target_file)
+        return RebuildResult(target_file, changed)
+
+    def check(self, page_dir: Optional[str] = None) -> List[SyncStatus]:
+        """Compare extracted literal files with this page's current values.
+
+        Raises FileNotFoundError if there is no extraction map.
+        """
+        page_path = self.default_dir(page_dir)
+        extraction_map = self.read_map(page_path, "No extraction map found")
+        current_content = {}
+        for literal in self.literals:
+            value = literal.value
+            if isinstance(value, str):
+                current_content[literal.path] = value
+        return compare_literal_files(
+            str(page_path), extraction_map, current_content, self.storage
+        )
+
+    def validate(self) -> List[ValidationIssue]:
+        """Check the page's structure and return any problems found."""
+        issues = []
+
+        def issue(location: str, message: str) -> None:
+            issues.append(ValidationIssue(self.source, location, message))
+
+        constant_name = self.fields.get("constantName")
+        if not isinstance(constant_name, str) or not constant_name:
+            issue("constantName", "missing or empty constantName")
+        if self.view is None:
+            issue("modelView", "missing modelView object")
+        elif "components" not in self._view_order:
+            issue("modelView.components", "missing components list")
+        elif "components" in self.view:
+            issue("modelView.components", "components is not a list")
+
+        seen: Dict[str, str] = {}
+        for component in self.iter_components():
+            if not component.type:
+                issue(component.path, "component has no type")
+            if not component.name:
+                issue(component.path, "component has no name")
+            elif component.name in seen:
+                issue(
+                    component.path,
+                    f"duplicate name {component.name!r} "
+                    f"(also at {seen[component.name]})",
+                )
+            else:
+                seen[component.name] = component.path
+            if "components" in component.fields:
+                issue(component.path, "components is not a list")
+            if isinstance(component, Literal) and not isinstance(component.value, str):
+                issue(component.path, "literal value is not a string")
+        return issues
+
+    def __repr__(self) -> str:
+        return f"Page({self.source!r})"
+
+
+class VirtualDomain:
+    """A virtual domain definition whose SQL is read from the file on demand."""
+
+    __slots__ = ("source", "storage", "pool", "fields", "_order", "_size")
+
+    def __init__(self, source: str, storage: Storage, pool: StringPool):
+        self.source = source
+        self.storage = storage
+        self.pool = pool
+        self.fields: Dict[str, Any] = {}
+        self._order: Tuple[str, ...] = ()
+        self._size = 0
+
+    @classmethod
+    def load(
+        cls,
+        path: PathLike,
+        storage: Optional[Storage] = None,
+        lazy: bool = True,
+        pool: Optional[StringPool] = None,
+    ) -> "VirtualDomain":
+        """Load a virtual domain file.
+
+        Raises ValueError if the file is not a JSON object (and
+        json.JSONDecodeError if it is not JSON at all).
+        """
+        storage = storage or DiskStorage()
+        with storage.open_bytes(path) as f:
+            raw = f.read()
+        data, loader = decode(raw, lazy, pool if pool is not None else StringPool())
+        if not isinstance(data, dict):
+            raise ValueError(f"{path} is not a JSON object")
+
+        domain = cls(str(path), storage, loader.pool)
+        domain.build(data, loader)
+        domain._size = len(raw)
+        return domain
+
+    def build(self, data: Dict[str, Any], loader: Loader) -> None:
+        self._order = loader.order(data)
+        for key, value in data.items():
+            if key in SQL_FIELDS:
+                self.fields[self.pool(key)] = loader.span(value)
+            else:
+                self.fields[self.pool(key)] = loader.plain(value)
+
+    @property
+    def service_name(self) -> str:
+        return self.fields.get("serviceName") or Path(self.source).stem.replace(
+            "virtualDomains.", ""
+        )
+
+    def sql(self, field: str) -> Optional[str]:
+        """Return an SQL field (``codeGet`` etc.), or None if it is not set."""
+        value = self.fields.get(field)
+        if isinstance(value, Span):
+            return read_span(self.storage, self.source, self._size, value)
+        return value
+
+    def set_sql(self, field: str, value: Optional[str]) -> None:
+        self.fields[field] = value
+        if field not in self._order:
+            self._order = self.pool(self._order + (self.pool(field),))
+
+    def to_data(self) -> Dict[str, Any]:
+        """Return the domain as JSON data, keys in their original order."""
+        return {
+            key: self.sql(key) if key in SQL_FIELDS else self.fields[key]
+            for key in self._order
+        }
+
+    def save(self, path: Optional[PathLike] = None) -> str:
+        """Write the domain (default: over its source) and return the path."""
+        target = str(path or self.source)
+        self.storage.write_text(
+            target, json.dumps(self.to_data(), indent=2, ensure_ascii=False)
+        )
+        if target == self.source:
+            fresh = VirtualDomain.load(self.source, self.storage, pool=self.pool)
+            for field in SQL_FIELDS:
+                if field in fresh.fields:
+                    self.fields[field] = fresh.fields[field]
+            self._size = fresh._size
+        return target
+
+    def extract(self, output_dir: str = "extracted_virtual_domains") -> ExtractResult:
+        """Extract SQL to ``<output_dir>/<serviceName>/``."""
+        extraction_map = extract_sql_from_data(
+            self.to_data(), self.source, output_dir, self.storage, verbose=False
+        )
+        directory = Path(output_dir) / extraction_map["service_name"]
+        files = [
+            str(directory / info["filename"]) for info in extraction_map["sql_blocks"]
+        ]
+        return ExtractResult(str(directory), files, extraction_map)
+
+    def default_dir(self, domain_dir: Optional[str]) -> Path:
+        return Path(domain_dir or Path("extracted_virtual_domains") / self.service_name)
+
+    def read_map(self, directory: Path, missing: str) -> Dict[str, Any]:
+        if not has_extraction_map(self.storage, directory):
+            raise FileNotFoundError(f"{missing}: {directory / MAP_FILE}")
+        return read_extraction_map(self.storage, directory)
+
+    def rebuild(
+        self, domain_dir: Optional[str] = None, output_dir: Optional[str] = None
+    ) -> RebuildResult:
+        """Update SQL fields from their extracted files and write the domain."""
+        domain_path = self.default_dir(domain_dir)
+        changed = []
+        with self.storage.lock(self.source):
+            extraction_map = self.read_map(domain_path, "Extraction map not found")
+            for sql_info in extraction_map["sql_blocks"]:
+                filepath = domain_path / sql_info["filename"]
+                if not self.storage.exists(filepath):
+                    continue
+                content = self.storage.read_text(filepath)
+                if self.sql(sql_info["field"]) != content:
+                    self.set_sql(sql_info["field"], content)
+                    changed.append(sql_info["field"])
+
+            target_file = (
+                str(Path(output_dir) / Path(self.source).name)
+                if output_dir
+                else self.source
+            )
+            if output_dir:
+                self.storage.mkdir(output_dir)
+            self.save(target_file)
+        return RebuildResult(target_file, changed)
+
+    def check(self, domain_dir: Optional[str] = None) -> List[SyncStatus]:
+        """Compare extracted SQL files with this domain's current SQL.
+
+        Raises FileNotFoundError if there is no extraction map.
+        """
+        domain_path = self.default_dir(domain_dir)
+        extraction_map = self.read_map(domain_path, "No extraction map found")
+        return compare_sql_files(
+            str(domain_path), extraction_map, self.to_data(), self.storage
+        )
+
+    def validate(self) -> List[ValidationIssue]:
+        """Check the domain's structure and return any problems found."""
+        issues = []
+
+        def issue(location: str, message: str) -> None:
+            issues.append(ValidationIssue(self.source, location, message))
+
+        service_name = self.fields.get("serviceName")
+        if not isinstance(service_name, str) or not service_name:
+            issue("serviceName", "missing or empty serviceName")
+        for field in SQL_FIELDS:
+            value = self.fields.get(field)
+            if value is not None and not isinstance(value, (str, Span)):
+                issue(field, "SQL is not a string")
+        if not any((self.sql(field) or "").strip() for field in SQL_FIELDS):
+            issue("codeGet", "no SQL in any of " + ", ".join(SQL_FIELDS))
+
+        roles = self.fields.get("virtualDomainRoles", [])
+        if not isinstance(roles, list):
+            issue("virtualDomainRoles", "virtualDomainRoles is not a list")
+            roles = []
+        for i, role in enumerate(roles):
+            location = f"virtualDomainRoles.{i}"
+            if not isinstance(role, dict):
+                issue(location, "role is not an object")
+                continue
+            if not isinstance(role.get("roleName"), str) or not role["roleName"]:
+                issue(location, "role has no roleName")
+            if not isinstance(role.get("allowGet"), bool):
+                issue(location, "role has no allowGet flag")
+        return issues
+
+    def __repr__(self) -> str:
+        return f"VirtualDomain({self.source!r})"
+
+
+Definition = Union[Page, VirtualDomain]
+
+
+def load_definition(
+    file_path: str, storage: Storage, pool: StringPool, lazy: bool = True
+) -> Optional[Definition]:
+    """Load a page or virtual domain, or return None if the file is neither."""
+    try:
+        with storage.open_bytes(file_path) as f:
+            raw = f.read()
+        data, loader = decode(raw, lazy, pool)
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        return None
+
+    item: Definition
+    if is_page_definition(data):
+        item = Page(file_path, storage, pool)
+    elif is_virtual_domain(data):
+        item = VirtualDomain(file_path, storage, pool)
+    else:
+        return None
+    item.build(data, loader)
+    item._size = len(raw)
+    return item
+
+
+def find_definition_files(
+    pattern: str = DEFAULT_PATTERN,
+    storage: Optional[Storage] = None,
+    roots: Optional[List[str]] = None,
+) -> List[str]:
+    """Find JSON files that may be page or virtual domain definitions."""
+    return [
+        file_path
+        for file_path in find_json_files(pattern, storage, roots)
+        if file_path.endswith(".json")
+        and not file_path.endswith("_extraction_map.json")
+    ]
+
+
+class Corpus:
+    """All pages and virtual domains found under some roots, sharing a pool."""
+
+    __slots__ = ("pages", "domains", "pool")
+
+    def __init__(self) -> None:
+        self.pages: List[Page] = []
+        self.domains: List[VirtualDomain] = []
+        self.pool = StringPool()
+
+    @classmethod
+    def load(
+        cls,
+        pattern: str = DEFAULT_PATTERN,
+        roots: Optional[List[str]] = None,
+        storage: Optional[Storage] = None,
+        lazy: bool = True,
+    ) -> "Corpus":
+        """Load every page and virtual domain JSON file matching ``pattern``.
+
+        Each file is read once; files that are neither are skipped.
+        """
+        storage = storage or DiskStorage()
+        corpus = cls()
+        for file_path in find_definition_files(pattern, storage, roots):
+            item = load_definition(file_path, storage, corpus.pool, lazy)
+            if isinstance(item, Page):
+                corpus.pages.append(item)
+            elif isinstance(item, VirtualDomain):
+                corpus.domains.append(item)
+        return corpus
+
+    def iter_literals(self) -> Iterator[Literal]:
+        for page in self.pages:
+            yield from page.literals
+
+    def validate(self) -> List[ValidationIssue]:
+        issues = []
+        for page in self.pages:
+            issues.extend(page.validate())
+        # extendsPage chains need every page, so they are checked here
+        by_name = {page.constant_name: page for page in self.pages}
+        parents = {name: extends_page(page.fields) for name, page in by_name.items()}
+        for name, problem in inheritance_problems(parents).items():
+            issues.append(ValidationIssue(by_name[name].source, "extendsPage", problem))
+        for domain in self.domains:
+            issues.extend(domain.validate())
+        return issues
+
+
+def iter_records(
+    json_files: Iterable[str], storage: Optional[Storage] = None
+) -> Iterator[Dict[str, Any]]:
+    """Yield an NDJSON record for every literal and SQL block, file by file.
+
+    Only one file is loaded at a time, and each value is read just before
+    its record is yielded.
+    """
+    storage = storage or DiskStorage()
+    for file_path in json_files:
+        item = load_definition(file_path, storage, StringPool())
+        if isinstance(item, Page):
+            for literal in item.literals:
+                value = literal.value
+                if not isinstance(value, str):
+                    continue
+                yield {
+                    "file": item.source,
+                    "page": item.constant_name,
+                    "path": literal.path,
+                    "name": literal.name,
+                    "kind": classify_literal(value, literal.name).kind,
+                    "hash": hashlib.md5(value.encode()).hexdigest(),
+                    "value": value,
+                }
+        elif isinstance(item, VirtualDomain):
+            for field in SQL_FIELDS:
+                sql = item.sql(field)
+                if not isinstance(sql, str):
+                    continue
+                yield {
+                    "file": item.source,
+                    "page": item.service_name,
+                    "path": field,
+                    "name": field,
+                    "kind": "sql",
+                    "hash": hashlib.md5(sql.encode()).hexdigest(),
+                    "value": sql,
+                }
+
+
+def changed_records(lines: Iterable[str]) -> Iterator[Dict[str, Any]]:
+    """Parse NDJSON records and yield those whose value no longer matches its hash.
+
+    Raises ValueError for a line that is not a record.
+    """
+    for number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"line {number}: {e}") from e
+        if not isinstance(record, dict) or not RECORD_KEYS <= record.keys():
+            raise ValueError(
+                f"line {number}: expected {', '.join(sorted(RECORD_KEYS))}"
+            )
+        if not isinstance(record["value"], str):
+            raise ValueError(f"line {number}: value is not a string")
+        if hashlib.md5(record["value"].encode()).hexdigest() != record["hash"]:
+            yield record
+
+
+class ImportResult(NamedTuple):
+    file: str
+    # Component paths or SQL fields written
+    changed: List[str]
+    errors: List[str]
+
+
+def apply_records(
+    file_path: str, records: List[Dict[str, Any]], storage: Optional[Storage] = None
+) -> ImportResult:
+    """Write changed record values into one page or virtual domain file.
+
+    A record is skipped (with an error) if the file's current value matches
+    neither the record's hash (the value when exported) nor its new value.
+    """
+    storage = storage or DiskStorage()
+    changed: List[str] = []
+    errors: List[str] = []
+    with storage.lock(file_path):
+        item = (
+            load_definition(file_path, storage, StringPool())
+            if storage.exists(file_path)
+            else None
+        )
+        if item is None:
+            return ImportResult(
+                file_path, [], [f"{file_path}: not a page or virtual domain"]
+            )
+
+        def needs_update(record: Dict[str, Any], current: Any) -> bool:
+            if current == record["value"]:
+                return False
+            if hashlib.md5((current or "").encode()).hexdigest() != record["hash"]:
+                errors.append(
+                    f"{file_path} [{record['path']}]: changed since it was exported"
+                )
+                return False
+            return True
+
+        for record in records:
+            path = record["path"]
+            if isinstance(item, Page):
+                literal = item.get_component(path)
+                if not isinstance(literal, Literal):
+                    errors.append(f"{file_path} [{path}]: no literal at this path")
+                elif needs_update(record, literal.value):
+                    literal.value = record["value"]
+                    changed.append(path)
+            elif path not in SQL_FIELDS:
+                errors.append(f"{file_path} [{path}]: not an SQL field")
+            elif needs_update(record, item.sql(path)):
+                item.set_sql(path, record["value"])
+                changed.append(path)
+
+        if changed:
+            item.save()
+    return ImportResult(file_path, changed, errors)
+
+
+def import_records(
+    lines: Iterable[str], storage: Optional[Storage] = None
+) -> Iterator[ImportResult]:
+    """Apply the changed records of an NDJSON stream, one file at a time.
+
+    Records are buffered only until the stream moves on to another file, so
+    an exported stream (grouped by file) is imported in constant memory.
+    """
+    pending: List[Dict[str, Any]] = []
+    for record in changed_records(lines):
+        if pending and record["file"] != pending[0]["file"]:
+            yield apply_records(pending[0]["file"], pending, storage)
+            pending = []
+        pending.append(record)
+    if pending:
+        yield apply_records(pending[0]["file"], pending, storage)
+
+
+def main():
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+
+    args, options = parse_options(sys.argv[1:])
+    command = args[0] if args else ""
+    file_pattern = args[1] if len(args) > 1 else DEFAULT_PATTERN
+    roots = parse_roots(options.get("roots"))
+
+    if command in ("export", "import") and "ndjson" not in options:
+        print(f"❌ {command} needs --ndjson (the only supported format)")
+        sys.exit(1)
+
+    if command == "export":
+        json_files = find_definition_files(file_pattern, roots=roots)
+        try:
+            for record in iter_records(json_files):
+                sys.stdout.write(json.dumps(record) + "\n")
+            sys.stdout.flush()
+        except BrokenPipeError:
+            # The reader stopped early (e.g. ``| head``); stay quiet about it
+            os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+            sys.exit(1)
+
+    elif command == "import":
+        storage: Storage = DiskStorage()
+        if "dry-run" in options:
+            storage = ReadOnlyStorage(storage)
+        source = args[1] if len(args) > 1 else "-"
+        if source == "-":
+            stream = io.TextIOWrapper(sys.stdin.buffer, encoding="utf-8")
+        else:
+            stream = open(source, encoding="utf-8")
+
+        records = files = 0
+        all_imported = True
+        try:
+            with stream:
+                for result in import_records(stream, storage):
+                    for error in result.errors:
+                        print(f"❌ {error}")
+                    all_imported = all_imported and not result.errors
+                    if result.changed:
+                        print(
+                            f"Rebuilt: {result.file} ({len(result.changed)} record(s))"
+                        )
+                        records += len(result.changed)
+                        files += 1
+        except ValueError as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+
+        if isinstance(storage, ReadOnlyStorage):
+            print_planned_writes(storage)
+        if not all_imported:
+            print("\n❌ Some records could not be imported.")
+            sys.exit(1)
+        print(f"\n✅ Imported {records} changed record(s) into {files} file(s)")
+
+    elif command == "validate":
+        corpus = Corpus.load(file_pattern, roots)
+        issues = corpus.validate()
+        for issue in issues:
+            print(f"❌ {issue.source} [{issue.location}]: {issue.message}")
+        checked = len(corpus.pages) + len(corpus.domains)
+        if issues:
+            print(f"\n❌ {len(issues)} problem(s) in {checked} file(s)")
+            sys.exit(1)
+        print(
+            f"✅ {len(corpus.pages)} page(s), {len(corpus.domains)} virtual domain(s) valid"
+        )
+
+    else:
+        print(f"Unknown command: {command}")
+        print(__doc__)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""
+Shared include partials for extracted literal files.
+
+A header, a CDN ``<link>`` block or helper functions repeated across pages can
+live once in ``extracted_literals/_partials/`` and be included from any
+extracted literal file with a comment on a line of its own::
+
+    <!-- @include cdn.html -->
+    /* @include theme.css */
+    // @include helpers.js
+
+Paths are relative to the partials directory, and partials can include other
+partials. ``rebuild`` expands each directive into the page JSON between the
+directive and a matching end marker::
+
+    <!-- @include cdn.html -->
+    ...contents of _partials/cdn.html...
+    <!-- @end-include cdn.html -->
+
+so ``extract`` can collapse the region back to the directive, and ``check``
+compares the expanded files with the JSON. Editing a partial only needs the
+pages that include it, directly or through other partials, to be rebuilt
+(``rebuild --partial=cdn.html``). Expansions are cached per partial for a run,
+and include cycles and missing partials raise ValueError.
+"""
+
+import re
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+from storage import DiskStorage, Storage
+
+PARTIALS_DIR = "_partials"
+
+# Each comment opener and the closer it needs
+COMMENT_CLOSERS = {"<!--": "-->", "/*": "*/", "//": ""}
+
+MARKER = (
+    r"^(?P<{group}indent>[ \t]*)(?P<{group}open><!--|/\*|//)[ \t]*@{keyword}"
+    r"[ \t]+(?P<{group}name>[^\s]+?)[ \t]*(?P<{group}close>-->|\*/)?[ \t]*$"
+)
+INCLUDE_RE = re.compile(MARKER.format(group="", keyword="include"), re.M)
+
+# A directive, optionally followed by an expanded region up to its end marker.
+# The region may not contain another directive for the same partial.
+REGION_RE = re.compile(
+    MARKER.format(group="", keyword="include")
+    + r"(?:\n(?P<body>(?:(?!^[ \t]*(?:<!--|/\*|//)[ \t]*@include[ \t]+(?P=name)[ \t]"
+    r"*(?:-->|\*/)?[ \t]*$).)*?)\n?"
+    + r"^[ \t]*(?:<!--|/\*|//)[ \t]*@end-include[ \t]+(?P=name)[ \t]*(?:-->|\*/)?"
+    + r"[ \t]*$)?",
+    re.M | re.S,
+)
+
+
+def is_directive(match: "re.Match[str]") -> bool:
+    """Return True if a marker's comment is closed the way it was opened."""
+    return (match.group("close") or "") == COMMENT_CLOSERS[match.group("open")]
+
+
+def has_includes(text: str) -> bool:
+    return "@include" in text and any(
+        is_directive(m) for m in INCLUDE_RE.finditer(text)
+    )
+
+
+def end_marker(match: "re.Match[str]") -> str:
+    close = match.group("close")
+    return (
+        f"{match.group('indent')}{match.group('open')} @end-include "
+        f"{match.group('name')}{' ' + close if close else ''}"
+    )
+
+
+class Partials:
+    """Expands include directives, caching each partial's expansion."""
+
+    def __init__(self, directory: Path, storage: Optional[Storage] = None):
+        self.directory = Path(directory)
+        self.storage = storage or DiskStorage()
+        self._expanded: Dict[str, str] = {}
+        self._includes: Dict[str, List[str]] = {}
+
+    @classmethod
+    def for_page(cls, page_path: Path, storage: Optional[Storage] = None) -> "Partials":
+        """Return the partials shared by the pages extracted next to ``page_path``."""
+        return cls(Path(page_path).parent / PARTIALS_DIR, storage)
+
+    def path(self, name: str) -> Path:
+        path = self.directory / name
+        if ".." in Path(name).parts or Path(name).is_absolute():
+            raise ValueError(f"Partial outside {self.directory}: {name}")
+        if not self.storage.exists(path):
+            raise ValueError(f"Partial not found: {path}")
+        return path
+
+    def read(self, name: str) -> str:
+        return self.storage.read_text(self.path(name))
+
+    def includes(self, name: str) -> List[str]:
+        """Return the partials ``name`` includes directly."""
+        if name not in self._includes:
+            self._includes[name] = direct_includes(self.read(name))
+        return self._includes[name]
+
+    def expand_partial(self, name: str, stack: Tuple[str, ...] = ()) -> str:
+        """Return a partial's content with its own includes expanded."""
+        if name in stack:
+            raise ValueError(f"Include cycle: {' -> '.join(stack + (name,))}")
+        if name not in self._expanded:
+            content = self.expand(self.read(name), stack + (name,))
+            self._expanded[name] = content[:-1] if content.endswith("\n") else content
+        return self._expanded[name]
+
+    def expand(self, text: str, stack: Tuple[str, ...] = ()) -> str:
+        """Expand every directive in ``text`` into a marked region.
+
+        Regions that are already expanded are left as they are: they either
+        match the partial already or were edited in place, and like
+        ``collapse`` this keeps those edits rather than reverting them.
+        """
+        if not has_includes(text):
+            return text
+
+        def replace(match: "re.Match[str]") -> str:
+            if not is_directive(match):
+                return match.group(0)
+            content = self.expand_partial(match.group("name"), stack)
+            if match.group("body") is not None and match.group("body") != content:
+                return match.group(0)
+            directive = match.group(0).split("\n", 1)[0]
+            return f"{directive}\n{content}\n{end_marker(match)}"
+
+        return REGION_RE.sub(replace, text)
+
+    def collapse(self, text: str) -> Tuple[str, List[str]]:
+        """Collapse expanded regions back to their directives.
+
+        Regions whose content no longer matches the partial are left expanded
+        and their partial names returned, so edits made to them are not lost.
+        """
+        if "@end-include" not in text:
+            return text, []
+        differing = []
+
+        def replace(match: "re.Match[str]") -> str:
+            if match.group("body") is None or not is_directive(match):
+                return match.group(0)
+            directive = match.group(0).split("\n", 1)[0]
+            try:
+                current = self.expand_partial(match.group("name"))
+            except ValueError:
+                current = None
+            if match.group("body") != current:
+                differing.append(match.group("name"))
+                return match.group(0)
+            return directive
+
+        return REGION_RE.sub(replace, text), differing
+
+    def dependencies(self, name: str, stack: Tuple[str, ...] = ()) -> Set[str]:
+        """Return every partial ``name`` includes, directly or indirectly."""
+        if name in stack:
+            raise ValueError(f"Include cycle: {' -> '.join(stack + (name,))}")
+        found: Set[str] = set()
+        for included in self.includes(name):
+            found.add(included)
+            found |= self.dependencies(included, stack + (name,))
+        return found
+
+    def used_by(self, text: str) -> Set[str]:
+        """Return every partial a file includes, directly or indirectly."""
+        found: Set[str] = set()
+        for name in direct_includes(text):
+            found.add(name)
+            found |= self.dependencies(name)
+        return found
+
+
+def direct_includes(text: str) -> List[str]:
+    """Return the partial names a file's directives refer to, in order."""
+    if "@include" not in text:
+        return []
+    return [m.group("name") for m in INCLUDE_RE.finditer(text) if is_directive(m)]
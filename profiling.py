@@ -0,0 +1,120 @@
+"""
+Profiling build transform for Banner Extensibility pages.
+
+Used by ``python extract_literals.py rebuild --profile``. Every inline script in
+a literal is bracketed with ``performance.mark`` calls and measured, and every
+``$.ajax``/``jQuery.ajax`` call is routed through a small collector that
+measures requests to virtual domains. Measures are named after the page and
+component path, e.g. ``pb:ftReview:3.components.1:functions`` and
+``pb:ftReview:3.components.1:functions:ajax:efg_terms#1``.
+
+The collector logs a ``console.table`` of all measures once the page has loaded
+and no instrumented requests are pending; call ``__pbProfile.report()`` from the
+browser console to print it again.
+"""
+
+import json
+import re
+from typing import Any, Dict
+
+from page_transforms import (
+    count_inline_scripts,
+    inject_script,
+    iter_literals,
+    rewrite_inline_scripts,
+)
+
+COLLECTOR_MARKER = "pagebuilder-profile-collector"
+
+COLLECTOR_SCRIPT = """/* pagebuilder-profile-collector */
+(function (w) {
+  if (w.__pbProfile) { return; }
+  var perf = w.performance;
+  var pending = 0;
+  var loaded = false;
+  var counter = 0;
+
+  function report() {
+    var rows = perf.getEntriesByType("measure")
+      .filter(function (m) { return m.name.indexOf("pb:") === 0; })
+      .map(function (m) {
+        return {
+          name: m.name,
+          start_ms: Math.round(m.startTime * 10) / 10,
+          duration_ms: Math.round(m.duration * 10) / 10
+        };
+      });
+    console.table(rows);
+    return rows;
+  }
+
+  function settle() {
+    if (loaded && pending === 0) { report(); }
+  }
+
+  w.__pbProfile = {
+    report: report,
+    ajax: function (label) {
+      var args = Array.prototype.slice.call(arguments, 1);
+      var jq = w.jQuery || w.$;
+      var url = typeof args[0] === "string" ? args[0] : (args[0] || {}).url;
+      var match = /virtualDomains\\.([\\w$-]+)/.exec(url || "");
+      if (!match) { return jq.ajax.apply(jq, args); }
+
+      var name = label + ":ajax:" + match[1] + "#" + (++counter);
+      pending++;
+      perf.mark(name + ":start");
+      return jq.ajax.apply(jq, args).always(function () {
+        perf.mark(name + ":end");
+        perf.measure(name, name + ":start", name + ":end");
+        pending--;
+        settle();
+      });
+    }
+  };
+
+  w.addEventListener("load", function () { loaded = true; settle(); });
+})(window);"""
+
+# $.ajax( / jQuery.ajax( not preceded by an identifier or member access
+AJAX_CALL_RE = re.compile(r"(?<![\w$.])(?:\$|jQuery)\.ajax\s*\(")
+
+
+def instrument_script(body: str, label: str) -> str:
+    """Bracket a script body with performance marks and route its ajax calls."""
+    name = json.dumps(label)
+    start = json.dumps(f"{label}:start")
+    end = json.dumps(f"{label}:end")
+
+    body = AJAX_CALL_RE.sub(lambda _: f"__pbProfile.ajax({name}, ", body)
+    return (
+        f"\nperformance.mark({start});{body}\n"
+        f";performance.mark({end}); performance.measure({name}, {start}, {end});\n"
+    )
+
+
+def instrument_page(data: Dict[str, Any]) -> None:
+    """Rebuild transform: instrument every script-bearing literal of a page."""
+    page_name = data.get("constantName", "page")
+    instrumented = False
+
+    for component_path, component in iter_literals(data):
+        value = component["value"]
+        script_count = count_inline_scripts(value)
+        if not script_count:
+            continue
+
+        label = f"pb:{page_name}:{component_path}:{component.get('name', '')}"
+        numbered = script_count > 1
+
+        def rewrite(
+            body: str, index: int, label: str = label, numbered: bool = numbered
+        ) -> str:
+            # Number the measures only when a literal has several scripts
+            return instrument_script(body, f"{label}#{index}" if numbered else label)
+
+        component["value"] = rewrite_inline_scripts(value, rewrite)
+        instrumented = True
+
+    if instrumented:
+        inject_script(data, COLLECTOR_SCRIPT, COLLECTOR_MARKER)
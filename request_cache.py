@@ -0,0 +1,332 @@
+"""
+Client-side request cache for virtual-domain calls, injected at rebuild time.
+
+Used by ``python extract_literals.py rebuild --request-cache[=config.json]``.
+Pages whose literals call ``virtualDomains.*`` get a small shim in front of
+their first such literal. The shim wraps ``jQuery.ajax`` so that:
+
+* concurrent identical GETs (same URL and parameters) share one request,
+* successful GET responses are cached per URL and parameter set for a TTL,
+  with a per-domain cap on the number of cached responses (least recently
+  used entries are evicted first),
+* POST/PUT/DELETE calls to a domain pass through and clear that domain's
+  cached responses,
+* each caller gets its own copy of the response data and a jqXHR-like object
+  with ``status``, ``statusText``, ``readyState`` and ``abort()``; a shared
+  request is only aborted once every caller sharing it has aborted.
+
+Cache settings come from a JSON file with defaults and per-domain overrides::
+
+    {
+      "default": {"ttl": 60, "max_entries": 50},
+      "domains": {
+        "efg_terms": {"ttl": 600},
+        "free_tuition_single": {"ttl": 30, "max_entries": 5},
+        "spridenName": false
+      }
+    }
+
+``ttl`` is in seconds; a domain set to ``false`` (or ``{"enabled": false}``)
+is never cached. The shim's core is a factory, ``createCachedAjax(ajax,
+Deferred, config, now)``, exported via ``module.exports`` when loaded outside a
+browser so it can be unit tested under Node.
+"""
+
+import json
+from typing import Any, Callable, Dict, Optional
+
+from page_transforms import inject_script
+
+SHIM_MARKER = "pagebuilder-request-cache"
+
+DEFAULT_CONFIG: Dict[str, Any] = {
+    "default": {"ttl": 60, "max_entries": 50},
+    "domains": {},
+}
+
+SHIM_TEMPLATE = """/* pagebuilder-request-cache */
+(function (root, factory) {
+  var api = factory();
+  if (typeof module === "object" && module.exports) {
+    module.exports = api;
+  } else {
+    api.install(root, __PB_REQUEST_CACHE_CONFIG__);
+  }
+})(typeof window !== "undefined" ? window : this, function () {
+  var DOMAIN_RE = /virtualDomains\\.([\\w$-]+)/;
+
+  function serialize(value) {
+    if (value === null || typeof value !== "object") {
+      return String(JSON.stringify(value));
+    }
+    var parts = [], i;
+    if (Object.prototype.toString.call(value) === "[object Array]") {
+      for (i = 0; i < value.length; i++) { parts.push(serialize(value[i])); }
+      return "[" + parts.join(",") + "]";
+    }
+    var keys = [];
+    for (var key in value) {
+      if (Object.prototype.hasOwnProperty.call(value, key)) { keys.push(key); }
+    }
+    keys.sort();
+    for (i = 0; i < keys.length; i++) {
+      parts.push(JSON.stringify(keys[i]) + ":" + serialize(value[keys[i]]));
+    }
+    return "{" + parts.join(",") + "}";
+  }
+
+  function domainSettings(config, name) {
+    var settings = {}, key;
+    var defaults = config["default"] || {};
+    var override = (config.domains || {})[name];
+    if (override === false) { return null; }
+    for (key in defaults) { settings[key] = defaults[key]; }
+    for (key in override || {}) { settings[key] = override[key]; }
+    return settings.enabled === false || !(settings.ttl > 0) ? null : settings;
+  }
+
+  function createCachedAjax(ajax, Deferred, config, now) {
+    var stores = {};
+    var inflight = {};
+    var generations = {};
+
+    function store(name) {
+      return stores[name] || (stores[name] = { entries: {}, order: [] });
+    }
+
+    function touch(domainStore, key) {
+      var index = domainStore.order.indexOf(key);
+      if (index !== -1) { domainStore.order.splice(index, 1); }
+      domainStore.order.push(key);
+    }
+
+    function remember(name, key, args, settings) {
+      var domainStore = store(name);
+      domainStore.entries[key] = { expires: now() + settings.ttl * 1000, args: args };
+      touch(domainStore, key);
+      while (domainStore.order.length > (settings.max_entries || 1)) {
+        delete domainStore.entries[domainStore.order.shift()];
+      }
+    }
+
+    function copy(value) {
+      return value !== null && typeof value === "object"
+        ? JSON.parse(JSON.stringify(value))
+        : value;
+    }
+
+    function attach(promise, settings) {
+      if (settings.success) { promise.done(settings.success); }
+      if (settings.error) { promise.fail(settings.error); }
+      if (settings.complete) {
+        promise.done(function (data, status, xhr) { settings.complete(xhr, status); });
+        promise.fail(function (xhr, status) { settings.complete(xhr, status); });
+      }
+      return promise;
+    }
+
+    // What one caller gets back: a jqXHR-like promise with readyState,
+    // status, statusText and abort(), resolved with its own copy of the
+    // data. Callers sharing a request only abort it once all of them have.
+    function respond(request, settings) {
+      var deferred = Deferred();
+      var response = deferred.promise();
+      var settled = false;
+
+      function finish(xhr, statusText, status) {
+        settled = true;
+        response.readyState = 4;
+        response.status = xhr && xhr.status !== undefined ? xhr.status : status;
+        response.statusText =
+          xhr && xhr.statusText !== undefined ? xhr.statusText : statusText;
+      }
+
+      request.callers += 1;
+      response.readyState = 1;
+      response.status = 0;
+      response.statusText = "";
+      response.abort = function (statusText) {
+        if (!settled) {
+          finish(null, statusText || "abort", 0);
+          request.callers -= 1;
+          if (request.callers === 0 && request.abort) { request.abort(); }
+          deferred.reject(response, "abort", "");
+        }
+        return response;
+      };
+      request.promise
+        .done(function (data, textStatus, xhr) {
+          if (settled) { return; }
+          finish(xhr, textStatus, 200);
+          deferred.resolve(copy(data), textStatus, response);
+        })
+        .fail(function (xhr, textStatus, error) {
+          if (settled) { return; }
+          finish(xhr, textStatus, 0);
+          deferred.reject(response, textStatus, error);
+        });
+      return attach(response, settings);
+    }
+
+    return function cachedAjax(url, options) {
+      // Copied first: reassigning url/options below would change arguments
+      var passthrough = Array.prototype.slice.call(arguments);
+      var self = this;
+      var settings = {}, key;
+      if (typeof url === "object") { options = url; url = undefined; }
+      for (key in options || {}) { settings[key] = options[key]; }
+      if (url !== undefined) { settings.url = url; }
+
+      var match = DOMAIN_RE.exec(settings.url || "");
+      if (!match) { return ajax.apply(self, passthrough); }
+      var name = match[1];
+
+      var method = String(settings.method || settings.type || "GET").toUpperCase();
+      if (method !== "GET") {
+        // Writes invalidate the domain's cached reads
+        delete stores[name];
+        generations[name] = (generations[name] || 0) + 1;
+        return ajax.apply(self, passthrough);
+      }
+
+      var cacheSettings = domainSettings(config, name);
+      if (!cacheSettings || settings.cache === false) {
+        return ajax.apply(self, passthrough);
+      }
+
+      var cacheKey = settings.url + " " + serialize(settings.data);
+      var domainStore = store(name);
+      var hit = domainStore.entries[cacheKey];
+      if (hit && hit.expires > now()) {
+        touch(domainStore, cacheKey);
+        var cached = Deferred();
+        cached.resolve.apply(cached, hit.args);
+        return respond({ promise: cached.promise(), callers: 0 }, settings);
+      }
+      if (inflight[cacheKey]) {
+        return respond(inflight[cacheKey], settings);
+      }
+
+      var generation = generations[name] || 0;
+      var deferred = Deferred();
+      var request = {
+        promise: deferred.promise(),
+        callers: 0,
+        abort: function () {
+          if (inflight[cacheKey] === request) { delete inflight[cacheKey]; }
+          if (request.xhr.abort) { request.xhr.abort(); }
+        }
+      };
+      inflight[cacheKey] = request;
+      // The caller's callbacks are attached to its own response instead, so
+      // they run once and only ever see a copy of the data
+      var requestSettings = {};
+      for (key in settings) {
+        if (key !== "success" && key !== "error" && key !== "complete") {
+          requestSettings[key] = settings[key];
+        }
+      }
+      request.xhr = ajax.call(self, requestSettings);
+      request.xhr
+        .done(function () {
+          var args = Array.prototype.slice.call(arguments);
+          if (inflight[cacheKey] === request) { delete inflight[cacheKey]; }
+          if ((generations[name] || 0) === generation) {
+            remember(name, cacheKey, args, cacheSettings);
+          }
+          deferred.resolve.apply(deferred, args);
+        })
+        .fail(function () {
+          if (inflight[cacheKey] === request) { delete inflight[cacheKey]; }
+          deferred.reject.apply(deferred, arguments);
+        });
+      return respond(request, settings);
+    };
+  }
+
+  function install(win, config) {
+    function wrap() {
+      var jq = win.jQuery;
+      if (!jq) { return false; }
+      if (!jq.ajax.__pbRequestCache) {
+        var original = jq.ajax;
+        jq.ajax = createCachedAjax(
+          function () { return original.apply(jq, arguments); },
+          jq.Deferred,
+          config,
+          function () { return new Date().getTime(); }
+        );
+        jq.ajax.__pbRequestCache = true;
+      }
+      return true;
+    }
+    if (!wrap() && win.document) {
+      win.document.addEventListener("DOMContentLoaded", wrap);
+    }
+  }
+
+  return { createCachedAjax: createCachedAjax, install: install, serialize: serialize };
+});"""
+
+
+def validate_config(config: Dict[str, Any]) -> None:
+    """Raise ValueError if a request cache configuration is malformed."""
+
+    def check_settings(settings: Any, where: str) -> None:
+        if settings is False:
+            return
+        if not isinstance(settings, dict):
+            raise ValueError(f"{where} must be an object or false")
+        ttl = settings.get("ttl", 1)
+        if not isinstance(ttl, (int, float)) or ttl < 0:
+            raise ValueError(f"{where}.ttl must be a non-negative number of seconds")
+        max_entries = settings.get("max_entries", 1)
+        if not isinstance(max_entries, int) or max_entries < 1:
+            raise ValueError(f"{where}.max_entries must be a positive integer")
+
+    check_settings(config.get("default", {}), "default")
+    domains = config.get("domains", {})
+    if not isinstance(domains, dict):
+        raise ValueError("domains must be an object keyed by serviceName")
+    for name, settings in domains.items():
+        check_settings(settings, f"domains.{name}")
+
+
+def load_config(config_file: Optional[str] = None) -> Dict[str, Any]:
+    """Load a request cache configuration, filling in defaults."""
+    config = {
+        "default": dict(DEFAULT_CONFIG["default"]),
+        "domains": {},
+    }
+    if config_file:
+        with open(config_file, encoding="utf-8") as f:
+            user_config = json.load(f)
+        config["default"].update(user_config.get("default", {}))
+        config["domains"].update(user_config.get("domains", {}))
+
+    validate_config(config)
+    return config
+
+
+def build_shim(config: Dict[str, Any]) -> str:
+    """Render the shim script with a configuration baked in."""
+    return SHIM_TEMPLATE.replace(
+        "__PB_REQUEST_CACHE_CONFIG__", json.dumps(config, sort_keys=True)
+    )
+
+
+def calls_virtual_domains(html: str) -> bool:
+    """Return True if a literal references a virtual domain endpoint."""
+    return "virtualDomains." in html
+
+
+def make_request_cache_transform(
+    config: Dict[str, Any],
+) -> Callable[[Dict[str, Any]], None]:
+    """Create a rebuild transform that injects the request cache shim."""
+    shim = build_shim(config)
+
+    def add_request_cache(data: Dict[str, Any]) -> None:
+        inject_script(data, shim, SHIM_MARKER, predicate=calls_virtual_domains)
+
+    return add_request_cache
@@ -0,0 +1,449 @@
+"""
+Resource-loading optimizer for external scripts and stylesheets, applied at
+rebuild time.
+
+Used by ``python extract_literals.py rebuild --optimize-resources[=policy.json]``.
+The HTML in each page's literals is scanned for ``<script src>`` and
+``<link>`` tags, in document order, and:
+
+* repeated tags for the same URL (same tag and ``rel``) are dropped, keeping
+  the first,
+* external scripts that are safe to defer get a ``defer`` attribute,
+* a ``<link rel="preconnect">`` and ``<link rel="dns-prefetch">`` for every
+  distinct external origin goes in front of the first literal that loads
+  anything, so connections are opened while the page is still parsing.
+
+A script is safe to defer when it is a classic script (not ``async``,
+``defer`` or a module), the globals it defines are known (see
+``KNOWN_GLOBALS``, or ``globals`` in the policy), no inline script later on
+the page and no event handler (``onLoad``, ``onUpdate``, ``onClick``, ... on
+any component or the page itself, which Page Builder runs too) mentions one
+of them, and every external script after it is deferred too, so deferring
+cannot change the order scripts see each other in. Scripts whose globals are
+unknown stay blocking.
+
+The policy file has defaults and per-page overrides, keyed by constantName::
+
+    {
+      "default": {"defer": true, "preconnect": true, "dedupe": true,
+                  "max_preconnect": 4, "keep_blocking": [], "globals": {}},
+      "pages": {
+        "efgByStu": {"keep_blocking": ["popper"]},
+        "name-coach-v3": {"globals": {"nc-widget-v3": ["NameCoach"]}},
+        "ftReview": false
+      }
+    }
+
+``keep_blocking`` lists URL substrings that are never deferred. ``globals``
+maps URL substrings to the globals those scripts define; a name starting with
+``.`` is a jQuery plugin method (``.modal`` matches ``.modal(``). Origins past
+``max_preconnect`` only get ``dns-prefetch``. A page set to ``false`` (or
+``{"enabled": false}``) is left alone.
+"""
+
+import html
+import json
+import re
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Set,
+    Tuple,
+)
+from urllib.parse import urlsplit
+
+from content_sniffer import JS_SCRIPT_TYPES, scan_markup
+from extract_literals import iter_components
+from page_transforms import iter_literals
+
+HINTS_MARKER = "<!-- pagebuilder-resource-hints -->"
+
+DEFAULT_POLICY: Dict[str, Any] = {
+    "default": {
+        "defer": True,
+        "preconnect": True,
+        "dedupe": True,
+        "max_preconnect": 4,
+        "keep_blocking": [],
+        "globals": {},
+    },
+    "pages": {},
+}
+
+# Globals defined by common libraries, matched against the script's file name
+KNOWN_GLOBALS: Dict[str, List[str]] = {
+    "jquery": ["$", "jQuery"],
+    "popper": ["Popper"],
+    "bootstrap": [
+        "bootstrap",
+        ".alert",
+        ".button",
+        ".carousel",
+        ".collapse",
+        ".dropdown",
+        ".modal",
+        ".offcanvas",
+        ".popover",
+        ".scrollspy",
+        ".tab",
+        ".toast",
+        ".tooltip",
+    ],
+    "font-awesome": ["FontAwesome"],
+    "moment": ["moment"],
+    "lodash": ["_"],
+}
+
+SCRIPT_OR_LINK_RE = re.compile(
+    r"""<(script|link)(?![\w:-])((?:[^>"']|"[^"]*"|'[^']*')*)>""", re.I
+)
+ATTRIBUTE_RE = re.compile(r"""([^\s=/>"']+)(?:\s*=\s*("[^"]*"|'[^']*'|[^\s"'>]+))?""")
+
+# Component and page keys holding JavaScript that Page Builder runs
+HANDLER_KEY_RE = re.compile(r"^on[A-Z]\w*$")
+
+# <link> rel values whose href is fetched while the page loads
+LOADED_RELS = {"stylesheet", "preload", "modulepreload", "icon"}
+
+
+class ResourceTag(NamedTuple):
+    # Position in the page's scan order, and the literal and range of the tag
+    position: int
+    component: Dict[str, Any]
+    start: int
+    end: int
+    tag: str
+    url: str
+    attributes: Dict[str, Optional[str]]
+
+    @property
+    def rel(self) -> Tuple[str, ...]:
+        return tuple(sorted((self.attributes.get("rel") or "").lower().split()))
+
+
+class InlineScript(NamedTuple):
+    position: int
+    body: str
+
+
+def validate_policy(policy: Dict[str, Any]) -> None:
+    """Raise ValueError if a resource policy is malformed."""
+
+    def check_settings(settings: Any, where: str) -> None:
+        if settings is False:
+            return
+        if not isinstance(settings, dict):
+            raise ValueError(f"{where} must be an object or false")
+        for key in ("enabled", "defer", "preconnect", "dedupe"):
+            if not isinstance(settings.get(key, True), bool):
+                raise ValueError(f"{where}.{key} must be true or false")
+        max_preconnect = settings.get("max_preconnect", 0)
+        if not isinstance(max_preconnect, int) or max_preconnect < 0:
+            raise ValueError(f"{where}.max_preconnect must be a non-negative integer")
+        keep_blocking = settings.get("keep_blocking", [])
+        if not isinstance(keep_blocking, list) or not all(
+            isinstance(item, str) for item in keep_blocking
+        ):
+            raise ValueError(f"{where}.keep_blocking must be a list of strings")
+        globals_ = settings.get("globals", {})
+        if not isinstance(globals_, dict) or not all(
+            isinstance(names, list) and all(isinstance(n, str) for n in names)
+            for names in globals_.values()
+        ):
+            raise ValueError(
+                f"{where}.globals must map URL substrings to lists of names"
+            )
+
+    check_settings(policy.get("default", {}), "default")
+    pages = policy.get("pages", {})
+    if not isinstance(pages, dict):
+        raise ValueError("pages must be an object keyed by constantName")
+    for name, settings in pages.items():
+        check_settings(settings, f"pages.{name}")
+
+
+def load_policy(policy_file: Optional[str] = None) -> Dict[str, Any]:
+    """Load a resource policy, filling in defaults."""
+    policy = {
+        "default": dict(DEFAULT_POLICY["default"]),
+        "pages": {},
+    }
+    if policy_file:
+        with open(policy_file, encoding="utf-8") as f:
+            user_policy = json.load(f)
+        policy["default"].update(user_policy.get("default", {}))
+        policy["pages"].update(user_policy.get("pages", {}))
+
+    validate_policy(policy)
+    return policy
+
+
+def page_settings(policy: Dict[str, Any], page_name: str) -> Optional[Dict[str, Any]]:
+    """Return the settings for a page, or None if it is excluded."""
+    override = policy.get("pages", {}).get(page_name)
+    if override is False:
+        return None
+    settings = dict(policy["default"])
+    settings.update(override or {})
+    settings["globals"] = {
+        **policy["default"].get("globals", {}),
+        **(override or {}).get("globals", {}),
+    }
+    return None if settings.get("enabled") is False else settings
+
+
+def parse_attributes(attribute_text: str) -> Dict[str, Optional[str]]:
+    """Parse tag attributes; valueless attributes map to None."""
+    attributes: Dict[str, Optional[str]] = {}
+    for match in ATTRIBUTE_RE.finditer(attribute_text):
+        value = match.group(2)
+        if value is not None:
+            if value[:1] in "\"'":
+                value = value[1:-1]
+            value = html.unescape(value)
+        attributes.setdefault(match.group(1).lower(), value)
+    return attributes
+
+
+def origin(url: str) -> Optional[str]:
+    """Return the origin of an absolute or protocol-relative URL."""
+    parts = urlsplit(url.strip())
+    if not parts.netloc or parts.scheme not in ("", "http", "https"):
+        return None
+    return f"{parts.scheme}://{parts.netloc}" if parts.scheme else f"//{parts.netloc}"
+
+
+def iter_handlers(data: Dict[str, Any]) -> Iterator[str]:
+    """Yield the JavaScript of the page's and every component's handlers."""
+    model_view = data.get("modelView") or {}
+    owners = [model_view] + [
+        component
+        for _, component in iter_components(model_view.get("components") or [])
+    ]
+    for owner in owners:
+        for key, value in owner.items():
+            if HANDLER_KEY_RE.match(key) and isinstance(value, str) and value:
+                yield value
+
+
+def scan_page(
+    data: Dict[str, Any],
+) -> Tuple[List[ResourceTag], List[InlineScript]]:
+    """Return a page's external script/link tags and inline scripts in order.
+
+    Handlers run once the page has loaded, so they come after everything else.
+    """
+    tags: List[ResourceTag] = []
+    inline: List[InlineScript] = []
+    position = 0
+    for _, component in iter_literals(data):
+        value = component["value"]
+        for item in scan_markup(value):
+            position += 1
+            if item.kind == "script":
+                inline.append(
+                    InlineScript(position, value[item.body_start : item.body_end])
+                )
+                continue
+            if item.kind != "markup":
+                continue
+            for match in SCRIPT_OR_LINK_RE.finditer(value, item.start, item.end):
+                tag = match.group(1).lower()
+                attributes = parse_attributes(match.group(2))
+                url = attributes.get("src" if tag == "script" else "href")
+                # A script block (external, or a template) is the whole item
+                end = item.end if tag == "script" else match.end()
+                if url:
+                    tags.append(
+                        ResourceTag(
+                            position,
+                            component,
+                            match.start(),
+                            end,
+                            tag,
+                            url,
+                            attributes,
+                        )
+                    )
+                if tag == "script":
+                    break
+    for handler in iter_handlers(data):
+        inline.append(InlineScript(position + 1, handler))
+    return tags, inline
+
+
+def script_globals(tag: ResourceTag, settings: Dict[str, Any]) -> Optional[List[str]]:
+    """Return the globals a script defines, or None if they are unknown."""
+    for pattern, names in settings["globals"].items():
+        if pattern in tag.url:
+            return list(names)
+    file_name = urlsplit(tag.url).path.rsplit("/", 1)[-1].lower()
+    for library, names in KNOWN_GLOBALS.items():
+        if library in file_name:
+            return names
+    return None
+
+
+def mentions(body: str, name: str) -> bool:
+    """Return True if script code mentions a global or jQuery plugin method."""
+    if name.startswith("."):
+        pattern = re.escape(name) + r"\s*\("
+    else:
+        pattern = r"(?<![\w$.])" + re.escape(name) + r"(?![\w$])"
+    return re.search(pattern, body) is not None
+
+
+def is_classic_blocking(tag: ResourceTag) -> bool:
+    """Return True for a parser-blocking classic script."""
+    attributes = tag.attributes
+    script_type = (attributes.get("type") or "text/javascript").lower()
+    return (
+        "async" not in attributes
+        and "defer" not in attributes
+        and script_type != "module"
+        and script_type in JS_SCRIPT_TYPES
+    )
+
+
+def deferrable_scripts(
+    tags: List[ResourceTag],
+    inline: List[InlineScript],
+    settings: Dict[str, Any],
+) -> List[ResourceTag]:
+    """Return the external scripts that can be deferred without reordering."""
+    deferred: List[ResourceTag] = []
+    blocking_after = False
+    for tag in reversed([t for t in tags if t.tag == "script"]):
+        if not is_classic_blocking(tag):
+            continue
+        names = script_globals(tag, settings)
+        safe = (
+            not blocking_after
+            and names is not None
+            and not any(pattern in tag.url for pattern in settings["keep_blocking"])
+            and not any(
+                mentions(script.body, name)
+                for script in inline
+                if script.position > tag.position
+                for name in names
+            )
+        )
+        if safe:
+            deferred.append(tag)
+        else:
+            blocking_after = True
+    return deferred
+
+
+def duplicate_tags(tags: List[ResourceTag]) -> List[ResourceTag]:
+    """Return the tags that repeat an earlier tag for the same URL."""
+    seen: Set[Tuple[str, Tuple[str, ...], str]] = set()
+    duplicates = []
+    for tag in tags:
+        key = (tag.tag, tag.rel, tag.url.strip())
+        if key in seen:
+            duplicates.append(tag)
+        seen.add(key)
+    return duplicates
+
+
+def resource_hints(
+    tags: List[ResourceTag], settings: Dict[str, Any], connected: Set[str]
+) -> List[str]:
+    """Build preconnect/dns-prefetch links for the origins a page loads from."""
+    # Origin -> whether it is fetched with and without CORS
+    origins: Dict[str, Set[bool]] = {}
+    for tag in tags:
+        if tag.tag == "link" and not LOADED_RELS & set(tag.rel):
+            continue
+        tag_origin = origin(tag.url)
+        if tag_origin and tag_origin not in connected:
+            origins.setdefault(tag_origin, set()).add("crossorigin" in tag.attributes)
+
+    hints = []
+    for position, (tag_origin, modes) in enumerate(origins.items()):
+        href = html.escape(tag_origin)
+        if position < settings["max_preconnect"]:
+            for cors in sorted(modes):
+                crossorigin = " crossorigin" if cors else ""
+                hints.append(f'<link rel="preconnect" href="{href}"{crossorigin}>')
+        hints.append(f'<link rel="dns-prefetch" href="{href}">')
+    return hints
+
+
+def add_defer(value: str, tag: ResourceTag) -> str:
+    """Return a script tag's markup with a ``defer`` attribute added.
+
+    Markup that isn't a script tag is returned unchanged (left blocking).
+    """
+    block = value[tag.start : tag.end]
+    match = SCRIPT_OR_LINK_RE.match(block)
+    if match is None:
+        return block
+    return block[: match.end(2)] + " defer" + block[match.end(2) :]
+
+
+def optimize_resources(data: Dict[str, Any], settings: Dict[str, Any]) -> None:
+    """Dedupe, defer and add connection hints to a page's external resources."""
+    tags, inline = scan_page(data)
+
+    # Literal -> (start, end, replacement) edits, applied back to front
+    edits: Dict[int, List[Tuple[int, int, str]]] = {}
+    components: Dict[int, Dict[str, Any]] = {}
+
+    def edit(tag: ResourceTag, replacement: str) -> None:
+        components[id(tag.component)] = tag.component
+        edits.setdefault(id(tag.component), []).append(
+            (tag.start, tag.end, replacement)
+        )
+
+    if settings["dedupe"]:
+        removed = set()
+        for tag in duplicate_tags(tags):
+            edit(tag, "")
+            removed.add((id(tag.component), tag.start))
+        tags = [tag for tag in tags if (id(tag.component), tag.start) not in removed]
+
+    if settings["defer"]:
+        for tag in deferrable_scripts(tags, inline, settings):
+            edit(tag, add_defer(tag.component["value"], tag))
+
+    for key, component_edits in edits.items():
+        component = components[key]
+        value = component["value"]
+        for start, end, replacement in sorted(component_edits, reverse=True):
+            value = value[:start] + replacement + value[end:]
+        component["value"] = value
+
+    if settings["preconnect"] and tags:
+        if any(HINTS_MARKER in c["value"] for _, c in iter_literals(data)):
+            return
+        connected = {
+            tag_origin
+            for tag in tags
+            if tag.tag == "link" and "preconnect" in tag.rel
+            for tag_origin in [origin(tag.url)]
+            if tag_origin
+        }
+        hints = resource_hints(tags, settings, connected)
+        if hints:
+            first = tags[0].component
+            first["value"] = "\n".join([HINTS_MARKER, *hints, first["value"]])
+
+
+def make_resource_optimizer_transform(
+    policy: Dict[str, Any],
+) -> Callable[[Dict[str, Any]], None]:
+    """Create a rebuild transform that applies the resource policy."""
+
+    def optimize_page_resources(data: Dict[str, Any]) -> None:
+        settings = page_settings(policy, data.get("constantName", ""))
+        if settings is not None:
+            optimize_resources(data, settings)
+
+    return optimize_page_resources
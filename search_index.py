@@ -0,0 +1,393 @@
+#!/usr/bin/env python3
+"""
+Script to search page literals and virtual domain SQL through an inverted index.
+
+Every literal value and SQL block is stored in a SQLite index together with
+its trigrams and word tokens, keyed by file and component path (or SQL field).
+Searches look up the query's trigrams (or tokens, for ``--word``) to find the
+few literals that can possibly match, and only those are scanned to report
+matching lines. Regular expressions are prefiltered with the literal text they
+require; patterns without any (e.g. alternations) scan every literal.
+
+The index is updated incrementally: files whose size and modification time are
+unchanged are skipped without being read, and files that changed on disk are
+only re-indexed if their content hash differs.
+
+Usage:
+    python search_index.py index [file_pattern]  # Build or update the index
+    python search_index.py search <query>        # Find literals/SQL containing <query>
+
+Options:
+    --index=<file>  Index location (default: .pagebuilder_cache/search.db)
+    --roots=<dirs>  Comma-separated directories to index (default: everything
+                    not ignored by .gitignore/.pagebuilderignore)
+    --regex         Treat the query as a Python regular expression
+    --word          Only match the query as whole words
+    --ignore-case   Case-insensitive matching
+    --limit=<n>     Show at most n matching lines
+    --no-update     Search the index as is instead of refreshing it first
+"""
+
+import json
+import os
+import re
+import sqlite3
+import sys
+from typing import Any, Dict, Iterator, List, Optional, Pattern, Set, Tuple
+
+from discovery import DEFAULT_PATTERN, find_json_files, parse_roots
+from extract_literals import is_page_definition, parse_options
+from extract_virtual_domains import SQL_FIELDS, is_virtual_domain
+from file_cache import FILES_SCHEMA, open_cache, update_files
+from page_transforms import iter_literals
+
+DEFAULT_INDEX_FILE = os.path.join(".pagebuilder_cache", "search.db")
+SCHEMA_VERSION = 1
+
+# Cap on the trigrams looked up per query; the rest are checked by the scan
+MAX_QUERY_TRIGRAMS = 32
+
+TOKEN_RE = re.compile(r"\w+")
+
+TABLES = ["files", "docs", "trigrams", "tokens"]
+
+SCHEMA = """
+CREATE TABLE docs (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    name TEXT NOT NULL,
+    location TEXT NOT NULL,
+    label TEXT NOT NULL,
+    text TEXT NOT NULL
+);
+CREATE INDEX docs_path ON docs (path);
+CREATE TABLE trigrams (
+    trigram TEXT NOT NULL,
+    doc_id INTEGER NOT NULL,
+    PRIMARY KEY (trigram, doc_id)
+) WITHOUT ROWID;
+CREATE TABLE tokens (
+    token TEXT NOT NULL,
+    doc_id INTEGER NOT NULL,
+    PRIMARY KEY (token, doc_id)
+) WITHOUT ROWID;
+"""
+
+
+def trigrams(text: str) -> Set[str]:
+    """Return the case-folded trigrams of a string."""
+    text = text.lower()
+    return {text[i : i + 3] for i in range(len(text) - 2)}
+
+
+def tokens(text: str) -> Set[str]:
+    """Return the case-folded word tokens of a string."""
+    return set(TOKEN_RE.findall(text.lower()))
+
+
+def open_index(index_file: str) -> sqlite3.Connection:
+    """Open the index, (re)creating it if it is missing or from another version."""
+    return open_cache(index_file, FILES_SCHEMA + SCHEMA, SCHEMA_VERSION, TABLES)
+
+
+def iter_documents(data: Any) -> Iterator[Dict[str, str]]:
+    """Yield the searchable text blocks of a page or virtual domain."""
+    if is_page_definition(data):
+        for component_path, component in iter_literals(data):
+            yield {
+                "kind": "page",
+                "name": data["constantName"],
+                "location": component_path,
+                "label": component.get("name", ""),
+                "text": component["value"],
+            }
+    elif is_virtual_domain(data):
+        for field in SQL_FIELDS:
+            if isinstance(data.get(field), str) and data[field]:
+                yield {
+                    "kind": "domain",
+                    "name": data["serviceName"],
+                    "location": field,
+                    "label": field,
+                    "text": data[field],
+                }
+
+
+def remove_file(conn: sqlite3.Connection, path: str) -> None:
+    """Drop a file's documents and postings from the index."""
+    docs = conn.execute("SELECT id, text FROM docs WHERE path = ?", (path,))
+    for doc_id, text in docs.fetchall():
+        # Postings are keyed by term first, so delete them term by term
+        conn.executemany(
+            "DELETE FROM trigrams WHERE trigram = ? AND doc_id = ?",
+            [(trigram, doc_id) for trigram in trigrams(text)],
+        )
+        conn.executemany(
+            "DELETE FROM tokens WHERE token = ? AND doc_id = ?",
+            [(token, doc_id) for token in tokens(text)],
+        )
+    conn.execute("DELETE FROM docs WHERE path = ?", (path,))
+
+
+def add_file(conn: sqlite3.Connection, path: str, text: str) -> None:
+    """Index every literal or SQL block of one file."""
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError:
+        data = None
+
+    for document in iter_documents(data):
+        cursor = conn.execute(
+            "INSERT INTO docs (path, kind, name, location, label, text) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                path,
+                document["kind"],
+                document["name"],
+                document["location"],
+                document["label"],
+                document["text"],
+            ),
+        )
+        doc_id = cursor.lastrowid
+        conn.executemany(
+            "INSERT INTO trigrams (trigram, doc_id) VALUES (?, ?)",
+            [(trigram, doc_id) for trigram in trigrams(document["text"])],
+        )
+        conn.executemany(
+            "INSERT INTO tokens (token, doc_id) VALUES (?, ?)",
+            [(token, doc_id) for token in tokens(document["text"])],
+        )
+
+
+def update_index(conn: sqlite3.Connection, file_paths: List[str]) -> Dict[str, int]:
+    """Bring the index up to date with ``file_paths`` (see ``update_files``)."""
+    return update_files(conn, file_paths, add_file, remove_file)
+
+
+# A whole escape sequence: \xHH, \uHHHH, \UHHHHHHHH, \N{name}, octal, a
+# backreference, or a backslash and one character
+ESCAPE_RE = re.compile(
+    r"\\(?:x[0-9a-fA-F]{2}|u[0-9a-fA-F]{4}|U[0-9a-fA-F]{8}|N\{[^}]*\}"
+    r"|0[0-7]{0,2}|[0-7]{3}|[1-9][0-9]?|.)",
+    re.DOTALL,
+)
+
+
+def required_literals(pattern: str) -> List[str]:
+    """Return literal strings that every match of a regular expression contains.
+
+    This is deliberately conservative: only literal runs outside groups count,
+    and patterns with alternation or verbose mode return nothing (so every
+    literal is scanned).
+    """
+    if "|" in pattern or re.compile(pattern).flags & re.VERBOSE:
+        return []
+
+    literals: List[str] = []
+    current = ""
+    depth = 0
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        literal: Optional[str] = None
+
+        if char == "\\":
+            # Letter and number escapes (classes, code points, backreferences)
+            # end the literal run
+            escape = ESCAPE_RE.match(pattern, i)
+            escaped = escape.group()[1:] if escape else ""
+            if len(escaped) == 1 and not escaped.isalnum():
+                literal = escaped
+            i = escape.end() if escape else i + 1
+        elif char == "[":
+            # Skip the character class; a ] right after [ or [^ is literal
+            i += 1
+            if pattern[i : i + 1] == "^":
+                i += 1
+            if pattern[i : i + 1] == "]":
+                i += 1
+            while i < len(pattern) and pattern[i] != "]":
+                i += 2 if pattern[i] == "\\" else 1
+            i += 1
+        elif char in "*?{":
+            # The previous character is optional (or repeated an unknown
+            # number of times), so it can't be relied on
+            current = current[:-1]
+            if char == "{":
+                i = pattern.find("}", i) + 1 or len(pattern)
+            else:
+                i += 1
+        elif char == "(":
+            depth += 1
+            i += 1
+        elif char == ")":
+            depth -= 1
+            i += 1
+        elif char in ".^$+":
+            i += 1
+        else:
+            literal = char
+            i += 1
+
+        if literal is not None and depth == 0:
+            current += literal
+        else:
+            if current:
+                literals.append(current)
+            current = ""
+    if current:
+        literals.append(current)
+    return literals
+
+
+def build_matcher(
+    query: str, regex: bool = False, word: bool = False, ignore_case: bool = False
+) -> Pattern[str]:
+    """Compile the pattern used to find matching lines in candidate literals."""
+    pattern = query if regex else re.escape(query)
+    if word:
+        pattern = rf"(?<!\w)(?:{pattern})(?!\w)"
+    return re.compile(pattern, re.IGNORECASE if ignore_case else 0)
+
+
+def candidate_query(
+    query: str, regex: bool = False, word: bool = False
+) -> Tuple[str, List[str]]:
+    """Build the SQL selecting documents that may match, with its parameters."""
+    columns = "SELECT id, path, kind, name, location, label, text FROM docs"
+    if word and not regex:
+        terms = sorted(tokens(query))
+        table, column = "tokens", "token"
+    else:
+        literals = required_literals(query) if regex else [query]
+        terms = sorted(set().union(*(trigrams(literal) for literal in literals)))
+        terms = terms[:MAX_QUERY_TRIGRAMS]
+        table, column = "trigrams", "trigram"
+
+    if not terms:
+        return f"{columns} ORDER BY path, id", []
+
+    placeholders = ", ".join("?" for _ in terms)
+    return (
+        f"{columns} WHERE id IN ("
+        f"SELECT doc_id FROM {table} WHERE {column} IN ({placeholders}) "
+        f"GROUP BY doc_id HAVING COUNT(*) = {len(terms)}"
+        f") ORDER BY path, id",
+        terms,
+    )
+
+
+def search_index(
+    conn: sqlite3.Connection,
+    query: str,
+    regex: bool = False,
+    word: bool = False,
+    ignore_case: bool = False,
+    limit: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """Find every line of an indexed literal or SQL block matching ``query``.
+
+    Returns dicts with ``file``, ``kind``, ``name`` (page or service name),
+    ``location`` (component path or SQL field), ``label`` (component name or
+    SQL field), ``line`` (1-based, within the literal) and ``text``.
+    """
+    matcher = build_matcher(query, regex, word, ignore_case)
+    sql, parameters = candidate_query(query, regex, word)
+
+    results: List[Dict[str, Any]] = []
+    for _, path, kind, name, location, label, text in conn.execute(sql, parameters):
+        last_line = 0
+        for match in matcher.finditer(text):
+            line = text.count("\n", 0, match.start()) + 1
+            if line == last_line:
+                continue
+            last_line = line
+            line_start = text.rfind("\n", 0, match.start()) + 1
+            line_end = text.find("\n", match.start())
+            results.append(
+                {
+                    "file": path,
+                    "kind": kind,
+                    "name": name,
+                    "location": location,
+                    "label": label,
+                    "line": line,
+                    "text": text[line_start : line_end if line_end >= 0 else None],
+                }
+            )
+            if limit is not None and len(results) >= limit:
+                return results
+    return results
+
+
+def main():
+    positionals, options = parse_options(sys.argv[1:])
+    if not positionals:
+        print(__doc__)
+        sys.exit(1)
+
+    command = positionals[0]
+    index_file = options.get("index", DEFAULT_INDEX_FILE)
+    roots = parse_roots(options.get("roots"))
+
+    if command == "index":
+        pattern = positionals[1] if len(positionals) > 1 else DEFAULT_PATTERN
+        conn = open_index(index_file)
+        counts = update_index(conn, find_json_files(pattern, roots=roots))
+        conn.close()
+        print(
+            f"✅ Index updated ({index_file}): {counts['added']} added, "
+            f"{counts['updated']} updated, {counts['removed']} removed, "
+            f"{counts['unchanged']} unchanged"
+        )
+
+    elif command == "search":
+        if len(positionals) != 2:
+            print(__doc__)
+            sys.exit(1)
+
+        query = positionals[1]
+        conn = open_index(index_file)
+        if "no-update" not in options:
+            update_index(conn, find_json_files(roots=roots))
+
+        try:
+            results = search_index(
+                conn,
+                query,
+                regex="regex" in options,
+                word="word" in options,
+                ignore_case="ignore-case" in options,
+                limit=int(options["limit"]) if "limit" in options else None,
+            )
+        except re.error as e:
+            print(f"❌ Invalid regular expression: {e}")
+            sys.exit(1)
+        finally:
+            conn.close()
+
+        for result in results:
+            label = (
+                f" {result['label']}" if result["label"] != result["location"] else ""
+            )
+            print(
+                f"{result['file']} [{result['location']}{label}] "
+                f"{result['line']}: {result['text'].strip()[:160]}"
+            )
+
+        if not results:
+            print(f"❌ No matches for: {query}")
+            sys.exit(1)
+        files = {result["file"] for result in results}
+        print(f"\n✅ {len(results)} matching line(s) in {len(files)} file(s).")
+
+    else:
+        print(f"Unknown command: {command}")
+        print(__doc__)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,421 @@
+#!/usr/bin/env python3
+"""
+Script to compare two Banner Extensibility export snapshots using Merkle hashes.
+
+Every page is hashed as a tree: each component gets a hash built from its own
+fields plus the hashes of its children, using the same component paths as
+``_extraction_map.json``. Two snapshots are compared by walking both trees and
+only descending into subtrees whose hashes differ, so unchanged pages and
+components are skipped without looking at their content.
+
+Hashes are cached between runs (keyed by file path, size and modification time)
+so re-running a diff against an unchanged export does not re-parse it.
+
+Either snapshot may be a directory or a ``.zip``/``.tar``/``.tar.gz`` export,
+which is read in place without unpacking.
+
+Usage:
+    python snapshot_diff.py diff <old_dir> <new_dir>  # Report differing pages, domains and components
+    python snapshot_diff.py hash <dir>                # Print the root hash of each page and domain
+
+Options:
+    --cache=<file>   Hash cache location (default: .pagebuilder_cache/merkle_hashes.json)
+    --no-cache       Always re-hash every file
+    --jobs=<n>       Archive members hashed in parallel (default: CPU count, max 8)
+"""
+
+import hashlib
+import json
+import os
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from discovery import walk_files
+from extract_literals import is_page_definition, iter_components, parse_options
+from extract_virtual_domains import is_virtual_domain
+from storage import is_archive, parse_jobs, process_archive
+
+DEFAULT_CACHE_FILE = os.path.join(".pagebuilder_cache", "merkle_hashes.json")
+
+
+def hash_value(value: Any) -> str:
+    """Hash a JSON value in canonical form (sorted keys, no whitespace)."""
+    canonical = json.dumps(
+        value, sort_keys=True, separators=(",", ":"), ensure_ascii=False
+    )
+    return hashlib.md5(canonical.encode("utf-8")).hexdigest()
+
+
+def make_node(
+    fields: Dict[str, Any], children: List[str], child_hashes: List[str]
+) -> Dict[str, Any]:
+    """Build a Merkle node from its own fields and its children's hashes."""
+    field_hashes = {key: hash_value(value) for key, value in fields.items()}
+
+    digest = hashlib.md5()
+    for key in sorted(field_hashes):
+        digest.update(f"{key}={field_hashes[key]}\n".encode())
+    for child_hash in child_hashes:
+        digest.update(f"child={child_hash}\n".encode())
+
+    return {"hash": digest.hexdigest(), "fields": field_hashes, "children": children}
+
+
+def hash_page(data: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """Compute the Merkle tree of a page, keyed by component path.
+
+    The page itself is the root node at path ``""``; its fields are the
+    top-level page fields plus ``modelView.*`` fields other than components.
+    """
+    model_view = data.get("modelView", {})
+    components = model_view.get("components", [])
+    nodes: Dict[str, Dict[str, Any]] = {}
+
+    # Hash children before parents: iter_components is depth first, so
+    # walking its output in reverse visits every child before its parent.
+    for component_path, component in reversed(list(iter_components(components))):
+        children = [
+            f"{component_path}.components.{i}"
+            for i in range(len(component.get("components", [])))
+        ]
+        fields = {k: v for k, v in component.items() if k != "components"}
+        node = make_node(fields, children, [nodes[c]["hash"] for c in children])
+        node["name"] = component.get("name", "")
+        node["type"] = component.get("type", "")
+        nodes[component_path] = node
+
+    root_fields = {k: v for k, v in data.items() if k != "modelView"}
+    for key, value in model_view.items():
+        if key != "components":
+            root_fields[f"modelView.{key}"] = value
+    children = [str(i) for i in range(len(components))]
+    root = make_node(root_fields, children, [nodes[c]["hash"] for c in children])
+    root["name"] = data.get("constantName", "")
+    root["type"] = "page"
+    nodes[""] = root
+
+    return nodes
+
+
+def hash_virtual_domain(data: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """Compute the (single node) Merkle tree of a virtual domain."""
+    root = make_node(data, [], [])
+    root["name"] = data.get("serviceName", "")
+    root["type"] = "virtualDomain"
+    return {"": root}
+
+
+def load_cache(cache_file: Optional[str]) -> Dict[str, Any]:
+    """Load the hash cache, returning an empty cache if it is missing or corrupt."""
+    if not cache_file or not os.path.exists(cache_file):
+        return {}
+    try:
+        with open(cache_file, encoding="utf-8") as f:
+            cache: Dict[str, Any] = json.load(f)
+        return cache
+    except (json.JSONDecodeError, OSError):
+        return {}
+
+
+def save_cache(cache_file: Optional[str], cache: Dict[str, Any]) -> None:
+    """Persist the hash cache."""
+    if not cache_file:
+        return
+    Path(cache_file).parent.mkdir(parents=True, exist_ok=True)
+    with open(cache_file, "w", encoding="utf-8") as f:
+        json.dump(cache, f)
+
+
+def hash_text(text: str) -> Optional[Dict[str, Any]]:
+    """Hash the JSON text of a page or virtual domain.
+
+    Returns a dict with ``kind`` (``"page"`` or ``"domain"``), ``key`` and
+    ``nodes``, or None if the text is not a page or virtual domain.
+    """
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError:
+        return None
+
+    if is_page_definition(data):
+        return {"kind": "page", "key": data["constantName"], "nodes": hash_page(data)}
+    if is_virtual_domain(data):
+        return {
+            "kind": "domain",
+            "key": data["serviceName"],
+            "nodes": hash_virtual_domain(data),
+        }
+    return None
+
+
+def add_entry(snapshot: Dict[str, Dict[str, Any]], entry: Dict[str, Any]) -> None:
+    """Add a hashed file to a snapshot.
+
+    Raises ValueError if another file defines the same page or domain, since
+    one would silently hide the other in the diff.
+    """
+    key = f"{entry['kind']}:{entry['key']}"
+    if key in snapshot:
+        name = "constantName" if entry["kind"] == "page" else "serviceName"
+        raise ValueError(
+            f"Duplicate {entry['kind']} {name} {entry['key']}: "
+            f"{snapshot[key]['file']} and {entry['file']}"
+        )
+    snapshot[key] = entry
+
+
+def hash_archive(
+    archive: str, cache: Dict[str, Any], jobs: int = 1
+) -> Dict[str, Dict[str, Any]]:
+    """Hash every page and virtual domain in an export archive.
+
+    Members are hashed straight from the archive, in parallel where the
+    format allows. The cache entry covers the whole archive, so an unchanged
+    archive is not opened at all.
+    """
+    stat = os.stat(archive)
+    cache_key = os.path.abspath(archive)
+    cached = cache.get(cache_key)
+    if (
+        cached
+        and cached["mtime_ns"] == stat.st_mtime_ns
+        and cached["size"] == stat.st_size
+    ):
+        cached_snapshot: Dict[str, Dict[str, Any]] = cached["snapshot"]
+        return cached_snapshot
+
+    def hash_member(member: str, text: str) -> Optional[Dict[str, Any]]:
+        if member.endswith("_extraction_map.json"):
+            return None
+        entry = hash_text(text)
+        return dict(entry, file=member) if entry is not None else None
+
+    snapshot: Dict[str, Dict[str, Any]] = {}
+    for entry in process_archive(archive, hash_member, "**/*.json", jobs):
+        add_entry(snapshot, entry)
+    cache[cache_key] = {
+        "mtime_ns": stat.st_mtime_ns,
+        "size": stat.st_size,
+        "snapshot": snapshot,
+    }
+    return snapshot
+
+
+def hash_file(file_path: str, cache: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Hash one export file, reusing the cached tree if the file is unchanged.
+
+    Returns a dict with ``kind`` (``"page"`` or ``"domain"``), ``key`` and
+    ``nodes``, or None if the file is not a page or virtual domain.
+    """
+    stat = os.stat(file_path)
+    cache_key = os.path.abspath(file_path)
+    cached = cache.get(cache_key)
+    if (
+        cached
+        and cached["mtime_ns"] == stat.st_mtime_ns
+        and cached["size"] == stat.st_size
+    ):
+        cached_entry: Optional[Dict[str, Any]] = cached["entry"]
+        return cached_entry
+
+    try:
+        with open(file_path, encoding="utf-8") as f:
+            entry = hash_text(f.read())
+    except UnicodeDecodeError:
+        entry = None
+
+    cache[cache_key] = {
+        "mtime_ns": stat.st_mtime_ns,
+        "size": stat.st_size,
+        "entry": entry,
+    }
+    return entry
+
+
+def hash_snapshot(
+    directory: str, cache: Optional[Dict[str, Any]] = None, jobs: int = 1
+) -> Dict[str, Dict[str, Any]]:
+    """Hash every page and virtual domain under a directory or in an archive.
+
+    Returns a dict keyed by ``"page:<constantName>"`` or
+    ``"domain:<serviceName>"``. Raises ValueError if two files define the
+    same page or domain.
+    """
+    if cache is None:
+        cache = {}
+    if is_archive(directory):
+        return hash_archive(directory, cache, jobs)
+
+    snapshot: Dict[str, Dict[str, Any]] = {}
+    # Export directories are walked with the usual ignore rules (.git etc.)
+    for file_path in sorted(walk_files(roots=[directory])):
+        if file_path.endswith("_extraction_map.json"):
+            continue
+        entry = hash_file(file_path, cache)
+        if entry is not None:
+            add_entry(snapshot, dict(entry, file=file_path))
+    return snapshot
+
+
+def diff_trees(
+    old_nodes: Dict[str, Dict[str, Any]],
+    new_nodes: Dict[str, Dict[str, Any]],
+    path: str = "",
+) -> List[Dict[str, Any]]:
+    """Compare two Merkle trees, descending only into subtrees that differ."""
+    old = old_nodes[path]
+    new = new_nodes[path]
+    if old["hash"] == new["hash"]:
+        return []
+
+    changes = []
+    old_fields = old["fields"]
+    new_fields = new["fields"]
+    changed_fields = sorted(
+        key
+        for key in set(old_fields) | set(new_fields)
+        if old_fields.get(key) != new_fields.get(key)
+    )
+    if changed_fields:
+        changes.append(
+            {
+                "status": "modified",
+                "path": path,
+                "name": new["name"],
+                "fields": changed_fields,
+            }
+        )
+
+    old_children = old["children"]
+    new_children = new["children"]
+    for child in new_children:
+        if child not in old_children:
+            changes.append(
+                {"status": "added", "path": child, "name": new_nodes[child]["name"]}
+            )
+        else:
+            changes.extend(diff_trees(old_nodes, new_nodes, child))
+    for child in old_children:
+        if child not in new_children:
+            changes.append(
+                {"status": "removed", "path": child, "name": old_nodes[child]["name"]}
+            )
+
+    return changes
+
+
+def diff_snapshots(
+    old_dir: str,
+    new_dir: str,
+    cache_file: Optional[str] = DEFAULT_CACHE_FILE,
+    jobs: int = 1,
+) -> List[Dict[str, Any]]:
+    """Compare two export directories (or archives).
+
+    Returns one entry per page or virtual domain that differs, with a
+    ``status`` of ``added``, ``removed`` or ``modified``. Modified entries list
+    the component-level ``changes`` found by :func:`diff_trees`.
+    """
+    cache = load_cache(cache_file)
+    old_snapshot = hash_snapshot(old_dir, cache, jobs)
+    new_snapshot = hash_snapshot(new_dir, cache, jobs)
+    save_cache(cache_file, cache)
+
+    results: List[Dict[str, Any]] = []
+    for key in sorted(set(old_snapshot) | set(new_snapshot)):
+        old = old_snapshot.get(key)
+        new = new_snapshot.get(key)
+        kind, _, name = key.partition(":")
+
+        if old is None:
+            results.append({"kind": kind, "key": name, "status": "added"})
+        elif new is None:
+            results.append({"kind": kind, "key": name, "status": "removed"})
+        elif old["nodes"][""]["hash"] != new["nodes"][""]["hash"]:
+            results.append(
+                {
+                    "kind": kind,
+                    "key": name,
+                    "status": "modified",
+                    "changes": diff_trees(old["nodes"], new["nodes"]),
+                }
+            )
+
+    return results
+
+
+STATUS_MARKERS = {"added": "+", "removed": "-", "modified": "~"}
+
+
+def main():
+    positionals, options = parse_options(sys.argv[1:])
+    if not positionals:
+        print(__doc__)
+        sys.exit(1)
+
+    command = positionals[0]
+    cache_file = (
+        None if "no-cache" in options else options.get("cache", DEFAULT_CACHE_FILE)
+    )
+    try:
+        jobs = parse_jobs(options.get("jobs"))
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    if command == "diff":
+        if len(positionals) != 3:
+            print(__doc__)
+            sys.exit(1)
+
+        old_dir, new_dir = positionals[1], positionals[2]
+        print(f"Comparing snapshots: {old_dir} -> {new_dir}")
+        try:
+            results = diff_snapshots(old_dir, new_dir, cache_file, jobs)
+        except ValueError as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+
+        for result in results:
+            print(
+                f"\n{STATUS_MARKERS[result['status']]} {result['kind']} {result['key']}"
+            )
+            for change in result.get("changes", []):
+                label = change["path"] or "(page)"
+                if change["name"]:
+                    label += f" ({change['name']})"
+                line = f"    {STATUS_MARKERS[change['status']]} {label}"
+                if change.get("fields"):
+                    line += ": " + ", ".join(change["fields"])
+                print(line)
+
+        if results:
+            print(f"\n❌ {len(results)} page(s)/domain(s) differ.")
+            sys.exit(1)
+        print("\n✅ Snapshots are identical!")
+
+    elif command == "hash":
+        if len(positionals) != 2:
+            print(__doc__)
+            sys.exit(1)
+
+        cache = load_cache(cache_file)
+        try:
+            snapshot = hash_snapshot(positionals[1], cache, jobs)
+        except ValueError as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+        save_cache(cache_file, cache)
+
+        for key, entry in snapshot.items():
+            print(f"{entry['nodes']['']['hash']}  {key}  ({entry['file']})")
+
+    else:
+        print(f"Unknown command: {command}")
+        print(__doc__)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
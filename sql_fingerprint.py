@@ -0,0 +1,421 @@
+#!/usr/bin/env python3
+"""
+Script to find virtual domains that run the same (or nearly the same) SQL.
+
+Every ``codeGet``/``codePost``/``codePut``/``codeDelete`` block is tokenized
+and normalized so that only the structure of the statement is left:
+
+* comments, whitespace and line endings (``\\r\\n``) are dropped
+* keywords and identifiers are lowercased, and quoted identifiers unquoted
+* string and number literals become ``?`` (a list of them, as in
+  ``in ('A', 'B')``, becomes one ``?``), and bind variables ``:?``
+* column aliases (``expr [as] alias`` in a select list) are dropped
+* table aliases (``from spriden s``) are dropped, and columns qualified by an
+  alias (``s.spriden_id``) are qualified by the table name instead
+
+A domain's structural fingerprint is a hash of its normalized blocks. Domains
+with the same fingerprint are identical. To find near-identical ones, each
+domain's token stream is also winnowed (see ``duplicates.py``, here over
+tokens rather than characters) and domains whose fingerprint sets overlap by
+at least ``--threshold`` (Jaccard similarity) are grouped.
+
+Each group is reported with the pages that call its domains (through
+``$.ajax``-style URLs in literals or ``resource`` components), as candidates
+for consolidating into one domain.
+
+Usage:
+    python sql_fingerprint.py dupes [file_pattern]  # Report duplicate virtual domains
+
+Options:
+    --threshold=<x>  Minimum similarity between 0 and 1 (default: 0.8)
+    --k=<n>          Tokens per hashed k-gram (default: 5)
+    --window=<n>     Winnowing window size (default: 4)
+    --roots=<dirs>   Comma-separated directories to search for virtual domains
+                     and pages (default: everything not ignored by
+                     .gitignore/.pagebuilderignore)
+"""
+
+import hashlib
+import json
+import re
+import sys
+from collections import defaultdict
+from typing import Any, Dict, List, NamedTuple, Optional, Set, Tuple
+
+from discovery import DEFAULT_PATTERN, parse_roots
+from duplicates import (
+    DEFAULT_MAX_SHARED,
+    kgram_hashes,
+    shared_fingerprint_counts,
+    winnow,
+)
+from extract_literals import find_page_files, iter_components, parse_options
+from extract_virtual_domains import SQL_FIELDS, find_domain_files
+from load_analyzer import resource_domain
+from load_test import extract_call_patterns
+
+DEFAULT_THRESHOLD = 0.8
+DEFAULT_K = 5
+DEFAULT_WINDOW = 4
+
+TOKEN_RE = re.compile(
+    r"""
+    (?P<space>\s+)
+  | (?P<comment>--[^\n]*|/\*.*?(?:\*/|\Z))
+  | (?P<string>[nN]?'(?:[^']|'')*(?:'|\Z))
+  | (?P<quoted>"(?:[^"]|"")*(?:"|\Z))
+  | (?P<number>(?:\d+(?:\.\d*)?|\.\d+)(?:[eE][+-]?\d+)?)
+  | (?P<bind>:[\w$#]+)
+  | (?P<word>[^\W\d][\w$#]*)
+  | (?P<op>\|\||<=|>=|<>|!=|\^=|:=|=>|\S)
+    """,
+    re.S | re.X,
+)
+
+# Reserved words that can never be an alias
+KEYWORDS = {
+    "all", "and", "any", "as", "asc", "begin", "between", "by", "case",
+    "connect", "cross", "declare", "delete", "desc", "distinct", "else",
+    "elsif", "end", "exists", "fetch", "for", "from", "full", "group",
+    "having", "if", "in", "inner", "insert", "intersect", "into", "is",
+    "join", "left", "like", "loop", "merge", "minus", "natural", "not",
+    "null", "offset", "on", "or", "order", "outer", "prior", "return",
+    "returning", "right", "select", "set", "start", "then", "union",
+    "update", "using", "values", "when", "where", "with",
+}  # fmt: skip
+
+# Keywords that start a clause; select lists and from lists hold aliases
+CLAUSE_KEYWORDS = {
+    "select": "select",
+    "from": "from",
+    "join": "from",
+    "update": "from",
+}
+CLAUSE_ENDS = KEYWORDS - {"as", "case", "end", "null", "not", "distinct"}
+
+# Tokens after which an expression can end (and an alias can follow)
+EXPRESSION_ENDS = {"word", "quoted", "literal", "bind"}
+
+
+class Token(NamedTuple):
+    # word, quoted, literal, bind or op
+    kind: str
+    value: str
+
+
+def tokenize_sql(sql: str) -> List[Token]:
+    """Split SQL into tokens, dropping whitespace and comments."""
+    tokens = []
+    for match in TOKEN_RE.finditer(sql):
+        kind = match.lastgroup or "op"
+        value = match.group()
+        if kind in ("space", "comment"):
+            continue
+        if kind in ("string", "number"):
+            tokens.append(Token("literal", "?"))
+        elif kind == "bind":
+            tokens.append(Token("bind", ":?"))
+        elif kind == "quoted":
+            tokens.append(Token("quoted", value.strip('"').replace('""', '"').lower()))
+        else:
+            tokens.append(Token(kind, value.lower()))
+    return tokens
+
+
+def ends_expression(token: Token) -> bool:
+    if token.kind == "word":
+        return token.value not in KEYWORDS or token.value in ("end", "null")
+    return token.kind in EXPRESSION_ENDS or token.value == ")"
+
+
+def is_alias_name(token: Token) -> bool:
+    return token.kind == "quoted" or (
+        token.kind == "word" and token.value not in KEYWORDS
+    )
+
+
+def normalize_sql(sql: str) -> List[str]:
+    """Return the structural tokens of an SQL block (see the module docstring)."""
+    tokens = tokenize_sql(sql)
+    keep = [True] * len(tokens)
+    # Table alias -> table name ("" for an aliased subquery)
+    aliases: Dict[str, str] = {}
+    # Clause at each parenthesis (or case ... end) depth
+    clauses: List[Optional[str]] = [None]
+
+    def next_token(i: int) -> Optional[Token]:
+        return tokens[i + 1] if i + 1 < len(tokens) else None
+
+    for i, token in enumerate(tokens):
+        if token.value == "(" and token.kind == "op":
+            clauses.append(None)
+            continue
+        if token.value == ")" and token.kind == "op":
+            if len(clauses) > 1:
+                clauses.pop()
+            continue
+        if token.kind == "word" and token.value == "case":
+            clauses.append("case")
+            continue
+        if clauses[-1] == "case":
+            # when/then/else belong to the expression, not the enclosing clause
+            if token.kind == "word" and token.value == "end":
+                clauses.pop()
+            continue
+        if token.kind == "word" and token.value in CLAUSE_KEYWORDS:
+            clauses[-1] = CLAUSE_KEYWORDS[token.value]
+            continue
+        if token.kind == "word" and token.value in CLAUSE_ENDS:
+            clauses[-1] = None
+            continue
+
+        clause = clauses[-1]
+        if clause is None or not keep[i]:
+            continue
+        following = next_token(i)
+
+        if token.value == "as" and following and is_alias_name(following):
+            keep[i] = keep[i + 1] = False
+            if clause == "from":
+                aliases[following.value] = previous_name(tokens, keep, i)
+            continue
+        if not is_alias_name(token) or i == 0 or not ends_expression(tokens[i - 1]):
+            continue
+        if tokens[i - 1].kind == "op" and tokens[i - 1].value != ")":
+            continue
+
+        ends_item = following is None or following.value in (",", ";", ")")
+        if clause == "select" and (
+            ends_item or (following and following.value in ("from", "into"))
+        ):
+            keep[i] = False
+        elif clause == "from" and (
+            ends_item or (following and following.value in KEYWORDS)
+        ):
+            keep[i] = False
+            aliases[token.value] = previous_name(tokens, keep, i)
+
+    normalized: List[str] = []
+    skip_dot = False
+    for i, token in enumerate(tokens):
+        if not keep[i]:
+            continue
+        if skip_dot:
+            skip_dot = False
+            continue
+        value = token.value
+        following = next_token(i)
+        is_qualifier = following is not None and following.value == "."
+        if is_qualifier and token.kind in ("word", "quoted") and value in aliases:
+            value = aliases[value]
+            if not value:
+                skip_dot = True
+                continue
+        # One placeholder for a whole list of literals
+        if (
+            value == "?"
+            and len(normalized) >= 2
+            and normalized[-1] == ","
+            and normalized[-2] == "?"
+        ):
+            normalized.pop()
+            continue
+        normalized.append(value)
+    return normalized
+
+
+def previous_name(tokens: List[Token], keep: List[bool], i: int) -> str:
+    """Return the table name an alias at ``i`` belongs to ("" for a subquery)."""
+    j = i - 1
+    while j >= 0 and not keep[j]:
+        j -= 1
+    if j < 0 or tokens[j].value == ")":
+        return ""
+    return tokens[j].value
+
+
+def domain_tokens(data: Dict[str, Any]) -> List[str]:
+    """Normalized tokens of every SQL block in a domain, each after a marker."""
+    tokens: List[str] = []
+    for field in SQL_FIELDS:
+        sql = data.get(field)
+        if isinstance(sql, str) and sql.strip():
+            tokens.append(f"<{field}>")
+            tokens.extend(normalize_sql(sql))
+    return tokens
+
+
+def structural_fingerprint(tokens: List[str]) -> str:
+    return hashlib.sha1(" ".join(tokens).encode()).hexdigest()[:16]
+
+
+def collect_domains(
+    domain_files: List[str], k: int = DEFAULT_K, window: int = DEFAULT_WINDOW
+) -> List[Dict[str, Any]]:
+    """Fingerprint every virtual domain that has SQL.
+
+    Returns dicts with ``file``, ``service_name``, ``fingerprint`` and
+    ``hashes`` (the set of winnowed token k-gram hashes).
+    """
+    # Each distinct token becomes one character, so k-grams are over tokens
+    vocabulary: Dict[str, str] = {}
+    domains = []
+    for domain_file in domain_files:
+        with open(domain_file, encoding="utf-8") as f:
+            data = json.load(f)
+        tokens = domain_tokens(data)
+        if not tokens:
+            continue
+        encoded = "".join(
+            vocabulary.setdefault(token, chr(0x100 + len(vocabulary)))
+            for token in tokens
+        )
+        domains.append(
+            {
+                "file": domain_file,
+                "service_name": data.get("serviceName", ""),
+                "fingerprint": structural_fingerprint(tokens),
+                "hashes": {h for h, _ in winnow(kgram_hashes(encoded, k), window)},
+            }
+        )
+    return domains
+
+
+def find_similar_domains(
+    domains: List[Dict[str, Any]],
+    threshold: float = DEFAULT_THRESHOLD,
+    max_shared: int = DEFAULT_MAX_SHARED,
+) -> List[Dict[str, Any]]:
+    """Group identical and near-identical domains.
+
+    Returns groups (largest first) with ``similarity`` (the lowest and highest
+    pairwise similarity that joined the group; 1.0 for identical SQL),
+    ``identical`` (True if every member has the same fingerprint) and
+    ``members`` (the domains' dicts).
+    """
+    parents = list(range(len(domains)))
+
+    def find(index: int) -> int:
+        while parents[index] != index:
+            parents[index] = parents[parents[index]]
+            index = parents[index]
+        return index
+
+    similar: List[Tuple[int, float]] = []
+    by_fingerprint: Dict[str, int] = {}
+    for index, domain in enumerate(domains):
+        first = by_fingerprint.setdefault(domain["fingerprint"], index)
+        if first != index:
+            similar.append((index, 1.0))
+            parents[find(index)] = find(first)
+
+    hash_sets = [domain["hashes"] for domain in domains]
+    for (a, b), shared in shared_fingerprint_counts(hash_sets, max_shared).items():
+        if domains[a]["fingerprint"] == domains[b]["fingerprint"]:
+            continue
+        similarity = shared / len(hash_sets[a] | hash_sets[b])
+        if similarity >= threshold:
+            similar.append((a, similarity))
+            parents[find(a)] = find(b)
+
+    groups: Dict[int, List[int]] = defaultdict(list)
+    for index in range(len(domains)):
+        groups[find(index)].append(index)
+    scores: Dict[int, List[float]] = defaultdict(list)
+    for index, similarity in similar:
+        scores[find(index)].append(similarity)
+
+    results: List[Dict[str, Any]] = []
+    for root, indexes in groups.items():
+        if len(indexes) < 2:
+            continue
+        members = [domains[index] for index in indexes]
+        results.append(
+            {
+                "similarity": (min(scores[root]), max(scores[root])),
+                "identical": len({m["fingerprint"] for m in members}) == 1,
+                "members": members,
+            }
+        )
+    results.sort(key=lambda group: (-len(group["members"]), -group["similarity"][0]))
+    return results
+
+
+def page_callers(page_files: List[str]) -> Dict[str, Set[str]]:
+    """Map virtual domain names to the pages that call them."""
+    callers: Dict[str, Set[str]] = defaultdict(set)
+    for page_file in page_files:
+        with open(page_file, encoding="utf-8") as f:
+            data = json.load(f)
+        page = data.get("constantName", page_file)
+        for pattern in extract_call_patterns(data):
+            callers[pattern.domain].add(page)
+        components = data.get("modelView", {}).get("components", [])
+        for _, component in iter_components(components):
+            if component.get("type") == "resource":
+                domain = resource_domain(component)
+                if domain:
+                    callers[domain].add(page)
+    return callers
+
+
+def main():
+    args, options = parse_options(sys.argv[1:])
+    if not args:
+        print(__doc__)
+        sys.exit(1)
+
+    command = args[0]
+    pattern = args[1] if len(args) > 1 else DEFAULT_PATTERN
+
+    if command != "dupes":
+        print(f"Unknown command: {command}")
+        print(__doc__)
+        sys.exit(1)
+
+    try:
+        threshold = float(options.get("threshold", DEFAULT_THRESHOLD))
+        k = int(options.get("k", DEFAULT_K))
+        window = int(options.get("window", DEFAULT_WINDOW))
+    except ValueError as e:
+        print(f"❌ Invalid option value: {e}")
+        sys.exit(1)
+
+    roots = parse_roots(options.get("roots"))
+    domain_files = find_domain_files(pattern, roots=roots)
+    if not domain_files:
+        print(f"No virtual domain JSON files found matching pattern: {pattern}")
+        sys.exit(1)
+
+    domains = collect_domains(domain_files, k, window)
+    groups = find_similar_domains(domains, threshold)
+    callers = page_callers(find_page_files(roots=roots)) if groups else {}
+
+    for number, group in enumerate(groups, 1):
+        low, high = group["similarity"]
+        if group["identical"]:
+            score = "identical"
+        elif low == high:
+            score = f"similarity {high:.2f}"
+        else:
+            score = f"similarity {low:.2f}-{high:.2f}"
+        print(f"\nGroup {number}: {len(group['members'])} virtual domains, {score}")
+        for member in group["members"]:
+            pages = sorted(callers.get(member["service_name"], ()))
+            print(
+                f"    {member['service_name']} ({member['file']}) "
+                f"fingerprint {member['fingerprint']}"
+            )
+            print(f"        called by: {', '.join(pages) or 'no pages'}")
+
+    if groups:
+        print(
+            f"\n❌ {len(groups)} group(s) of duplicate virtual domains "
+            f"in {len(domain_files)} file(s); consider consolidating them."
+        )
+        sys.exit(1)
+    print(f"\n✅ No duplicate virtual domains in {len(domain_files)} file(s).")
+
+
+if __name__ == "__main__":
+    main()
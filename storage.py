@@ -0,0 +1,728 @@
+"""
+File access backends for the extraction tools.
+
+``extract_literals.py`` and ``extract_virtual_domains.py`` read and write
+through a ``Storage`` object instead of calling ``open``/``Path`` directly:
+
+* ``DiskStorage`` - the real filesystem (the default). Every write goes to a
+  temporary file that is renamed over the target, so a crash never leaves a
+  truncated file, and ``lock()`` takes an advisory lock shared with other
+  processes.
+* ``MemoryStorage`` - a dict-backed filesystem, used by tests so round trips
+  over thousands of pages never touch disk.
+* ``ReadOnlyStorage`` - wraps another storage and never modifies it. Writes
+  and removals are recorded as planned (and visible to later reads), which is how
+  ``--dry-run`` works.
+* ``ArchiveStorage`` - wraps another storage and additionally reads members of
+  ``.zip``/``.tar``/``.tar.gz`` exports in place, without unpacking them.
+
+Paths are plain strings (or ``Path`` objects) in the same form the tools
+already use, e.g. ``extracted_literals/ftReview/functions.js``. Archive members
+are addressed as ``<archive>!/<member>``, e.g.
+``exports/prod.zip!/pages/pages.ftReview.json``.
+"""
+
+import abc
+import contextlib
+import glob
+import io
+import os
+import posixpath
+import re
+import stat
+import tarfile
+import tempfile
+import threading
+import zipfile
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import (
+    Any,
+    BinaryIO,
+    Callable,
+    ContextManager,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Pattern,
+    Set,
+    Tuple,
+    TypeVar,
+    Union,
+)
+
+PathLike = Union[str, Path]
+T = TypeVar("T")
+
+ARCHIVE_SUFFIXES = (".zip", ".tar", ".tar.gz", ".tgz")
+ARCHIVE_SEPARATOR = "!/"
+MAX_JOBS = 8
+DEFAULT_JOBS = min(MAX_JOBS, os.cpu_count() or 1)
+
+# always: fsync each file and its directory before moving on (safest)
+# end:    fsync everything written when the run finishes (``Storage.flush``)
+# never:  leave it to the OS (fastest; writes are still atomic renames)
+FSYNC_POLICIES = ("always", "end", "never")
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None  # type: ignore[assignment]
+    import msvcrt
+
+# Permissions for new files (mkstemp creates them 0o600). The umask isn't
+# consulted: reading it means setting it, which would race with other threads.
+NEW_FILE_MODE = 0o644
+
+
+class Storage(abc.ABC):
+    """Interface for the file operations the extraction tools need.
+
+    Backends must implement the abstract methods; the rest have defaults
+    built on them.
+    """
+
+    @abc.abstractmethod
+    def read_text(self, path: PathLike) -> str:
+        """Return a file's content."""
+
+    @abc.abstractmethod
+    def write_text(self, path: PathLike, content: str) -> None:
+        """Replace a file's content, creating the file if needed."""
+
+    def append_text(self, path: PathLike, content: str) -> None:
+        """Add ``content`` to the end of a file, creating it if needed."""
+        existing = self.read_text(path) if self.exists(path) else ""
+        self.write_text(path, existing + content)
+
+    @abc.abstractmethod
+    def remove(self, path: PathLike) -> None:
+        """Delete a file; a file that doesn't exist is ignored."""
+
+    def open_bytes(self, path: PathLike) -> BinaryIO:
+        """Open a file for reading raw bytes (line endings untranslated)."""
+        return io.BytesIO(self.read_text(path).encode("utf-8"))
+
+    @abc.abstractmethod
+    def exists(self, path: PathLike) -> bool:
+        """Return True if a file or directory exists."""
+
+    @abc.abstractmethod
+    def is_dir(self, path: PathLike) -> bool:
+        """Return True if a directory exists."""
+
+    @abc.abstractmethod
+    def mkdir(self, path: PathLike) -> None:
+        """Create a directory and any missing parents."""
+
+    @abc.abstractmethod
+    def iterdir(self, path: PathLike) -> List[str]:
+        """Return the paths of a directory's entries, sorted."""
+
+    def scandir(self, path: PathLike) -> List[Tuple[str, bool]]:
+        """Return ``(name, is_dir)`` for a directory's entries, sorted by name."""
+        return [
+            (posixpath.basename(normalize_path(entry)), self.is_dir(entry))
+            for entry in self.iterdir(path)
+        ]
+
+    @abc.abstractmethod
+    def glob(self, pattern: str) -> List[str]:
+        """Return paths matching a glob pattern (``**`` matches any depth)."""
+
+    def lock(self, path: PathLike) -> ContextManager[None]:
+        """Hold an exclusive lock on a page for the duration of a ``with`` block.
+
+        Locking is advisory: it only keeps out other callers that lock the
+        same path. The default does nothing.
+        """
+        return contextlib.nullcontext()
+
+    def flush(self) -> None:
+        """Make pending writes durable (see ``FSYNC_POLICIES``).
+
+        The default does nothing, for backends whose writes need no flushing.
+        """
+        return None
+
+
+def fsync_path(path: str) -> None:
+    """fsync a file or directory by path."""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except (IsADirectoryError, PermissionError):
+        return  # Directories can't be opened on Windows
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class DiskStorage(Storage):
+    """Storage backed by the real filesystem.
+
+    ``fsync`` is one of ``FSYNC_POLICIES``.
+    """
+
+    def __init__(self, fsync: str = "always"):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(
+                f"Unknown fsync policy: {fsync} (expected one of "
+                f"{', '.join(FSYNC_POLICIES)})"
+            )
+        self.fsync = fsync
+        self.unsynced: Set[str] = set()
+        self.unsynced_lock = threading.Lock()
+
+    def read_text(self, path: PathLike) -> str:
+        with open(path, encoding="utf-8") as f:
+            return f.read()
+
+    def open_bytes(self, path: PathLike) -> BinaryIO:
+        return open(path, "rb")
+
+    def write_text(self, path: PathLike, content: str) -> None:
+        """Write via a temporary file in the same directory and an atomic rename."""
+        path = str(path)
+        directory = os.path.dirname(path) or "."
+        if os.path.exists(path):
+            mode = stat.S_IMODE(os.stat(path).st_mode)
+        else:
+            mode = NEW_FILE_MODE
+
+        fd, temp_path = tempfile.mkstemp(
+            dir=directory, prefix=f".{os.path.basename(path)}.", suffix=".tmp"
+        )
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(content)
+                if self.fsync == "always":
+                    f.flush()
+                    os.fsync(f.fileno())
+            os.chmod(temp_path, mode)
+            os.replace(temp_path, path)
+        except BaseException:
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(temp_path)
+            raise
+
+        if self.fsync == "always":
+            fsync_path(directory)
+        elif self.fsync == "end":
+            with self.unsynced_lock:
+                self.unsynced.update((path, directory))
+
+    def append_text(self, path: PathLike, content: str) -> None:
+        """Append in place, without rewriting the file.
+
+        Unlike ``write_text`` this is not atomic: a crash can leave a partial
+        last line.
+        """
+        path = str(path)
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(content)
+            if self.fsync == "always":
+                f.flush()
+                os.fsync(f.fileno())
+        if self.fsync == "end":
+            with self.unsynced_lock:
+                self.unsynced.add(path)
+
+    def remove(self, path: PathLike) -> None:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def flush(self) -> None:
+        with self.unsynced_lock:
+            pending, self.unsynced = self.unsynced, set()
+        for path in sorted(pending, key=len, reverse=True):
+            with contextlib.suppress(FileNotFoundError):
+                fsync_path(path)
+
+    @contextlib.contextmanager
+    def lock(self, path: PathLike) -> Iterator[None]:
+        """Lock a page via a hidden ``.<name>.lock`` file next to it."""
+        path = str(path)
+        lock_file = os.path.join(
+            os.path.dirname(path), f".{os.path.basename(path)}.lock"
+        )
+        fd = os.open(lock_file, os.O_RDWR | os.O_CREAT, 0o666)
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            else:
+                msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(fd, fcntl.LOCK_UN)
+                else:
+                    os.lseek(fd, 0, os.SEEK_SET)
+                    msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+        finally:
+            os.close(fd)
+
+    def exists(self, path: PathLike) -> bool:
+        return os.path.exists(path)
+
+    def is_dir(self, path: PathLike) -> bool:
+        return os.path.isdir(path)
+
+    def mkdir(self, path: PathLike) -> None:
+        Path(path).mkdir(parents=True, exist_ok=True)
+
+    def iterdir(self, path: PathLike) -> List[str]:
+        return sorted(str(child) for child in Path(path).iterdir())
+
+    def scandir(self, path: PathLike) -> List[Tuple[str, bool]]:
+        """List a directory without a stat per entry; symlinked dirs aren't followed."""
+        with os.scandir(path) as entries:
+            return sorted(
+                (entry.name, entry.is_dir(follow_symlinks=False)) for entry in entries
+            )
+
+    def glob(self, pattern: str) -> List[str]:
+        return glob.glob(pattern, recursive=True)
+
+
+def normalize_path(path: PathLike) -> str:
+    """Normalize a path to the key form used by in-memory storages."""
+    return posixpath.normpath(str(path).replace(os.sep, "/"))
+
+
+def parent_path(path: str) -> str:
+    return posixpath.dirname(path) or "."
+
+
+def glob_to_regex(pattern: str) -> Pattern[str]:
+    """Translate a glob pattern to a regex over normalized paths."""
+    segments = normalize_path(pattern).split("/")
+    regex = ""
+    for index, segment in enumerate(segments):
+        last = index == len(segments) - 1
+        if segment == "**":
+            regex += ".*" if last else "(?:[^/]+/)*"
+        else:
+            regex += segment_to_regex(segment) + ("" if last else "/")
+    return re.compile(regex + r"\Z")
+
+
+def segment_to_regex(segment: str) -> str:
+    """Translate one path segment of a glob (no ``/``) to a regex."""
+    regex = ""
+    i = 0
+    while i < len(segment):
+        char = segment[i]
+        if char == "*":
+            regex += "[^/]*"
+        elif char == "?":
+            regex += "[^/]"
+        elif char == "[" and "]" in segment[i + 1 :]:
+            end = segment.index("]", i + 1)
+            body = segment[i + 1 : end]
+            if body.startswith("!"):
+                body = "^" + body[1:]
+            regex += f"[{body}]"
+            i = end
+        else:
+            regex += re.escape(char)
+        i += 1
+    return regex
+
+
+class MemoryStorage(Storage):
+    """Storage that keeps every file in a dict; nothing touches disk."""
+
+    def __init__(self, files: Optional[Dict[str, str]] = None):
+        self.files: Dict[str, str] = {}
+        self.dirs: Set[str] = {"."}
+        for path, content in (files or {}).items():
+            self.mkdir(parent_path(normalize_path(path)))
+            self.files[normalize_path(path)] = content
+
+    def read_text(self, path: PathLike) -> str:
+        key = normalize_path(path)
+        if key not in self.files:
+            raise FileNotFoundError(f"No such file: {path}")
+        return self.files[key]
+
+    def write_text(self, path: PathLike, content: str) -> None:
+        key = normalize_path(path)
+        if key in self.dirs:
+            raise IsADirectoryError(f"Is a directory: {path}")
+        if parent_path(key) not in self.dirs:
+            raise FileNotFoundError(f"No such directory: {parent_path(key)}")
+        self.files[key] = content
+
+    def remove(self, path: PathLike) -> None:
+        key = normalize_path(path)
+        if key in self.dirs:
+            raise IsADirectoryError(f"Is a directory: {path}")
+        self.files.pop(key, None)
+
+    def exists(self, path: PathLike) -> bool:
+        key = normalize_path(path)
+        return key in self.files or key in self.dirs
+
+    def is_dir(self, path: PathLike) -> bool:
+        return normalize_path(path) in self.dirs
+
+    def mkdir(self, path: PathLike) -> None:
+        key = normalize_path(path)
+        while key not in self.dirs:
+            if key in self.files:
+                raise FileExistsError(f"Not a directory: {key}")
+            self.dirs.add(key)
+            key = parent_path(key)
+
+    def iterdir(self, path: PathLike) -> List[str]:
+        key = normalize_path(path)
+        if key not in self.dirs:
+            raise FileNotFoundError(f"No such directory: {path}")
+        return sorted(
+            entry
+            for entry in self.files.keys() | self.dirs
+            if entry != key and parent_path(entry) == key
+        )
+
+    def glob(self, pattern: str) -> List[str]:
+        regex = glob_to_regex(pattern)
+        return sorted(path for path in self.files if regex.match(path))
+
+
+class ReadOnlyStorage(Storage):
+    """Wrap another storage without ever modifying it.
+
+    Writes land in an in-memory overlay instead, so later reads see them, and
+    are listed in ``planned_writes`` as ``(path, content)`` in write order.
+    Removed files are hidden from later reads and listed in
+    ``planned_removals``.
+    """
+
+    def __init__(self, base: Storage):
+        self.base = base
+        self.overlay = MemoryStorage()
+        self.planned_writes: List[Tuple[str, str]] = []
+        self.planned_removals: List[str] = []
+        self.removed: Set[str] = set()
+
+    def read_text(self, path: PathLike) -> str:
+        if self.overlay.exists(path) and not self.overlay.is_dir(path):
+            return self.overlay.read_text(path)
+        if normalize_path(path) in self.removed:
+            raise FileNotFoundError(f"No such file: {path}")
+        return self.base.read_text(path)
+
+    def open_bytes(self, path: PathLike) -> BinaryIO:
+        if self.overlay.exists(path) and not self.overlay.is_dir(path):
+            return self.overlay.open_bytes(path)
+        if normalize_path(path) in self.removed:
+            raise FileNotFoundError(f"No such file: {path}")
+        return self.base.open_bytes(path)
+
+    def write_text(self, path: PathLike, content: str) -> None:
+        key = normalize_path(path)
+        if not self.is_dir(parent_path(key)):
+            raise FileNotFoundError(f"No such directory: {parent_path(key)}")
+        self.overlay.mkdir(parent_path(key))
+        self.overlay.files[key] = content
+        self.removed.discard(key)
+        self.planned_writes.append((str(path), content))
+
+    def remove(self, path: PathLike) -> None:
+        if not self.exists(path):
+            return
+        if self.is_dir(path):
+            raise IsADirectoryError(f"Is a directory: {path}")
+        self.overlay.remove(path)
+        self.removed.add(normalize_path(path))
+        self.planned_removals.append(str(path))
+
+    def exists(self, path: PathLike) -> bool:
+        if self.overlay.exists(path):
+            return True
+        return normalize_path(path) not in self.removed and self.base.exists(path)
+
+    def is_dir(self, path: PathLike) -> bool:
+        return self.overlay.is_dir(path) or self.base.is_dir(path)
+
+    def mkdir(self, path: PathLike) -> None:
+        self.overlay.mkdir(path)
+
+    def iterdir(self, path: PathLike) -> List[str]:
+        entries = (
+            set(self.overlay.iterdir(path)) if self.overlay.is_dir(path) else set()
+        )
+        if self.base.is_dir(path):
+            entries.update(normalize_path(p) for p in self.base.iterdir(path))
+        return sorted(entries - self.removed)
+
+    def glob(self, pattern: str) -> List[str]:
+        matches = {normalize_path(p) for p in self.base.glob(pattern)}
+        return sorted((matches - self.removed) | set(self.overlay.glob(pattern)))
+
+    def describe_planned_writes(self) -> List[str]:
+        """Describe each planned write as new, changed or unchanged."""
+        lines = []
+        for path, content in self.planned_writes:
+            if not self.base.exists(path):
+                status = "new"
+            elif self.base.read_text(path) == content:
+                status = "unchanged"
+            else:
+                status = "changed"
+            lines.append(f"{path} ({status}, {len(content.encode())} bytes)")
+        lines.extend(f"{path} (removed)" for path in self.planned_removals)
+        return lines
+
+
+def is_archive(path: PathLike) -> bool:
+    """Return True if a path names a supported export archive."""
+    return str(path).lower().endswith(ARCHIVE_SUFFIXES)
+
+
+def member_path(archive: str, member: str) -> str:
+    """Build the ``<archive>!/<member>`` path of an archive member."""
+    return f"{archive}{ARCHIVE_SEPARATOR}{normalize_path(member)}"
+
+
+def parse_jobs(value: Optional[str]) -> int:
+    """Parse a ``--jobs`` value, capped at ``MAX_JOBS`` (default: ``DEFAULT_JOBS``).
+
+    Raises ValueError if it isn't a positive whole number.
+    """
+    if value is None:
+        return DEFAULT_JOBS
+    try:
+        jobs = int(value)
+    except ValueError:
+        jobs = 0
+    if jobs < 1:
+        raise ValueError(f"--jobs must be a positive whole number, not {value!r}")
+    return min(jobs, MAX_JOBS)
+
+
+def split_archive_path(path: PathLike) -> Optional[Tuple[str, str]]:
+    """Split ``<archive>!/<member>`` into its parts, or return None."""
+    archive, separator, member = str(path).partition(ARCHIVE_SEPARATOR)
+    if not separator or not is_archive(archive):
+        return None
+    return archive, normalize_path(member) if member else "."
+
+
+def process_archive(
+    archive: str,
+    handler: Callable[[str, str], Optional[T]],
+    pattern: str = "**/*",
+    jobs: int = 1,
+) -> Iterator[T]:
+    """Call ``handler(member_path, text)`` for archive members matching a glob.
+
+    Zip members are read and handled in parallel, each worker thread with its
+    own handle on the archive. Tar archives can only be read front to back, so
+    members are streamed in order and handled in parallel as they arrive, with
+    at most ``2 * jobs`` of them read ahead. Members that aren't UTF-8 text are
+    skipped, as are None results. Results are yielded in archive order as they
+    are ready, so the caller can report and record each on its own thread.
+    """
+    regex = glob_to_regex(pattern)
+
+    def handle_bytes(name: str, content: bytes) -> Optional[T]:
+        try:
+            text = content.decode("utf-8")
+        except UnicodeDecodeError:
+            return None
+        return handler(member_path(archive, name), text)
+
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as executor:
+        if archive.lower().endswith(".zip"):
+            with zipfile.ZipFile(archive) as zip_file:
+                names = [
+                    info.filename
+                    for info in zip_file.infolist()
+                    if not info.is_dir() and regex.match(normalize_path(info.filename))
+                ]
+
+            local = threading.local()
+            handles: List[zipfile.ZipFile] = []
+
+            def read_and_handle(name: str) -> Optional[T]:
+                if not hasattr(local, "zip_file"):
+                    local.zip_file = zipfile.ZipFile(archive)
+                    handles.append(local.zip_file)
+                return handle_bytes(name, local.zip_file.read(name))
+
+            try:
+                for result in executor.map(read_and_handle, names):
+                    if result is not None:
+                        yield result
+            finally:
+                for handle in handles:
+                    handle.close()
+        else:
+            # Members read but not yet handled, oldest first
+            pending: "deque[Future[Optional[T]]]" = deque()
+            with tarfile.open(archive, mode="r|*") as tar_file:
+                for info in tar_file:
+                    if info.isfile() and regex.match(normalize_path(info.name)):
+                        member = tar_file.extractfile(info)
+                        if member is None:
+                            continue
+                        # Don't read further ahead than the workers can keep up
+                        while len(pending) >= 2 * max(1, jobs):
+                            result = pending.popleft().result()
+                            if result is not None:
+                                yield result
+                        pending.append(
+                            executor.submit(handle_bytes, info.name, member.read())
+                        )
+            while pending:
+                result = pending.popleft().result()
+                if result is not None:
+                    yield result
+
+
+class ArchiveStorage(Storage):
+    """Wrap another storage, adding read-only access to archive members.
+
+    Paths of the form ``<archive>!/<member>`` are read from the archive
+    without unpacking it; every other path goes to the wrapped storage.
+    Writing inside an archive raises ``PermissionError``.
+    """
+
+    def __init__(self, base: Optional[Storage] = None):
+        self.base = base or DiskStorage()
+        self.archives: Dict[str, Tuple[Any, Dict[str, str]]] = {}
+        self.archive_lock = threading.Lock()
+
+    def open_archive(self, archive: str) -> Tuple[Any, Dict[str, str]]:
+        """Return an open archive and its ``{normalized name: name}`` index."""
+        with self.archive_lock:
+            if archive not in self.archives:
+                handle: Any
+                if archive.lower().endswith(".zip"):
+                    handle = zipfile.ZipFile(archive)
+                    names = [i.filename for i in handle.infolist() if not i.is_dir()]
+                else:
+                    handle = tarfile.open(archive, mode="r:*")
+                    names = [i.name for i in handle.getmembers() if i.isfile()]
+                index = {normalize_path(name): name for name in names}
+                self.archives[archive] = (handle, index)
+            return self.archives[archive]
+
+    def lock(self, path: PathLike) -> ContextManager[None]:
+        if split_archive_path(path) is not None:
+            return contextlib.nullcontext()  # Archives are never written
+        return self.base.lock(path)
+
+    def flush(self) -> None:
+        self.base.flush()
+
+    def close(self) -> None:
+        for handle, _ in self.archives.values():
+            handle.close()
+        self.archives = {}
+
+    def read_text(self, path: PathLike) -> str:
+        parts = split_archive_path(path)
+        if parts is None:
+            return self.base.read_text(path)
+        archive, member = parts
+        handle, index = self.open_archive(archive)
+        if member not in index:
+            raise FileNotFoundError(f"No such archive member: {path}")
+        with self.archive_lock:
+            if isinstance(handle, zipfile.ZipFile):
+                content = handle.read(index[member])
+            else:
+                content = handle.extractfile(index[member]).read()
+        return content.decode("utf-8")
+
+    def open_bytes(self, path: PathLike) -> BinaryIO:
+        if split_archive_path(path) is None:
+            return self.base.open_bytes(path)
+        return super().open_bytes(path)
+
+    def write_text(self, path: PathLike, content: str) -> None:
+        if split_archive_path(path) is not None:
+            raise PermissionError(f"Archives are read-only: {path}")
+        self.base.write_text(path, content)
+
+    def append_text(self, path: PathLike, content: str) -> None:
+        if split_archive_path(path) is not None:
+            raise PermissionError(f"Archives are read-only: {path}")
+        self.base.append_text(path, content)
+
+    def remove(self, path: PathLike) -> None:
+        if split_archive_path(path) is not None:
+            raise PermissionError(f"Archives are read-only: {path}")
+        self.base.remove(path)
+
+    def exists(self, path: PathLike) -> bool:
+        parts = split_archive_path(path)
+        if parts is None:
+            return self.base.exists(path)
+        if not self.base.exists(parts[0]):
+            return False
+        return parts[1] in self.open_archive(parts[0])[1] or self.is_dir(path)
+
+    def is_dir(self, path: PathLike) -> bool:
+        parts = split_archive_path(path)
+        if parts is None:
+            return self.base.is_dir(path)
+        archive, member = parts
+        if not self.base.exists(archive):
+            return False
+        prefix = "" if member == "." else member + "/"
+        return any(name.startswith(prefix) for name in self.open_archive(archive)[1])
+
+    def mkdir(self, path: PathLike) -> None:
+        if split_archive_path(path) is not None:
+            raise PermissionError(f"Archives are read-only: {path}")
+        self.base.mkdir(path)
+
+    def scandir(self, path: PathLike) -> List[Tuple[str, bool]]:
+        if split_archive_path(path) is None:
+            return self.base.scandir(path)
+        return super().scandir(path)
+
+    def iterdir(self, path: PathLike) -> List[str]:
+        parts = split_archive_path(path)
+        if parts is None:
+            return self.base.iterdir(path)
+        archive, member = parts
+        if not self.is_dir(path):
+            raise FileNotFoundError(f"No such archive directory: {path}")
+        prefix = "" if member == "." else member + "/"
+        children = {
+            prefix + name[len(prefix) :].split("/")[0]
+            for name in self.open_archive(archive)[1]
+            if name.startswith(prefix)
+        }
+        return sorted(member_path(archive, child) for child in children)
+
+    def glob(self, pattern: str) -> List[str]:
+        """Glob the wrapped storage, or archive members.
+
+        ``exports/prod.zip`` on its own matches every member of the archive;
+        ``exports/prod.zip!/pages/*.json`` matches members against a pattern.
+        """
+        if is_archive(pattern) and self.base.exists(pattern):
+            pattern = member_path(pattern, "**/*")
+        parts = split_archive_path(pattern)
+        if parts is None:
+            return self.base.glob(pattern)
+        archive, member_pattern = parts
+        if not self.base.exists(archive):
+            return []
+        regex = glob_to_regex(member_pattern)
+        return [
+            member_path(archive, name)
+            for name in sorted(self.open_archive(archive)[1])
+            if regex.match(name)
+        ]
@@ -0,0 +1,119 @@
+"""
+Streaming comparison of extracted files against their JSON content.
+
+``check_sync_status`` in both extraction tools used to read each extracted
+file into a string, then encode it (and, for SQL, make normalized copies)
+just to compare and hash it. Here the file is read as bytes in fixed-size
+chunks (through ``mmap`` for large files on disk), line endings are normalized
+while streaming, and the comparison stops at the first differing chunk.
+Hashes for the mismatch message are only computed once a mismatch is found.
+"""
+
+import hashlib
+import io
+import mmap
+import os
+from typing import BinaryIO, Iterable, Iterator, Optional, Tuple
+
+from storage import PathLike, Storage
+
+CHUNK_SIZE = 1 << 20
+MMAP_THRESHOLD = 4 * CHUNK_SIZE
+
+
+def iter_chunks(f: BinaryIO, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    """Yield a binary file's content in chunks, via mmap for large disk files."""
+    try:
+        fileno: Optional[int] = f.fileno()
+    except (AttributeError, OSError, io.UnsupportedOperation):
+        fileno = None
+
+    if fileno is not None and os.fstat(fileno).st_size >= MMAP_THRESHOLD:
+        with mmap.mmap(fileno, 0, access=mmap.ACCESS_READ) as mapped:
+            for offset in range(0, len(mapped), chunk_size):
+                yield mapped[offset : offset + chunk_size]
+        return
+
+    while True:
+        chunk = f.read(chunk_size)
+        if not chunk:
+            return
+        yield chunk
+
+
+def iter_text_chunks(text: str, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    """Yield the UTF-8 encoding of a string in chunks."""
+    view = memoryview(text.encode("utf-8"))
+    for offset in range(0, len(view), chunk_size):
+        yield view[offset : offset + chunk_size].tobytes()
+
+
+def normalize_newlines(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """Convert ``\\r\\n`` and ``\\r`` to ``\\n`` across chunk boundaries."""
+    pending = b""
+    for chunk in chunks:
+        data = pending + chunk if pending else chunk
+        pending = b""
+        if data.endswith(b"\r"):
+            # Might be the first half of a \r\n split across chunks
+            data, pending = data[:-1], b"\r"
+        if b"\r" in data:
+            data = data.replace(b"\r\n", b"\n").replace(b"\r", b"\n")
+        if data:
+            yield data
+    if pending:
+        yield b"\n"
+
+
+def chunks_equal(left: Iterable[bytes], right: Iterable[bytes]) -> bool:
+    """Compare two chunk streams, stopping at the first difference."""
+    left_chunks, right_chunks = iter(left), iter(right)
+    left_buffer = right_buffer = memoryview(b"")
+
+    while True:
+        if not left_buffer:
+            left_buffer = memoryview(next(left_chunks, b""))
+        if not right_buffer:
+            right_buffer = memoryview(next(right_chunks, b""))
+        if not left_buffer or not right_buffer:
+            return not left_buffer and not right_buffer
+
+        size = min(len(left_buffer), len(right_buffer))
+        if left_buffer[:size] != right_buffer[:size]:
+            return False
+        left_buffer, right_buffer = left_buffer[size:], right_buffer[size:]
+
+
+def md5_chunks(chunks: Iterable[bytes]) -> str:
+    digest = hashlib.md5()
+    for chunk in chunks:
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def compare_file_to_text(
+    storage: Storage,
+    path: PathLike,
+    text: str,
+    normalize_text: bool = False,
+    chunk_size: int = CHUNK_SIZE,
+) -> Optional[Tuple[str, str]]:
+    """Compare an extracted file with the JSON content it came from.
+
+    The file's line endings are always normalized (as reading it in text
+    mode would); ``normalize_text`` does the same for ``text``. Returns None
+    if they match, otherwise the MD5 hashes of the (normalized) file and text.
+    """
+
+    def text_chunks() -> Iterator[bytes]:
+        chunks = iter_text_chunks(text, chunk_size)
+        return normalize_newlines(chunks) if normalize_text else chunks
+
+    with storage.open_bytes(path) as f:
+        file_chunks = normalize_newlines(iter_chunks(f, chunk_size))
+        if chunks_equal(file_chunks, text_chunks()):
+            return None
+
+    with storage.open_bytes(path) as f:
+        file_hash = md5_chunks(normalize_newlines(iter_chunks(f, chunk_size)))
+    return file_hash, md5_chunks(text_chunks())
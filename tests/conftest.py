@@ -0,0 +1,27 @@
+"""Fixtures shared by the test modules."""
+
+import json
+
+import pytest
+
+
+@pytest.fixture
+def definitions_repo(tmp_path, monkeypatch):
+    """Return a function that writes a page, a virtual domain and a JSON file
+    that is neither into the working directory, which is ``tmp_path``."""
+
+    def make(page: dict, domain: dict):
+        files = {
+            tmp_path / "pages" / f"pages.{page['constantName']}.json": page,
+            tmp_path
+            / "virtualDomains"
+            / f"virtualDomains.{domain['serviceName']}.json": domain,
+            tmp_path / "other.json": {"not": "a definition"},
+        }
+        for path, data in files.items():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(json.dumps(data, indent=3))
+        monkeypatch.chdir(tmp_path)
+        return tmp_path
+
+    return make
@@ -0,0 +1,204 @@
+"""Tests for reading Banner exports directly from zip/tar archives."""
+
+import io
+import json
+import sys
+import tarfile
+import threading
+import zipfile
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import extract_literals
+from extract_literals import (
+    check_sync_status,
+    extract_literals_from_archive,
+    rebuild_json_from_literals,
+)
+from extract_virtual_domains import extract_sql_from_archive
+from snapshot_diff import diff_snapshots
+from storage import ArchiveStorage, DiskStorage, process_archive
+
+PAGE = {
+    "constantName": "archived_page",
+    "extendsPage": None,
+    "modelView": {
+        "components": [
+            {"type": "literal", "name": "header", "value": "<h1>Archived</h1>"},
+            {"type": "literal", "name": "functions", "value": "<script>go();</script>"},
+        ]
+    },
+}
+
+DOMAIN = {"serviceName": "archived_domain", "codeGet": "select 1 from dual"}
+
+MEMBERS = {
+    "export/pages/pages.archived_page.json": json.dumps(PAGE),
+    "export/virtualDomains/virtualDomains.archived_domain.json": json.dumps(DOMAIN),
+    "export/other.json": json.dumps({"not": "a definition"}),
+    "export/logo.bin": "\udcff",
+}
+
+
+def encode(content: str) -> bytes:
+    return content.encode("utf-8", errors="surrogateescape")
+
+
+def make_zip(path: Path, members: dict = MEMBERS) -> str:
+    with zipfile.ZipFile(path, "w") as zip_file:
+        for name, content in members.items():
+            zip_file.writestr(name, encode(content))
+    return str(path)
+
+
+def make_tar(path: Path, members: dict = MEMBERS) -> str:
+    with tarfile.open(path, "w:gz") as tar_file:
+        for name, content in members.items():
+            data = encode(content)
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            tar_file.addfile(info, io.BytesIO(data))
+    return str(path)
+
+
+@pytest.fixture(params=["zip", "tar.gz"])
+def archive(request, tmp_path):
+    if request.param == "zip":
+        return make_zip(tmp_path / "export.zip")
+    return make_tar(tmp_path / "export.tar.gz")
+
+
+class TestArchiveExtraction:
+    """Extract, check and rebuild straight from archives."""
+
+    def test_extract_literals(self, archive, tmp_path):
+        storage = ArchiveStorage(DiskStorage())
+        output_dir = tmp_path / "extracted"
+
+        (extraction_map,) = extract_literals_from_archive(
+            archive, str(output_dir), storage, jobs=4
+        )
+
+        source_file = f"{archive}!/export/pages/pages.archived_page.json"
+        assert extraction_map["source_file"] == source_file
+        page_dir = output_dir / "archived_page"
+        assert (page_dir / "header.html").read_text() == "<h1>Archived</h1>"
+        assert check_sync_status(str(page_dir), storage)
+
+        (page_dir / "header.html").write_text("<h1>Edited</h1>")
+        assert not check_sync_status(str(page_dir), storage)
+
+    def test_rebuild_requires_output_dir(self, archive, tmp_path):
+        storage = ArchiveStorage(DiskStorage())
+        extract_literals_from_archive(archive, str(tmp_path / "extracted"), storage)
+        page_dir = str(tmp_path / "extracted" / "archived_page")
+
+        with pytest.raises(PermissionError):
+            rebuild_json_from_literals(page_dir, storage=storage)
+
+        built = rebuild_json_from_literals(
+            page_dir, output_dir=str(tmp_path / "build"), storage=storage
+        )
+        assert json.loads(Path(built).read_text()) == PAGE
+
+    def test_extract_sql(self, archive, tmp_path):
+        (extraction_map,) = extract_sql_from_archive(
+            archive, str(tmp_path / "extracted"), jobs=2
+        )
+
+        assert extraction_map["service_name"] == "archived_domain"
+        sql_file = tmp_path / "extracted" / "archived_domain" / "codeget.sql"
+        assert sql_file.read_text() == "select 1 from dual"
+
+    def test_maps_and_output_written_by_caller(
+        self, archive, tmp_path, monkeypatch, capsys
+    ):
+        threads = []
+        write_map = extract_literals.write_extraction_map
+
+        def record(*args):
+            threads.append(threading.current_thread())
+            return write_map(*args)
+
+        monkeypatch.setattr(extract_literals, "write_extraction_map", record)
+        extract_literals_from_archive(
+            archive, str(tmp_path / "extracted"), ArchiveStorage(DiskStorage()), 4
+        )
+
+        assert threads == [threading.main_thread()]
+        lines = capsys.readouterr().out.splitlines()
+        assert lines[1].startswith("Processing: ")
+        assert lines[2:4] == [
+            f"Extracted: {tmp_path / 'extracted' / 'archived_page' / name}"
+            for name in ("header.html", "functions.js")
+        ]
+        assert lines[4].startswith("Extraction map saved: ")
+
+    def test_tar_members_read_ahead_is_bounded(self, tmp_path):
+        members = {f"page_{i:02}.json": "{}" for i in range(40)}
+        archive = make_tar(tmp_path / "many.tar.gz", members)
+        handled = []
+
+        def handler(member, text):
+            handled.append(member)
+            return member
+
+        results = process_archive(archive, handler, "*.json", jobs=2)
+        assert next(results).endswith("page_00.json")
+        assert len(handled) <= 4
+        assert len(list(results)) == 39
+
+
+class TestArchiveStorage:
+    """Test archive member paths."""
+
+    def test_glob_and_listing(self, archive):
+        storage = ArchiveStorage(DiskStorage())
+
+        assert storage.glob(f"{archive}!/**/*.json") == [
+            f"{archive}!/export/other.json",
+            f"{archive}!/export/pages/pages.archived_page.json",
+            f"{archive}!/export/virtualDomains/virtualDomains.archived_domain.json",
+        ]
+        assert len(storage.glob(archive)) == len(MEMBERS)
+        assert storage.iterdir(f"{archive}!/export") == [
+            f"{archive}!/export/logo.bin",
+            f"{archive}!/export/other.json",
+            f"{archive}!/export/pages",
+            f"{archive}!/export/virtualDomains",
+        ]
+        assert storage.is_dir(f"{archive}!/export/pages")
+        assert not storage.exists(f"{archive}!/export/missing.json")
+
+        with pytest.raises(PermissionError):
+            storage.write_text(f"{archive}!/export/other.json", "{}")
+
+
+class TestArchiveSnapshotDiff:
+    """Snapshot diffs accept archives as either side."""
+
+    def test_directory_matches_archive(self, archive, tmp_path):
+        export_dir = tmp_path / "unpacked"
+        for name, content in MEMBERS.items():
+            (export_dir / name).parent.mkdir(parents=True, exist_ok=True)
+            (export_dir / name).write_bytes(encode(content))
+
+        assert diff_snapshots(str(export_dir), archive, None, jobs=2) == []
+
+    def test_modified_archive(self, archive, tmp_path):
+        changed_page = json.loads(json.dumps(PAGE))
+        changed_page["modelView"]["components"][0]["value"] = "<h1>Changed</h1>"
+        changed = make_zip(
+            tmp_path / "changed.zip",
+            dict(
+                MEMBERS,
+                **{"export/pages/pages.archived_page.json": json.dumps(changed_page)},
+            ),
+        )
+
+        (result,) = diff_snapshots(archive, changed, None)
+        assert result["status"] == "modified"
+        assert [change["path"] for change in result["changes"]] == ["0"]
@@ -0,0 +1,235 @@
+"""Tests for factoring shared literals into a base page."""
+
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from base_pages import (
+    SHARED_TAGS_NAME,
+    extends_page,
+    factor_pages,
+    leading_literals,
+    make_base_page_transform,
+    movable_fragments,
+    plan_base,
+)
+from extract_literals import compare_extracted_literals, extract_literals_from_json
+
+REPO_ROOT = Path(__file__).parent.parent
+
+CSS = '<link href="https://cdn.example.com/fw.css" rel="stylesheet">'
+ICONS = '<link rel="stylesheet" href="https://cdn.example.com/icons.css">'
+LIB = '<script src="https://cdn.example.com/lib.js"></script>'
+NOTICE = '<div class="alert">Maintenance on Sunday</div>'
+
+
+def page(name: str, *values: str, after: str = "<p>body</p>") -> dict:
+    components = [{"type": "resource", "name": "data", "resource": "virtualDomains.x"}]
+    components += [
+        {"type": "literal", "name": f"literal{i}", "value": value}
+        for i, value in enumerate(values)
+    ]
+    components.append(
+        {
+            "type": "block",
+            "name": "main",
+            "components": [{"type": "literal", "name": "inner", "value": after}],
+        }
+    )
+    return {
+        "constantName": name,
+        "extendsPage": None,
+        "modelView": {"name": name, "components": components},
+    }
+
+
+def plan_for(*pages: dict, min_pages: int = 2):
+    return plan_base(
+        {data["constantName"]: leading_literals(data) for data in pages},
+        "shared",
+        min_pages,
+    )
+
+
+def labels(data: dict, *tags: str) -> list:
+    keys = {
+        f.key for lit in leading_literals(page("x", *tags)) for _, f in lit.resources
+    }
+    return [f.label for f in movable_fragments(leading_literals(data), keys)]
+
+
+class TestMovable:
+    """Test which fragments can move without changing the page."""
+
+    def test_scripts_and_stylesheets_keep_their_order(self):
+        data = page("a", f"{CSS}\n<script>init();</script>\n{LIB}\n{ICONS}")
+        # The inline script would run before lib.js instead of after it
+        assert labels(data, CSS + LIB + ICONS) == [
+            "https://cdn.example.com/fw.css",
+            "https://cdn.example.com/icons.css",
+        ]
+
+        data = page("a", f"<style>.x{{}}</style>{CSS}{LIB}")
+        assert labels(data, CSS + LIB) == ["https://cdn.example.com/lib.js"]
+
+    def test_commented_tags_ignored(self):
+        data = page("a", f"<!-- {LIB} -->{CSS}")
+        assert labels(data, CSS + LIB) == ["https://cdn.example.com/fw.css"]
+
+    def test_whole_literals_must_lead(self):
+        data = page("a", "<h1>A</h1>", NOTICE)
+        notice = leading_literals(page("x", NOTICE))[0].whole.key
+        assert movable_fragments(leading_literals(data), {notice}) == []
+        data = page("a", NOTICE, "<h1>A</h1>")
+        assert len(movable_fragments(leading_literals(data), {notice})) == 1
+
+    def test_literals_after_the_first_block_ignored(self):
+        data = page("a", after=CSS)
+        assert leading_literals(data) == []
+
+
+class TestPlan:
+    """Test choosing the base page contents and the pages extending it."""
+
+    def test_largest_saving_chosen(self):
+        plan = plan_for(
+            page("a", f"{CSS}\n{LIB}\n<h1>A</h1>"),
+            page("b", f"{CSS}\n{LIB}\n{ICONS}<h1>B</h1>"),
+            page("c", f"{ICONS}\n<h1>C</h1>"),
+        )
+        assert plan is not None
+        assert plan.pages == ["a", "b"] and len(plan.keys) == 2
+
+    def test_every_page_needs_every_fragment(self):
+        plan = plan_for(
+            page("a", NOTICE, CSS + LIB),
+            page("b", NOTICE, CSS + LIB),
+            page("c", NOTICE, CSS),
+            min_pages=3,
+        )
+        assert plan is not None
+        # lib.js stays on a and b, since c doesn't load it
+        assert plan.pages == ["a", "b", "c"] and len(plan.keys) == 2
+
+    def test_nothing_shared(self):
+        assert plan_for(page("a", CSS), page("b", ICONS)) is None
+        assert plan_for(page("a", CSS), page("b", CSS), min_pages=3) is None
+
+    def test_factor_pages(self):
+        pages = {
+            "a": page("a", NOTICE, f"{CSS}\n\n{LIB}\n<h1>A</h1>"),
+            "b": page("b", NOTICE, f"{CSS}\n{LIB}"),
+        }
+        plan = plan_for(*pages.values())
+        assert plan is not None
+        base, rewritten = factor_pages(pages, plan)
+
+        components = base["modelView"]["components"]
+        assert [c["value"] for c in components] == [NOTICE, f"{CSS}\n{LIB}"]
+        assert components[1]["name"] == SHARED_TAGS_NAME
+        assert base["constantName"] == "shared" and base["pageRoles"] == []
+
+        assert extends_page(rewritten["a"]) == "shared"
+        assert [c.get("value") for c in rewritten["a"]["modelView"]["components"]][
+            :2
+        ] == [None, "<h1>A</h1>"]
+        # A literal left empty is dropped
+        assert [c["type"] for c in rewritten["b"]["modelView"]["components"]] == [
+            "resource",
+            "block",
+        ]
+        assert pages["a"]["extendsPage"] is None
+
+    def test_transform_rejects_changed_pages(self):
+        plan = plan_for(page("a", CSS), page("b", CSS))
+        assert plan is not None
+        with pytest.raises(ValueError, match="no longer has"):
+            make_base_page_transform(plan)(page("a", ICONS))
+
+
+class TestCommand:
+    """Test factoring pages on disk and the extract/rebuild round trip."""
+
+    @pytest.fixture
+    def workspace(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        Path("pages").mkdir()
+        for name, values in [
+            ("a", [NOTICE, f"{CSS}\n{LIB}\n<h1>A</h1>"]),
+            ("b", [NOTICE, f"{CSS}\n{LIB}\n<h1>B</h1>"]),
+            ("c", ["<h1>C</h1>"]),
+        ]:
+            Path(f"pages/pages.{name}.json").write_text(json.dumps(page(name, *values)))
+            extract_literals_from_json(f"pages/pages.{name}.json", "extracted_literals")
+        return tmp_path
+
+    def run(self, command: str, *args: str) -> subprocess.CompletedProcess:
+        return subprocess.run(
+            [sys.executable, str(REPO_ROOT / "base_pages.py"), command]
+            + ["--roots=pages", "--base=shared", *args],
+            capture_output=True,
+            text=True,
+        )
+
+    def test_factor_and_round_trip(self, workspace):
+        result = self.run("analyze")
+        assert result.returncode == 0, result.stdout
+        assert "a: " in result.stdout and "saved" in result.stdout
+        assert not Path("pages/pages.shared.json").exists()
+
+        result = self.run("factor")
+        assert result.returncode == 0, result.stdout
+        base = json.loads(Path("pages/pages.shared.json").read_text())
+        assert len(base["modelView"]["components"]) == 2
+        data = json.loads(Path("pages/pages.a.json").read_text())
+        assert data["extendsPage"] == {"constantName": "shared"}
+        assert "c" not in result.stdout.split("Shared by")[1].split("\n")[0]
+
+        # The moved literal's file is gone and everything is in sync
+        assert not Path("extracted_literals/a/literal0.html").exists()
+        assert Path("extracted_literals/a/literal1.html").read_text() == "<h1>A</h1>"
+        for name in ("a", "b", "c", "shared"):
+            statuses = compare_extracted_literals(f"extracted_literals/{name}")
+            assert all(status.status == "in-sync" for status in statuses)
+
+        result = subprocess.run(
+            [sys.executable, str(REPO_ROOT / "extract_literals.py"), "rebuild"]
+            + ["--roots=pages"],
+            capture_output=True,
+            text=True,
+        )
+        assert result.returncode == 0, result.stdout
+        assert json.loads(Path("pages/pages.a.json").read_text()) == data
+
+        # Pages that already extend a page are left alone
+        assert "already extends shared" in self.run("analyze", "--base=x").stdout
+
+    def test_unsynced_edits_refused(self, workspace):
+        Path("extracted_literals/b/literal1.html").write_text("edited")
+        result = self.run("factor")
+        assert result.returncode == 1
+        assert "out of sync" in result.stdout
+        assert not Path("pages/pages.shared.json").exists()
+
+    def test_out_dir_leaves_sources(self, workspace):
+        original = Path("pages/pages.a.json").read_text()
+        result = self.run("factor", "--out=factored")
+        assert result.returncode == 0, result.stdout
+        assert Path("factored/pages.shared.json").exists()
+        assert extends_page(json.loads(Path("factored/pages.a.json").read_text()))
+        assert Path("pages/pages.a.json").read_text() == original
+
+    def test_repo_pages(self):
+        pages = {}
+        for json_file in sorted((REPO_ROOT / "pages").glob("pages.*.json")):
+            data = json.loads(json_file.read_text())
+            pages[data["constantName"]] = leading_literals(data)
+        plan = plan_base(pages)
+        assert plan is not None
+        # The Bootstrap CSS, Popper and Font Awesome tags of the AB 3158 pages
+        assert plan.pages == ["efgByStu", "ftReview"] and len(plan.keys) == 3
@@ -0,0 +1,168 @@
+"""Tests for the SQLite catalog of pages and virtual domains."""
+
+import hashlib
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from catalog import open_catalog, update_catalog
+
+REPO_ROOT = Path(__file__).parent.parent
+
+PAGE = {
+    "constantName": "term_page",
+    "extendsPage": None,
+    "pageRoles": [{"roleName": "ADMIN", "allow": True}],
+    "modelView": {
+        "title": "Terms",
+        "components": [
+            {
+                "type": "resource",
+                "name": "termsResource",
+                "resource": "virtualDomains.terms",
+            },
+            {
+                "type": "block",
+                "name": "main",
+                "components": [
+                    {
+                        "type": "select",
+                        "name": "term",
+                        "sourceModel": "termsResource",
+                        "loadInitially": True,
+                        "labelKey": "DESC",
+                    },
+                    {
+                        "type": "literal",
+                        "name": "functions",
+                        "value": "<script>var term = 1;</script>",
+                    },
+                ],
+            },
+        ],
+    },
+}
+
+DOMAIN = {
+    "serviceName": "terms",
+    "typeOfCode": "S",
+    "codeGet": "select code, desc from stvterm",
+    "codePut": "update stvterm set desc = :desc where code = :code",
+    "codeDelete": None,
+    "virtualDomainRoles": [
+        {
+            "roleName": "ADMIN",
+            "allowGet": True,
+            "allowPost": False,
+            "allowPut": True,
+            "allowDelete": False,
+        }
+    ],
+}
+
+
+@pytest.fixture
+def repo(definitions_repo):
+    return definitions_repo(PAGE, DOMAIN)
+
+
+@pytest.fixture
+def conn(repo):
+    conn = open_catalog(str(repo / ".pagebuilder_cache" / "catalog.db"))
+    update_catalog(conn, json_files(repo))
+    yield conn
+    conn.close()
+
+
+def json_files(repo):
+    return sorted(str(path.relative_to(repo)) for path in repo.rglob("*.json"))
+
+
+def table_counts(conn):
+    tables = ["pages", "page_roles", "components", "literals", "domains"]
+    tables += ["domain_sql", "domain_roles"]
+    return {
+        table: conn.execute(f"SELECT count(*) FROM {table}").fetchone()[0]
+        for table in tables
+    }
+
+
+class TestCatalog:
+    """Test the cataloged rows."""
+
+    def test_rows(self, conn):
+        assert table_counts(conn) == {
+            "pages": 1,
+            "page_roles": 1,
+            "components": 4,
+            "literals": 1,
+            "domains": 1,
+            "domain_sql": 2,
+            "domain_roles": 1,
+        }
+        rows = conn.execute(
+            "SELECT path, depth, parent_id IS NOT NULL, domain, properties "
+            "FROM components ORDER BY id"
+        ).fetchall()
+        assert rows == [
+            ("0", 0, 0, "terms", "{}"),
+            ("1", 0, 0, None, "{}"),
+            ("1.components.0", 1, 1, "terms", '{"labelKey": "DESC"}'),
+            ("1.components.1", 1, 1, None, "{}"),
+        ]
+
+    def test_cross_cutting_query(self, conn):
+        rows = conn.execute(
+            "SELECT p.constant_name, c.name FROM components c "
+            "JOIN pages p ON p.id = c.page_id "
+            "JOIN domains d ON d.service_name = c.domain "
+            "JOIN domain_roles r ON r.domain_id = d.id "
+            "WHERE c.type = 'select' AND c.load_initially AND r.allow_put"
+        ).fetchall()
+        assert rows == [("term_page", "term")]
+
+    def test_literals_and_sql(self, conn):
+        value = PAGE["modelView"]["components"][1]["components"][1]["value"]
+        assert conn.execute("SELECT size, hash, kind FROM literals").fetchone() == (
+            len(value),
+            hashlib.md5(value.encode()).hexdigest(),
+            "js",
+        )
+        fields = conn.execute("SELECT field FROM domain_sql ORDER BY field")
+        assert [field for (field,) in fields] == ["codeGet", "codePut"]
+
+    def test_repo_definitions(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(REPO_ROOT)
+        conn = open_catalog(str(tmp_path / "catalog.db"))
+        files = [
+            str(path.relative_to(REPO_ROOT))
+            for folder in ("pages", "virtualDomains")
+            for path in (REPO_ROOT / folder).glob("*.json")
+        ]
+        update_catalog(conn, files)
+        counts = table_counts(conn)
+        assert counts["pages"] == len(list((REPO_ROOT / "pages").glob("*.json")))
+        assert counts["components"] > counts["literals"] > 0
+        assert counts["domains"] >= 1
+        conn.close()
+
+
+class TestUpdates:
+    """Test that a file's rows follow its changes."""
+
+    def test_changed_page_rows_replaced(self, repo, conn):
+        changed = json.loads(json.dumps(PAGE))
+        del changed["modelView"]["components"][1]["components"][1]
+        (repo / "pages" / "pages.term_page.json").write_text(json.dumps(changed))
+        assert update_catalog(conn, json_files(repo))["updated"] == 1
+        assert table_counts(conn)["components"] == 3
+        assert table_counts(conn)["literals"] == 0
+
+    def test_removed_files_leave_no_rows(self, repo, conn):
+        update_catalog(conn, [])
+        assert set(table_counts(conn).values()) == {0}
+        assert conn.execute("SELECT count(*) FROM files").fetchone()[0] == 0
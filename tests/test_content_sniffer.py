@@ -0,0 +1,188 @@
+"""Tests for literal content classification and splitting."""
+
+import json
+import random
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from content_sniffer import classify_literal, join_literal, split_literal
+from extract_literals import (
+    check_sync_status,
+    extract_literals_from_json,
+    rebuild_json_from_literals,
+)
+from page_transforms import iter_literals
+
+REPO_ROOT = Path(__file__).parent.parent
+
+STYLE_LINKS = (
+    '<link href="https://cdn.example.com/bootstrap.min.css" rel="stylesheet">\n'
+    '<script src="https://cdn.example.com/bootstrap.bundle.min.js"></script>\n'
+)
+MIXED = (
+    '<div class="row">\n  <span id="term"></span>\n</div>\n'
+    "<script>\n  $('#term').html('<select id=\"t\"></select>');\n</script>\n"
+    "<STYLE media=screen>\n  #term { color: red; }\n</STYLE>\n"
+    "<!-- <script>ignored()</script> -->\n"
+    '<script type="text/template"><b>{{name}}</b></script>\n'
+)
+
+
+def repo_literals():
+    for page_file in sorted((REPO_ROOT / "pages").glob("*.json")):
+        with open(page_file, encoding="utf-8") as f:
+            data = json.load(f)
+        for _, component in iter_literals(data):
+            yield component["name"], component["value"]
+
+
+class TestClassify:
+    """Test literal classification."""
+
+    @pytest.mark.parametrize(
+        "content, name, kind",
+        [
+            (STYLE_LINKS, "style", "html"),
+            ("<script>\nvar x = '<div>';\n</script>", "functions", "js"),
+            ("<script>\nfunction unclosed() {", "functions", "js"),
+            ("  <style>.a { margin: 0 }</style>\n", "main", "css"),
+            (MIXED, "main_literal", "mixed"),
+            (STYLE_LINKS + "<style>.a { margin: 0 }</style>", "style", "mixed"),
+            ("<script>a()</script><style>.a { b: c }</style>", "x", "mixed"),
+            ("<!-- note --><script>a()</script>", "x", "js"),
+            ('<script src="a.js"></script>', "js", "html"),
+            ("<h1>Title</h1><p>Content</p>", "main_content", "html"),
+            ("Hello <b>there</b>", "json_data", "html"),
+            (
+                "@media (max-width: 600px) { .a:not(.b) > p::before { content: '{'; } }"
+                "\n@import url(x.css);\n[type=text] { color: rgba(0,0,0,.5) }",
+                "main",
+                "css",
+            ),
+            ("$(document).ready(function(){ x = 1; });", "style", "js"),
+            ("console.log('test')", "main", "js"),
+            ("if (ok) { show(); }", "main", "js"),
+            ("return { a: 1 };", "main", "js"),
+            ("Plain text content", "test", "text"),
+            ("Plain text content", "js_notes", "js"),
+            ("Plain text content", "page_styles", "css"),
+            ("   \n", "functions", "html"),
+        ],
+    )
+    def test_kinds(self, content, name, kind):
+        assert classify_literal(content, name).kind == kind
+
+    def test_block_counts(self):
+        result = classify_literal(MIXED)
+        assert (result.inline_scripts, result.inline_styles) == (1, 1)
+        assert result.extension == ".html"
+        assert result.has_script
+        assert not classify_literal(STYLE_LINKS).has_script
+
+    def test_only_prefix_is_scanned(self):
+        script = "<script>\n" + "x = 1;\n" * 5_000 + "</script>\n"
+        assert classify_literal(script + "<div>late</div>").kind == "mixed"
+        assert classify_literal(script + "<div>late</div>", limit=1000).kind == "js"
+        # Code is decided on the prefix too
+        css = ".a { b: c }\n" * 100
+        assert classify_literal(css + "var x = 1;").kind == "css"
+
+    def test_repo_literals(self):
+        kinds = {
+            (name, classify_literal(value, name).kind)
+            for name, value in repo_literals()
+        }
+        assert ("style", "html") in kinds
+        assert ("style", "mixed") in kinds
+        assert ("functions", "js") in kinds
+        assert ("main_literal", "mixed") in kinds
+
+
+class TestSplit:
+    """Test splitting mixed literals and joining them back."""
+
+    def test_split_and_join(self):
+        skeleton, bodies = split_literal(MIXED)
+        assert bodies == [
+            ("script", "\n  $('#term').html('<select id=\"t\"></select>');\n"),
+            ("style", "\n  #term { color: red; }\n"),
+        ]
+        assert "<script></script>" in skeleton
+        assert "<STYLE media=screen></STYLE>" in skeleton
+        assert "ignored()" in skeleton
+        assert join_literal(skeleton, [body for _, body in bodies]) == MIXED
+
+    def test_round_trips_byte_for_byte(self):
+        rng = random.Random(7)
+        pieces = [
+            "<div>",
+            "</div>\n",
+            "<script>",
+            "</script>",
+            "<style>",
+            "</style >",
+            "<!--",
+            "-->",
+            "x = 1;\r\n",
+            ".a { b: c }",
+            "<script src='a.js'>",
+            "<p title='>'>",
+            " ",
+        ]
+        literals = [value for _, value in repo_literals()]
+        literals += ["".join(rng.choices(pieces, k=40)) for _ in range(300)]
+        for literal in literals:
+            skeleton, bodies = split_literal(literal)
+            assert join_literal(skeleton, [body for _, body in bodies]) == literal
+
+    def test_join_checks_block_count(self):
+        skeleton, _ = split_literal(MIXED)
+        with pytest.raises(ValueError, match="2 script/style block"):
+            join_literal(skeleton, ["only one"])
+
+
+class TestSplitExtraction:
+    """Test extracting mixed literals as split files."""
+
+    def test_extract_rebuild_and_check(self, tmp_path):
+        page = {
+            "constantName": "split_page",
+            "modelView": {
+                "components": [
+                    {"type": "literal", "name": "main_literal", "value": MIXED},
+                    {"type": "literal", "name": "style", "value": STYLE_LINKS},
+                ]
+            },
+        }
+        json_file = tmp_path / "page.json"
+        json_file.write_text(json.dumps(page))
+        output_dir = tmp_path / "out"
+        page_dir = output_dir / "split_page"
+
+        extraction_map = extract_literals_from_json(
+            str(json_file), str(output_dir), split_mixed=True
+        )
+        main, style = extraction_map["literals"]
+        assert main["filename"] == "main_literal.html"
+        assert main["parts"] == ["main_literal.1.js", "main_literal.2.css"]
+        assert (style["filename"], "parts" in style) == ("style.html", False)
+        assert (page_dir / "main_literal.2.css").read_text() == (
+            "\n  #term { color: red; }\n"
+        )
+        assert check_sync_status(str(page_dir))
+
+        (page_dir / "main_literal.1.js").write_text("\n  render();\n")
+        assert not check_sync_status(str(page_dir))
+        rebuild_json_from_literals(str(page_dir))
+        rebuilt = json.loads(json_file.read_text())
+        assert rebuilt["modelView"]["components"][0]["value"] == MIXED.replace(
+            "\n  $('#term').html('<select id=\"t\"></select>');\n", "\n  render();\n"
+        )
+        assert check_sync_status(str(page_dir))
+
+        (page_dir / "main_literal.2.css").unlink()
+        assert not check_sync_status(str(page_dir))
@@ -0,0 +1,187 @@
+"""Tests for purging unused framework CSS."""
+
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from css_purge import (
+    add_js,
+    new_usage,
+    page_usage,
+    parse_css,
+    purge_css,
+    selector_matches,
+)
+
+REPO_ROOT = Path(__file__).parent.parent
+
+STYLESHEET = """/*! Framework v1 | MIT License */
+:root{--fw-blue:#0d6efd}
+*,::after,::before{box-sizing:border-box}
+h1,.h1{font-size:2rem}
+blockquote{margin:0}
+.btn{padding:1px}
+.btn:hover:not(.disabled){color:red}
+.btn-primary{color:blue}
+.modal.show .modal-dialog{transform:none}
+#results > .row{margin:0}
+input[type="checkbox"]{accent-color:red}
+@media (min-width:576px){.col-sm-6{width:50%}.container{max-width:540px}}
+@font-face{font-family:"Icons";src:url(icons.woff2)}
+@font-face{font-family:"Unused";src:url(unused.woff2)}
+.fa-solid{font-family:"Icons"}
+.fa-user::before{content:"\\f007"}
+.fa-car::before{content:"\\f1b9"}
+.w-\\31 00{width:100%}
+@keyframes spin{0%{transform:rotate(0)}to{transform:rotate(1turn)}}
+@keyframes fade{from{opacity:0}}
+.fa-spin{animation:spin 1s}
+"""
+
+PAGE = {
+    "constantName": "purge_test",
+    "modelView": {
+        "components": [
+            {"type": "block", "name": "main", "style": "container"},
+            {
+                "type": "literal",
+                "name": "header",
+                "value": '<div id="results"><i class="fa-solid fa-user"></i></div>'
+                "<script>$('#results').append("
+                "'<span class=\"row fa-spin\">' + name + '</span>');"
+                "// .btn-primary in a comment doesn't count\n"
+                "</script>",
+            },
+            {
+                "type": "literal",
+                "name": "js",
+                "value": "$('.w-100').addClass(\"btn\");",
+            },
+            {"type": "literal", "name": "css", "value": "<style>.x{}</style>"},
+        ]
+    },
+}
+
+
+def selectors(css: str) -> list:
+    return [rule.prelude for rule in parse_css(css) if rule.kind == "style"]
+
+
+class TestUsage:
+    """Test collecting the names a page uses."""
+
+    def test_page_usage(self):
+        usage = page_usage(PAGE)
+        assert {"container", "fa-solid", "fa-user", "row", "fa-spin"} <= usage.classes
+        assert {"btn", "w-100"} <= usage.classes
+        assert "results" in usage.ids
+        assert {"i", "span", "div", "table"} <= usage.tags
+        assert "btn-primary" not in usage.classes
+        assert "x" not in usage.classes
+
+    def test_js_strings_and_templates(self):
+        usage = new_usage()
+        add_js(usage, "el.className = `card ${active ? 'is-active' : ''}`;")
+        assert {"card", "is-active"} <= usage.classes
+        assert "el" not in usage.classes and "className" not in usage.classes
+
+
+class TestPurge:
+    """Test pruning a stylesheet to the rules that could match."""
+
+    def test_selector_matches(self):
+        usage = new_usage(["btn", "results", "row"])
+        assert selector_matches(".btn:hover:not(.disabled)", usage)
+        assert selector_matches("#results > .row", usage)
+        assert selector_matches('input[type="checkbox"]', usage)
+        assert selector_matches("::before", usage)
+        assert not selector_matches(".modal.show .modal-dialog", usage)
+        assert not selector_matches("blockquote", usage)
+        assert not selector_matches("div .btn-primary", usage)
+
+    def test_purged_stylesheet(self):
+        purged = purge_css(STYLESHEET, page_usage(PAGE))
+        assert purged.startswith("/*! Framework v1 | MIT License */\n")
+        assert selectors(purged) == [
+            ":root",
+            "*,::after,::before",
+            ".btn",
+            ".btn:hover:not(.disabled)",
+            "#results > .row",
+            'input[type="checkbox"]',
+            ".fa-solid",
+            ".fa-user::before",
+            ".w-\\31 00",
+            ".fa-spin",
+        ]
+        assert "@media (min-width:576px){.container{max-width:540px}}" in purged
+        assert '@font-face{font-family:"Icons"' in purged
+        assert "Unused" not in purged
+        assert "@keyframes spin" in purged and "fade" not in purged
+        # h1 is neither in the page nor rendered by Page Builder
+        assert "h1" not in purged
+
+    def test_empty_blocks_and_definitions_dropped(self):
+        purged = purge_css(STYLESHEET, new_usage())
+        assert "@media" not in purged
+        assert "@font-face" not in purged and "@keyframes" not in purged
+        assert selectors(purged) == [
+            ":root",
+            "*,::after,::before",
+            'input[type="checkbox"]',
+        ]
+
+
+class TestCommand:
+    """Test the purge command end to end."""
+
+    def test_per_page_and_shared(self, tmp_path):
+        css_file = tmp_path / "framework.css"
+        css_file.write_text(STYLESHEET)
+        pages = tmp_path / "pages"
+        pages.mkdir()
+        (pages / "pages.purge_test.json").write_text(json.dumps(PAGE))
+        other = {
+            "constantName": "other",
+            "modelView": {
+                "components": [
+                    {"type": "literal", "name": "m", "value": '<b class="btn-primary">'}
+                ]
+            },
+        }
+        (pages / "pages.other.json").write_text(json.dumps(other))
+
+        def purge(*extra):
+            return subprocess.run(
+                [sys.executable, str(REPO_ROOT / "css_purge.py"), "purge"]
+                + [f"--css={css_file}", "--out=out", "--roots=pages", *extra],
+                cwd=tmp_path,
+                capture_output=True,
+                text=True,
+            )
+
+        result = purge()
+        assert result.returncode == 0, result.stdout
+        assert "bytes saved" in result.stdout
+        literal = (tmp_path / "out" / "purge_test.css").read_text()
+        assert literal.startswith("<style>\n") and literal.endswith("</style>\n")
+        assert ".fa-user::before" in literal and ".btn-primary" not in literal
+        assert ".btn-primary" in (tmp_path / "out" / "other.css").read_text()
+
+        result = purge("--shared")
+        assert result.returncode == 0, result.stdout
+        shared = (tmp_path / "out" / "shared.css").read_text()
+        assert ".fa-user::before" in shared and ".btn-primary" in shared
+
+    def test_stylesheet_required(self, tmp_path):
+        result = subprocess.run(
+            [sys.executable, str(REPO_ROOT / "css_purge.py"), "purge"],
+            cwd=tmp_path,
+            capture_output=True,
+            text=True,
+        )
+        assert result.returncode == 1
+        assert "--css" in result.stdout
@@ -0,0 +1,152 @@
+"""Tests for ignore-aware page and virtual domain discovery."""
+
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from discovery import (
+    find_json_files,
+    is_ignored,
+    parse_ignore_lines,
+    parse_roots,
+    walk_files,
+)
+from extract_literals import find_page_files
+from extract_virtual_domains import find_domain_files
+from storage import MemoryStorage
+
+PAGE = json.dumps({"constantName": "p", "modelView": {"components": []}})
+DOMAIN = json.dumps({"serviceName": "d", "codeGet": "select 1 from dual"})
+
+
+class RecordingStorage(MemoryStorage):
+    """MemoryStorage that records which directories were listed."""
+
+    def __init__(self, files):
+        super().__init__(files)
+        self.scanned = []
+
+    def scandir(self, path):
+        self.scanned.append(str(path))
+        return super().scandir(path)
+
+
+def tree() -> RecordingStorage:
+    return RecordingStorage(
+        {
+            "pages/pages.a.json": PAGE,
+            "pages/drafts/pages.draft.json": PAGE,
+            "pages/.gitignore": "drafts/\n",
+            "virtualDomains/virtualDomains.d.json": DOMAIN,
+            ".git/objects/info.json": "{}",
+            ".venv/lib/site.json": "{}",
+            "node_modules/pkg/package.json": "{}",
+            "extracted_literals/p/_extraction_map.json": "{}",
+            "build/pages.a.json": PAGE,
+            "logs/app.json": "{}",
+            "notes.txt": "",
+            ".gitignore": "/build/\n*.log\nlogs\n",
+        }
+    )
+
+
+class TestIgnoreRules:
+    """Test .gitignore pattern semantics."""
+
+    def test_patterns(self):
+        rules = parse_ignore_lines(
+            [
+                "# comment",
+                "",
+                "*.tmp",
+                "/top.json",
+                "cache/",
+                "docs/**/draft.json",
+                "!keep.tmp",
+                "\\#literal",
+            ],
+            ".",
+        )
+        assert is_ignored("a/b/file.tmp", False, rules)
+        assert not is_ignored("a/keep.tmp", False, rules)
+        assert is_ignored("top.json", False, rules)
+        assert not is_ignored("sub/top.json", False, rules)
+        assert is_ignored("a/cache", True, rules)
+        assert not is_ignored("a/cache", False, rules)
+        assert is_ignored("docs/x/y/draft.json", False, rules)
+        assert is_ignored("docs/draft.json", False, rules)
+        assert is_ignored("#literal", False, rules)
+
+    def test_rules_are_relative_to_their_directory(self):
+        rules = parse_ignore_lines(["/local.json", "deep.json"], "pages")
+        assert is_ignored("pages/local.json", False, rules)
+        assert not is_ignored("local.json", False, rules)
+        assert not is_ignored("pages/sub/local.json", False, rules)
+        assert is_ignored("pages/sub/deep.json", False, rules)
+        assert not is_ignored("other/deep.json", False, rules)
+
+
+class TestWalkFiles:
+    """Test the pruned directory walker."""
+
+    def test_ignored_directories_are_never_listed(self):
+        storage = tree()
+        assert walk_files(storage) == [
+            "pages/pages.a.json",
+            "virtualDomains/virtualDomains.d.json",
+        ]
+        assert sorted(storage.scanned) == [".", "pages", "virtualDomains"]
+
+    def test_pagebuilderignore_can_reinclude(self):
+        storage = tree()
+        storage.write_text(".pagebuilderignore", "!build/\n")
+        storage.write_text("pages/.pagebuilderignore", "!drafts/\n")
+        assert walk_files(storage) == [
+            "build/pages.a.json",
+            "pages/drafts/pages.draft.json",
+            "pages/pages.a.json",
+            "virtualDomains/virtualDomains.d.json",
+        ]
+
+    def test_include_roots(self):
+        storage = tree()
+        assert walk_files(storage, ["virtualDomains", "missing"]) == [
+            "virtualDomains/virtualDomains.d.json"
+        ]
+        assert storage.scanned == ["virtualDomains"]
+        # Ignore files above a root still apply
+        assert walk_files(storage, ["pages"]) == ["pages/pages.a.json"]
+
+    def test_explicit_patterns_are_globbed(self):
+        storage = tree()
+        assert find_json_files("build/*.json", storage) == ["build/pages.a.json"]
+
+
+class TestFindDefinitions:
+    """Page and domain discovery use the walker for the default pattern."""
+
+    def test_pages_and_domains(self):
+        storage = tree()
+        assert find_page_files(storage=storage) == ["pages/pages.a.json"]
+        assert find_domain_files(storage=storage) == [
+            "virtualDomains/virtualDomains.d.json"
+        ]
+        assert find_page_files(storage=storage, roots=["virtualDomains"]) == []
+
+    def test_disk_walk_from_working_directory(self, tmp_path, monkeypatch):
+        (tmp_path / "pages").mkdir()
+        (tmp_path / "pages" / "pages.a.json").write_text(PAGE)
+        (tmp_path / ".venv" / "lib").mkdir(parents=True)
+        (tmp_path / ".venv" / "lib" / "pages.b.json").write_text(PAGE)
+        (tmp_path / "old").mkdir()
+        (tmp_path / "old" / "pages.c.json").write_text(PAGE)
+        (tmp_path / ".gitignore").write_text("old/\n")
+        monkeypatch.chdir(tmp_path)
+
+        assert find_page_files() == ["pages/pages.a.json"]
+
+    def test_parse_roots(self):
+        assert parse_roots("pages, virtualDomains") == ["pages", "virtualDomains"]
+        assert parse_roots(None) is None
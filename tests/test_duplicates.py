@@ -0,0 +1,148 @@
+"""Tests for near-duplicate literal detection."""
+
+import json
+import random
+import string
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from duplicates import (
+    HASH_BASE,
+    HASH_MODULUS,
+    collect_literals,
+    find_duplicates,
+    fingerprint,
+    kgram_hashes,
+    shared_fingerprint_counts,
+    winnow,
+)
+
+rng = random.Random(42)
+
+
+def random_code(lines: int) -> str:
+    words = ["var", "if", "$(", "row", "term", "{", "}", ";", "=", "+", "'<td>'"]
+    return "\n".join(
+        " ".join(
+            rng.choice(words) + rng.choice(string.ascii_lowercase) for _ in range(8)
+        )
+        for _ in range(lines)
+    )
+
+
+def write_page(path: Path, name: str, literals: dict) -> str:
+    page = {
+        "constantName": name,
+        "modelView": {
+            "components": [
+                {"type": "literal", "name": literal_name, "value": value}
+                for literal_name, value in literals.items()
+            ]
+        },
+    }
+    path.write_text(json.dumps(page, indent=3))
+    return str(path)
+
+
+class TestWinnowing:
+    """Test fingerprint selection."""
+
+    def test_rolling_hash_matches_direct_hash(self):
+        text = random_code(3)
+        k = 7
+        for i, value in enumerate(kgram_hashes(text, k)):
+            expected = 0
+            for char in text[i : i + k]:
+                expected = (expected * HASH_BASE + ord(char)) % HASH_MODULUS
+            assert value == expected
+
+    @pytest.mark.parametrize("window", [1, 4, 9])
+    def test_matches_brute_force_definition(self, window):
+        hashes = [rng.randrange(20) for _ in range(200)]
+        expected = []
+        for start in range(len(hashes) - window + 1):
+            values = hashes[start : start + window]
+            position = start + max(
+                i for i, value in enumerate(values) if value == min(values)
+            )
+            if not expected or expected[-1][1] != position:
+                expected.append((hashes[position], position))
+        assert winnow(hashes, window) == expected
+
+    def test_shared_region_always_shares_a_fingerprint(self):
+        k, window = 10, 8
+        for _ in range(50):
+            shared = "".join(rng.choice("abcdef") for _ in range(k + window - 1))
+            left = random_code(2) + shared + random_code(2)
+            right = random_code(3) + shared
+            left_hashes = {
+                value for value, _ in fingerprint(left, k, window)["fingerprints"]
+            }
+            right_hashes = {
+                value for value, _ in fingerprint(right, k, window)["fingerprints"]
+            }
+            assert left_hashes & right_hashes
+
+    def test_whitespace_is_ignored(self):
+        code = random_code(10)
+        reformatted = code.replace(" ", "\n    ")
+        assert (
+            fingerprint(code)["fingerprints"]
+            == fingerprint(reformatted)["fingerprints"]
+        )
+
+
+class TestFindDuplicates:
+    """Test clustering of near-duplicate literals."""
+
+    def test_clusters_copied_literals(self, tmp_path):
+        shared = random_code(30)
+        edited = shared.replace(shared.splitlines()[15], "var edited = true;")
+        files = [
+            write_page(
+                tmp_path / "a.json",
+                "a",
+                {"functions": shared, "other": random_code(30)},
+            ),
+            write_page(tmp_path / "b.json", "b", {"functions": edited}),
+            write_page(
+                tmp_path / "c.json", "c", {"helpers": random_code(5) + "\n" + shared}
+            ),
+            write_page(tmp_path / "d.json", "d", {"tiny": "x = 1;"}),
+        ]
+
+        (cluster,) = find_duplicates(collect_literals(files))
+
+        members = [(m["file"], m["component_path"]) for m in cluster["members"]]
+        assert members == [(files[0], "0"), (files[1], "0"), (files[2], "0")]
+        low, high = cluster["similarity"]
+        assert 0.5 < low <= high == 1.0
+        assert cluster["members"][2]["regions"] == [(6, 35)]
+
+    def test_threshold(self, tmp_path):
+        base = random_code(20)
+        files = [
+            write_page(tmp_path / "a.json", "a", {"js": base}),
+            write_page(
+                tmp_path / "b.json",
+                "b",
+                {"js": base[: len(base) // 3] + random_code(20)},
+            ),
+        ]
+        literals = collect_literals(files)
+        assert find_duplicates(literals, threshold=0.9) == []
+        assert len(find_duplicates(literals, threshold=0.1)) == 1
+
+    def test_boilerplate_fingerprints_are_ignored(self):
+        hash_sets = [{1, 2}, {1, 3}, {1, 4}, {5, 6}, {5, 7}]
+        assert shared_fingerprint_counts(hash_sets) == {
+            (0, 1): 1,
+            (0, 2): 1,
+            (1, 2): 1,
+            (3, 4): 1,
+        }
+        assert shared_fingerprint_counts(hash_sets, max_shared=2) == {(3, 4): 1}
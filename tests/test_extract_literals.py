@@ -292,3 +292,37 @@ class TestExtractLiterals:
             assert (page_dir / "html_content.html").exists()
             assert (page_dir / "css_styles.css").exists()
             assert (page_dir / "js_functions.js").exists()
+
+    def test_reextract_removes_stale_files(self):
+        """Test that files the new map no longer lists are deleted."""
+        test_data = {
+            "constantName": "stale_test",
+            "modelView": {
+                "components": [
+                    {"type": "literal", "name": "widget", "value": "init();"},
+                    {"type": "literal", "name": "gone", "value": "<p>Gone</p>"},
+                ]
+            },
+        }
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            json_file = Path(temp_dir) / "stale.json"
+            json_file.write_text(json.dumps(test_data))
+            output_dir = Path(temp_dir) / "output"
+            page_dir = output_dir / "stale_test"
+            extract_literals_from_json(str(json_file), str(output_dir))
+            (page_dir / "notes.txt").write_text("not extracted")
+
+            # The literal becomes markup and the other one is removed
+            test_data["modelView"]["components"] = [
+                {"type": "literal", "name": "widget", "value": "<div>init</div>"}
+            ]
+            json_file.write_text(json.dumps(test_data))
+            extract_literals_from_json(str(json_file), str(output_dir))
+
+            assert sorted(p.name for p in page_dir.iterdir()) == [
+                "_extraction_map.json",
+                "notes.txt",
+                "widget.html",
+            ]
+            assert check_sync_status(str(page_dir))
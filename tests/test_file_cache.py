@@ -0,0 +1,108 @@
+"""Tests for the incremental updates shared by the SQLite caches."""
+
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from file_cache import FILES_SCHEMA, open_cache, update_files
+
+SCHEMA = "CREATE TABLE lines (path TEXT NOT NULL, line TEXT NOT NULL);"
+
+
+class Recorder:
+    """Callbacks that store each file's lines and log what they were called with."""
+
+    def __init__(self):
+        self.calls = []
+
+    def add(self, conn, path, content):
+        self.calls.append(("add", path))
+        conn.executemany(
+            "INSERT INTO lines (path, line) VALUES (?, ?)",
+            [(path, line) for line in content.splitlines()],
+        )
+
+    def remove(self, conn, path):
+        self.calls.append(("remove", path))
+        conn.execute("DELETE FROM lines WHERE path = ?", (path,))
+
+
+@pytest.fixture
+def files(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    for name in ("a.json", "b.json", "c.json"):
+        Path(name).write_text(f"{name}\nsecond line\n")
+    return ["a.json", "b.json", "c.json"]
+
+
+@pytest.fixture
+def conn(tmp_path):
+    conn = open_cache(
+        str(tmp_path / "cache" / "test.db"),
+        FILES_SCHEMA + SCHEMA,
+        1,
+        ["lines", "files"],
+    )
+    yield conn
+    conn.close()
+
+
+def touch(path: str, seconds: int) -> None:
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + seconds * 10**9))
+
+
+def line_count(conn) -> int:
+    return conn.execute("SELECT count(*) FROM lines").fetchone()[0]
+
+
+class TestUpdateFiles:
+    """Test that only changed files are removed and added again."""
+
+    def test_update_counts(self, files, conn):
+        recorder = Recorder()
+        counts = update_files(conn, files, recorder.add, recorder.remove)
+        assert counts == {"added": 3, "updated": 0, "removed": 0, "unchanged": 0}
+        assert line_count(conn) == 6
+
+        # Touched but identical content is only re-stat'ed
+        recorder.calls.clear()
+        touch("a.json", 1)
+        counts = update_files(conn, files, recorder.add, recorder.remove)
+        assert counts["unchanged"] == 3 and recorder.calls == []
+
+        Path("a.json").write_text("changed\n")
+        touch("a.json", 2)
+        counts = update_files(conn, files[:2], recorder.add, recorder.remove)
+        assert counts == {"added": 0, "updated": 1, "removed": 1, "unchanged": 1}
+        assert recorder.calls == [
+            ("remove", "c.json"),
+            ("remove", "a.json"),
+            ("add", "a.json"),
+        ]
+        assert line_count(conn) == 3
+        paths = conn.execute("SELECT path FROM files ORDER BY path").fetchall()
+        assert paths == [("a.json",), ("b.json",)]
+
+    def test_files_recorded_before_add(self, files, conn):
+        def add(conn, path, content):
+            # Other tables can reference the file's row
+            assert conn.execute(
+                "SELECT count(*) FROM files WHERE path = ?", (path,)
+            ).fetchone() == (1,)
+
+        update_files(conn, files, add)
+        assert update_files(conn, files, add)["unchanged"] == 3
+
+    def test_schema_version_change_recreates(self, tmp_path, files, conn):
+        update_files(conn, files, Recorder().add)
+        conn.close()
+        db_file = str(tmp_path / "cache" / "test.db")
+        conn = open_cache(db_file, FILES_SCHEMA + SCHEMA, 2, ["lines", "files"])
+        assert line_count(conn) == 0
+        assert conn.execute("PRAGMA user_version").fetchone() == (2,)
+        conn.close()
@@ -0,0 +1,197 @@
+"""Tests for resolving extendsPage inheritance."""
+
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from inheritance import Resolver, merge_components
+from pagebuilder import Corpus
+
+REPO_ROOT = Path(__file__).parent.parent
+
+
+def literal(name: str, value: str = "") -> dict:
+    return {"type": "literal", "name": name, "value": value or name}
+
+
+def page(name: str, parent=None, *names: str) -> dict:
+    return {
+        "constantName": name,
+        "extendsPage": {"constantName": parent} if parent else None,
+        "pageRoles": [{"roleName": name, "allow": True}],
+        "modelView": {
+            "name": name,
+            "components": [literal(n, f"{name}:{n}") for n in names],
+        },
+    }
+
+
+def values(effective) -> list:
+    return [c["value"] for c in effective.data["modelView"]["components"]]
+
+
+@pytest.fixture
+def resolver():
+    # root <- middle <- leaf, root <- sibling
+    return Resolver(
+        {
+            "leaf": page("leaf", "middle", "header", "body"),
+            "middle": page("middle", "root", "nav"),
+            "root": page("root", None, "cdn", "header"),
+            "sibling": page("sibling", "root", "other"),
+        }
+    )
+
+
+class TestResolve:
+    """Test building effective pages."""
+
+    def test_chain_and_overrides(self, resolver):
+        effective = resolver.resolve("leaf")
+        assert effective.chain == ("middle", "root")
+        # leaf's header replaces root's in place; its own components follow
+        assert values(effective) == [
+            "root:cdn",
+            "leaf:header",
+            "middle:nav",
+            "leaf:body",
+        ]
+        assert effective.origins == ["root", "leaf", "middle", "leaf"]
+        assert effective.data["constantName"] == "leaf"
+        assert effective.data["extendsPage"] is None
+        assert effective.data["pageRoles"][0]["roleName"] == "leaf"
+        assert len(resolver.pages["leaf"]["modelView"]["components"]) == 2
+
+    def test_repeated_name_overrides_once(self):
+        components, origins = merge_components(
+            [literal("a")], ["base"], [literal("a", "x"), literal("a", "y")], "page"
+        )
+        assert [c["value"] for c in components] == ["x", "y"]
+        assert origins == ["page", "page"]
+
+    def test_ancestors_resolved_once(self, resolver, monkeypatch):
+        built = []
+        original = Resolver._build
+
+        def counting_build(self, name):
+            built.append(name)
+            return original(self, name)
+
+        monkeypatch.setattr(Resolver, "_build", counting_build)
+        for name in ("leaf", "sibling", "middle", "root", "leaf"):
+            resolver.resolve(name)
+        assert sorted(built) == ["leaf", "middle", "root", "sibling"]
+        # Descendants share the ancestor's resolved components
+        cdn = resolver.resolve("root").data["modelView"]["components"][0]
+        assert resolver.resolve("sibling").data["modelView"]["components"][0] is cdn
+
+    def test_topological_order(self, resolver):
+        assert resolver.order() == ["root", "middle", "leaf", "sibling"]
+
+
+class TestProblems:
+    """Test missing parents and cycles."""
+
+    def test_missing_parent_and_cycle(self, resolver):
+        resolver.update("orphan", page("orphan", "gone", "x"))
+        resolver.update("a", page("a", "b"))
+        resolver.update("b", page("b", "a"))
+        resolver.update("c", page("c", "a"))
+
+        assert resolver.problems() == {
+            "a": "extendsPage cycle: a -> b -> a",
+            "b": "extendsPage cycle: b -> a -> b",
+            "c": "extendsPage cycle: c -> a -> b -> a",
+            "orphan": "orphan extends missing page gone",
+        }
+        with pytest.raises(ValueError, match="missing page gone"):
+            resolver.resolve("orphan")
+        with pytest.raises(ValueError, match="cycle"):
+            resolver.resolve("c")
+        assert resolver.order() == ["root", "middle", "leaf", "sibling"]
+
+    def test_corpus_validation(self, tmp_path):
+        for data in (page("a", "gone"), page("b", None)):
+            path = tmp_path / f"pages.{data['constantName']}.json"
+            path.write_text(json.dumps(data))
+        issues = Corpus.load(roots=[str(tmp_path)]).validate()
+        assert [(issue.location, issue.message) for issue in issues] == [
+            ("extendsPage", "a extends missing page gone")
+        ]
+
+
+class TestUpdate:
+    """Test that changing a page drops only what inherits from it."""
+
+    def test_only_descendants_invalidated(self, resolver):
+        for name in ("leaf", "sibling"):
+            resolver.resolve(name)
+        sibling = resolver.resolve("sibling")
+
+        assert resolver.update("middle", page("middle", "root", "menu")) == {
+            "middle",
+            "leaf",
+        }
+        assert resolver.resolve("sibling") is sibling
+        assert values(resolver.resolve("leaf")) == [
+            "root:cdn",
+            "leaf:header",
+            "middle:menu",
+            "leaf:body",
+        ]
+
+        assert resolver.update("root", page("root", None, "cdn2")) == {
+            "root",
+            "middle",
+            "leaf",
+            "sibling",
+        }
+        assert values(resolver.resolve("sibling"))[0] == "root:cdn2"
+
+    def test_reparenting_and_removal(self, resolver):
+        resolver.update("leaf", page("leaf", "sibling", "body"))
+        assert resolver.descendants("middle") == set()
+        assert resolver.resolve("leaf").chain == ("sibling", "root")
+
+        assert resolver.update("sibling", None) == {"sibling", "leaf"}
+        assert "leaf" in resolver.problems()
+
+
+class TestCommand:
+    """Test writing effective pages for the other tools."""
+
+    def test_resolve_writes_effective_pages(self, tmp_path):
+        pages = tmp_path / "pages"
+        pages.mkdir()
+        for data in (page("base", None, "cdn"), page("app", "base", "body")):
+            path = pages / f"pages.{data['constantName']}.json"
+            path.write_text(json.dumps(data))
+
+        def run(command: str) -> subprocess.CompletedProcess:
+            return subprocess.run(
+                [sys.executable, str(REPO_ROOT / "inheritance.py"), command]
+                + ["--roots=pages"],
+                cwd=tmp_path,
+                capture_output=True,
+                text=True,
+            )
+
+        result = run("resolve")
+        assert result.returncode == 0, result.stdout
+        assert "app: extends base (1 of 2 components inherited)" in result.stdout
+        effective = json.loads((tmp_path / "effective/pages.app.json").read_text())
+        assert [c["name"] for c in effective["modelView"]["components"]] == [
+            "cdn",
+            "body",
+        ]
+        assert "base (1 components)\n  app (1 components)" in run("tree").stdout
+
+        (pages / "pages.base.json").unlink()
+        result = run("resolve")
+        assert result.returncode == 1
+        assert "app extends missing page base" in result.stdout
@@ -0,0 +1,185 @@
+"""Tests for the page JavaScript performance linter."""
+
+import json
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from js_lint import lint_literal, lint_page_file, lint_script, tokenize_js
+
+
+def rules(source: str) -> list:
+    return [finding.rule for finding in lint_script(source)]
+
+
+class TestTokenizer:
+    """Test the JavaScript tokenizer."""
+
+    def test_strings_comments_and_positions(self):
+        """Strings and comments are single tokens with 1-based positions."""
+        tokens = tokenize_js('var a = "x // y";\n// note\nb = 2;')
+        assert [t.kind for t in tokens] == [
+            "name",
+            "name",
+            "punct",
+            "string",
+            "punct",
+            "comment",
+            "name",
+            "punct",
+            "number",
+            "punct",
+        ]
+        assert tokens[3].value == '"x // y"'
+        assert (tokens[6].value, tokens[6].line, tokens[6].col) == ("b", 3, 1)
+
+    def test_regex_versus_division(self):
+        """A slash after an operand divides; elsewhere it starts a regex."""
+        division = tokenize_js("x = a / b / c;")
+        assert [t.value for t in division if t.kind == "punct"].count("/") == 2
+
+        regex = tokenize_js("var re = /[/]+\\/x/g.exec(s);")
+        assert regex[3].kind == "regex"
+        assert regex[3].value == "/[/]+\\/x/g"
+
+    def test_template_literal_with_nested_expressions(self):
+        """Template literals, including nested ${...} braces, are one token."""
+        tokens = tokenize_js("s = `a ${ {b: 1}.b } c`; d = 1;")
+        assert tokens[2].kind == "template"
+        assert tokens[2].value == "`a ${ {b: 1}.b } c`"
+        assert tokens[4].value == "d"
+
+
+class TestRules:
+    """Test each performance rule."""
+
+    def test_jquery_lookup_in_each_and_for_loops(self):
+        """Selector lookups inside $.each callbacks and loop bodies are flagged."""
+        source = """
+        $.each(data, function(key, v) { $("#term").append(v); });
+        for (var i = 0; i < 3; i++) { $(".row").hide(); }
+        $.each(data, function() { $(this).show(); });
+        $("#outside").hide();
+        """
+        assert rules(source) == ["jquery-lookup-in-loop", "jquery-lookup-in-loop"]
+
+    def test_rebind_in_callback(self):
+        """Binding handlers inside .done callbacks is flagged; triggering is not."""
+        source = """
+        $.ajax({url: url}).done(function(data) {
+            $("#term-dropdown").change(function() { go(); });
+            $("#term-dropdown").change();
+        });
+        $("#term-dropdown").change(function() { go(); });
+        """
+        findings = lint_script(source)
+        assert [f.rule for f in findings] == ["rebind-in-callback"]
+        assert findings[0].line == 3
+
+    def test_implicit_globals(self):
+        """Assignments to undeclared names are flagged, respecting scopes."""
+        source = """
+        var declared = 1;
+        function draw(param) {
+            var url = '/x';
+            param = 2;
+            declared = 3;
+            url = '/y';
+            selected = "";
+        }
+        function other() { url = '/z'; }
+        var f = (a, b) => { a = 1; };
+        window.foo = 1;
+        var many = 1,
+            more = 2;
+        more = 3;
+        """
+        findings = lint_script(source)
+        assert [(f.rule, f.line) for f in findings] == [
+            ("implicit-global", 8),
+            ("implicit-global", 10),
+        ]
+
+    def test_reload_navigation(self):
+        """window.open(..., "_self") and location.reload() are flagged."""
+        source = """
+        window.open("?term=" + t, "_self");
+        window.open("https://example.com", "_blank");
+        location.reload();
+        """
+        assert rules(source) == ["reload-navigation", "reload-navigation"]
+
+
+class TestSuppression:
+    """Test suppression comments."""
+
+    def test_disable_line_and_next_line(self):
+        source = """
+        x = 1; // pblint-disable-line implicit-global
+        // pblint-disable-next-line
+        y = 2;
+        z = 3; // pblint-disable-line reload-navigation
+        """
+        findings = lint_script(source)
+        assert [(f.rule, f.line) for f in findings] == [("implicit-global", 5)]
+
+    def test_disable_range(self):
+        source = """
+        /* pblint-disable implicit-global */
+        a = 1;
+        b = 2;
+        /* pblint-enable */
+        c = 3;
+        """
+        assert [f.line for f in lint_script(source)] == [6]
+
+
+class TestLintPage:
+    """Test linting page files."""
+
+    def test_reports_component_path_and_literal_line(self):
+        """Findings in HTML literals carry the component path and literal line."""
+        page = {
+            "constantName": "lint_test",
+            "modelView": {
+                "components": [
+                    {"type": "literal", "name": "header", "value": "<h1>x = 1</h1>"},
+                    {
+                        "type": "block",
+                        "name": "main",
+                        "components": [
+                            {
+                                "type": "literal",
+                                "name": "functions",
+                                "value": "<script>\nvar shared;\n</script>",
+                            },
+                            {
+                                "type": "literal",
+                                "name": "js",
+                                "value": "<script>\nshared = 1;\n"
+                                "  leaked = 2;\n</script>",
+                            },
+                        ],
+                    },
+                ]
+            },
+        }
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            json_file = Path(temp_dir) / "pages.lint_test.json"
+            json_file.write_text(json.dumps(page))
+            findings = lint_page_file(str(json_file))
+
+        assert len(findings) == 1
+        finding = findings[0]
+        assert finding["component_path"] == "1.components.1"
+        assert finding["filename"] == "js.js"
+        assert (finding["line"], finding["col"]) == (3, 3)
+        assert finding["rule"] == "implicit-global"
+
+    def test_first_line_columns_offset_by_script_tag(self):
+        """Columns on the <script> line account for the tag itself."""
+        (finding,) = lint_literal("<script>leaked = 1;</script>")
+        assert (finding.line, finding.col) == (1, 9)
@@ -0,0 +1,152 @@
+"""Tests for the page data-loading analyzer."""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from load_analyzer import analyze_page, estimated_load_requests, is_unbounded_sql
+
+
+def resource(name: str, domain: str) -> dict:
+    return {"type": "resource", "name": name, "resource": f"virtualDomains.{domain}"}
+
+
+def page(*components) -> dict:
+    return {"constantName": "test_page", "modelView": {"components": list(components)}}
+
+
+def rules(findings):
+    return [(f.component_path, f.rule, f.requests) for f in findings]
+
+
+class TestSqlBounds:
+    """Test detection of unbounded domain SQL."""
+
+    def test_bounded_and_unbounded(self):
+        assert is_unbounded_sql("select stvterm_code from stvterm")
+        assert is_unbounded_sql("select * from t -- where id = :id")
+        assert not is_unbounded_sql("select * from t where id = :id")
+        assert not is_unbounded_sql("select * from t where rownum <= 50")
+        assert not is_unbounded_sql("select * from t fetch first 10 rows only")
+
+
+class TestAnalyzePage:
+    """Test findings and request estimates."""
+
+    def test_eager_loads_and_page_sizes(self):
+        findings = analyze_page(
+            page(
+                resource("getinfo", "namecoach_getinfo"),
+                {
+                    "type": "data",
+                    "name": "getinfo_data",
+                    "model": "getinfo",
+                    "loadInitially": True,
+                    "pageSize": 5,
+                    "onLoad": "$detail_data.$load();",
+                },
+                {"type": "data", "name": "detail_data", "model": "getinfo"},
+                {
+                    "type": "grid",
+                    "name": "big_grid",
+                    "model": "getinfo",
+                    "pageSize": 500,
+                },
+            )
+        )
+        assert rules(findings) == [
+            ("1", "eager-load", 2),
+            ("2", "missing-page-size", 1),
+            ("3", "large-page-size", 1),
+        ]
+        assert "then detail_data" in findings[0].message
+        assert estimated_load_requests(findings) == 2
+
+    def test_nested_fan_out(self):
+        findings = analyze_page(
+            page(
+                resource("students", "students"),
+                resource("holds", "holds"),
+                {
+                    "type": "grid",
+                    "name": "student_grid",
+                    "model": "students",
+                    "pageSize": 20,
+                    "loadInitially": True,
+                    "components": [
+                        {
+                            "type": "list",
+                            "name": "notes",
+                            "components": [
+                                {
+                                    "type": "data",
+                                    "name": "hold_data",
+                                    "model": "holds",
+                                    "pageSize": 10,
+                                    "loadInitially": True,
+                                }
+                            ],
+                        }
+                    ],
+                },
+            ),
+            budget=100,
+            default_rows=3,
+        )
+        # 20 grid rows x 3 assumed rows for the list without a pageSize
+        assert rules(findings) == [
+            ("2", "eager-load", 1),
+            ("2.components.0.components.0", "eager-load", 60),
+            ("2.components.0.components.0", "nested-fan-out", 60),
+        ]
+        assert estimated_load_requests(findings) == 61
+        assert (
+            findings[2].message
+            == "loads holds (virtualDomains.holds) once per row of notes"
+        )
+
+    def test_budget(self):
+        loaders = [
+            {
+                "type": "data",
+                "name": f"d{i}",
+                "model": "r",
+                "pageSize": 1,
+                "loadInitially": True,
+            }
+            for i in range(3)
+        ]
+        page_data = page(resource("r", "r"), *loaders)
+        assert analyze_page(page_data, budget=3)[-1].rule == "eager-load"
+        over = analyze_page(page_data, budget=2)[-1]
+        assert (over.rule, over.requests, over.name) == ("over-budget", 3, "test_page")
+
+    def test_unbounded_selects(self):
+        select = {
+            "type": "select",
+            "name": "select_term",
+            "sourceModel": "terms",
+            "sourceParameters": {},
+        }
+        data = page(resource("terms", "stvterm_all"), select)
+
+        domains = {"stvterm_all": "select stvterm_code, stvterm_desc from stvterm"}
+        assert rules(analyze_page(data, domains)) == [("1", "unbounded-select", 1)]
+
+        domains = {"stvterm_all": "select * from stvterm where stvterm_code > :from"}
+        assert analyze_page(data, domains) == []
+
+        # Unknown SQL: only flagged when nothing narrows the query
+        assert rules(analyze_page(data)) == [("1", "unbounded-select", 1)]
+        select["sourceParameters"] = {"from": "$from_term"}
+        assert analyze_page(data) == []
+
+    def test_static_resources_are_ignored(self):
+        findings = analyze_page(
+            page(
+                {"type": "resource", "name": "static", "staticData": [{"a": 1}]},
+                {"type": "data", "name": "d", "model": "static", "loadInitially": True},
+            )
+        )
+        assert findings == []
@@ -0,0 +1,199 @@
+"""Tests for the virtual domain load generator."""
+
+import asyncio
+import json
+import random
+import sys
+import threading
+from http.server import ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from load_test import (
+    CallPattern,
+    HttpConnection,
+    build_target,
+    extract_call_patterns,
+    percentile,
+    run_load,
+)
+from mock_server import URL_PREFIX, MockVirtualDomains, load_config, make_handler
+
+REPO_ROOT = Path(__file__).parent.parent
+
+NOTES = {"serviceName": "notes", "codeGet": "select n.note_id id, n.pidm from notes n"}
+
+
+def load_page(name: str) -> dict:
+    with open(REPO_ROOT / "pages" / f"pages.{name}.json", encoding="utf-8") as f:
+        return json.load(f)
+
+
+@pytest.fixture
+def server():
+    config = load_config(defaults={"rows": 3})
+    config["domains"]["flaky"] = {"error_rate": 0.5, "error_status": 503}
+    mock = MockVirtualDomains(
+        {"notes": NOTES, "flaky": dict(NOTES, serviceName="flaky")}, config, seed=1
+    )
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(mock))
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_port}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+class TestCallPatterns:
+    """Test call patterns read from pages."""
+
+    def test_ajax_calls_in_literals(self):
+        patterns = extract_call_patterns(load_page("ftReview"))
+        assert [(p.domain, p.path, p.params) for p in patterns] == [
+            ("efg_terms", URL_PREFIX + "efg_terms", {"max": "300", "offset": "0"}),
+            (
+                "free_tuition_single",
+                URL_PREFIX + "free_tuition_single",
+                {"max": "1", "offset": "0", "term": None},
+            ),
+        ]
+
+    def test_inline_urls_and_nested_values(self):
+        script = """
+            // virtualDomains.commented_out
+            $.get("virtualDomains.holds", {});
+            $.ajax({
+              url: '/custom/virtualDomains.notes',
+              data: {max: 10, "pidm": pidm, filter: {a: 1}, q: 'x' + y}
+            });
+        """
+        page = {
+            "modelView": {
+                "components": [{"type": "literal", "name": "js", "value": script}]
+            }
+        }
+        patterns = extract_call_patterns(page, "p.json")
+        assert [(p.domain, p.path, p.params, p.source) for p in patterns] == [
+            ("holds", URL_PREFIX + "holds", {}, "p.json [0]"),
+            (
+                "notes",
+                "/custom/virtualDomains.notes",
+                {"max": "10", "pidm": None, "filter": None, "q": None},
+                "p.json [0]",
+            ),
+        ]
+
+    def test_resource_components(self):
+        page = {
+            "modelView": {
+                "components": [
+                    {"type": "resource", "name": "r", "resource": "virtualDomains.x"},
+                    {"type": "resource", "name": "static", "staticData": []},
+                    {
+                        "type": "grid",
+                        "name": "g",
+                        "model": "r",
+                        "pageSize": 20,
+                        "parameters": {"term": "$term", "level": "UG"},
+                    },
+                    {"type": "select", "name": "s", "sourceModel": "r"},
+                    {"type": "data", "name": "d", "model": "static"},
+                ]
+            }
+        }
+        patterns = extract_call_patterns(page)
+        assert [(p.domain, p.params, p.source) for p in patterns] == [
+            ("x", {"max": "20", "offset": "0", "term": None, "level": "UG"}, "[2]"),
+            ("x", {}, "[3]"),
+        ]
+
+    def test_variable_parameters(self):
+        pattern = CallPattern("d", "/vd", {"max": "5", "term": None, "gid": None}, "")
+        rng = random.Random(0)
+        assert build_target(pattern, {}, rng) == "/vd?max=5"
+        values = {"d": {"term": ["202450"]}, "*": {"gid": ["A1", "A2"]}}
+        targets = {build_target(pattern, values, rng) for _ in range(20)}
+        assert targets == {
+            "/vd?max=5&term=202450&gid=A1",
+            "/vd?max=5&term=202450&gid=A2",
+        }
+
+
+class TestPercentiles:
+    """Test nearest-rank percentiles."""
+
+    def test_nearest_rank(self):
+        values = [float(v) for v in range(1, 101)]
+        assert percentile(values, 0.5) == 50
+        assert percentile(values, 0.95) == 95
+        assert percentile(values, 0.99) == 99
+        assert percentile([7.0], 0.99) == 7
+        assert percentile([], 0.5) == 0
+
+
+class TestRunLoad:
+    """Test replaying patterns against a server."""
+
+    def test_against_mock_server(self, server):
+        patterns = [
+            CallPattern("notes", URL_PREFIX + "notes", {"max": "2"}, ""),
+            CallPattern("flaky", URL_PREFIX + "flaky", {}, ""),
+            CallPattern("missing", URL_PREFIX + "missing", {}, ""),
+        ]
+        stats, elapsed = asyncio.run(
+            run_load(server, patterns, concurrency=4, total_requests=300)
+        )
+        assert elapsed > 0
+        assert {d: s.requests for d, s in stats.items()} == {
+            "notes": 100,
+            "flaky": 100,
+            "missing": 100,
+        }
+        assert stats["notes"].errors == 0
+        assert stats["missing"].error_kinds == {"HTTP 404": 100}
+        assert 20 < stats["flaky"].error_kinds["HTTP 503"] < 80
+        notes = stats["notes"]
+        assert 0 < notes.p50 <= notes.p95 <= notes.p99 <= notes.max
+
+    def test_connection_errors(self):
+        patterns = [CallPattern("notes", URL_PREFIX + "notes", {}, "")]
+        # Port 9 (discard) is closed on test machines
+        stats, _ = asyncio.run(
+            run_load("http://127.0.0.1:9", patterns, concurrency=2, total_requests=4)
+        )
+        assert stats["notes"].requests == stats["notes"].errors == 4
+        assert stats["notes"].p99 == 0
+
+    def test_chunked_and_keep_alive(self):
+        connections = []
+
+        async def handle(reader, writer):
+            connections.append(writer)
+            try:
+                while await reader.readuntil(b"\r\n\r\n"):
+                    writer.write(
+                        b"HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\n"
+                        b"4\r\n[1, \r\n3;ext=1\r\n2]\n\r\n0\r\nX-Trailer: y\r\n\r\n"
+                    )
+                    await writer.drain()
+            except asyncio.IncompleteReadError:
+                writer.close()
+
+        async def scenario():
+            httpd = await asyncio.start_server(handle, "127.0.0.1", 0)
+            port = httpd.sockets[0].getsockname()[1]
+            connection = HttpConnection(f"http://127.0.0.1:{port}")
+            try:
+                first = await connection.request("/a")
+                second = await connection.request("/b", {"Cookie": "s=1"})
+            finally:
+                await connection.close()
+                httpd.close()
+            return first, second
+
+        first, second = asyncio.run(scenario())
+        assert first == second == (200, b"[1, 2]\n")
+        assert len(connections) == 1
@@ -0,0 +1,258 @@
+"""Tests for the single extraction manifest."""
+
+import json
+import subprocess
+import sys
+import zipfile
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from extract_literals import (
+    compare_extracted_literals,
+    extract_literals_from_json,
+    find_extracted_dirs,
+    rebuild_json_from_literals,
+)
+from extract_virtual_domains import extract_sql_from_json
+from manifest import MANIFEST_FILE, Manifest, compact_manifest, load_manifest, migrate
+from storage import MemoryStorage, ReadOnlyStorage
+
+REPO_ROOT = Path(__file__).parent.parent
+
+PAGE = {
+    "constantName": "home",
+    "modelView": {
+        "components": [
+            {"type": "literal", "name": "intro", "value": "<p>héllo</p>"},
+            {
+                "type": "block",
+                "name": "main",
+                "components": [{"type": "literal", "name": "js", "value": "x();"}],
+            },
+        ]
+    },
+}
+DOMAIN = {"serviceName": "people", "codeGet": "select 1\r\nfrom dual"}
+
+
+def mapping(source: str, *filenames: str) -> dict:
+    literals = [
+        {"component_path": str(i), "filename": f, "content_hash": "h"}
+        for i, f in enumerate(filenames)
+    ]
+    return {"source_file": source, "page_name": "p", "literals": literals}
+
+
+def line(directory: str, extraction_map: dict) -> str:
+    return json.dumps({"dir": directory, **extraction_map}) + "\n"
+
+
+@pytest.fixture
+def storage():
+    return MemoryStorage(
+        {
+            "pages/pages.home.json": json.dumps(PAGE),
+            "virtualDomains/virtualDomains.people.json": json.dumps(DOMAIN),
+            MANIFEST_FILE: "",
+        }
+    )
+
+
+class TestManifest:
+    """Test parsing, replacing and indexing mappings."""
+
+    def test_later_line_wins_and_dump_is_sorted(self):
+        text = (
+            line("extracted_literals/b", mapping("pages/b.json", "old.html"))
+            + line("extracted_literals/a", mapping("pages/a.json", "a.html"))
+            + line("extracted_literals/b", mapping("pages/b.json", "new.html"))
+        )
+        manifest = Manifest.parse(text)
+        assert manifest.unsorted
+        assert manifest.find_file("extracted_literals/b/old.html") is None
+        directory, item = manifest.find_file("extracted_literals/b/new.html")
+        assert directory == "extracted_literals/b" and item["component_path"] == "0"
+        assert manifest.find_source("./pages/a.json") == "extracted_literals/a"
+
+        dumped = manifest.dumps()
+        assert [json.loads(x)["dir"] for x in dumped.splitlines()] == [
+            "extracted_literals/a",
+            "extracted_literals/b",
+        ]
+        assert not Manifest.parse(dumped).unsorted
+
+    def test_malformed_line(self):
+        with pytest.raises(ValueError, match=f"{MANIFEST_FILE}:2:"):
+            Manifest.parse(line("d", mapping("s", "f")) + "{oops\n")
+        with pytest.raises(ValueError, match="not an extraction mapping"):
+            Manifest.parse('{"dir": "d"}\n')
+
+
+class TestExtraction:
+    """Test extracting, checking and rebuilding with the manifest."""
+
+    def test_round_trip_without_map_files(self, storage):
+        extract_literals_from_json(
+            "pages/pages.home.json", "extracted_literals", storage
+        )
+        extract_sql_from_json(
+            "virtualDomains/virtualDomains.people.json",
+            "extracted_virtual_domains",
+            storage,
+        )
+        assert not storage.exists("extracted_literals/home/_extraction_map.json")
+        assert find_extracted_dirs("extracted_literals", storage) == [
+            "extracted_literals/home"
+        ]
+
+        manifest = load_manifest(storage)
+        assert manifest is not None
+        _, intro = manifest.find_file("extracted_literals/home/intro.html")
+        assert intro["size"] == len("<p>héllo</p>".encode())
+        _, sql = manifest.find_file("extracted_virtual_domains/people/codeget.sql")
+        assert sql["size"] == len("select 1\nfrom dual")
+
+        # Appended in extraction order; compacting sorts by directory
+        assert manifest.unsorted and compact_manifest(storage)
+        assert not compact_manifest(storage)
+        dirs = [
+            json.loads(x)["dir"] for x in storage.read_text(MANIFEST_FILE).splitlines()
+        ]
+        assert dirs == ["extracted_literals/home", "extracted_virtual_domains/people"]
+
+        storage.write_text("extracted_literals/home/intro.html", "<p>bye</p>")
+        statuses = compare_extracted_literals("extracted_literals/home", storage)
+        assert [s.status for s in statuses] == ["out-of-sync", "in-sync"]
+        rebuild_json_from_literals("extracted_literals/home", storage=storage)
+        data = json.loads(storage.read_text("pages/pages.home.json"))
+        assert data["modelView"]["components"][0]["value"] == "<p>bye</p>"
+
+    def test_compact_keeps_lines_appended_by_other_runs(self, storage):
+        extract_literals_from_json(
+            "pages/pages.home.json", "extracted_literals", storage
+        )
+        # Another run sharing the tree appends after this one loaded the manifest
+        other = line("extracted_literals/other", mapping("pages/o.json", "o.html"))
+        storage.append_text(MANIFEST_FILE, other)
+
+        assert compact_manifest(storage)
+        dirs = [
+            json.loads(x)["dir"] for x in storage.read_text(MANIFEST_FILE).splitlines()
+        ]
+        assert dirs == ["extracted_literals/home", "extracted_literals/other"]
+        manifest = load_manifest(storage)
+        assert manifest.find_file("extracted_literals/other/o.html") is not None
+
+    def test_dry_run_appends_to_overlay(self, storage):
+        overlay = ReadOnlyStorage(storage)
+        extract_literals_from_json(
+            "pages/pages.home.json", "extracted_literals", overlay
+        )
+        assert storage.read_text(MANIFEST_FILE) == ""
+        assert "extracted_literals/home" in overlay.read_text(MANIFEST_FILE)
+
+    def test_map_files_without_manifest(self):
+        storage = MemoryStorage({"pages/pages.home.json": json.dumps(PAGE)})
+        extract_literals_from_json(
+            "pages/pages.home.json", "extracted_literals", storage
+        )
+        assert load_manifest(storage) is None
+        assert storage.exists("extracted_literals/home/_extraction_map.json")
+
+
+class TestMigrate:
+    """Test building the manifest from per-directory maps."""
+
+    def test_migrate_adds_sizes(self):
+        storage = MemoryStorage({"pages/pages.home.json": json.dumps(PAGE)})
+        extract_literals_from_json(
+            "pages/pages.home.json", "extracted_literals", storage
+        )
+        map_file = "extracted_literals/home/_extraction_map.json"
+        # Maps written before sizes were recorded
+        old = json.loads(storage.read_text(map_file))
+        for item in old["literals"]:
+            del item["size"]
+        storage.write_text(map_file, json.dumps(old))
+        storage.mkdir("extracted_literals/gone")
+        storage.write_text(
+            "extracted_literals/gone/_extraction_map.json",
+            json.dumps(mapping("pages/pages.gone.json", "x.html")),
+        )
+
+        manifest, migrated, missing = migrate(storage)
+        assert sorted(migrated) == [
+            "extracted_literals/gone/_extraction_map.json",
+            map_file,
+        ]
+        assert missing == ["extracted_literals/gone"]
+        assert [
+            item["size"] for item in manifest.get("extracted_literals/home")["literals"]
+        ] == [len("<p>héllo</p>".encode()), 4]
+        assert Manifest.parse(storage.read_text(MANIFEST_FILE)).entries == (
+            manifest.entries
+        )
+
+    def test_command(self, tmp_path):
+        pages = tmp_path / "pages"
+        pages.mkdir()
+        (pages / "pages.home.json").write_text(json.dumps(PAGE))
+
+        def run(*args: str) -> subprocess.CompletedProcess:
+            return subprocess.run(
+                [sys.executable, *args], cwd=tmp_path, capture_output=True, text=True
+            )
+
+        assert run(str(REPO_ROOT / "extract_literals.py"), "extract").returncode == 0
+        result = run(str(REPO_ROOT / "manifest.py"), "migrate", "--remove-maps")
+        assert result.returncode == 0, result.stdout
+        assert "1 mapping(s)" in result.stdout
+        assert not (tmp_path / "extracted_literals/home/_extraction_map.json").exists()
+
+        result = run(
+            str(REPO_ROOT / "manifest.py"), "lookup", "extracted_literals/home/js.js"
+        )
+        assert "from pages/pages.home.json" in result.stdout
+        assert "component_path: 1.components.0" in result.stdout
+        result = run(str(REPO_ROOT / "manifest.py"), "lookup", "pages/pages.home.json")
+        assert "extracted to extracted_literals/home" in result.stdout
+
+        # Later runs keep using the manifest
+        (tmp_path / "extracted_literals/home/js.js").write_text("y();")
+        result = run(str(REPO_ROOT / "extract_literals.py"), "rebuild")
+        assert result.returncode == 0, result.stdout
+        assert "y();" in (pages / "pages.home.json").read_text()
+        result = run(str(REPO_ROOT / "extract_literals.py"), "check")
+        assert result.returncode == 0, result.stdout
+
+    def test_command_with_archive_and_dry_run(self, tmp_path):
+        with zipfile.ZipFile(tmp_path / "export.zip", "w") as archive:
+            archive.writestr("pages/pages.home.json", json.dumps(PAGE))
+
+        def run(*args: str) -> subprocess.CompletedProcess:
+            return subprocess.run(
+                [sys.executable, *args], cwd=tmp_path, capture_output=True, text=True
+            )
+
+        result = run(str(REPO_ROOT / "extract_literals.py"), "extract", "export.zip")
+        assert result.returncode == 0, result.stdout
+        map_file = tmp_path / "extracted_literals/home/_extraction_map.json"
+
+        # Nothing is written or removed on a dry run
+        result = run(
+            str(REPO_ROOT / "manifest.py"), "migrate", "--remove-maps", "--dry-run"
+        )
+        assert result.returncode == 0, result.stdout
+        assert "(removed)" in result.stdout
+        assert map_file.exists() and not (tmp_path / MANIFEST_FILE).exists()
+
+        # Sizes come from the source inside the archive
+        result = run(str(REPO_ROOT / "manifest.py"), "migrate", "--remove-maps")
+        assert "Source file missing" not in result.stdout
+        assert not map_file.exists()
+        manifest = Manifest.parse((tmp_path / MANIFEST_FILE).read_text())
+        intro = manifest.get("extracted_literals/home")["literals"][0]
+        assert intro["size"] == len("<p>héllo</p>".encode())
@@ -0,0 +1,191 @@
+"""Tests for the mock virtual domain REST server."""
+
+import json
+import random
+import sys
+import threading
+import urllib.request
+from http.server import ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from mock_server import (
+    URL_PREFIX,
+    MockVirtualDomains,
+    load_config,
+    load_domains,
+    make_handler,
+    parse_latency,
+    parse_select_columns,
+)
+
+REPO_ROOT = Path(__file__).parent.parent
+
+NOTES = {
+    "serviceName": "notes",
+    "codeGet": 'select n.note_id id, n.pidm, n.note_text as "noteText"\nfrom notes n',
+    "codePost": "insert into notes values (:pidm, :noteText)",
+    "codePut": "update notes set note_text = :noteText where note_id = :id",
+    "codeDelete": "delete from notes where note_id = :id",
+}
+
+
+@pytest.fixture
+def mock():
+    return MockVirtualDomains({"notes": NOTES}, load_config(defaults={"rows": 5}))
+
+
+class TestSelectColumns:
+    """Test column names parsed from codeGet select lists."""
+
+    def test_spriden_name(self):
+        domains = load_domains(
+            [str(REPO_ROOT / "virtualDomains" / "virtualDomains.spridenName.json")]
+        )
+        assert parse_select_columns(domains["spridenName"]["codeGet"]) == [
+            "GID",
+            "P_PIDM",
+            "FIRST",
+            "MIDDLE",
+            "LAST",
+        ]
+
+    def test_expressions(self):
+        sql = """
+            select distinct t.stvterm_code, -- the code
+                   nvl(t.stvterm_desc, 'n/a, none') term_desc,
+                   (select count(*) from sfrstcr where sfrstcr_term_code = t.code) "Enrolled",
+                   case when 1 = 1 then 'Y' end,
+                   t.*
+            from stvterm t where t.code in (select code from other)
+        """
+        assert parse_select_columns(sql) == [
+            "STVTERM_CODE",
+            "TERM_DESC",
+            "Enrolled",
+            "CASE WHEN 1 = 1 THEN 'Y' END",
+        ]
+
+
+class TestLatency:
+    """Test latency distribution specs."""
+
+    @pytest.mark.parametrize(
+        "spec, low, high",
+        [
+            ("0", 0, 0),
+            ("fixed:25", 25, 25),
+            ("uniform:10,20", 10, 20),
+            ("normal:50,10", 0, float("inf")),
+            ("lognormal:80,0.5", 0, float("inf")),
+            ("exponential:30", 0, float("inf")),
+        ],
+    )
+    def test_samples(self, spec, low, high):
+        sample = parse_latency(spec)
+        rng = random.Random(1)
+        assert all(low <= sample(rng) <= high for _ in range(200))
+
+    @pytest.mark.parametrize("spec", ["slow", "uniform:10", "fixed:-5", "gamma:1,2"])
+    def test_invalid(self, spec):
+        with pytest.raises(ValueError):
+            parse_latency(spec)
+
+    def test_invalid_config(self, tmp_path):
+        config_file = tmp_path / "mock.json"
+        config_file.write_text(json.dumps({"domains": {"notes": {"error_rate": 2}}}))
+        with pytest.raises(ValueError, match="domains.notes.error_rate"):
+            load_config(str(config_file))
+
+
+class TestMockVirtualDomains:
+    """Test REST semantics without a socket."""
+
+    def test_get_paging_and_filters(self, mock):
+        status, rows, _ = mock.handle("GET", URL_PREFIX + "notes")
+        assert status == 200
+        assert len(rows) == 5
+        assert list(rows[0]) == ["ID", "PIDM", "noteText"]
+
+        _, page, _ = mock.handle("GET", URL_PREFIX + "notes?max=2&offset=3")
+        assert page == rows[3:5]
+
+        _, matches, _ = mock.handle("GET", URL_PREFIX + f"notes?pidm={rows[1]['PIDM']}")
+        assert matches == [rows[1]]
+
+        status, _, _ = mock.handle("GET", URL_PREFIX + "notes?max=ten")
+        assert status == 400
+
+    def test_post_put_delete(self, mock):
+        status, created, _ = mock.handle(
+            "POST",
+            URL_PREFIX + "notes",
+            json.dumps({"pidm": 7, "NOTETEXT": "hi"}).encode(),
+        )
+        assert status == 200
+        assert created == {"ID": None, "PIDM": 7, "noteText": "hi", "id": 6}
+
+        status, updated, _ = mock.handle(
+            "PUT", URL_PREFIX + "notes/6", json.dumps({"noteText": "bye"}).encode()
+        )
+        assert (status, updated["noteText"], updated["PIDM"]) == (200, "bye", 7)
+
+        assert mock.handle("DELETE", URL_PREFIX + "notes/6")[:2] == (204, None)
+        assert mock.handle("DELETE", URL_PREFIX + "notes/6")[0] == 404
+        assert mock.handle("PUT", URL_PREFIX + "notes", b"[1]")[0] == 400
+
+    def test_undefined_methods_and_domains(self):
+        domains = load_domains(
+            [str(REPO_ROOT / "virtualDomains" / "virtualDomains.spridenName.json")]
+        )
+        mock = MockVirtualDomains(domains)
+        assert mock.handle("POST", URL_PREFIX + "spridenName", b"{}")[0] == 405
+        assert mock.handle("GET", URL_PREFIX + "missing")[0] == 404
+        assert mock.handle("GET", "/elsewhere")[0] == 404
+
+    def test_fixtures(self, tmp_path):
+        (tmp_path / "notes.json").write_text(json.dumps([{"ID": 1, "TEXT": "a"}]))
+        mock = MockVirtualDomains({"notes": NOTES}, fixtures_dir=str(tmp_path))
+        assert mock.handle("GET", URL_PREFIX + "notes")[1] == [{"ID": 1, "TEXT": "a"}]
+
+    def test_rows_persist_in_db_file(self, tmp_path):
+        db_file = str(tmp_path / "mock.db")
+        first = MockVirtualDomains({"notes": NOTES}, db_file=db_file)
+        first.handle("DELETE", URL_PREFIX + "notes/1")
+        first.conn.close()
+
+        second = MockVirtualDomains({"notes": NOTES}, db_file=db_file)
+        assert len(second.handle("GET", URL_PREFIX + "notes")[1]) == 49
+
+    def test_latency_and_error_injection(self):
+        config = load_config(
+            defaults={"latency": "fixed:40"},
+        )
+        config["domains"]["notes"] = {"error_rate": 0.5, "error_status": 503}
+        mock = MockVirtualDomains({"notes": NOTES}, config, seed=3)
+
+        results = [mock.handle("GET", URL_PREFIX + "notes?max=1") for _ in range(400)]
+        statuses = [status for status, _, _ in results]
+        assert set(statuses) == {200, 503}
+        assert 150 < statuses.count(503) < 250
+        assert {delay for _, _, delay in results} == {0.04}
+
+
+class TestHttpServer:
+    """Test the server over a real socket."""
+
+    def test_get_over_http(self, mock):
+        server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(mock))
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            url = f"http://127.0.0.1:{server.server_port}{URL_PREFIX}notes?max=2"
+            with urllib.request.urlopen(url) as response:
+                assert response.headers["Access-Control-Allow-Origin"] == "*"
+                assert len(json.load(response)) == 2
+        finally:
+            server.shutdown()
+            server.server_close()
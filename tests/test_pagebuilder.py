@@ -0,0 +1,344 @@
+"""Tests for the page and virtual domain object model."""
+
+import hashlib
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from pagebuilder import (
+    LAZY_MIN_LENGTH,
+    Corpus,
+    ImportResult,
+    Literal,
+    Page,
+    StringPool,
+    ValidationIssue,
+    VirtualDomain,
+    import_records,
+    iter_records,
+)
+
+REPO_ROOT = Path(__file__).parent.parent
+
+LONG_HTML = '<div class="é">\n  "quoted" \\ back\\slash ✓\n</div>\n' * 10
+LONG_SQL = "select spriden_id, spriden_last_name\nfrom spriden\r\nwhere 1 = 1\n" * 5
+
+
+def make_page(name="sample", literals=None):
+    if literals is None:
+        literals = [
+            {"name": "main", "type": "literal", "value": LONG_HTML},
+            {"name": "short", "type": "literal", "value": "<b>hi</b>"},
+        ]
+    return {
+        "constantName": name,
+        "developerSecurity": [],
+        "modelView": {
+            "components": [
+                literals[0],
+                {"name": "block", "type": "block", "components": literals[1:]},
+            ],
+            "name": name,
+            "style": "",
+        },
+        "owner": None,
+    }
+
+
+def write_json(path, data, indent=3):
+    path.write_text(json.dumps(data, indent=indent, ensure_ascii=False), "utf-8")
+    return str(path)
+
+
+@pytest.fixture
+def page_file(tmp_path):
+    return write_json(tmp_path / "pages.sample.json", make_page())
+
+
+class TestLoading:
+    """Test lazy loading and interning."""
+
+    def test_long_values_are_read_on_demand(self, page_file):
+        page = Page.load(page_file)
+        main, short = page.literals
+        assert (main.path, short.path) == ("0", "1.components.0")
+        assert not main.is_loaded
+        assert short.is_loaded
+        assert main.value == LONG_HTML
+        assert len(LONG_HTML) >= LAZY_MIN_LENGTH
+        assert page.to_data() == make_page()
+
+    @pytest.mark.parametrize("lazy", [True, False])
+    def test_repo_files_round_trip(self, lazy):
+        for path in sorted((REPO_ROOT / "pages").glob("*.json")):
+            page = Page.load(path, lazy=lazy)
+            assert page.to_data() == json.loads(path.read_text("utf-8"))
+        for path in sorted((REPO_ROOT / "virtualDomains").glob("*.json")):
+            domain = VirtualDomain.load(path, lazy=lazy)
+            assert domain.to_data() == json.loads(path.read_text("utf-8"))
+            assert list(domain.to_data()) == list(json.loads(path.read_text("utf-8")))
+
+    def test_strings_are_interned_across_pages(self, tmp_path):
+        pool = StringPool()
+        first = Page.load(write_json(tmp_path / "a.json", make_page("a")), pool=pool)
+        second = Page.load(write_json(tmp_path / "b.json", make_page("b")), pool=pool)
+        a, b = first.literals[1], second.literals[1]
+        assert a.type is b.type
+        assert a.path is b.path
+        assert a.value is b.value
+        assert a._order is b._order
+        assert first.components[1].fields["name"] is second.components[1].fields["name"]
+
+    def test_changed_source_is_detected(self, page_file):
+        page = Page.load(page_file)
+        Path(page_file).write_text(json.dumps(make_page()), "utf-8")
+        with pytest.raises(ValueError, match="changed since it was loaded"):
+            assert page.literals[0].value
+
+    def test_rejects_non_objects(self, tmp_path):
+        with pytest.raises(ValueError, match="not a JSON object"):
+            Page.load(write_json(tmp_path / "list.json", []))
+        page = make_page()
+        page["modelView"]["components"].append("oops")
+        with pytest.raises(ValueError, match="component 2 is not an object"):
+            Page.load(write_json(tmp_path / "bad.json", page))
+
+
+class TestPageMethods:
+    """Test extract, check, rebuild and validate on pages."""
+
+    def test_extract_check_rebuild(self, page_file, tmp_path):
+        page = Page.load(page_file)
+        out = str(tmp_path / "out")
+        page_dir = tmp_path / "out" / "sample"
+
+        result = page.extract(out)
+        assert result.directory == str(page_dir)
+        assert result.files == [
+            str(page_dir / "main.html"),
+            str(page_dir / "short.html"),
+        ]
+        assert [s.status for s in page.check(str(page_dir))] == ["in-sync"] * 2
+
+        (page_dir / "short.html").write_text("<b>bye</b>", "utf-8")
+        statuses = page.check(str(page_dir))
+        assert [s.status for s in statuses] == ["in-sync", "out-of-sync"]
+
+        result = page.rebuild(str(page_dir))
+        assert result == (page_file, ["1.components.0"])
+        assert page.literals[1].value == "<b>bye</b>"
+        # Lazy values point into the rewritten file
+        assert page.literals[0].value == LONG_HTML
+        assert not page.literals[0].is_loaded
+        assert json.loads(Path(page_file).read_text("utf-8")) == page.to_data()
+        assert page.rebuild(str(page_dir)).changed == []
+
+    def test_check_compares_in_memory_values(self, page_file, tmp_path):
+        page = Page.load(page_file)
+        page_dir = page.extract(str(tmp_path / "out")).directory
+        page.literals[0].value = "changed"
+        assert [s.status for s in page.check(page_dir)] == ["out-of-sync", "in-sync"]
+        with pytest.raises(FileNotFoundError, match="No extraction map found"):
+            page.check(str(tmp_path / "missing"))
+
+    def test_rebuild_with_transforms_and_output_dir(self, page_file, tmp_path):
+        page = Page.load(page_file)
+        page_dir = page.extract(str(tmp_path / "out")).directory
+
+        def add_marker(data):
+            data["modelView"]["components"][0]["value"] += "<!-- built -->"
+
+        result = page.rebuild(page_dir, str(tmp_path / "build"), [add_marker])
+        assert result.target_file == str(tmp_path / "build" / "pages.sample.json")
+        built = json.loads(Path(result.target_file).read_text("utf-8"))
+        assert built["modelView"]["components"][0]["value"].endswith("<!-- built -->")
+        assert page.literals[0].value == LONG_HTML
+
+    def test_validate(self, tmp_path):
+        data = make_page(
+            literals=[
+                {"name": "main", "type": "literal", "value": 42},
+                {"name": "main", "type": "literal", "value": ""},
+                {"type": "button"},
+            ]
+        )
+        del data["constantName"]
+        page = Page.load(write_json(tmp_path / "p.json", data))
+        source = str(tmp_path / "p.json")
+        assert page.validate() == [
+            ValidationIssue(source, "constantName", "missing or empty constantName"),
+            ValidationIssue(source, "0", "literal value is not a string"),
+            ValidationIssue(
+                source, "1.components.0", "duplicate name 'main' (also at 0)"
+            ),
+            ValidationIssue(source, "1.components.1", "component has no name"),
+        ]
+        assert isinstance(page.get_component("1.components.0"), Literal)
+        assert page.get_component("1.components.5") is None
+
+    def test_repo_pages_are_valid(self):
+        corpus = Corpus.load(roots=[str(REPO_ROOT / "pages")])
+        assert len(corpus.pages) == 4
+        assert corpus.validate() == []
+
+
+class TestVirtualDomain:
+    """Test virtual domain SQL access and methods."""
+
+    @pytest.fixture
+    def domain_file(self, tmp_path):
+        data = {
+            "owner": None,
+            "codePut": None,
+            "virtualDomainRoles": [{"roleName": "ADMIN", "allowGet": True}],
+            "codeGet": LONG_SQL,
+            "serviceName": "lookup",
+            "codePost": "insert into t values (:a)",
+        }
+        return write_json(tmp_path / "virtualDomains.lookup.json", data, indent=2)
+
+    def test_sql_and_round_trip(self, domain_file, tmp_path):
+        domain = VirtualDomain.load(domain_file)
+        assert domain.sql("codeGet") == LONG_SQL
+        assert domain.sql("codePut") is None
+        assert domain.sql("codeDelete") is None
+        assert domain.validate() == []
+
+        out = str(tmp_path / "out")
+        result = domain.extract(out)
+        assert [Path(f).name for f in result.files] == ["codeget.sql", "codepost.sql"]
+        # Extracted SQL has normalized line endings; check allows for that
+        assert [s.status for s in domain.check(result.directory)] == ["in-sync"] * 2
+
+        Path(result.files[1]).write_text("insert into t values (:b)", "utf-8")
+        rebuilt = domain.rebuild(result.directory)
+        assert rebuilt.changed == ["codeGet", "codePost"]
+        assert domain.sql("codePost") == "insert into t values (:b)"
+        assert json.loads(Path(domain_file).read_text("utf-8")) == domain.to_data()
+        assert list(domain.to_data())[:4] == [
+            "owner",
+            "codePut",
+            "virtualDomainRoles",
+            "codeGet",
+        ]
+
+    def test_validate(self, tmp_path):
+        data = {
+            "serviceName": "",
+            "codeGet": "  ",
+            "virtualDomainRoles": [{"roleName": "X"}, "bad"],
+        }
+        domain = VirtualDomain.load(write_json(tmp_path / "d.json", data))
+        assert [(i.location, i.message) for i in domain.validate()] == [
+            ("serviceName", "missing or empty serviceName"),
+            ("codeGet", "no SQL in any of codeGet, codePost, codePut, codeDelete"),
+            ("virtualDomainRoles.0", "role has no allowGet flag"),
+            ("virtualDomainRoles.1", "role is not an object"),
+        ]
+
+
+class TestCorpus:
+    """Test loading a corpus of pages and domains."""
+
+    def test_load_shares_pool(self, tmp_path):
+        write_json(tmp_path / "a.json", make_page("a"))
+        write_json(tmp_path / "b.json", make_page("b"))
+        write_json(tmp_path / "d.json", {"serviceName": "d", "codeGet": "select 1"})
+        write_json(tmp_path / "other.json", {"unrelated": True})
+        (tmp_path / "broken.json").write_text("{", "utf-8")
+
+        corpus = Corpus.load(roots=[str(tmp_path)])
+        assert [p.constant_name for p in corpus.pages] == ["a", "b"]
+        assert [d.service_name for d in corpus.domains] == ["d"]
+        assert len(list(corpus.iter_literals())) == 4
+        assert corpus.pages[0].pool is corpus.pages[1].pool is corpus.pool
+        assert corpus.pages[0].literals[1].name is corpus.pages[1].literals[1].name
+
+
+class TestNdjson:
+    """Test streaming literals and SQL out and back in as NDJSON."""
+
+    @pytest.fixture
+    def files(self, tmp_path):
+        page = write_json(tmp_path / "pages.sample.json", make_page())
+        domain = write_json(
+            tmp_path / "virtualDomains.d.json",
+            {"serviceName": "d", "codeGet": LONG_SQL, "codePut": None},
+            indent=2,
+        )
+        return page, domain
+
+    def test_export_records(self, files):
+        page, domain = files
+        records = list(iter_records(files))
+        assert [(r["file"], r["page"], r["path"], r["kind"]) for r in records] == [
+            (page, "sample", "0", "html"),
+            (page, "sample", "1.components.0", "html"),
+            (domain, "d", "codeGet", "sql"),
+        ]
+        assert records[0]["value"] == LONG_HTML
+        assert records[2]["hash"] == hashlib.md5(LONG_SQL.encode()).hexdigest()
+
+    def test_import_writes_only_changed_records(self, files):
+        page, domain = files
+        records = list(iter_records(files))
+        records[1]["value"] = "<b>changed</b>"
+        domain_before = Path(domain).read_text("utf-8")
+
+        lines = [json.dumps(r) for r in records]
+        results = list(import_records(lines))
+        assert results == [ImportResult(page, ["1.components.0"], [])]
+        assert Page.load(page).literals[1].value == "<b>changed</b>"
+        assert Page.load(page).literals[0].value == LONG_HTML
+        assert Path(domain).read_text("utf-8") == domain_before
+        # Importing the same stream again is a no-op
+        assert list(import_records(lines)) == [ImportResult(page, [], [])]
+
+    def test_import_skips_records_changed_since_export(self, files):
+        page, domain = files
+        records = list(iter_records(files))
+        records[0]["value"] = "mine"
+        records[2]["value"] = "select 2"
+        loaded = Page.load(page)
+        loaded.literals[0].value = "theirs"
+        loaded.save()
+
+        results = list(import_records(json.dumps(r) for r in records))
+        assert results == [
+            ImportResult(page, [], [f"{page} [0]: changed since it was exported"]),
+            ImportResult(domain, ["codeGet"], []),
+        ]
+        assert Page.load(page).literals[0].value == "theirs"
+        assert VirtualDomain.load(domain).sql("codeGet") == "select 2"
+
+    def test_invalid_lines(self):
+        with pytest.raises(ValueError, match="line 2"):
+            list(import_records(["", "not json"]))
+        with pytest.raises(ValueError, match="expected file, hash, path, value"):
+            list(import_records(['{"file": "x"}']))
+
+    def test_command_line_pipeline(self, files, tmp_path):
+        script = str(REPO_ROOT / "pagebuilder.py")
+        exported = subprocess.run(
+            [sys.executable, script, "export", "--ndjson", f"--roots={tmp_path}"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        edited = exported.replace("select spriden_id", "select spriden_pidm")
+        result = subprocess.run(
+            [sys.executable, script, "import", "--ndjson"],
+            input=edited,
+            capture_output=True,
+            text=True,
+        )
+        assert result.returncode == 0, result.stdout
+        assert "Imported 1 changed record(s) into 1 file(s)" in result.stdout
+        assert VirtualDomain.load(files[1]).sql("codeGet") == LONG_SQL.replace(
+            "select spriden_id", "select spriden_pidm"
+        )
@@ -0,0 +1,213 @@
+"""Tests for include partials in extracted literal files."""
+
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from extract_literals import (
+    compare_extracted_literals,
+    extract_literals_from_json,
+    page_partials,
+    rebuild_json_from_literals,
+)
+from pagebuilder import Page
+from partials import Partials, direct_includes
+from storage import DiskStorage
+
+REPO_ROOT = Path(__file__).parent.parent
+
+CDN = '<link rel="stylesheet" href="https://cdn.example.com/fw.css">\n'
+HELPERS = "function money(x) {\n  return '$' + x.toFixed(2);\n}\n"
+
+
+def make_page(name: str) -> dict:
+    return {
+        "constantName": name,
+        "modelView": {
+            "components": [
+                {"type": "literal", "name": "style", "value": CDN + f"<h1>{name}</h1>"},
+                {
+                    "type": "literal",
+                    "name": "js",
+                    "value": f"<script>\n{HELPERS}var page = '{name}';\n</script>",
+                },
+            ]
+        },
+    }
+
+
+@pytest.fixture
+def workspace(tmp_path, monkeypatch):
+    """Two extracted pages, with the repeated blocks moved into partials."""
+    monkeypatch.chdir(tmp_path)
+    Path("pages").mkdir()
+    for name in ("first", "second"):
+        Path(f"pages/pages.{name}.json").write_text(json.dumps(make_page(name)))
+        extract_literals_from_json(f"pages/pages.{name}.json", "extracted_literals")
+
+    partials = Path("extracted_literals/_partials")
+    partials.mkdir()
+    (partials / "cdn.html").write_text(CDN)
+    (partials / "helpers.js").write_text(HELPERS)
+    (partials / "head.html").write_text("<!-- @include cdn.html -->\n<meta x>\n")
+    Path("extracted_literals/first/style.html").write_text(
+        "<!-- @include head.html -->\n<h1>first</h1>"
+    )
+    Path("extracted_literals/second/style.html").write_text(
+        "<!-- @include cdn.html -->\n<h1>second</h1>"
+    )
+    Path("extracted_literals/second/js.js").write_text(
+        "<script>\n// @include helpers.js\nvar page = 'second';\n</script>"
+    )
+    return tmp_path
+
+
+def literal(name: str, index: int) -> str:
+    data = json.loads(Path(f"pages/pages.{name}.json").read_text())
+    return data["modelView"]["components"][index]["value"]
+
+
+def in_sync(name: str) -> bool:
+    statuses = compare_extracted_literals(f"extracted_literals/{name}")
+    return all(status.status == "in-sync" for status in statuses)
+
+
+class TestExpand:
+    """Test expanding directives."""
+
+    def test_directive_styles(self, tmp_path):
+        (tmp_path / "p.css").write_text(".a {}\n")
+        partials = Partials(tmp_path)
+        for directive, end in [
+            ("<!-- @include p.css -->", "<!-- @end-include p.css -->"),
+            ("/* @include p.css */", "/* @end-include p.css */"),
+            ("  // @include p.css", "  // @end-include p.css"),
+        ]:
+            text = f"before\n{directive}\nafter"
+            assert (
+                partials.expand(text) == f"before\n{directive}\n.a {{}}\n{end}\nafter"
+            )
+
+    def test_non_directives_untouched(self, tmp_path):
+        partials = Partials(tmp_path)
+        for text in [
+            "@include mixin;",
+            "<!-- @include p.css",
+            "/* @include p.css -->",
+            "x = 1; // @include p.css",
+        ]:
+            assert partials.expand(text) == text
+            assert direct_includes(text) == []
+
+    def test_missing_cycles_and_escapes(self, tmp_path):
+        (tmp_path / "a.html").write_text("<!-- @include b.html -->")
+        (tmp_path / "b.html").write_text("<!-- @include a.html -->")
+        partials = Partials(tmp_path)
+        with pytest.raises(ValueError, match="a.html -> b.html -> a.html"):
+            partials.expand("<!-- @include a.html -->")
+        with pytest.raises(ValueError, match="Partial not found"):
+            partials.expand("<!-- @include c.html -->")
+        with pytest.raises(ValueError, match="outside"):
+            partials.expand("<!-- @include ../secret.html -->")
+
+    def test_expansions_cached(self, tmp_path):
+        (tmp_path / "p.html").write_text("one")
+        partials = Partials(tmp_path)
+        assert partials.expand("<!-- @include p.html -->").count("one") == 1
+        (tmp_path / "p.html").write_text("two")
+        assert "one" in partials.expand("<!-- @include p.html -->")
+        assert "two" in Partials(tmp_path).expand("<!-- @include p.html -->")
+
+
+class TestRebuild:
+    """Test rebuilding, checking and re-extracting pages with includes."""
+
+    def test_rebuild_and_check(self, workspace):
+        assert not in_sync("first")
+        for name in ("first", "second"):
+            rebuild_json_from_literals(f"extracted_literals/{name}")
+            assert in_sync(name)
+
+        assert literal("first", 0) == (
+            "<!-- @include head.html -->\n"
+            "<!-- @include cdn.html -->\n"
+            f"{CDN}"
+            "<!-- @end-include cdn.html -->\n"
+            "<meta x>\n"
+            "<!-- @end-include head.html -->\n"
+            "<h1>first</h1>"
+        )
+        assert HELPERS in literal("second", 1)
+
+        # Editing a partial puts every page including it out of sync
+        Path("extracted_literals/_partials/cdn.html").write_text(CDN + "<meta y>\n")
+        assert not in_sync("first") and not in_sync("second")
+
+    def test_reextract_collapses_regions(self, workspace):
+        for name in ("first", "second"):
+            rebuild_json_from_literals(f"extracted_literals/{name}")
+            extract_literals_from_json(f"pages/pages.{name}.json", "extracted_literals")
+            assert in_sync(name)
+        assert Path("extracted_literals/first/style.html").read_text() == (
+            "<!-- @include head.html -->\n<h1>first</h1>"
+        )
+        assert "// @include helpers.js\nvar" in (
+            Path("extracted_literals/second/js.js").read_text()
+        )
+
+    def test_edited_region_left_expanded(self, workspace):
+        rebuild_json_from_literals("extracted_literals/second")
+        data = json.loads(Path("pages/pages.second.json").read_text())
+        data["modelView"]["components"][0]["value"] = literal("second", 0).replace(
+            "fw.css", "fw2.css"
+        )
+        Path("pages/pages.second.json").write_text(json.dumps(data))
+
+        extract_literals_from_json("pages/pages.second.json", "extracted_literals")
+        extracted = Path("extracted_literals/second/style.html").read_text()
+        assert "fw2.css" in extracted and "@end-include cdn.html" in extracted
+        assert in_sync("second")
+
+        # Rebuilding keeps the edit instead of restoring the partial
+        rebuild_json_from_literals("extracted_literals/second")
+        assert "fw2.css" in literal("second", 0)
+        assert in_sync("second")
+
+    def test_object_model_expands_includes(self, workspace):
+        page = Page.load("pages/pages.second.json")
+        result = page.rebuild("extracted_literals/second")
+        assert sorted(result.changed) == ["0", "1"]
+        assert page.check("extracted_literals/second")[0].status == "in-sync"
+
+
+class TestDependencies:
+    """Test finding the pages a partial change affects."""
+
+    def test_page_partials(self, workspace):
+        storage = DiskStorage()
+        partials = Partials(Path("extracted_literals/_partials"), storage)
+        assert page_partials("extracted_literals/first", storage, partials) == {
+            "head.html",
+            "cdn.html",
+        }
+        assert page_partials("extracted_literals/second", storage, partials) == {
+            "cdn.html",
+            "helpers.js",
+        }
+
+    def test_rebuild_only_dependent_pages(self, workspace):
+        result = subprocess.run(
+            [sys.executable, str(REPO_ROOT / "extract_literals.py"), "rebuild"]
+            + ["--partial=helpers.js"],
+            capture_output=True,
+            text=True,
+        )
+        assert result.returncode == 0, result.stdout
+        assert "Rebuilding: second" in result.stdout
+        assert "Rebuilding: first" not in result.stdout
+        assert in_sync("second") and not in_sync("first")
@@ -0,0 +1,113 @@
+"""Tests for the profiling rebuild transform."""
+
+import json
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from extract_literals import extract_literals_from_json, rebuild_json_from_literals
+from profiling import COLLECTOR_MARKER, instrument_page
+
+FUNCTIONS = """<script>
+function loadTerms() {
+  $.ajax({url: '/BannerExtensibility/internalPb/virtualDomains.efg_terms'});
+}
+</script>"""
+
+TEST_PAGE = {
+    "constantName": "profile_test",
+    "modelView": {
+        "components": [
+            {
+                "type": "literal",
+                "name": "style",
+                "value": '<script src="https://cdn.example.com/lib.js"></script>',
+            },
+            {"type": "literal", "name": "header", "value": "<h1>Title</h1>"},
+            {"type": "literal", "name": "functions", "value": FUNCTIONS},
+            {
+                "type": "literal",
+                "name": "js",
+                "value": "<script>loadTerms();</script><script>var x = 1;</script>",
+            },
+        ]
+    },
+}
+
+
+class TestInstrumentPage:
+    """Static checks on the instrumented page output."""
+
+    def instrumented(self) -> dict:
+        data = json.loads(json.dumps(TEST_PAGE))
+        instrument_page(data)
+        return data
+
+    def test_inline_scripts_get_named_marks(self):
+        """Each inline script is bracketed with marks named after page and path."""
+        components = self.instrumented()["modelView"]["components"]
+        functions = components[2]["value"]
+
+        assert 'performance.mark("pb:profile_test:2:functions:start")' in functions
+        assert (
+            'performance.measure("pb:profile_test:2:functions", '
+            '"pb:profile_test:2:functions:start", "pb:profile_test:2:functions:end")'
+            in functions
+        )
+        # Several scripts in one literal are numbered
+        assert "pb:profile_test:3:js#0:start" in components[3]["value"]
+        assert "pb:profile_test:3:js#1:start" in components[3]["value"]
+
+    def test_external_scripts_and_html_untouched(self):
+        """Script tags with src and plain HTML literals are not instrumented."""
+        components = self.instrumented()["modelView"]["components"]
+        assert (
+            components[0]["value"] == TEST_PAGE["modelView"]["components"][0]["value"]
+        )
+        assert components[1]["value"] == "<h1>Title</h1>"
+
+    def test_ajax_calls_routed_through_collector(self):
+        """$.ajax calls are rewritten to the collector with their page label."""
+        functions = self.instrumented()["modelView"]["components"][2]["value"]
+        assert "$.ajax(" not in functions
+        assert '__pbProfile.ajax("pb:profile_test:2:functions", {url:' in functions
+
+    def test_collector_injected_once_before_first_script(self):
+        """The collector runs before any instrumented page code."""
+        components = self.instrumented()["modelView"]["components"]
+        all_values = "".join(c["value"] for c in components)
+
+        assert all_values.count(COLLECTOR_MARKER) == 1
+        functions = components[2]["value"]
+        assert functions.index(COLLECTOR_MARKER) < functions.index("performance.mark(")
+
+
+class TestProfileRebuild:
+    """Test the profiling build through rebuild_json_from_literals."""
+
+    def test_profile_build_leaves_sources_untouched(self):
+        """The build output is instrumented; extracted files and source JSON are not."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            json_file = Path(temp_dir) / "pages.profile_test.json"
+            with open(json_file, "w") as f:
+                json.dump(TEST_PAGE, f)
+            original_json = json_file.read_text()
+
+            output_dir = Path(temp_dir) / "extracted"
+            extract_literals_from_json(str(json_file), str(output_dir))
+            page_dir = output_dir / "profile_test"
+            extracted_before = {p.name: p.read_text() for p in page_dir.iterdir()}
+
+            build_dir = Path(temp_dir) / "build"
+            built = rebuild_json_from_literals(
+                str(page_dir), [instrument_page], str(build_dir)
+            )
+
+            assert Path(built) == build_dir / "pages.profile_test.json"
+            assert COLLECTOR_MARKER in Path(built).read_text()
+            assert json_file.read_text() == original_json
+            assert {
+                p.name: p.read_text() for p in page_dir.iterdir()
+            } == extracted_before
@@ -0,0 +1,285 @@
+"""Tests for the injected virtual-domain request cache."""
+
+import json
+import shutil
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from request_cache import (
+    SHIM_MARKER,
+    build_shim,
+    load_config,
+    make_request_cache_transform,
+)
+
+# Minimal stand-ins for jQuery.Deferred and jQuery.ajax, plus a fake clock.
+# Each scenario prints how many requests reached the fake ajax.
+NODE_HARNESS = """
+const api = require(process.argv[2]);
+
+function Deferred() {
+  let state = "pending", args = [];
+  const callbacks = { resolved: [], rejected: [] };
+  const settle = (s) => function () {
+    if (state !== "pending") return this;
+    state = s; args = Array.from(arguments);
+    callbacks[s].forEach((f) => f.apply(null, args));
+    return this;
+  };
+  const on = (s) => function (f) {
+    if (state === s) f.apply(null, args); else if (state === "pending") callbacks[s].push(f);
+    return promise;
+  };
+  const promise = { done: on("resolved"), fail: on("rejected") };
+  promise.always = (f) => promise.done(f).fail(f);
+  return { resolve: settle("resolved"), reject: settle("rejected"), promise: () => promise };
+}
+
+function setup(config) {
+  const env = { calls: [], pending: [], time: 0, aborted: 0 };
+  const ajax = function (url, options) {
+    const settings = typeof url === "object" ? url : Object.assign({ url: url }, options);
+    env.calls.push(settings);
+    const d = Deferred();
+    env.pending.push(d);
+    const xhr = d.promise();
+    xhr.abort = () => { env.aborted++; d.reject(xhr, "abort", ""); };
+    // Like jQuery, call the settings' callbacks when the request settles
+    if (settings.success) xhr.done(settings.success);
+    if (settings.error) xhr.fail(settings.error);
+    if (settings.complete) xhr.done((d, s) => settings.complete(xhr, s)).fail((x, s) => settings.complete(x, s));
+    return xhr;
+  };
+  env.ajax = api.createCachedAjax(ajax, Deferred, config, () => env.time);
+  return env;
+}
+
+const VD = "/BannerExtensibility/internalPb/virtualDomains.";
+const config = {
+  default: { ttl: 60, max_entries: 2 },
+  domains: { efg_terms: { ttl: 600 }, spridenName: false },
+};
+const results = {};
+
+// Concurrent identical GETs share one request
+let env = setup(config);
+let received = [];
+env.ajax({ url: VD + "efg_terms", data: { max: 300, offset: "0" } }).done((d) => received.push(d));
+env.ajax({ url: VD + "efg_terms", data: { offset: "0", max: 300 } }).done((d) => received.push(d));
+env.pending[0].resolve(["202450"], "success", {});
+results.dedupe = { calls: env.calls.length, received: received.length };
+
+// Cached within TTL, refetched after expiry
+env.ajax({ url: VD + "efg_terms", data: { max: 300, offset: "0" } });
+results.cached_calls = env.calls.length;
+env.time = 601 * 1000;
+env.ajax({ url: VD + "efg_terms", data: { max: 300, offset: "0" } });
+results.expired_calls = env.calls.length;
+
+// Size cap evicts the least recently used entry
+env = setup(config);
+["1", "2", "3"].forEach((term, i) => {
+  env.ajax({ url: VD + "free_tuition_single", data: { term: term } });
+  env.pending[i].resolve([term], "success", {});
+});
+env.ajax({ url: VD + "free_tuition_single", data: { term: "3" } });
+results.recent_calls = env.calls.length;
+env.ajax({ url: VD + "free_tuition_single", data: { term: "1" } });
+results.evicted_calls = env.calls.length;
+
+// Writes pass through and invalidate the domain
+env = setup(config);
+env.ajax({ url: VD + "efg_terms" });
+env.pending[0].resolve([], "success", {});
+env.ajax({ url: VD + "efg_terms", method: "POST", data: { a: 1 } });
+env.ajax({ url: VD + "efg_terms" });
+results.write_calls = env.calls.length;
+results.write_passed = env.calls[1].url === VD + "efg_terms" && env.calls[1].method === "POST";
+
+// Disabled domains and non-domain URLs are never cached
+env = setup(config);
+env.ajax({ url: VD + "spridenName", data: { gid: "G0" } });
+env.ajax({ url: VD + "spridenName", data: { gid: "G0" } });
+env.ajax("/other/endpoint");
+env.ajax("/other/endpoint");
+results.uncached_calls = env.calls.length;
+
+// Failures are not cached; success callbacks fire for shared requests
+env = setup(config);
+let successes = 0;
+env.ajax({ url: VD + "efg_terms" });
+env.ajax({ url: VD + "efg_terms", success: () => successes++ });
+env.pending[0].reject({}, "error");
+env.ajax({ url: VD + "efg_terms" });
+env.ajax({ url: VD + "efg_terms", success: () => successes++ });
+env.pending[1].resolve([], "success", {});
+results.failure_calls = env.calls.length;
+results.successes = successes;
+
+// The first caller's callbacks run once, on its own copy of the data
+env = setup(config);
+let firstSuccesses = 0, firstCompletes = 0;
+env.ajax({
+  url: VD + "efg_terms",
+  success: (d) => { firstSuccesses++; d.rows.push(2); },
+  complete: () => firstCompletes++,
+});
+env.ajax({ url: VD + "efg_terms", success: (d) => { results.shared_rows = d.rows.length; } });
+env.pending[0].resolve({ rows: [1] }, "success", {});
+results.first_caller = { successes: firstSuccesses, completes: firstCompletes };
+
+// Callers get status fields and abort(), and their own copy of the data
+env = setup(config);
+const first = env.ajax({ url: VD + "efg_terms" });
+const second = env.ajax({ url: VD + "efg_terms" });
+let abortStatus = null;
+second.fail((xhr, status) => { abortStatus = status; });
+second.abort();
+results.abort_one = { aborted: env.aborted, status: abortStatus, readyState: second.readyState };
+let firstData = null;
+first.done((d) => { firstData = d; });
+env.pending[0].resolve({ rows: [1] }, "success", { status: 200, statusText: "OK" });
+results.first_status = [first.readyState, first.status, first.statusText];
+firstData.rows.push(2);
+let cachedData = null;
+const cachedResponse = env.ajax({ url: VD + "efg_terms" }).done((d) => { cachedData = d; });
+results.copied_rows = cachedData.rows.length;
+results.cached_status = cachedResponse.status;
+
+// Aborting every caller aborts the shared request
+const lone = env.ajax({ url: VD + "efg_terms", data: { x: 1 } });
+lone.abort();
+env.ajax({ url: VD + "efg_terms", data: { x: 1 } });
+results.abort_all = { aborted: env.aborted, calls: env.calls.length };
+
+console.log(JSON.stringify(results));
+"""
+
+
+class TestRequestCacheConfig:
+    """Test configuration loading."""
+
+    def test_defaults(self):
+        """Without a config file the defaults apply to every domain."""
+        config = load_config()
+        assert config["default"]["ttl"] > 0
+        assert config["domains"] == {}
+
+    def test_per_domain_overrides(self):
+        """Per-domain settings and disabled domains are read from the file."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            config_file = Path(temp_dir) / "request_cache.json"
+            config_file.write_text(
+                json.dumps(
+                    {
+                        "default": {"ttl": 30},
+                        "domains": {"efg_terms": {"ttl": 600}, "spridenName": False},
+                    }
+                )
+            )
+            config = load_config(str(config_file))
+
+        assert config["default"] == {"ttl": 30, "max_entries": 50}
+        assert config["domains"]["efg_terms"] == {"ttl": 600}
+        assert config["domains"]["spridenName"] is False
+
+    def test_invalid_config_rejected(self):
+        """Malformed settings raise ValueError."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            config_file = Path(temp_dir) / "request_cache.json"
+            config_file.write_text(json.dumps({"domains": {"x": {"max_entries": 0}}}))
+            with pytest.raises(ValueError):
+                load_config(str(config_file))
+
+
+class TestRequestCacheTransform:
+    """Test shim injection at rebuild time."""
+
+    def test_injected_only_into_pages_calling_virtual_domains(self):
+        """The shim goes in front of the first literal that calls a domain."""
+        page = {
+            "constantName": "cache_test",
+            "modelView": {
+                "components": [
+                    {"type": "literal", "name": "header", "value": "<h1>Hi</h1>"},
+                    {
+                        "type": "literal",
+                        "name": "functions",
+                        "value": "<script>$.ajax({url: "
+                        "'/BannerExtensibility/internalPb/virtualDomains.efg_terms'})"
+                        "</script>",
+                    },
+                ]
+            },
+        }
+        static_page = {
+            "constantName": "static_test",
+            "modelView": {
+                "components": [
+                    {"type": "literal", "name": "header", "value": "<h1>Hi</h1>"}
+                ]
+            },
+        }
+
+        transform = make_request_cache_transform(load_config())
+        transform(page)
+        transform(static_page)
+
+        components = page["modelView"]["components"]
+        assert SHIM_MARKER not in components[0]["value"]
+        assert components[1]["value"].startswith("<script>\n/* " + SHIM_MARKER)
+        assert SHIM_MARKER not in json.dumps(static_page)
+
+    def test_config_baked_into_shim(self):
+        """The rendered shim carries the configuration."""
+        config = load_config()
+        config["domains"]["efg_terms"] = {"ttl": 600}
+        assert '"efg_terms": {"ttl": 600}' in build_shim(config)
+
+
+@pytest.mark.skipif(shutil.which("node") is None, reason="node is not installed")
+class TestRequestCacheShim:
+    """Run the shim's cache logic under Node with a fake ajax and clock."""
+
+    def test_cache_behaviour(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            shim_file = Path(temp_dir) / "shim.js"
+            shim_file.write_text(build_shim(load_config()))
+            harness_file = Path(temp_dir) / "harness.js"
+            harness_file.write_text(NODE_HARNESS)
+
+            output = subprocess.run(
+                ["node", str(harness_file), str(shim_file)],
+                capture_output=True,
+                text=True,
+                check=True,
+            ).stdout
+        results = json.loads(output)
+
+        assert results["dedupe"] == {"calls": 1, "received": 2}
+        assert results["cached_calls"] == 1
+        assert results["expired_calls"] == 2
+        assert results["recent_calls"] == 3
+        assert results["evicted_calls"] == 4
+        assert results["write_calls"] == 3
+        assert results["write_passed"] is True
+        assert results["uncached_calls"] == 4
+        assert results["failure_calls"] == 2
+        assert results["successes"] == 1
+        assert results["first_caller"] == {"successes": 1, "completes": 1}
+        assert results["shared_rows"] == 1
+        assert results["abort_one"] == {
+            "aborted": 0,
+            "status": "abort",
+            "readyState": 4,
+        }
+        assert results["first_status"] == [4, 200, "OK"]
+        assert results["copied_rows"] == 1
+        assert results["cached_status"] == 200
+        assert results["abort_all"] == {"aborted": 1, "calls": 3}
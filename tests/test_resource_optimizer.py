@@ -0,0 +1,282 @@
+"""Tests for the resource-loading optimizer rebuild transform."""
+
+import json
+import sys
+from pathlib import Path
+from typing import Optional
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from extract_literals import extract_literals_from_json, rebuild_json_from_literals
+from resource_optimizer import (
+    HINTS_MARKER,
+    ResourceTag,
+    add_defer,
+    load_policy,
+    make_resource_optimizer_transform,
+    parse_attributes,
+    scan_page,
+)
+
+REPO_ROOT = Path(__file__).parent.parent
+
+JQUERY = "https://code.jquery.com/jquery-3.7.1.min.js"
+POPPER = "https://cdn.jsdelivr.net/npm/@popperjs/core@2.11.7/dist/umd/popper.min.js"
+BOOTSTRAP = "https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/js/bootstrap.min.js"
+BOOTSTRAP_CSS = (
+    "https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/css/bootstrap.min.css"
+)
+WIDGET = "https://widgets.example.com/widget.js"
+
+
+def script(url: str, extra: str = "") -> str:
+    return f'<script src="{url}"{extra}></script>'
+
+
+def page(*values: str, name: str = "resource_test") -> dict:
+    return {
+        "constantName": name,
+        "modelView": {
+            "components": [
+                {"type": "literal", "name": f"literal{i}", "value": value}
+                for i, value in enumerate(values)
+            ]
+        },
+    }
+
+
+def optimized(data: dict, policy: Optional[dict] = None) -> list:
+    make_resource_optimizer_transform(policy or load_policy())(data)
+    return [c.get("value") for c in data["modelView"]["components"]]
+
+
+def tags(data: dict) -> list:
+    return [(tag.url, tag.attributes) for tag in scan_page(data)[0]]
+
+
+def deferred(data: dict) -> list:
+    return [url for url, attributes in tags(data) if "defer" in attributes]
+
+
+class TestDefer:
+    """Test which external scripts are deferred."""
+
+    def test_known_libraries_deferred_in_order(self):
+        data = page(
+            f'<link href="{BOOTSTRAP_CSS}" rel="stylesheet">'
+            + script(POPPER)
+            + script(BOOTSTRAP),
+            "<script>$(function () { init(); });</script>",
+        )
+        optimized(data)
+        assert deferred(data) == [POPPER, BOOTSTRAP]
+        assert (
+            script(BOOTSTRAP, " defer") in data["modelView"]["components"][0]["value"]
+        )
+
+    def test_later_inline_use_keeps_script_blocking(self):
+        data = page(
+            script(JQUERY) + script(BOOTSTRAP),
+            "<script>$('#dialog').modal('show');</script>",
+        )
+        optimized(data)
+        assert deferred(data) == []
+
+        data = page(script(JQUERY) + script(POPPER), "<script>var jq = $;</script>")
+        optimized(data)
+        assert deferred(data) == [POPPER]
+
+    def test_handler_use_keeps_script_blocking(self):
+        data = page(script(POPPER) + script(BOOTSTRAP))
+        data["modelView"]["components"].append(
+            {
+                "type": "block",
+                "name": "main",
+                "components": [
+                    {
+                        "type": "button",
+                        "name": "open",
+                        "onClick": "new bootstrap.Modal('#dialog').show();",
+                    }
+                ],
+            }
+        )
+        optimized(data)
+        assert deferred(data) == []
+
+        # Page-level handlers run after loading too
+        data = page(script(JQUERY) + script(BOOTSTRAP))
+        data["modelView"]["onLoad"] = "$('#dialog').modal('show');"
+        optimized(data)
+        assert deferred(data) == []
+
+    def test_inline_use_before_script_is_fine(self):
+        data = page("<script>var b = bootstrap;</script>" + script(BOOTSTRAP))
+        optimized(data)
+        assert deferred(data) == [BOOTSTRAP]
+
+    def test_unknown_script_blocks_earlier_ones(self):
+        data = page(script(POPPER) + script(WIDGET))
+        optimized(data)
+        assert deferred(data) == []
+
+        policy = load_policy()
+        policy["pages"]["resource_test"] = {"globals": {"widgets.example": ["W"]}}
+        data = page(script(POPPER) + script(WIDGET))
+        optimized(data, policy)
+        assert deferred(data) == [POPPER, WIDGET]
+
+    def test_async_module_and_non_js_scripts_untouched(self):
+        data = page(
+            script(POPPER, " async")
+            + script(BOOTSTRAP, ' type="module"')
+            + script("https://cdn.example.com/lodash.tpl", ' type="text/template"')
+        )
+        values = optimized(data)
+        assert deferred(data) == []
+        assert " defer" not in values[0]
+
+    def test_keep_blocking_and_disabled_pages(self):
+        policy = load_policy()
+        policy["pages"]["resource_test"] = {"keep_blocking": ["bootstrap"]}
+        data = page(script(POPPER) + script(BOOTSTRAP))
+        optimized(data, policy)
+        assert deferred(data) == []
+
+        policy["pages"]["resource_test"] = False
+        data = page(script(POPPER) + script(POPPER))
+        assert optimized(data, policy) == [script(POPPER) + script(POPPER)]
+
+    def test_tags_in_comments_and_script_strings_ignored(self):
+        value = (
+            f"<!-- {script(POPPER)} -->"
+            f"<script>document.write('{script(JQUERY)}');</script>"
+        )
+        data = page(value)
+        assert tags(data) == []
+        assert optimized(data) == [value]
+
+    def test_add_defer_leaves_other_markup_unchanged(self):
+        value = f"<p>x</p>{script(POPPER)}"
+        tag = ResourceTag(0, {}, 0, 8, "script", POPPER, {"src": POPPER})
+        assert add_defer(value, tag) == "<p>x</p>"
+        tag = tag._replace(start=8, end=len(value))
+        assert add_defer(value, tag) == f'<script src="{POPPER}" defer></script>'
+
+
+class TestHintsAndDuplicates:
+    """Test connection hints and duplicate removal."""
+
+    def test_hints_per_origin(self):
+        data = page(
+            "<h1>Title</h1>",
+            f'<link rel="stylesheet" href="{BOOTSTRAP_CSS}" crossorigin="anonymous">'
+            + script(JQUERY)
+            + script(POPPER),
+        )
+        values = optimized(data)
+        assert values[0] == "<h1>Title</h1>"
+        assert values[1].startswith(
+            "\n".join(
+                [
+                    HINTS_MARKER,
+                    '<link rel="preconnect" href="https://cdn.jsdelivr.net">',
+                    '<link rel="preconnect" href="https://cdn.jsdelivr.net" '
+                    "crossorigin>",
+                    '<link rel="dns-prefetch" href="https://cdn.jsdelivr.net">',
+                    '<link rel="preconnect" href="https://code.jquery.com">',
+                    '<link rel="dns-prefetch" href="https://code.jquery.com">',
+                    "<link",
+                ]
+            )
+        )
+
+    def test_max_preconnect_and_existing_hints(self):
+        policy = load_policy()
+        policy["default"]["max_preconnect"] = 1
+        data = page(
+            '<link rel="preconnect" href="https://code.jquery.com">'
+            + script(JQUERY)
+            + script(POPPER)
+            + script(WIDGET)
+        )
+        value = optimized(data, policy)[0]
+        assert value.count('rel="preconnect"') == 2
+        assert '<link rel="dns-prefetch" href="https://code.jquery.com">' not in value
+        assert '<link rel="dns-prefetch" href="https://widgets.example.com">' in value
+
+    def test_duplicates_removed(self):
+        data = page(
+            f'<link href="{BOOTSTRAP_CSS}" rel="stylesheet">' + script(POPPER),
+            f'<p>Hi</p><link rel="stylesheet" href="{BOOTSTRAP_CSS}" />'
+            + script(POPPER),
+        )
+        values = optimized(data)
+        assert values[1] == "<p>Hi</p>"
+        assert [url for url, _ in tags(data)].count(POPPER) == 1
+
+    def test_transform_is_idempotent(self):
+        data = page(script(POPPER), "<link rel='stylesheet' href='/local.css'>")
+        once = optimized(data)
+        assert optimized(data) == once
+
+
+class TestPolicy:
+    """Test loading and validating the policy file."""
+
+    def test_overrides_merge_with_defaults(self, tmp_path):
+        policy_file = tmp_path / "policy.json"
+        policy_file.write_text(
+            json.dumps({"default": {"dedupe": False}, "pages": {"a": False}})
+        )
+        policy = load_policy(str(policy_file))
+        assert policy["default"]["dedupe"] is False
+        assert policy["default"]["defer"] is True
+        assert policy["pages"] == {"a": False}
+
+    @pytest.mark.parametrize(
+        "user_policy",
+        [
+            {"default": {"defer": "yes"}},
+            {"default": {"max_preconnect": -1}},
+            {"pages": {"a": {"keep_blocking": "jquery"}}},
+            {"pages": {"a": {"globals": {"widget": "W"}}}},
+            {"pages": ["a"]},
+        ],
+    )
+    def test_invalid_policy_rejected(self, tmp_path, user_policy):
+        policy_file = tmp_path / "policy.json"
+        policy_file.write_text(json.dumps(user_policy))
+        with pytest.raises(ValueError):
+            load_policy(str(policy_file))
+
+    def test_parse_attributes(self):
+        assert parse_attributes(
+            " src=\"a.js?x=1&amp;y=2\" defer data-x='q' TYPE=module"
+        ) == {"src": "a.js?x=1&y=2", "defer": None, "data-x": "q", "type": "module"}
+
+
+class TestRepoPages:
+    """Test the optimizer against the repo's pages through a rebuild."""
+
+    def test_rebuild_repo_pages(self, tmp_path):
+        transform = make_resource_optimizer_transform(load_policy())
+        results = {}
+        for name in ("efgByStu", "name-coach"):
+            json_file = REPO_ROOT / "pages" / f"pages.{name}.json"
+            original = json_file.read_text()
+            extract_literals_from_json(str(json_file), str(tmp_path / "extracted"))
+            built = rebuild_json_from_literals(
+                str(tmp_path / "extracted" / name), [transform], str(tmp_path / "b")
+            )
+            assert json_file.read_text() == original
+            with open(built, encoding="utf-8") as f:
+                results[name] = json.load(f)
+
+        # bootstrap.min.js is commented out, so nothing on the page needs Popper
+        assert deferred(results["efgByStu"]) == [POPPER]
+        # The widget's globals are unknown and it needs jQuery
+        assert deferred(results["name-coach"]) == []
+        assert HINTS_MARKER in json.dumps(results["name-coach"])
@@ -0,0 +1,172 @@
+"""Tests for the literal/SQL search index."""
+
+import json
+import random
+import re
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from search_index import (
+    candidate_query,
+    open_index,
+    required_literals,
+    search_index,
+    update_index,
+)
+
+PAGE = {
+    "constantName": "term_page",
+    "modelView": {
+        "components": [
+            {
+                "type": "block",
+                "name": "main",
+                "components": [
+                    {
+                        "type": "literal",
+                        "name": "styles",
+                        "value": '<link href="https://cdn.example.com/'
+                        'bootstrap@5.3.0-alpha3/dist/css/bootstrap.min.css">',
+                    },
+                    {
+                        "type": "literal",
+                        "name": "functions",
+                        "value": "<script>\nvar term = row.EFG_TERM;\n"
+                        "var code = row.EFG_TERM_CODE;\n</script>",
+                    },
+                ],
+            }
+        ]
+    },
+}
+
+DOMAIN = {
+    "serviceName": "terms",
+    "codeGet": "select efg_term\nfrom efg_terms\nwhere efg_term = :term",
+    "codePost": "",
+}
+
+
+@pytest.fixture
+def repo(definitions_repo):
+    return definitions_repo(PAGE, DOMAIN)
+
+
+@pytest.fixture
+def conn(repo):
+    conn = open_index(str(repo / ".pagebuilder_cache" / "search.db"))
+    update_index(conn, [str(path.relative_to(repo)) for path in repo.rglob("*.json")])
+    yield conn
+    conn.close()
+
+
+def locations(results):
+    return [(r["file"], r["location"], r["line"]) for r in results]
+
+
+class TestSearch:
+    """Test queries against the index."""
+
+    def test_substring(self, conn):
+        assert locations(search_index(conn, "EFG_TERM")) == [
+            ("pages/pages.term_page.json", "0.components.1", 2),
+            ("pages/pages.term_page.json", "0.components.1", 3),
+        ]
+        (result,) = search_index(conn, "5.3.0-alpha3")
+        assert result["name"] == "term_page"
+        assert result["label"] == "styles"
+
+    def test_ignore_case_and_words(self, conn):
+        assert len(search_index(conn, "EFG_TERM", ignore_case=True)) == 5
+        assert locations(search_index(conn, "efg_term", word=True)) == [
+            ("virtualDomains/virtualDomains.terms.json", "codeGet", 1),
+            ("virtualDomains/virtualDomains.terms.json", "codeGet", 3),
+        ]
+        assert len(search_index(conn, "EFG_TERM", word=True, ignore_case=True)) == 3
+
+    def test_regex(self, conn):
+        results = search_index(conn, r"bootstrap@5\.\d+\.\d+", regex=True)
+        assert locations(results) == [
+            ("pages/pages.term_page.json", "0.components.0", 1)
+        ]
+        assert len(search_index(conn, r"EFG_TERM(_CODE)?;", regex=True)) == 2
+        assert len(search_index(conn, r"from|where", regex=True)) == 2
+        escaped = r"row\x2eEFG\N{LOW LINE}TERM\u005fCODE"
+        assert len(search_index(conn, escaped, regex=True)) == 1
+
+    def test_limit_and_no_match(self, conn):
+        assert len(search_index(conn, "var", limit=1)) == 1
+        assert search_index(conn, "not in any literal") == []
+
+
+class TestUpdates:
+    """Test that the index follows changed and removed files."""
+
+    def test_changed_file_reindexed(self, repo, conn):
+        changed = json.loads(json.dumps(PAGE))
+        changed["modelView"]["components"][0]["components"][1]["value"] = "NEW_TOKEN"
+        (repo / "pages" / "pages.term_page.json").write_text(json.dumps(changed))
+        update_index(
+            conn, [str(path.relative_to(repo)) for path in repo.rglob("*.json")]
+        )
+
+        assert search_index(conn, "EFG_TERM") == []
+        assert len(search_index(conn, "NEW_TOKEN")) == 1
+        assert len(search_index(conn, "select")) == 1
+
+    def test_removed_files_leave_no_postings(self, repo, conn):
+        update_index(conn, [])
+        for table in ("files", "docs", "trigrams", "tokens"):
+            assert conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone() == (0,)
+
+
+class TestPrefilter:
+    """The index prefilter must never drop a real match."""
+
+    @pytest.mark.parametrize(
+        "pattern, literals",
+        [
+            ("abc", ["abc"]),
+            (r"ab?c", ["a", "c"]),
+            (r"abc+d", ["abc", "d"]),
+            (r"bootstrap@5\.3\.\d", ["bootstrap@5.3."]),
+            (r"x[\]]yz", ["x", "yz"]),
+            (r"x{2}yz", ["yz"]),
+            (r"(?i)select (\w+) from", ["select ", " from"]),
+            (r"caf\u00e9 \x41b\U0001F600c\N{LOW LINE}d", ["caf", " ", "b", "c", "d"]),
+            (r"(ab)c\1de\0f\101g", ["c", "de", "f", "g"]),
+            (r"a|b", []),
+            (r"(?x) a b c", []),
+        ],
+    )
+    def test_required_literals(self, pattern, literals):
+        assert required_literals(pattern) == literals
+
+    def test_matches_brute_force(self, conn):
+        texts = [
+            row[0] for row in conn.execute("SELECT text FROM docs ORDER BY path, id")
+        ]
+        rng = random.Random(0)
+        for _ in range(200):
+            text = rng.choice(texts)
+            start = rng.randrange(len(text))
+            query = text[start : start + rng.randint(1, 12)]
+            for ignore_case in (False, True):
+                flags = re.IGNORECASE if ignore_case else 0
+                expected = sum(
+                    1
+                    for t in texts
+                    for line in t.split("\n")
+                    if re.search(re.escape(query), line, flags)
+                )
+                if "\n" not in query:
+                    results = search_index(conn, query, ignore_case=ignore_case)
+                    assert len(results) == expected, query
+
+    def test_long_queries_use_capped_trigrams(self):
+        _, parameters = candidate_query("x" * 10 + "abcdefghijklmnopqrstuvwxyz" * 3)
+        assert 0 < len(parameters) <= 32
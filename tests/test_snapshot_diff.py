@@ -0,0 +1,172 @@
+"""Tests for Merkle-hashed snapshot diffing."""
+
+import copy
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from snapshot_diff import diff_snapshots, hash_file, hash_page
+
+PAGE = {
+    "constantName": "diff_test",
+    "extendsPage": None,
+    "modelView": {
+        "name": "diffTest",
+        "components": [
+            {"type": "literal", "name": "style", "value": "<link rel='x'>"},
+            {
+                "type": "block",
+                "name": "main_block",
+                "components": [
+                    {"type": "literal", "name": "main", "value": "<div>Hi</div>"},
+                    {
+                        "type": "literal",
+                        "name": "functions",
+                        "value": "<script></script>",
+                    },
+                ],
+            },
+        ],
+    },
+}
+
+DOMAIN = {"serviceName": "diffDomain", "codeGet": "select 1 from dual"}
+
+
+def write_snapshot(directory: Path, page: dict, domain: dict) -> None:
+    """Write one page and one virtual domain into an export directory."""
+    (directory / "pages").mkdir(parents=True)
+    (directory / "virtualDomains").mkdir(parents=True)
+    with open(directory / "pages" / "pages.diff_test.json", "w") as f:
+        json.dump(page, f, indent=3)
+    with open(
+        directory / "virtualDomains" / "virtualDomains.diffDomain.json", "w"
+    ) as f:
+        json.dump(domain, f, indent=3)
+
+
+class TestMerkleHashing:
+    """Test the per-component Merkle hashes."""
+
+    def test_hash_uses_component_paths(self):
+        """Nodes should be keyed by the _extraction_map.json component path scheme."""
+        nodes = hash_page(PAGE)
+        assert set(nodes) == {"", "0", "1", "1.components.0", "1.components.1"}
+        assert nodes["1"]["children"] == ["1.components.0", "1.components.1"]
+
+    def test_hash_ignores_formatting_and_key_order(self):
+        """Hashes are computed on canonical JSON, not on the file text."""
+        reordered = json.loads(json.dumps(PAGE, sort_keys=True))
+        assert hash_page(reordered)[""]["hash"] == hash_page(PAGE)[""]["hash"]
+
+    def test_child_change_propagates_to_ancestors_only(self):
+        """Changing a leaf changes its ancestors' hashes but not its siblings'."""
+        changed = copy.deepcopy(PAGE)
+        changed["modelView"]["components"][1]["components"][1]["value"] = (
+            "<script>x</script>"
+        )
+
+        before = hash_page(PAGE)
+        after = hash_page(changed)
+        for path in ["", "1", "1.components.1"]:
+            assert before[path]["hash"] != after[path]["hash"]
+        for path in ["0", "1.components.0"]:
+            assert before[path]["hash"] == after[path]["hash"]
+
+
+class TestSnapshotDiff:
+    """Test comparing two export directories."""
+
+    def test_identical_snapshots(self):
+        """Identical exports should produce no differences."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            old_dir = Path(temp_dir) / "old"
+            new_dir = Path(temp_dir) / "new"
+            write_snapshot(old_dir, PAGE, DOMAIN)
+            write_snapshot(new_dir, PAGE, DOMAIN)
+
+            cache_file = str(Path(temp_dir) / "cache.json")
+            assert diff_snapshots(str(old_dir), str(new_dir), cache_file) == []
+
+    def test_reports_changed_component_and_domain(self):
+        """Only the modified component and the modified domain should be reported."""
+        changed_page = copy.deepcopy(PAGE)
+        changed_page["modelView"]["components"][1]["components"][0]["value"] = (
+            "<div>Bye</div>"
+        )
+        changed_domain = dict(DOMAIN, codeGet="select 2 from dual")
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            old_dir = Path(temp_dir) / "old"
+            new_dir = Path(temp_dir) / "new"
+            write_snapshot(old_dir, PAGE, DOMAIN)
+            write_snapshot(new_dir, changed_page, changed_domain)
+
+            results = diff_snapshots(str(old_dir), str(new_dir), None)
+            by_key = {(r["kind"], r["key"]): r for r in results}
+
+            assert by_key[("page", "diff_test")]["changes"] == [
+                {
+                    "status": "modified",
+                    "path": "1.components.0",
+                    "name": "main",
+                    "fields": ["value"],
+                }
+            ]
+            assert by_key[("domain", "diffDomain")]["status"] == "modified"
+
+    def test_reports_added_and_removed_components(self):
+        """Components that only exist on one side are reported as added/removed."""
+        changed_page = copy.deepcopy(PAGE)
+        changed_page["modelView"]["components"].append(
+            {"type": "literal", "name": "footer", "value": "<p>Footer</p>"}
+        )
+        del changed_page["modelView"]["components"][1]["components"][1]
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            old_dir = Path(temp_dir) / "old"
+            new_dir = Path(temp_dir) / "new"
+            write_snapshot(old_dir, PAGE, DOMAIN)
+            write_snapshot(new_dir, changed_page, DOMAIN)
+
+            (result,) = diff_snapshots(str(old_dir), str(new_dir), None)
+            statuses = {(c["status"], c["path"]) for c in result["changes"]}
+            assert ("added", "2") in statuses
+            assert ("removed", "1.components.1") in statuses
+
+    def test_cache_reused_for_unchanged_files(self):
+        """An unchanged file should be served from the cache without re-parsing."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            snapshot_dir = Path(temp_dir) / "snap"
+            write_snapshot(snapshot_dir, PAGE, DOMAIN)
+            page_file = str(snapshot_dir / "pages" / "pages.diff_test.json")
+
+            cache: dict = {}
+            entry = hash_file(page_file, cache)
+            assert entry["kind"] == "page"
+
+            # Poison the cached tree: a cache hit must return it untouched
+            cache[os.path.abspath(page_file)]["entry"] = {
+                "kind": "page",
+                "key": "cached",
+            }
+            assert hash_file(page_file, cache)["key"] == "cached"
+
+    def test_duplicate_page_names_reported(self):
+        """Two files defining the same page must not hide one another."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            snapshot_dir = Path(temp_dir) / "snap"
+            write_snapshot(snapshot_dir, PAGE, DOMAIN)
+            with open(snapshot_dir / "pages" / "pages.copy.json", "w") as f:
+                json.dump(PAGE, f, indent=3)
+
+            with pytest.raises(
+                ValueError, match="Duplicate page constantName diff_test"
+            ):
+                diff_snapshots(str(snapshot_dir), str(snapshot_dir), None)
@@ -0,0 +1,170 @@
+"""Tests for SQL fingerprinting of virtual domains."""
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sql_fingerprint import (
+    collect_domains,
+    find_similar_domains,
+    normalize_sql,
+    page_callers,
+    structural_fingerprint,
+)
+
+REPO_ROOT = Path(__file__).parent.parent
+
+SPRIDEN = """select
+s.spriden_id GID, s.spriden_pidm as "pidm", -- ids
+s.spriden_first_name first, s.spriden_last_name last
+from spriden s
+where s.spriden_change_ind is null and s.spriden_id = :gid
+  and s.spriden_ntyp_code in ('A', 'B')"""
+
+SPRIDEN_RENAMED = """SELECT /* same query */ x.SPRIDEN_ID id,
+       x.SPRIDEN_PIDM, x.SPRIDEN_FIRST_NAME, x.SPRIDEN_LAST_NAME AS surname
+  FROM SPRIDEN x
+ WHERE x.SPRIDEN_CHANGE_IND IS NULL AND x.SPRIDEN_ID = :id\r
+   AND x.SPRIDEN_NTYP_CODE IN ('C')"""
+
+TERMS = """select t.stvterm_code code, t.stvterm_desc description
+from stvterm t where t.stvterm_code >= :term order by t.stvterm_code desc"""
+
+
+def write_domain(path: Path, name: str, **fields) -> str:
+    domain_file = path / f"virtualDomains.{name}.json"
+    domain_file.write_text(json.dumps({"serviceName": name, **fields}))
+    return str(domain_file)
+
+
+class TestNormalize:
+    """Test SQL normalization."""
+
+    def test_aliases_literals_comments_and_case(self):
+        assert normalize_sql(SPRIDEN) == normalize_sql(SPRIDEN_RENAMED)
+        assert " ".join(normalize_sql(TERMS)) == (
+            "select stvterm . stvterm_code , stvterm . stvterm_desc from stvterm "
+            "where stvterm . stvterm_code >= :? order by stvterm . stvterm_code desc"
+        )
+
+    @pytest.mark.parametrize(
+        "sql, expected",
+        [
+            (
+                "select case when a = 1 then 'x' end as flag, b c from t",
+                "select case when a = ? then ? end , b from t",
+            ),
+            (
+                "select count(*) n from (select 1 from dual) sub where sub.a = 1",
+                "select count ( * ) from ( select ? from dual ) where a = ?",
+            ),
+            (
+                "select a.x from saturn.spriden a join spbpers b on b.p = a.p",
+                "select spriden . x from saturn . spriden join spbpers "
+                "on spbpers . p = spriden . p",
+            ),
+            (
+                "update notes n set n.text = :t where n.id = :id",
+                "update notes set notes . text = :? where notes . id = :?",
+            ),
+            (
+                "begin\r\n  delete from notes where id = :id;\r\nend;",
+                "begin delete from notes where id = :? ; end ;",
+            ),
+            ("select 'it''s' from dual", "select ? from dual"),
+        ],
+    )
+    def test_statements(self, sql, expected):
+        assert " ".join(normalize_sql(sql)) == expected
+
+    def test_real_domain_keeps_structure(self):
+        with open(
+            REPO_ROOT / "virtualDomains" / "virtualDomains.spridenName.json",
+            encoding="utf-8",
+        ) as f:
+            sql = json.load(f)["codeGet"]
+        tokens = normalize_sql(sql)
+        assert "p_pidm" not in tokens and "gid" not in tokens
+        assert "spbpers_pref_first_name" in tokens
+        assert tokens.count(":?") == 1
+
+
+class TestGroups:
+    """Test grouping identical and near-identical domains."""
+
+    def test_identical_and_near_identical(self, tmp_path):
+        files = [
+            write_domain(tmp_path, "names", codeGet=SPRIDEN),
+            write_domain(tmp_path, "names_copy", codeGet=SPRIDEN_RENAMED),
+            write_domain(
+                tmp_path,
+                "names_plus",
+                codeGet=SPRIDEN + " and s.spriden_entity_ind = 'P'",
+            ),
+            write_domain(tmp_path, "terms", codeGet=TERMS),
+            write_domain(tmp_path, "empty", codeGet=None, codePost="  "),
+        ]
+        domains = collect_domains(files)
+        assert [d["service_name"] for d in domains] == [
+            "names",
+            "names_copy",
+            "names_plus",
+            "terms",
+        ]
+        assert domains[0]["fingerprint"] == domains[1]["fingerprint"]
+
+        (group,) = find_similar_domains(domains, threshold=0.7)
+        assert [m["service_name"] for m in group["members"]] == [
+            "names",
+            "names_copy",
+            "names_plus",
+        ]
+        assert not group["identical"]
+        low, high = group["similarity"]
+        assert 0.7 <= low < 1.0 == high
+
+        groups = find_similar_domains(domains, threshold=0.99)
+        assert [len(g["members"]) for g in groups] == [2]
+        assert groups[0]["identical"]
+
+    def test_all_sql_fields_count(self, tmp_path):
+        files = [
+            write_domain(tmp_path, "a", codeGet=TERMS, codeDelete="delete from x"),
+            write_domain(tmp_path, "b", codeGet=TERMS),
+        ]
+        first, second = collect_domains(files)
+        assert first["fingerprint"] != second["fingerprint"]
+        assert structural_fingerprint(["a"]) != structural_fingerprint(["b"])
+
+
+class TestCallers:
+    """Test finding the pages that call each domain."""
+
+    def test_ajax_and_resources(self, tmp_path):
+        page = {
+            "constantName": "lookup",
+            "modelView": {
+                "components": [
+                    {
+                        "type": "literal",
+                        "name": "js",
+                        "value": "<script>$.get('virtualDomains.names', {});</script>",
+                    },
+                    {
+                        "type": "resource",
+                        "name": "terms",
+                        "resource": "virtualDomains.terms",
+                    },
+                ]
+            },
+        }
+        page_file = tmp_path / "pages.lookup.json"
+        page_file.write_text(json.dumps(page))
+        assert page_callers([str(page_file)]) == {
+            "names": {"lookup"},
+            "terms": {"lookup"},
+        }
@@ -0,0 +1,374 @@
+"""Tests for the storage backends and in-memory round trips."""
+
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import extract_literals
+from extract_literals import (
+    check_sync_status,
+    extract_literals_from_json,
+    find_extracted_dirs,
+    find_page_files,
+    rebuild_json_from_literals,
+)
+from extract_virtual_domains import (
+    extract_sql_from_json,
+    find_domain_files,
+    rebuild_json_from_sql,
+)
+from storage import (
+    DEFAULT_JOBS,
+    MAX_JOBS,
+    DiskStorage,
+    MemoryStorage,
+    ReadOnlyStorage,
+    Storage,
+    parse_jobs,
+)
+
+
+def synthetic_page(index: int) -> dict:
+    return {
+        "constantName": f"page_{index}",
+        "extendsPage": None,
+        "modelView": {
+            "components": [
+                {
+                    "type": "literal",
+                    "name": "header",
+                    "value": f"<h1>Page {index}</h1>",
+                },
+                {
+                    "type": "block",
+                    "name": "main",
+                    "components": [
+                        {
+                            "type": "literal",
+                            "name": "functions",
+                            "value": f"<script>var page = {index};</script>",
+                        },
+                        {"type": "literal", "name": "empty", "value": "  "},
+                    ],
+                },
+            ]
+        },
+    }
+
+
+class TestStorageInterface:
+    """Test that backends must implement the whole interface."""
+
+    def test_incomplete_backend_cannot_be_created(self):
+        class NoRemove(Storage):
+            def read_text(self, path):
+                return ""
+
+            def write_text(self, path, content):
+                pass
+
+            def exists(self, path):
+                return False
+
+            def is_dir(self, path):
+                return False
+
+            def mkdir(self, path):
+                pass
+
+            def iterdir(self, path):
+                return []
+
+            def glob(self, pattern):
+                return []
+
+        with pytest.raises(TypeError, match="remove"):
+            NoRemove()
+
+    def test_defaults_built_on_abstract_methods(self):
+        storage = MemoryStorage()
+        storage.append_text("log.txt", "a")
+        storage.append_text("log.txt", "b")
+        assert storage.read_text("log.txt") == "ab"
+        assert isinstance(storage, Storage)
+
+
+class TestMemoryStorage:
+    """Test the in-memory filesystem."""
+
+    def test_read_write_and_listing(self):
+        storage = MemoryStorage({"pages/a.json": "{}"})
+        storage.mkdir("out/nested")
+        storage.write_text("out/nested/b.txt", "b")
+
+        assert storage.read_text("./pages/a.json") == "{}"
+        assert storage.is_dir("out") and not storage.is_dir("out/nested/b.txt")
+        assert storage.iterdir("out") == ["out/nested"]
+        assert storage.iterdir(".") == ["out", "pages"]
+
+    def test_missing_paths_raise_like_disk(self):
+        storage = MemoryStorage()
+        with pytest.raises(FileNotFoundError):
+            storage.read_text("missing.json")
+        with pytest.raises(FileNotFoundError):
+            storage.write_text("no_dir/file.json", "{}")
+
+    def test_glob(self):
+        storage = MemoryStorage(
+            {
+                "top.json": "",
+                "pages/pages.a.json": "",
+                "pages/sub/pages.b.json": "",
+                "pages/notes.txt": "",
+            }
+        )
+        assert storage.glob("**/*.json") == [
+            "pages/pages.a.json",
+            "pages/sub/pages.b.json",
+            "top.json",
+        ]
+        assert storage.glob("pages/*.json") == ["pages/pages.a.json"]
+        assert storage.glob("pages/pages.[ab].json") == ["pages/pages.a.json"]
+
+
+class TestReadOnlyStorage:
+    """Test the dry-run wrapper."""
+
+    def test_writes_are_planned_not_applied(self):
+        base = MemoryStorage({"pages/a.json": "old"})
+        storage = ReadOnlyStorage(base)
+        storage.write_text("pages/a.json", "new")
+        storage.mkdir("out")
+        storage.write_text("out/b.json", "b")
+
+        assert base.read_text("pages/a.json") == "old"
+        assert not base.exists("out")
+        assert storage.read_text("pages/a.json") == "new"
+        assert storage.iterdir(".") == ["out", "pages"]
+        assert storage.describe_planned_writes() == [
+            "pages/a.json (changed, 3 bytes)",
+            "out/b.json (new, 1 bytes)",
+        ]
+
+    def test_removals_are_planned_not_applied(self):
+        base = MemoryStorage({"pages/a.json": "a", "pages/b.json": "b"})
+        storage = ReadOnlyStorage(base)
+        storage.remove("pages/a.json")
+        storage.remove("pages/missing.json")
+
+        assert base.read_text("pages/a.json") == "a"
+        assert not storage.exists("pages/a.json")
+        assert storage.iterdir("pages") == ["pages/b.json"]
+        assert storage.describe_planned_writes() == ["pages/a.json (removed)"]
+        storage.write_text("pages/a.json", "again")
+        assert storage.read_text("pages/a.json") == "again"
+
+    def test_dry_run_leaves_disk_untouched(self, tmp_path, monkeypatch, capsys):
+        pages_dir = tmp_path / "pages"
+        pages_dir.mkdir()
+        (pages_dir / "pages.dry.json").write_text(json.dumps(synthetic_page(0)))
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setattr(
+            sys, "argv", ["extract_literals.py", "extract", "--dry-run"]
+        )
+
+        extract_literals.main()
+
+        assert sorted(p.name for p in tmp_path.iterdir()) == ["pages"]
+        output = capsys.readouterr().out
+        assert "Dry run: 3 file(s) would be written" in output
+        assert "extracted_literals/page_0/_extraction_map.json (new" in output
+
+
+class TestInMemoryRoundTrip:
+    """Round trips over many synthetic pages without touching disk."""
+
+    def test_thousands_of_pages(self):
+        page_count = 2000
+        storage = MemoryStorage(
+            {
+                f"pages/pages.page_{i}.json": json.dumps(synthetic_page(i))
+                for i in range(page_count)
+            }
+        )
+
+        json_files = find_page_files("pages/*.json", storage)
+        assert len(json_files) == page_count
+        for json_file in json_files:
+            extract_literals_from_json(json_file, "extracted_literals", storage)
+
+        page_dirs = find_extracted_dirs("extracted_literals", storage)
+        assert len(page_dirs) == page_count
+        assert storage.iterdir("extracted_literals/page_7") == [
+            "extracted_literals/page_7/_extraction_map.json",
+            "extracted_literals/page_7/functions.js",
+            "extracted_literals/page_7/header.html",
+        ]
+
+        storage.write_text("extracted_literals/page_7/header.html", "<h1>Edited</h1>")
+        assert not check_sync_status("extracted_literals/page_7", storage)
+        for page_dir in page_dirs:
+            rebuild_json_from_literals(page_dir, storage=storage)
+        assert all(check_sync_status(page_dir, storage) for page_dir in page_dirs)
+
+        rebuilt = json.loads(storage.read_text("pages/pages.page_7.json"))
+        assert rebuilt["modelView"]["components"][0]["value"] == "<h1>Edited</h1>"
+        unchanged = json.loads(storage.read_text("pages/pages.page_8.json"))
+        assert unchanged == synthetic_page(8)
+
+    def test_virtual_domain_round_trip(self):
+        domain = {
+            "serviceName": "lookup",
+            "codeGet": "select 1\r\nfrom dual",
+            "codePost": "",
+        }
+        storage = MemoryStorage(
+            {"virtualDomains/virtualDomains.lookup.json": json.dumps(domain)}
+        )
+
+        (json_file,) = find_domain_files("virtualDomains/*.json", storage)
+        extract_sql_from_json(json_file, "extracted_virtual_domains", storage)
+        storage.write_text(
+            "extracted_virtual_domains/lookup/codeget.sql", "select 2 from dual"
+        )
+        rebuild_json_from_sql("extracted_virtual_domains/lookup", storage)
+
+        rebuilt = json.loads(storage.read_text(json_file))
+        assert rebuilt["codeGet"] == "select 2 from dual"
+        assert rebuilt["codePost"] == ""
+
+
+class TestParseJobs:
+    """Test validating --jobs."""
+
+    def test_default_and_cap(self):
+        assert parse_jobs(None) == DEFAULT_JOBS
+        assert parse_jobs("2") == 2
+        assert parse_jobs("64") == MAX_JOBS
+
+    @pytest.mark.parametrize("value", ["0", "-3", "abc", "true", "1.5"])
+    def test_invalid_values_rejected(self, value):
+        with pytest.raises(ValueError, match="--jobs must be a positive whole number"):
+            parse_jobs(value)
+
+
+class TestDiskStorage:
+    """The disk backend behaves like the in-memory one."""
+
+    def test_matches_memory_listing(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            storage = DiskStorage()
+            storage.mkdir(Path(temp_dir) / "a" / "b")
+            storage.write_text(Path(temp_dir) / "a" / "c.json", "{}")
+
+            assert storage.iterdir(Path(temp_dir) / "a") == [
+                str(Path(temp_dir) / "a" / "b"),
+                str(Path(temp_dir) / "a" / "c.json"),
+            ]
+            assert storage.glob(f"{temp_dir}/**/*.json") == [
+                str(Path(temp_dir) / "a" / "c.json")
+            ]
+
+
+class TestDiskStorageSafety:
+    """Atomic writes, fsync policies and page locks."""
+
+    def test_failed_write_leaves_original_intact(self, tmp_path, monkeypatch):
+        target = tmp_path / "pages.safe.json"
+        target.write_text('{"old": true}')
+        target.chmod(0o640)
+        storage = DiskStorage()
+
+        def crash(src, dst):
+            raise OSError("disk full")
+
+        with monkeypatch.context() as patch:
+            patch.setattr("storage.os.replace", crash)
+            with pytest.raises(OSError):
+                storage.write_text(target, '{"new": ')
+
+        assert target.read_text() == '{"old": true}'
+        storage.write_text(target, '{"new": true}')
+        assert target.read_text() == '{"new": true}'
+        assert target.stat().st_mode & 0o777 == 0o640
+        assert [p.name for p in tmp_path.iterdir()] == ["pages.safe.json"]
+
+    def test_new_file_mode_leaves_umask_alone(self, tmp_path):
+        previous = os.umask(0o077)
+        try:
+            DiskStorage().write_text(tmp_path / "new.json", "{}")
+            assert os.umask(0o077) == 0o077
+        finally:
+            os.umask(previous)
+        assert (tmp_path / "new.json").stat().st_mode & 0o777 == 0o644
+
+    @pytest.mark.parametrize(
+        "policy, during_run, after_flush",
+        [("always", 4, 4), ("end", 0, 3), ("never", 0, 0)],
+    )
+    def test_fsync_policies(
+        self, tmp_path, monkeypatch, policy, during_run, after_flush
+    ):
+        calls = []
+        monkeypatch.setattr("storage.os.fsync", calls.append)
+        storage = DiskStorage(fsync=policy)
+
+        storage.write_text(tmp_path / "a.json", "a")
+        storage.write_text(tmp_path / "b.json", "b")
+        assert len(calls) == during_run
+        storage.flush()
+        assert len(calls) == after_flush
+
+    def test_unknown_fsync_policy(self):
+        with pytest.raises(ValueError):
+            DiskStorage(fsync="sometimes")
+
+    def test_lock_excludes_other_holders(self, tmp_path):
+        storage = DiskStorage()
+        page = tmp_path / "pages.locked.json"
+        events = []
+        holding = threading.Event()
+
+        def second_holder():
+            holding.wait()
+            with storage.lock(page):
+                events.append("second")
+
+        thread = threading.Thread(target=second_holder)
+        thread.start()
+        with storage.lock(page):
+            holding.set()
+            time.sleep(0.1)
+            events.append("first")
+        thread.join()
+
+        assert events == ["first", "second"]
+
+    def test_concurrent_rebuilds_never_corrupt_source(self, tmp_path, capsys):
+        storage = DiskStorage(fsync="never")
+        json_file = tmp_path / "pages.page_0.json"
+        json_file.write_text(json.dumps(synthetic_page(0)))
+        extract_literals_from_json(str(json_file), str(tmp_path / "out"), storage)
+        page_dir = str(tmp_path / "out" / "page_0")
+
+        threads = [
+            threading.Thread(
+                target=rebuild_json_from_literals, args=(page_dir, None, None, storage)
+            )
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert json.loads(json_file.read_text()) == synthetic_page(0)
+        assert check_sync_status(page_dir, storage)
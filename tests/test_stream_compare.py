@@ -0,0 +1,107 @@
+"""Tests for streaming file comparison."""
+
+import hashlib
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import stream_compare
+from storage import DiskStorage, MemoryStorage
+from stream_compare import (
+    chunks_equal,
+    compare_file_to_text,
+    iter_chunks,
+    normalize_newlines,
+)
+
+
+def normalized(text: str) -> str:
+    return text.replace("\r\n", "\n").replace("\r", "\n")
+
+
+class TestChunkHelpers:
+    """Test the chunk-level building blocks."""
+
+    def test_newlines_split_across_chunks(self):
+        chunks = [b"a\r", b"\nb\r", b"c\r\r", b"\n", b"\r"]
+        assert b"".join(normalize_newlines(chunks)) == b"a\nb\nc\n\n\n"
+
+    def test_chunk_boundaries_do_not_matter(self):
+        assert chunks_equal([b"abc", b"def"], [b"a", b"bcde", b"f"])
+        assert not chunks_equal([b"abc", b"def"], [b"abc", b"de"])
+        assert not chunks_equal([b"abc"], [b"abc", b"d"])
+        assert chunks_equal([], [b""])
+
+    def test_stops_at_first_difference(self):
+        def chunks():
+            yield b"same"
+            yield b"different"
+            raise AssertionError("read past the first difference")
+
+        assert not chunks_equal(chunks(), [b"same", b"other!!!!", b"more"])
+
+    def test_large_files_are_memory_mapped(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(stream_compare, "MMAP_THRESHOLD", 10)
+        mapped = []
+        real_mmap = stream_compare.mmap.mmap
+        monkeypatch.setattr(
+            stream_compare.mmap,
+            "mmap",
+            lambda *args, **kwargs: mapped.append(args) or real_mmap(*args, **kwargs),
+        )
+        path = tmp_path / "big.sql"
+        path.write_bytes(b"x" * 25)
+
+        with open(path, "rb") as f:
+            assert list(iter_chunks(f, 10)) == [b"x" * 10, b"x" * 10, b"x" * 5]
+        assert len(mapped) == 1
+
+
+class TestCompareFileToText:
+    """Test comparing extracted files with JSON content."""
+
+    @pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 1 << 20])
+    @pytest.mark.parametrize(
+        "file_content, text, normalize_text",
+        [
+            ("select 1\nfrom dual", "select 1\nfrom dual", False),
+            ("select 1\r\nfrom dual\r", "select 1\nfrom dual\n", False),
+            ("select 1\nfrom dual", "select 1\r\nfrom dual", True),
+            ("select 1\nfrom dual", "select 1\r\nfrom dual", False),
+            ("<div>é</div>", "<div>é</div>", False),
+            ("<div>é</div>", "<div>e</div>", False),
+            ("", "x", False),
+        ],
+    )
+    def test_matches_whole_file_comparison(
+        self, tmp_path, chunk_size, file_content, text, normalize_text
+    ):
+        path = tmp_path / "extracted.sql"
+        path.write_bytes(file_content.encode("utf-8"))
+
+        expected_file = normalized(file_content)
+        expected_text = normalized(text) if normalize_text else text
+        result = compare_file_to_text(
+            DiskStorage(), path, text, normalize_text, chunk_size
+        )
+
+        if expected_file == expected_text:
+            assert result is None
+        else:
+            assert result == (
+                hashlib.md5(expected_file.encode()).hexdigest(),
+                hashlib.md5(expected_text.encode()).hexdigest(),
+            )
+
+    def test_memory_storage(self):
+        storage = MemoryStorage({"out/page/functions.js": "<script>a()</script>"})
+        assert (
+            compare_file_to_text(
+                storage, "out/page/functions.js", "<script>a()</script>"
+            )
+            is None
+        )
+        assert compare_file_to_text(storage, "out/page/functions.js", "b") is not None